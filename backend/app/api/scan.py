@@ -1,10 +1,30 @@
 """
 Stock Scanner API endpoints
 """
-from fastapi import APIRouter, HTTPException
-from app.schemas.scan import ScanRequest, ScanResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+from app.database import get_db
+from app.schemas.scan import (
+    ScanCriteria,
+    ScanDailyRollupResponse,
+    ScanJobStatus,
+    ScanRequest,
+    ScanResponse,
+    ScanRunDetail,
+    ScanRunPage,
+    ScanRunResultsPage,
+)
+from app.services.jobs import JOB_COMPLETED, JOB_FAILED, ScanJob, scan_job_manager
+from app.services.scan_rollups import ScanRollupService
+from app.services.scan_runs import ScanRunService
 from app.services.scanner import StockScanner
+from app.services.scan_store import scan_dataset_store
+import json
 import logging
+import uuid
 
 router = APIRouter(prefix="/api", tags=["Scanner"])
 logger = logging.getLogger(__name__)
@@ -43,8 +63,12 @@ async def scan_stocks(request: ScanRequest):
     ```
     """
     try:
+        # ID datasetu - pozwala pozniej re-filtrowac wyniki bez API calls
+        scan_id = uuid.uuid4().hex
+
         # Wywolaj StockScanner service z WSZYSTKIMI parametrami
-        results = StockScanner.scan_stocks(
+        # (wersja async - blokujacy I/O w watkach, event loop obsluguje inne requesty)
+        results = await StockScanner.scan_stocks_async(
             symbols=request.symbols,
             min_volume=request.min_volume or 1_000_000,
             min_price_change_percent=request.min_price_change_percent,
@@ -55,14 +79,22 @@ async def scan_stocks(request: ScanRequest):
             min_roce=request.min_roce,
             max_debt_equity=request.max_debt_equity,
             min_revenue_growth=request.min_revenue_growth,
-            max_forward_pe=request.max_forward_pe
+            max_forward_pe=request.max_forward_pe,
+            max_workers=request.max_workers,
+            lazy=request.lazy,
+            only_matches=request.only_matches,
+            dataset_id=scan_id,
+            return_horizons=request.return_horizons,
+            indicator_thresholds=request.indicator_thresholds()
         )
 
         # Policz matches (akcje spelniajace kryteria)
         matches = sum(1 for r in results if r.meets_criteria)
 
         return ScanResponse(
-            total_scanned=len(results),
+            scan_id=scan_id,
+            # Liczone z requestu (nie z results) - to samo z i bez only_matches
+            total_scanned=len(set(request.symbols)),
             matches=matches,
             results=results
         )
@@ -82,3 +114,337 @@ async def scan_stocks(request: ScanRequest):
             status_code=500,
             detail=f"Nie udalo sie przetworzyc skanowania: {str(e)}"
         )
+
+
+@router.post("/scan/{scan_id}/refilter", response_model=ScanResponse)
+async def refilter_scan(scan_id: str, criteria: ScanCriteria):
+    """
+    Re-filtruje dataset wczesniejszego scanu nowymi progami - BEZ API calls.
+
+    Uzywane przez UI przy zmianie suwakow (min_roe, max_forward_pe, ...).
+    Dataset zyje SCAN_DATASET_TTL sekund od scanu.
+
+    UWAGA: Dla scanu z lazy=true symbole odrzucone wczesnie nie maja fundamentals,
+    wiec luzniejsze progi nie zrobia z nich matches. Wskazniki techniczne (RSI, SMA, ...)
+    sa w datasecie tylko gdy scan mial kryterium techniczne.
+
+    **Przyklad request:**
+    ```json
+    {
+        "min_roe": 20.0,
+        "max_forward_pe": 12.0,
+        "only_matches": true
+    }
+    ```
+    """
+    dataset = scan_dataset_store.get(scan_id)
+    if dataset is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Scan dataset not found (wygasl lub nie istnieje) - uruchom scan ponownie"
+        )
+
+    results = StockScanner.filter_rows(
+        dataset.rows,
+        criteria.thresholds(),
+        only_matches=criteria.only_matches,
+        frame=dataset.frame
+    )
+
+    return ScanResponse(
+        scan_id=scan_id,
+        # Jak w POST /api/scan - unikalne symbole z requestu scanu, nie wiersze datasetu
+        total_scanned=dataset.total_symbols,
+        matches=sum(1 for r in results if r.meets_criteria),
+        results=results
+    )
+
+
+@router.post("/scan/stream")
+async def scan_stocks_stream(request: ScanRequest, format: Literal["ndjson", "sse"] = "ndjson"):
+    """
+    Streamingowy scan - kazdy StockResult wysylany zaraz po przetworzeniu symbolu.
+
+    Dla setek symboli (rate limiter 60 calls/min) zwykly /api/scan odpowiada po minutach
+    i klienci HTTP dostaja timeout. Tu pierwszy wynik przychodzi po ~1s.
+    Wyniki przychodza w kolejnosci ukonczenia (nie w kolejnosci symbols).
+
+    **Formaty (query param `format`):**
+    - `ndjson` (domyslnie, `application/x-ndjson`) - 1 rekord JSON na linie
+    - `sse` (`text/event-stream`) - Server-Sent Events (`event: result|summary|error`)
+
+    **Przyklad (ndjson):**
+    ```
+    {"type": "result", "symbol": "AAPL", "price": 175.5, ..., "meets_criteria": true}
+    {"type": "result", "symbol": "MSFT", "price": 410.2, ..., "meets_criteria": false}
+    {"type": "summary", "scan_id": "9b1d...", "run_id": 42, "total_scanned": 2, "matches": 1}
+    ```
+
+    `run_id` w podsumowaniu = GET /api/scan/runs/{run_id} (null gdy zapis runu sie nie udal).
+    """
+    scan_id = uuid.uuid4().hex
+
+    async def records() -> AsyncIterator[str]:
+        matches = 0
+        run_id: Optional[int] = None
+
+        def run_started(started_run_id: Optional[int]) -> None:
+            nonlocal run_id
+            run_id = started_run_id
+
+        try:
+            async for result in StockScanner.scan_stocks_stream(
+                symbols=request.symbols,
+                min_volume=request.min_volume or 1_000_000,
+                min_price_change_percent=request.min_price_change_percent,
+                min_market_cap=request.min_market_cap,
+                max_market_cap=request.max_market_cap,
+                min_roe=request.min_roe,
+                min_roce=request.min_roce,
+                max_debt_equity=request.max_debt_equity,
+                min_revenue_growth=request.min_revenue_growth,
+                max_forward_pe=request.max_forward_pe,
+                max_workers=request.max_workers,
+                lazy=request.lazy,
+                only_matches=request.only_matches,
+                return_horizons=request.return_horizons,
+                indicator_thresholds=request.indicator_thresholds(),
+                scan_id=scan_id,
+                run_started=run_started
+            ):
+                matches += int(result.meets_criteria)
+                yield _encode_record(format, "result", result.model_dump())
+
+        except Exception as e:
+            # Naglowki HTTP 200 juz wyslane - blad jako ostatni rekord streamu
+            logger.error(f"Nieoczekiwany blad podczas streamingu skanowania: {e}", exc_info=True)
+            yield _encode_record(format, "error", {
+                "detail": f"Nie udalo sie przetworzyc skanowania: {str(e)}"
+            })
+            return
+
+        # Liczone z requestu (nie ze streamowanych wynikow) - to samo z i bez only_matches
+        yield _encode_record(format, "summary", {
+            "scan_id": scan_id,
+            "run_id": run_id,
+            "total_scanned": len(set(request.symbols)),
+            "matches": matches
+        })
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+    return StreamingResponse(records(), media_type=media_type)
+
+
+def _encode_record(format: str, record_type: str, payload: Dict[str, Any]) -> str:
+    """
+    Koduje jeden rekord streamu jako linie NDJSON lub event SSE.
+
+    Args:
+        format: "ndjson" lub "sse"
+        record_type: "result", "summary" lub "error"
+        payload: Dane rekordu
+
+    Returns:
+        String gotowy do wyslania klientowi
+    """
+    if format == "sse":
+        return f"event: {record_type}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({"type": record_type, **payload}) + "\n"
+
+
+@router.post("/scan/jobs", response_model=ScanJobStatus, status_code=202)
+async def submit_scan_job(request: ScanRequest):
+    """
+    Uruchamia scan w tle i zwraca od razu job_id (HTTP 202).
+
+    Dla duzych universe (setki symboli) - request HTTP nie czeka minut na rate limiter.
+    Postep: GET /api/scan/jobs/{job_id}, wyniki: GET /api/scan/jobs/{job_id}/results.
+
+    **Przyklad response:**
+    ```json
+    {
+        "job_id": "9b1deb4d3b7d4bad9bdd2b0d7b3dcb6d",
+        "status": "queued",
+        "total_symbols": 500,
+        "symbols_done": 0,
+        "api_calls": 0,
+        "progress_percent": 0.0,
+        "eta_seconds": 1000.0
+    }
+    ```
+    """
+    job = scan_job_manager.submit(
+        symbols=request.symbols,
+        min_volume=request.min_volume or 1_000_000,
+        min_price_change_percent=request.min_price_change_percent,
+        min_market_cap=request.min_market_cap,
+        max_market_cap=request.max_market_cap,
+        min_roe=request.min_roe,
+        min_roce=request.min_roce,
+        max_debt_equity=request.max_debt_equity,
+        min_revenue_growth=request.min_revenue_growth,
+        max_forward_pe=request.max_forward_pe,
+        max_workers=request.max_workers,
+        lazy=request.lazy,
+        only_matches=request.only_matches,
+        return_horizons=request.return_horizons,
+        indicator_thresholds=request.indicator_thresholds()
+    )
+    return _job_status(job)
+
+
+@router.get("/scan/jobs/{job_id}", response_model=ScanJobStatus)
+async def get_scan_job(job_id: str):
+    """
+    Status background scanu: symbole done/total, API calls, ETA.
+    """
+    return _job_status(_get_job_or_404(job_id))
+
+
+@router.get("/scan/jobs/{job_id}/results", response_model=ScanResponse)
+async def get_scan_job_results(job_id: str):
+    """
+    Wyniki zakonczonego background scanu.
+
+    - 409 jesli job jeszcze trwa (queued / running)
+    - 500 jesli scan sie nie powiodl
+
+    scan_id w odpowiedzi = job_id (re-filter: POST /api/scan/{job_id}/refilter).
+    """
+    job = _get_job_or_404(job_id)
+
+    if job.status == JOB_FAILED:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Nie udalo sie przetworzyc skanowania: {job.error}"
+        )
+
+    if job.status != JOB_COMPLETED:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job nie jest zakonczony (status: {job.status}, "
+                   f"{job.symbols_done}/{job.total_symbols} symboli)"
+        )
+
+    results = job.results or []
+    return ScanResponse(
+        scan_id=job.job_id,
+        total_scanned=job.total_symbols,
+        matches=sum(1 for r in results if r.meets_criteria),
+        results=results
+    )
+
+
+@router.get("/scan/runs", response_model=ScanRunPage)
+async def list_scan_runs(
+    limit: int = Query(50, ge=1, le=500, description="Ile runow na strone"),
+    before_id: Optional[int] = Query(None, description="Kursor: next_before_id z poprzedniej strony"),
+    scan_id: Optional[str] = Query(None, description="Tylko run o tym scan_id / job_id"),
+    db: Session = Depends(get_db)
+):
+    """
+    Historia scanow od najnowszego (pierwszy element = ostatni scan).
+
+    Stronicowanie kursorem: kolejna strona = `?before_id={next_before_id}`.
+
+    **Przyklad response:**
+    ```json
+    {
+        "runs": [
+            {"id": 42, "scan_id": "9b1d...", "source": "job", "status": "completed",
+             "total_symbols": 500, "total_scanned": 480, "matches": 12, "api_calls": 730}
+        ],
+        "next_before_id": 42
+    }
+    ```
+    """
+    runs = ScanRunService.list_runs(db, limit=limit, before_id=before_id, scan_id=scan_id)
+    return ScanRunPage(
+        runs=runs,
+        next_before_id=runs[-1].id if len(runs) == limit else None
+    )
+
+
+@router.get("/scan/runs/{run_id}", response_model=ScanRunDetail)
+async def get_scan_run(run_id: int, db: Session = Depends(get_db)):
+    """
+    Run scanu z parametrami requestu (symbole, progi kryteriow).
+    """
+    run = ScanRunService.get_run(db, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Scan run not found")
+    return run
+
+
+@router.get("/scan/runs/{run_id}/results", response_model=ScanRunResultsPage)
+async def get_scan_run_results(
+    run_id: int,
+    limit: int = Query(100, ge=1, le=1000, description="Ile wynikow na strone"),
+    after_id: Optional[int] = Query(None, description="Kursor: next_after_id z poprzedniej strony"),
+    only_matches: bool = Query(False, description="Tylko akcje spelniajace kryteria"),
+    db: Session = Depends(get_db)
+):
+    """
+    Zapisane wyniki runu scanu, strona po `limit` (id rosnaco).
+
+    Stronicowanie kursorem: kolejna strona = `?after_id={next_after_id}`.
+    """
+    if ScanRunService.get_run(db, run_id) is None:
+        raise HTTPException(status_code=404, detail="Scan run not found")
+
+    results = ScanRunService.list_results(
+        db, run_id, limit=limit, after_id=after_id, only_matches=only_matches
+    )
+    return ScanRunResultsPage(
+        run_id=run_id,
+        results=results,
+        next_after_id=results[-1].id if len(results) == limit else None
+    )
+
+
+@router.get("/scan/symbols/{symbol}/daily", response_model=List[ScanDailyRollupResponse])
+async def get_symbol_daily_history(
+    symbol: str,
+    start: Optional[date] = Query(None, description="Od dnia (wlacznie)"),
+    end: Optional[date] = Query(None, description="Do dnia (wlacznie)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Dzienna historia symbolu w scanach (rollupy) - do wykresow dlugoterminowych.
+
+    Jeden punkt na dzien: wartosci z ostatniego scanu dnia + ile scanow / matches.
+    Dostepne takze dla dni, ktorych wyniki usunela juz retencja scan_results.
+    """
+    return ScanRollupService.history(db, symbol.upper(), start=start, end=end)
+
+
+def _get_job_or_404(job_id: str) -> ScanJob:
+    """
+    Pobiera job lub rzuca HTTP 404.
+    """
+    job = scan_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Scan job not found (usuniety lub nie istnieje)"
+        )
+    return job
+
+
+def _job_status(job: ScanJob) -> ScanJobStatus:
+    """
+    Zamienia ScanJob na response schema.
+    """
+    return ScanJobStatus(
+        job_id=job.job_id,
+        status=job.status,
+        total_symbols=job.total_symbols,
+        symbols_done=job.symbols_done,
+        api_calls=job.api_calls,
+        progress_percent=job.progress_percent,
+        eta_seconds=job.eta_seconds(),
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        error=job.error
+    )
@@ -10,24 +10,346 @@ Każdy scan robi 2 API calls per symbol:
 
 Z cache: 5 symboli = 0 API calls (po pierwszym scan)
 Bez cache: 5 symboli = 10 API calls
+
+FORMAT: Wartości w Redis = msgpack + zlib (app.cache_codecs), nie JSON.
+
+L1 CACHE: Przed Redis stoi ograniczony cache w pamięci procesu (LRU + TTL).
+Gorące symbole = 0 round tripów do Redis i 0 deserializacji (mikrosekundy).
+Wpis L1 nigdy nie żyje dłużej niż wpis w Redis (TTL z PTTL przy odczycie).
+
+SINGLEFLIGHT: Równoległe cache MISS dla tego samego klucza (np. dwa scany
+z get_fundamentals("AAPL")) = JEDEN upstream call:
+- w procesie: pozostałe wątki czekają na wynik pierwszego
+- między procesami: krótki lock w Redis (SET NX), pozostałe procesy
+  czekają aż wynik pojawi się w cache
+
+NEGATIVE CACHE: Symbol bez danych (delisted, literówka, brak fundamentals) nie
+jest pytany przy każdym scanie - funkcja zwraca KNOWN_EMPTY, decorator zapisuje
+EMPTY_MARKER z krótszym TTL (negative_ttl) i zwraca None. Błędy sieci / API
+(None) NIE są cache'owane - to nie jest "wiadomo że pusto".
+
+STALE-WHILE-REVALIDATE: @cache(max_stale=N) zapisuje wartość w kopercie
+z czasem zapisu i trzyma ją w Redis ttl + N sekund. Po upływie ttl wartość
+jest zwracana od razu (oznaczona STALE_KEY = wiek w sekundach), a odświeżenie
+idzie w tle (kilka wątków, upstream przez ten sam rate limiter). Starsza niż
+ttl + N = zwykły MISS (synchroniczny upstream call). Scan po wygaśnięciu TTL
+nie czeka już na API dla każdego symbolu. Funkcja zwracająca wartość pobraną
+wcześniej (snapshot z bazy) opakowuje ją w FetchedAt - wiek liczony od pobrania.
+
+TTL: int albo callable zwracający TTL przy każdym zapisie (app.cache_policy -
+TTL quote zależny od sesji giełdy). TTL z chwili zapisu trafia do koperty SWR.
 """
 import redis
-import json
+import fnmatch
 import functools
 import logging
-from typing import Callable, Any, Optional, Dict
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Any, Optional, Dict, List, Tuple, Union
 from app.config import settings
+from app.cache_codecs import CacheSerializer
 
 # Logger dla cache operations
 logger = logging.getLogger(__name__)
 
+# Singleflight: max czas trzymania locka w Redis (upstream call + czekanie na rate limiter)
+SINGLEFLIGHT_LOCK_TTL = 30
+# Singleflight: co ile sekund proces czekający sprawdza cache / lock
+SINGLEFLIGHT_POLL_INTERVAL = 0.05
+
+# Zwolnienie locka tylko przez właściciela (lock mógł wygasnąć i należeć do innego procesu)
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Wartość w cache oznaczająca "upstream odpowiedział, ale danych brak"
+# (odróżnialna od MISS = None; przeżywa serializację msgpack/json)
+EMPTY_MARKER = {"__empty__": True}
+
+
+class _KnownEmpty:
+    """Typ sentinela KNOWN_EMPTY"""
+
+    def __repr__(self) -> str:
+        return "KNOWN_EMPTY"
+
+
+# Zwracany przez funkcje z @cache gdy upstream potwierdził brak danych
+KNOWN_EMPTY = _KnownEmpty()
+
+
+def is_empty_marker(value: Any) -> bool:
+    """True jeśli wartość z cache to EMPTY_MARKER (negative cache hit)"""
+    return value == EMPTY_MARKER
+
+
+class FetchedAt:
+    """
+    Wynik funkcji z @cache pobrany z upstream wcześniej (np. snapshot z bazy).
+
+    Decorator zapisuje go z czasem pobrania (koperta SWR ze stored_at = fetched_at,
+    TTL w Redis pomniejszony o wiek) zamiast czasu zapisu - wartość sprzed 23h
+    z ttl 24h jest nieświeża po 1h, a nie po kolejnych 24h.
+    """
+
+    __slots__ = ("value", "fetched_at", "ttl")
+
+    def __init__(self, value: Any, fetched_at: float, ttl: int):
+        """
+        Args:
+            value: Wynik funkcji
+            fetched_at: Epoch pobrania z upstream
+            ttl: Po ilu sekundach od fetched_at wartość jest nieświeża
+        """
+        self.value = value
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+
+
+# Koperta stale-while-revalidate: {SWR_STORED_AT: epoch zapisu, SWR_VALUE: wartość}
+SWR_STORED_AT = "__swr_at__"
+SWR_VALUE = "v"
+SWR_TTL = "ttl"
+# Klucz w zwróconym dict: wiek nieświeżej wartości w sekundach (brak = świeża)
+STALE_KEY = "__stale__"
+
+
+# TTL dla @cache: sekundy albo funkcja liczona przy każdym zapisie (app.cache_policy)
+TTLSpec = Union[int, Callable[[], int]]
+
+
+def resolve_ttl(ttl: TTLSpec) -> int:
+    """TTL w sekundach dla zapisu teraz"""
+    return ttl() if callable(ttl) else ttl
+
+
+def stale_age(value: Any) -> Optional[float]:
+    """
+    Wiek wartości zwróconej przez @cache(max_stale=...) w trybie stale.
+
+    Returns:
+        Sekundy od zapisu lub None jeśli wartość świeża / nie-dict
+    """
+    if isinstance(value, dict):
+        return value.get(STALE_KEY)
+    return None
+
+
+class LocalCache:
+    """
+    Cache L1 w pamięci procesu: LRU z limitem liczby wpisów + TTL per wpis.
+
+    Thread-safe (scanner odpytuje cache z wielu wątków).
+    UWAGA: Zwraca TEN SAM obiekt co zapisany - wywołujący nie mogą go modyfikować.
+    """
+
+    def __init__(self, max_items: int, max_ttl: int):
+        """
+        Args:
+            max_items: Max liczba wpisów (najdawniej używane usuwane), 0 = L1 wyłączony
+            max_ttl: Max czas życia wpisu w sekundach
+        """
+        self.max_items = max_items
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Zwraca wartość lub None (brak / wygasła).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Zapisuje wartość na min(ttl, max_ttl) sekund.
+        """
+        ttl = min(ttl, self.max_ttl)
+        if self.max_items <= 0 or ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Usuwa wpis (jeśli istnieje)"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear_pattern(self, pattern: str) -> int:
+        """
+        Usuwa wpisy pasujące do wzorca glob (jak Redis KEYS, np. "finnhub:*").
+        """
+        with self._lock:
+            keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Usuwa wszystkie wpisy"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisHealth:
+    """
+    Maszyna stanów połączenia z Redis (circuit breaker) - zamiast PING przed każdą operacją.
+
+    Stany:
+    - closed: Redis działa, operacje idą do Redis (1 round trip, bez PING)
+    - open: po FAILURE_THRESHOLD kolejnych błędach połączenia - operacje pomijają
+      Redis (cache L1 / fallback), wątek w tle próbuje połączyć się ponownie
+      z exponential backoff (RECONNECT_MIN_DELAY ... RECONNECT_MAX_DELAY)
+    - half_open: trwa próba ponownego połączenia (PING)
+
+    Stan i liczniki przejść: snapshot() (GET /health, get_cache_stats()).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    FAILURE_THRESHOLD = 3       # kolejne błędy połączenia -> open
+    RECONNECT_MIN_DELAY = 1.0   # sekundy
+    RECONNECT_MAX_DELAY = 30.0  # sekundy
+
+    def __init__(self, probe: Callable[[], None], state: str = CLOSED):
+        """
+        Args:
+            probe: Próba połączenia (np. PING) - rzuca wyjątek gdy Redis niedostępny
+            state: Stan początkowy
+        """
+        self._probe = probe
+        self.state = state
+        self.consecutive_failures = 0
+        self.transitions: Dict[str, int] = {}
+        self.reconnect_attempts = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._reconnecting = False
+
+        if state == self.OPEN:
+            self._start_reconnect()
+
+    def allow(self) -> bool:
+        """True jeśli operacje mogą iść do Redis"""
+        return self.state == self.CLOSED
+
+    def record_success(self) -> None:
+        """Operacja Redis się udała - zeruje licznik błędów"""
+        if self.consecutive_failures:
+            with self._lock:
+                self.consecutive_failures = 0
+
+    def record_failure(self, error: Exception) -> None:
+        """
+        Błąd połączenia z Redis - po FAILURE_THRESHOLD kolejnych otwiera circuit.
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            if self.state != self.CLOSED or self.consecutive_failures < self.FAILURE_THRESHOLD:
+                return
+            self._transition(self.OPEN)
+
+        logger.warning(f"⚠ Redis circuit OPEN po {self.FAILURE_THRESHOLD} błędach: {error}. Cache wyłączony.")
+        self._start_reconnect()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Stan do monitoringu.
+
+        Returns:
+            Dict: state, consecutive_failures, transitions ("closed->open": n, ...),
+            reconnect_attempts, last_error
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "transitions": dict(self.transitions),
+                "reconnect_attempts": self.reconnect_attempts,
+                "last_error": self.last_error,
+            }
+
+    def _transition(self, state: str) -> None:
+        """Zmienia stan i liczy przejście (wywoływane pod lockiem)"""
+        name = f"{self.state}->{state}"
+        self.transitions[name] = self.transitions.get(name, 0) + 1
+        self.state = state
+
+    def _start_reconnect(self) -> None:
+        """Uruchamia (jeden) wątek ponownego łączenia"""
+        with self._lock:
+            if self._reconnecting:
+                return
+            self._reconnecting = True
+
+        threading.Thread(target=self._reconnect_loop, name="redis-reconnect", daemon=True).start()
+
+    def _reconnect_loop(self) -> None:
+        """
+        Próby połączenia z exponential backoff aż do skutku (-> closed).
+        """
+        delay = self.RECONNECT_MIN_DELAY
+        while True:
+            time.sleep(delay)
+
+            with self._lock:
+                self.reconnect_attempts += 1
+                self._transition(self.HALF_OPEN)
+
+            try:
+                self._probe()
+            except Exception as e:
+                with self._lock:
+                    self.last_error = str(e)
+                    self._transition(self.OPEN)
+                delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+                logger.debug(f"Redis reconnect nieudany ({e}), kolejna próba za {delay:.0f}s")
+                continue
+
+            with self._lock:
+                self.consecutive_failures = 0
+                self._transition(self.CLOSED)
+                self._reconnecting = False
+            logger.info(f"✓ Redis ponownie połączony: {settings.REDIS_URL}. Cache włączony.")
+            return
+
 
 class RedisCache:
     """
-    Wrapper dla Redis client z connection pooling.
+    Wrapper dla Redis client z connection pooling + cache L1 w pamięci procesu.
 
     Connection pool optymalizuje wydajność - używa jednego połączenia Redis
     zamiast tworzyć nowe przy każdym request.
+
+    Dostępność Redis śledzi RedisHealth (na podstawie wyników operacji),
+    więc każda operacja cache = 1 round trip (bez PING).
     """
 
     def __init__(self):
@@ -35,46 +357,81 @@ class RedisCache:
         Inicjalizuje Redis client z connection pool.
 
         Parametry:
-        - decode_responses=True: Automatycznie konwertuj bytes -> str
+        - decode_responses=False: Wartości jako bytes (binarny kodek, app.cache_codecs)
         - socket_connect_timeout=2: Max 2s na połączenie
         - socket_timeout=2: Max 2s na operacje read/write
+
+        Redis niedostępny przy starcie = circuit open, wątek w tle łączy
+        się ponownie (cache włącza się sam po starcie Redis).
         """
+        # Format wartości w Redis (msgpack + zlib, stare wpisy JSON nadal czytelne)
+        self.serializer = CacheSerializer(
+            codec=settings.CACHE_CODEC,
+            compress_min_bytes=settings.CACHE_COMPRESS_MIN_BYTES
+        )
+
+        # L1 działa także bez Redis (pojedynczy proces dev)
+        self.local = LocalCache(
+            max_items=settings.CACHE_L1_MAX_ITEMS,
+            max_ttl=settings.CACHE_L1_MAX_TTL
+        )
+
+        self.client = None
         try:
-            self.client = redis.Redis.from_url(
-                settings.REDIS_URL,
-                decode_responses=True,
-                socket_connect_timeout=2,
-                socket_timeout=2
-            )
-            # Test połączenia
-            self.client.ping()
+            self._connect()
             logger.info(f"✓ Redis połączony: {settings.REDIS_URL}")
+            state = RedisHealth.CLOSED
         except redis.ConnectionError as e:
             logger.warning(f"⚠ Redis niedostępny: {e}. Cache wyłączony.")
             self.client = None
+            state = RedisHealth.OPEN
         except Exception as e:
             logger.error(f"❌ Redis error: {e}. Cache wyłączony.")
             self.client = None
+            state = RedisHealth.OPEN
+
+        self.health = RedisHealth(probe=self._connect, state=state)
+
+    def _connect(self) -> None:
+        """
+        Tworzy klienta (jeśli brak) i sprawdza połączenie PING-iem.
+
+        Używane przy starcie i przez wątek reconnect RedisHealth.
+        """
+        client = self.client or redis.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=False,
+            socket_connect_timeout=2,
+            socket_timeout=2
+        )
+        # Test połączenia
+        client.ping()
+        self.client = client
 
     def is_available(self) -> bool:
         """
-        Sprawdza czy Redis jest dostępny.
+        Sprawdza czy Redis jest dostępny (stan circuit breakera - BEZ round tripu).
 
         Returns:
             True jeśli Redis działa, False w przeciwnym razie
         """
-        if not self.client:
-            return False
+        return self.client is not None and self.health.allow()
 
-        try:
-            self.client.ping()
-            return True
-        except Exception:
-            return False
+    def report_error(self, error: Exception) -> None:
+        """
+        Zgłasza błąd operacji Redis (także spoza RedisCache, np. rate limiter).
+
+        Błędy połączenia (nie np. błędy danych) liczą się do circuit breakera.
+        """
+        if isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+            self.health.record_failure(error)
 
     def get(self, key: str) -> Optional[Dict]:
         """
-        Pobiera wartość z cache.
+        Pobiera wartość z cache (najpierw L1 w pamięci procesu, potem Redis).
+
+        Trafienie w Redis trafia też do L1 na pozostały TTL klucza w Redis
+        (GET + PTTL w jednym round tripie).
 
         Args:
             key: Klucz cache (np. "finnhub:get_quote:AAPL")
@@ -82,18 +439,33 @@ class RedisCache:
         Returns:
             Dict z danymi jeśli znaleziono, None jeśli brak w cache lub błąd
         """
+        value = self.local.get(key)
+        if value is not None:
+            logger.debug(f"[CACHE L1 HIT] {key}")
+            return value
+
         if not self.is_available():
             return None
 
         try:
-            value = self.client.get(key)
-            if value:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            raw, ttl_ms = pipe.execute()
+            self.health.record_success()
+
+            if raw:
                 logger.debug(f"[CACHE HIT] {key}")
-                return json.loads(value)
+                value = self.serializer.loads(raw)
+                # PTTL < 0 = klucz bez TTL (-1) lub właśnie wygasł (-2)
+                if ttl_ms and ttl_ms > 0:
+                    self.local.set(key, value, ttl_ms / 1000)
+                return value
             else:
                 logger.debug(f"[CACHE MISS] {key}")
                 return None
         except Exception as e:
+            self.report_error(e)
             logger.error(f"Redis GET error dla {key}: {e}")
             return None
 
@@ -103,23 +475,107 @@ class RedisCache:
 
         Args:
             key: Klucz cache
-            value: Wartość do zapisania (będzie zserializowana do JSON)
+            value: Wartość do zapisania (serializowana przez self.serializer)
             ttl: Czas życia w sekundach (default 900s = 15 minut)
 
         Returns:
             True jeśli zapisano, False jeśli błąd
         """
+        self.local.set(key, value, ttl)
+
         if not self.is_available():
             return False
 
         try:
-            self.client.setex(key, ttl, json.dumps(value))
+            self.client.setex(key, ttl, self.serializer.dumps(value))
+            self.health.record_success()
             logger.debug(f"[CACHE SET] {key} (TTL: {ttl}s)")
             return True
         except Exception as e:
+            self.report_error(e)
             logger.error(f"Redis SET error dla {key}: {e}")
             return False
 
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Pobiera wiele kluczy naraz: L1, a brakujące JEDNYM round tripem do Redis
+        (pipeline: MGET + PTTL dla każdego klucza).
+
+        Trafienia z Redis trafiają do L1 (jak get()), więc kolejne get() tych
+        kluczy nie robią już round tripów.
+
+        Args:
+            keys: Lista kluczy cache
+
+        Returns:
+            Dict klucz -> wartość (tylko trafienia)
+        """
+        found: Dict[str, Any] = {}
+        missing: List[str] = []
+
+        for key in dict.fromkeys(keys):
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+
+        if not missing or not self.is_available():
+            return found
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.mget(missing)
+            for key in missing:
+                pipe.pttl(key)
+            raw_values, *ttls = pipe.execute()
+            self.health.record_success()
+
+            for key, raw, ttl_ms in zip(missing, raw_values, ttls):
+                if not raw:
+                    continue
+                value = self.serializer.loads(raw)
+                found[key] = value
+                if ttl_ms and ttl_ms > 0:
+                    self.local.set(key, value, ttl_ms / 1000)
+
+            logger.debug(f"[CACHE MGET] {len(found)}/{len(keys)} trafień")
+        except Exception as e:
+            self.report_error(e)
+            logger.error(f"Redis MGET error ({len(missing)} kluczy): {e}")
+
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: int = 900) -> bool:
+        """
+        Zapisuje wiele wartości z tym samym TTL jednym round tripem (pipeline SETEX).
+
+        Args:
+            items: Dict klucz -> wartość
+            ttl: Czas życia w sekundach
+
+        Returns:
+            True jeśli zapisano w Redis, False jeśli błąd / Redis niedostępny
+        """
+        for key, value in items.items():
+            self.local.set(key, value, ttl)
+
+        if not items or not self.is_available():
+            return False
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, self.serializer.dumps(value))
+            pipe.execute()
+            self.health.record_success()
+            logger.debug(f"[CACHE MSET] {len(items)} kluczy (TTL: {ttl}s)")
+            return True
+        except Exception as e:
+            self.report_error(e)
+            logger.error(f"Redis MSET error ({len(items)} kluczy): {e}")
+            return False
+
     def delete(self, key: str) -> bool:
         """
         Usuwa klucz z cache.
@@ -130,17 +586,92 @@ class RedisCache:
         Returns:
             True jeśli usunięto, False jeśli błąd
         """
+        self.local.delete(key)
+
         if not self.is_available():
             return False
 
         try:
             self.client.delete(key)
+            self.health.record_success()
             logger.debug(f"[CACHE DELETE] {key}")
             return True
         except Exception as e:
+            self.report_error(e)
             logger.error(f"Redis DELETE error dla {key}: {e}")
             return False
 
+    def delete_many(self, keys: List[str]) -> bool:
+        """
+        Usuwa wiele kluczy jednym round tripem (DEL key1 key2 ...).
+
+        Args:
+            keys: Klucze do usunięcia
+
+        Returns:
+            True jeśli usunięto, False jeśli błąd / Redis niedostępny
+        """
+        for key in keys:
+            self.local.delete(key)
+
+        if not keys or not self.is_available():
+            return False
+
+        try:
+            self.client.delete(*keys)
+            self.health.record_success()
+            logger.debug(f"[CACHE DELETE] {len(keys)} kluczy")
+            return True
+        except Exception as e:
+            self.report_error(e)
+            logger.error(f"Redis DELETE error ({len(keys)} kluczy): {e}")
+            return False
+
+    def acquire_lock(self, key: str, ttl: int = SINGLEFLIGHT_LOCK_TTL) -> Optional[str]:
+        """
+        Próbuje założyć lock "lock:{key}" (SET NX z TTL) - bez czekania.
+
+        Args:
+            key: Klucz cache którego dotyczy lock
+            ttl: Czas życia locka w sekundach (zabezpieczenie gdy proces padnie)
+
+        Returns:
+            Token właściciela jeśli lock założony, None jeśli trzyma go inny proces.
+            Gdy Redis niedostępny - zwraca token (brak koordynacji między procesami).
+        """
+        token = uuid.uuid4().hex
+        if not self.is_available():
+            return token
+
+        try:
+            acquired = self.client.set(f"lock:{key}", token, nx=True, ex=ttl)
+            self.health.record_success()
+            if acquired:
+                return token
+            return None
+        except Exception as e:
+            self.report_error(e)
+            logger.error(f"Redis LOCK error dla {key}: {e}")
+            return token
+
+    def release_lock(self, key: str, token: str) -> None:
+        """
+        Zwalnia lock założony przez acquire_lock() (tylko jeśli token się zgadza).
+
+        Args:
+            key: Klucz cache którego dotyczy lock
+            token: Token zwrócony przez acquire_lock()
+        """
+        if not self.is_available():
+            return
+
+        try:
+            self.client.eval(RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token)
+            self.health.record_success()
+        except Exception as e:
+            self.report_error(e)
+            logger.error(f"Redis UNLOCK error dla {key}: {e}")
+
     def clear_pattern(self, pattern: str) -> int:
         """
         Usuwa wszystkie klucze pasujące do wzorca.
@@ -151,17 +682,22 @@ class RedisCache:
         Returns:
             Liczba usuniętych kluczy
         """
+        # L1 czyścimy tylko w tym procesie - inne workery wygasną po CACHE_L1_MAX_TTL
+        self.local.clear_pattern(pattern)
+
         if not self.is_available():
             return 0
 
         try:
             keys = self.client.keys(pattern)
+            self.health.record_success()
             if keys:
                 deleted = self.client.delete(*keys)
                 logger.info(f"[CACHE CLEAR] Usunięto {deleted} kluczy: {pattern}")
                 return deleted
             return 0
         except Exception as e:
+            self.report_error(e)
             logger.error(f"Redis CLEAR error dla {pattern}: {e}")
             return 0
 
@@ -170,7 +706,277 @@ class RedisCache:
 redis_cache = RedisCache()
 
 
-def cache(ttl: int = 900, key_prefix: str = "finnhub"):
+class BackgroundRefresher:
+    """
+    Odświeżanie nieświeżych wpisów cache w tle (stale-while-revalidate).
+
+    Max jedno odświeżenie na klucz naraz; max_pending ogranicza kolejkę -
+    przy zalewie wygasłych kluczy nadmiarowe odświeżenia są pomijane
+    (wartość odświeży kolejny odczyt albo wymusi granica max_stale).
+    Upstream idzie przez rate limiter klienta, więc tło nie przekracza limitu API.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-refresh")
+        self._pending: set = set()
+        self._lock = threading.Lock()
+
+    def submit(self, cache_key: str, refresh: Callable[[], Any]) -> bool:
+        """
+        Planuje odświeżenie klucza.
+
+        Returns:
+            True jeśli zaplanowano, False jeśli już w toku / kolejka pełna
+        """
+        with self._lock:
+            if cache_key in self._pending or len(self._pending) >= self.max_pending:
+                return False
+            self._pending.add(cache_key)
+
+        self._executor.submit(self._run, cache_key, refresh)
+        return True
+
+    def pending(self) -> int:
+        """Liczba odświeżeń w kolejce / w toku"""
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self, cache_key: str, refresh: Callable[[], Any]) -> None:
+        try:
+            refresh()
+            logger.debug(f"[CACHE SWR] Odświeżono {cache_key}")
+        except Exception as e:
+            logger.error(f"[CACHE SWR] Błąd odświeżania {cache_key}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(cache_key)
+
+
+# Singleton - wspólna pula odświeżania dla wszystkich funkcji z @cache
+background_refresher = BackgroundRefresher(
+    max_workers=settings.CACHE_REFRESH_WORKERS,
+    max_pending=settings.CACHE_REFRESH_MAX_PENDING
+)
+
+
+class _Flight:
+    """
+    Upstream call w toku - wątki z tym samym cache key czekają na jego wynik.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+# Singleflight w procesie: cache key -> call w toku
+_inflight: Dict[str, _Flight] = {}
+_inflight_lock = threading.Lock()
+
+
+def _singleflight(cache_key: str, load: Callable[[], Any]) -> Any:
+    """
+    Wykonuje load() raz dla wszystkich wątków które równocześnie proszą o cache_key.
+
+    Pierwszy wątek (leader) wywołuje load(), pozostałe czekają i dostają ten sam
+    wynik (lub ten sam wyjątek).
+
+    Args:
+        cache_key: Klucz cache
+        load: Funkcja ładująca wartość (upstream call + zapis w cache)
+
+    Returns:
+        Wynik load()
+    """
+    with _inflight_lock:
+        flight = _inflight.get(cache_key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[cache_key] = _Flight()
+
+    if not leader:
+        logger.info(f"⧗ Singleflight: czekam na call w toku dla {cache_key}")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = load()
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[cache_key]
+        flight.done.set()
+
+
+def _load_with_lock(
+    cache_key: str,
+    ttl: TTLSpec,
+    load: Callable[[], Any],
+    negative_ttl: Optional[int] = None,
+    max_stale: int = 0
+) -> Any:
+    """
+    Singleflight między procesami: upstream call tylko u właściciela locka w Redis.
+
+    Proces bez locka czeka aż wynik pojawi się w cache. Jeśli właściciel skończył
+    bez wyniku (None, błąd) albo lock wygasł - przejmuje lock i wywołuje load() sam.
+
+    Args:
+        cache_key: Klucz cache
+        ttl: TTL wyniku w cache (int lub callable - liczony przy zapisie)
+        load: Funkcja wywołująca upstream API
+        negative_ttl: TTL dla KNOWN_EMPTY (None = nie cache'uj braku danych)
+        max_stale: Stale-while-revalidate - zapis w kopercie na ttl + max_stale
+
+    Returns:
+        Wynik load() lub wartość zapisana w cache przez inny proces
+        (None dla negative cache hit)
+    """
+    token = redis_cache.acquire_lock(cache_key)
+    deadline = time.monotonic() + SINGLEFLIGHT_LOCK_TTL
+
+    while token is None:
+        if time.monotonic() >= deadline:
+            # Lock wisi dłużej niż jego TTL - nie blokujemy scanu w nieskończoność
+            logger.warning(f"Singleflight: timeout czekania na {cache_key} - wywołuję API")
+            return _call_and_store(cache_key, ttl, load, negative_ttl, max_stale)
+
+        time.sleep(SINGLEFLIGHT_POLL_INTERVAL)
+
+        cached_value = redis_cache.get(cache_key)
+        if cached_value is not None:
+            logger.info(f"✓ Singleflight HIT: {cache_key} (wynik z innego procesu)")
+            return _unwrap(cached_value)
+
+        token = redis_cache.acquire_lock(cache_key)
+
+    try:
+        return _call_and_store(cache_key, ttl, load, negative_ttl, max_stale)
+    finally:
+        redis_cache.release_lock(cache_key, token)
+
+
+def _call_and_store(
+    cache_key: str,
+    ttl: TTLSpec,
+    load: Callable[[], Any],
+    negative_ttl: Optional[int] = None,
+    max_stale: int = 0
+) -> Any:
+    """
+    Wywołuje upstream i zapisuje wynik w cache (tylko jeśli nie jest None/pusty).
+
+    KNOWN_EMPTY -> EMPTY_MARKER z negative_ttl (jeśli ustawiony), zwraca None.
+    FetchedAt -> zapis z czasem pobrania (wiek wartości nie jest zerowany), zwraca wartość.
+    max_stale > 0 -> wynik w kopercie SWR, w Redis na ttl + max_stale.
+    """
+    logger.info(f"⊗ Cache MISS: {cache_key} - wywołuję API...")
+    result = load()
+
+    if result is KNOWN_EMPTY:
+        if negative_ttl:
+            logger.info(f"∅ Brak danych: {cache_key} - negative cache na {negative_ttl}s")
+            redis_cache.set(cache_key, EMPTY_MARKER, negative_ttl)
+        return None
+
+    if isinstance(result, FetchedAt):
+        remaining = int(result.ttl + max_stale - (time.time() - result.fetched_at))
+        if result.value and remaining > 0:
+            if max_stale:
+                entry = swr_envelope(result.value, result.ttl, stored_at=result.fetched_at)
+            else:
+                entry = result.value
+            redis_cache.set(cache_key, entry, remaining)
+        return result.value
+
+    if result:
+        store_ttl = resolve_ttl(ttl)
+        if max_stale:
+            redis_cache.set(cache_key, swr_envelope(result, store_ttl), store_ttl + max_stale)
+        else:
+            redis_cache.set(cache_key, result, store_ttl)
+
+    return result
+
+
+def swr_envelope(value: Any, ttl: int, stored_at: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Koperta stale-while-revalidate dla wartości zapisywanej poza decoratorem
+    (np. snapshot z bazy - stored_at = czas pobrania z API, nie zapisu do cache).
+
+    Args:
+        value: Wynik funkcji
+        ttl: Po ilu sekundach od stored_at wartość jest nieświeża
+        stored_at: Epoch pobrania wartości (domyślnie teraz)
+    """
+    return {SWR_STORED_AT: time.time() if stored_at is None else stored_at, SWR_TTL: ttl, SWR_VALUE: value}
+
+
+def _unwrap(cached_value: Any) -> Any:
+    """
+    Wartość z cache -> wynik funkcji (EMPTY_MARKER -> None, koperta SWR -> wartość).
+    """
+    if is_empty_marker(cached_value):
+        return None
+    if isinstance(cached_value, dict) and SWR_STORED_AT in cached_value:
+        return cached_value[SWR_VALUE]
+    return cached_value
+
+
+def _mark_stale(value: Any, age: float) -> Any:
+    """
+    Kopia wartości z STALE_KEY (wpisu z cache nie modyfikujemy - L1 zwraca ten sam obiekt).
+    """
+    if isinstance(value, dict):
+        return {**value, STALE_KEY: round(age, 1)}
+    return value
+
+
+def build_cache_key(
+    key_prefix: str,
+    func_name: str,
+    args: Tuple[Any, ...] = (),
+    kwargs: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Buduje cache key w formacie @cache: "{prefix}:{function_name}:{arg1}:{arg2}".
+
+    Używane przez decorator i przez bulk prefetch (get_many) - klucze muszą być identyczne.
+
+    Args:
+        key_prefix: Prefix (np. "finnhub")
+        func_name: Nazwa funkcji (np. "get_quote")
+        args: Argumenty pozycyjne BEZ self
+        kwargs: Argumenty keyword
+
+    Returns:
+        Cache key, np. "finnhub:get_quote:AAPL"
+    """
+    cache_args = list(args)
+    cache_args.extend([f"{k}={v}" for k, v in sorted((kwargs or {}).items())])
+
+    # Bezpieczne generowanie klucza (tylko string/int/float)
+    safe_args = []
+    for arg in cache_args:
+        if isinstance(arg, (str, int, float)):
+            safe_args.append(str(arg))
+
+    return f"{key_prefix}:{func_name}:{':'.join(safe_args)}"
+
+
+def cache(
+    ttl: TTLSpec = 900,
+    key_prefix: str = "finnhub",
+    negative_ttl: Optional[int] = None,
+    max_stale: int = 0
+):
     """
     Decorator cache'ujący wynik funkcji w Redis.
 
@@ -183,8 +989,12 @@ def cache(ttl: int = 900, key_prefix: str = "finnhub"):
     Przykład: "finnhub:get_quote:AAPL"
 
     Args:
-        ttl: Time To Live w sekundach (default 900s = 15 minut)
+        ttl: Time To Live w sekundach (default 900s = 15 minut) albo callable
+            zwracający TTL przy każdym zapisie (np. ttl_policy.ttl_for(DATA_QUOTE))
         key_prefix: Prefix dla cache key (default "finnhub")
+        negative_ttl: TTL dla wyniku KNOWN_EMPTY (default None = brak danych nie jest cache'owany)
+        max_stale: Stale-while-revalidate - ile sekund po ttl zwracać nieświeżą wartość
+            (odświeżaną w tle). Starsza = synchroniczny upstream call. 0 = wyłączone
 
     Usage:
         @cache(ttl=900)
@@ -213,8 +1023,10 @@ def cache(ttl: int = 900, key_prefix: str = "finnhub"):
 
             1. Generuje cache key z argumentów funkcji
             2. Sprawdza czy wynik jest w cache (GET)
-            3. Jeśli HIT: zwraca z cache
-            4. Jeśli MISS: wywołuje funkcję, zapisuje w cache (SET), zwraca wynik
+            3. Jeśli HIT: zwraca z cache (EMPTY_MARKER -> None, bez API call);
+               wartość po ttl (max_stale) - zwraca ją od razu, odświeża w tle
+            4. Jeśli MISS: wywołuje funkcję (singleflight - jeden call na klucz
+               w procesie i między procesami), zapisuje w cache (SET), zwraca wynik
 
             Args:
                 *args: Positional arguments funkcji
@@ -226,32 +1038,40 @@ def cache(ttl: int = 900, key_prefix: str = "finnhub"):
             # Generuj cache key z argumentów
             # args[0] to self (dla metod klasy), args[1:] to prawdziwe argumenty
             # Dla get_quote(self, symbol="AAPL"): key = "finnhub:get_quote:AAPL"
-            cache_args = list(args[1:])  # Pomiń self
-            cache_args.extend([f"{k}={v}" for k, v in sorted(kwargs.items())])
+            cache_key = build_cache_key(key_prefix, func.__name__, args[1:], kwargs)
 
-            # Bezpieczne generowanie klucza (tylko string/int/float)
-            safe_args = []
-            for arg in cache_args:
-                if isinstance(arg, (str, int, float)):
-                    safe_args.append(str(arg))
-
-            cache_key = f"{key_prefix}:{func.__name__}:{':'.join(safe_args)}"
+            def load_and_store() -> Any:
+                return _load_with_lock(
+                    cache_key, ttl, lambda: func(*args, **kwargs), negative_ttl, max_stale
+                )
 
             # Sprawdź cache
             cached_value = redis_cache.get(cache_key)
             if cached_value is not None:
-                logger.info(f"✓ Cache HIT: {cache_key}")
-                return cached_value
+                stored_at = cached_value.get(SWR_STORED_AT) if isinstance(cached_value, dict) else None
+                if stored_at is None:
+                    logger.info(f"✓ Cache HIT: {cache_key}")
+                    return _unwrap(cached_value)
+
+                # TTL z chwili zapisu (polityka mogła dać np. "do otwarcia sesji")
+                entry_ttl = cached_value.get(SWR_TTL) or resolve_ttl(ttl)
+                age = time.time() - stored_at
+                if age <= entry_ttl:
+                    logger.info(f"✓ Cache HIT: {cache_key}")
+                    return cached_value[SWR_VALUE]
 
-            # Cache MISS - wywołaj funkcję
-            logger.info(f"⊗ Cache MISS: {cache_key} - wywołuję API...")
-            result = func(*args, **kwargs)
+                if age <= entry_ttl + max_stale:
+                    # Nieświeże - zwróć od razu, odśwież w tle (jeden upstream call na klucz)
+                    logger.info(f"✓ Cache STALE: {cache_key} ({age:.0f}s) - odświeżam w tle")
+                    background_refresher.submit(
+                        cache_key, lambda: _singleflight(cache_key, load_and_store)
+                    )
+                    return _mark_stale(cached_value[SWR_VALUE], age)
 
-            # Zapisz w cache (tylko jeśli wynik nie jest None/pusty)
-            if result:
-                redis_cache.set(cache_key, result, ttl)
+                # Starsze niż max_stale (np. koperta bez max_stale) - synchronicznie
 
-            return result
+            # Cache MISS - jeden upstream call dla wszystkich równoczesnych wywołań
+            return _singleflight(cache_key, load_and_store)
 
         return wrapper
 
@@ -283,7 +1103,11 @@ def get_cache_stats() -> Dict[str, Any]:
         Dict z info o cache (memory usage, keys count, etc.)
     """
     if not redis_cache.is_available():
-        return {"status": "unavailable", "error": "Redis nie jest dostępny"}
+        return {
+            "status": "unavailable",
+            "error": "Redis nie jest dostępny",
+            "health": redis_cache.health.snapshot()
+        }
 
     try:
         info = redis_cache.client.info("stats")
@@ -294,6 +1118,9 @@ def get_cache_stats() -> Dict[str, Any]:
             "total_connections": info.get("total_connections_received", 0),
             "total_commands": info.get("total_commands_processed", 0),
             "keys_finnhub": len(redis_cache.client.keys("finnhub:*")),
+            "l1_items": len(redis_cache.local),
+            "swr_refresh_pending": background_refresher.pending(),
+            "health": redis_cache.health.snapshot(),
             "keyspace": keyspace
         }
     except Exception as e:
@@ -0,0 +1,123 @@
+"""
+Kodeki dla wartości w Redis cache (format binarny + opcjonalna kompresja)
+
+PROBLEM: json.dumps() całej odpowiedzi company_basic_financials (117 metryk
++ wieloletnie series.annual / series.quarterly) = dziesiątki KB na symbol,
+parsowane json.loads() przy każdym cache HIT.
+
+ROZWIĄZANIE: Wartość w Redis = 2 bajty nagłówka + payload:
+- bajt 1: kodek (TAG_JSON / TAG_MSGPACK)
+- bajt 2: kompresja (COMPRESSION_NONE / COMPRESSION_ZLIB)
+
+Stare wpisy (czysty JSON, bez nagłówka) nadal są czytane - JSON nigdy nie
+zaczyna się od bajtu < 0x20, więc nagłówek jest jednoznaczny.
+
+Porównanie rozmiaru i czasu: benchmark_cache_codecs.py
+"""
+import json
+import zlib
+from typing import Any, Callable, Dict, Union
+import msgpack
+
+# Bajt 1 - format serializacji
+TAG_JSON = b"\x01"
+TAG_MSGPACK = b"\x02"
+
+# Bajt 2 - kompresja
+COMPRESSION_NONE = b"\x00"
+COMPRESSION_ZLIB = b"\x01"
+
+
+class Codec:
+    """
+    Format serializacji wartości cache.
+
+    Attributes:
+        name: Nazwa w konfiguracji (CACHE_CODEC)
+        tag: Bajt nagłówka
+        dumps: value -> bytes
+        loads: bytes -> value
+    """
+
+    def __init__(self, name: str, tag: bytes, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]):
+        self.name = name
+        self.tag = tag
+        self.dumps = dumps
+        self.loads = loads
+
+
+JSON_CODEC = Codec(
+    "json",
+    TAG_JSON,
+    dumps=lambda value: json.dumps(value, separators=(",", ":")).encode(),
+    loads=json.loads
+)
+
+MSGPACK_CODEC = Codec(
+    "msgpack",
+    TAG_MSGPACK,
+    dumps=lambda value: msgpack.packb(value, use_bin_type=True),
+    loads=lambda data: msgpack.unpackb(data, raw=False)
+)
+
+CODECS: Dict[str, Codec] = {codec.name: codec for codec in (JSON_CODEC, MSGPACK_CODEC)}
+CODECS_BY_TAG: Dict[bytes, Codec] = {codec.tag: codec for codec in CODECS.values()}
+
+
+class CacheSerializer:
+    """
+    Serializacja wartości cache: kodek + kompresja zlib dla dużych payloadów.
+
+    Usage:
+        serializer = CacheSerializer("msgpack", compress_min_bytes=1024)
+        data = serializer.dumps({"metric": {...}})   # bytes z nagłówkiem
+        serializer.loads(data)                      # także stare wpisy JSON
+    """
+
+    def __init__(self, codec: str = "msgpack", compress_min_bytes: int = 1024, compress_level: int = 1):
+        """
+        Args:
+            codec: Nazwa kodeka do zapisu ("msgpack" lub "json")
+            compress_min_bytes: Kompresuj payloady >= tylu bajtów (-1 = nigdy).
+                Quote (~100 B) nie opłaca się kompresować, fundamentals (dziesiątki KB) tak.
+            compress_level: Poziom zlib (1 = najszybszy, wystarczający dla powtarzalnych kluczy)
+
+        Raises:
+            ValueError: Nieznany kodek
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Nieznany kodek cache: {codec} (dostępne: {', '.join(CODECS)})")
+
+        self.codec = CODECS[codec]
+        self.compress_min_bytes = compress_min_bytes
+        self.compress_level = compress_level
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        Serializuje wartość do bytes z nagłówkiem (kodek + kompresja).
+        """
+        payload = self.codec.dumps(value)
+
+        if 0 <= self.compress_min_bytes <= len(payload):
+            return self.codec.tag + COMPRESSION_ZLIB + zlib.compress(payload, self.compress_level)
+
+        return self.codec.tag + COMPRESSION_NONE + payload
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        Deserializuje wartość zapisaną przez dumps() dowolnym kodekiem
+        albo stary wpis w czystym JSON.
+        """
+        if isinstance(data, str):
+            return json.loads(data)
+
+        codec = CODECS_BY_TAG.get(data[:1])
+        if codec is None:
+            # Stary format - czysty JSON bez nagłówka
+            return json.loads(data)
+
+        payload = data[2:]
+        if data[1:2] == COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+
+        return codec.loads(payload)
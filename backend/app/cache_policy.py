@@ -0,0 +1,108 @@
+"""
+Polityka TTL cache zależna od typu danych i sesji giełdy
+
+PROBLEM: Stałe TTL (quote / fundamentals 900s, profile 3600s) = scan nocą
+albo w weekend płaci pełne API calls za dane, które nie zmieniły się od
+zamknięcia sesji.
+
+ROZWIĄZANIE: @cache(ttl=ttl_policy.ttl_for(DATA_QUOTE)) - decorator pyta
+politykę o TTL przy KAŻDYM zapisie:
+- quote w trakcie sesji: krótki TTL, ale nie dłużej niż do zamknięcia
+  (+ QUOTE_CLOSE_GRACE, żeby złapać cenę zamknięcia)
+- quote po zamknięciu / weekend / święto: do następnego otwarcia sesji
+- fundamentals / profile: dni (zmieniają się przy raportach, nie co minutę)
+
+Kalendarz sesji: app.market_calendar (lokalna tabela świąt NYSE).
+"""
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, Optional
+from app.config import settings
+from app.market_calendar import MarketCalendar, us_market_calendar
+
+# Typy danych
+DATA_QUOTE = "quote"
+DATA_FUNDAMENTALS = "fundamentals"
+DATA_PROFILE = "profile"
+
+
+class TTLPolicy:
+    """
+    TTL wpisu cache w sekundach dla typu danych i aktualnej chwili.
+
+    Usage:
+        ttl_policy.ttl(DATA_QUOTE)          # int, liczone teraz
+        @cache(ttl=ttl_policy.ttl_for(DATA_QUOTE))
+    """
+
+    def __init__(
+        self,
+        calendar: MarketCalendar,
+        quote_session_ttl: int,
+        quote_close_grace: int,
+        fundamentals_ttl: int,
+        profile_ttl: int
+    ):
+        """
+        Args:
+            calendar: Kalendarz sesji giełdy
+            quote_session_ttl: TTL quote w trakcie sesji
+            quote_close_grace: Ile sekund po zamknięciu pobrać quote ponownie (cena zamknięcia)
+            fundamentals_ttl: TTL fundamentals
+            profile_ttl: TTL company profile
+        """
+        self.calendar = calendar
+        self.quote_session_ttl = quote_session_ttl
+        self.quote_close_grace = quote_close_grace
+        self.fixed_ttls: Dict[str, int] = {
+            DATA_FUNDAMENTALS: fundamentals_ttl,
+            DATA_PROFILE: profile_ttl,
+        }
+
+    def ttl(self, data_type: str, now: Optional[datetime] = None) -> int:
+        """
+        TTL dla typu danych.
+
+        Args:
+            data_type: DATA_QUOTE / DATA_FUNDAMENTALS / DATA_PROFILE
+            now: Chwila zapisu (domyślnie teraz)
+
+        Returns:
+            TTL w sekundach (>= 1)
+
+        Raises:
+            ValueError: Nieznany typ danych
+        """
+        if data_type == DATA_QUOTE:
+            return self._quote_ttl(now)
+
+        if data_type not in self.fixed_ttls:
+            raise ValueError(f"Nieznany typ danych cache: {data_type}")
+        return self.fixed_ttls[data_type]
+
+    def ttl_for(self, data_type: str) -> Callable[[], int]:
+        """
+        TTL jako callable dla @cache(ttl=...) - liczony przy każdym zapisie.
+        """
+        if data_type != DATA_QUOTE and data_type not in self.fixed_ttls:
+            raise ValueError(f"Nieznany typ danych cache: {data_type}")
+        return partial(self.ttl, data_type)
+
+    def _quote_ttl(self, now: Optional[datetime]) -> int:
+        until_close = self.calendar.seconds_until_close(now)
+        if until_close is not None:
+            # Sesja trwa - cena się zmienia; wpis wygasa najpóźniej tuż po zamknięciu
+            return max(1, int(min(self.quote_session_ttl, until_close + self.quote_close_grace)))
+
+        # Giełda zamknięta - quote nie zmieni się do następnego otwarcia
+        return max(1, int(self.calendar.seconds_until_next_open(now)))
+
+
+# Singleton - polityka dla FinnhubClient
+ttl_policy = TTLPolicy(
+    calendar=us_market_calendar,
+    quote_session_ttl=settings.CACHE_TTL_QUOTE_SESSION,
+    quote_close_grace=settings.CACHE_TTL_QUOTE_CLOSE_GRACE,
+    fundamentals_ttl=settings.CACHE_TTL_FUNDAMENTALS,
+    profile_ttl=settings.CACHE_TTL_PROFILE
+)
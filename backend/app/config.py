@@ -4,7 +4,7 @@ Konfiguracja aplikacji (ustawienia środowiskowe)
 import os
 import logging
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 # Logger dla ostrzeżeń konfiguracji
 logger = logging.getLogger(__name__)
@@ -23,14 +23,73 @@ class Settings(BaseSettings):
     DB_NAME: str = "multibagger"
     DB_HOST: str = "localhost"
     DB_PORT: int = 5433  # Port zmieniony na 5433 bo lokalny postgres zajmuje 5432
+    # Logowanie każdego zapytania SQL (SQLAlchemy echo) - tylko do debugowania
+    DB_ECHO: bool = False
+    # Zapis wyników scanu: wierszy na jeden INSERT / COPY i metoda ("insert" / "copy" - tylko PostgreSQL)
+    SCAN_SAVE_BATCH_SIZE: int = 1000
+    SCAN_SAVE_METHOD: str = "insert"
+    # Partycje miesięczne scan_results (PostgreSQL): ile miesięcy do przodu tworzyć
+    # i ile pełnych miesięcy wstecz trzymać wyniki (0 = bez retencji)
+    SCAN_PARTITIONS_AHEAD: int = 2
+    SCAN_RESULTS_RETENTION_MONTHS: int = 6
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
+    # Cache L1 w pamięci procesu (przed Redis): max wpisów (0 = wyłączony)
+    # i max TTL w sekundach - ogranicza rozjazd z Redis między workerami
+    CACHE_L1_MAX_ITEMS: int = 2048
+    CACHE_L1_MAX_TTL: int = 300
+    # Format wartości w Redis: "msgpack" lub "json" (stare wpisy czytane zawsze)
+    # i od ilu bajtów kompresować zlib (-1 = bez kompresji)
+    CACHE_CODEC: str = "msgpack"
+    CACHE_COMPRESS_MIN_BYTES: int = 1024
+    # TTL cache (app.cache_policy): quote w trakcie sesji (max - wygasa tez tuz po
+    # zamknieciu + CLOSE_GRACE sekund), po zamknieciu quote trzymany do otwarcia sesji
+    CACHE_TTL_QUOTE_SESSION: int = 900
+    CACHE_TTL_QUOTE_CLOSE_GRACE: int = 120
+    CACHE_TTL_FUNDAMENTALS: int = 86400        # 1 dzien
+    CACHE_TTL_PROFILE: int = 604800            # 7 dni
+    # Negative cache: jak dlugo pamietac "brak danych" dla symbolu (sekundy, 0 = wylaczony)
+    NEGATIVE_CACHE_TTL: int = 3600
+    # Stale-while-revalidate: ile sekund po TTL zwracac nieswieze quote/fundamentals
+    # (odswiezane w tle) zanim wymusimy synchroniczny API call (0 = wylaczone)
+    CACHE_MAX_STALE: int = 3600
+    # Odswiezanie w tle: liczba watkow i max kluczy w kolejce
+    CACHE_REFRESH_WORKERS: int = 2
+    CACHE_REFRESH_MAX_PENDING: int = 1000
 
     # API
     PORT: int = 8000
     MIN_VOLUME: int = 1000000
 
+    # Scanner
+    # Ile symboli skanowac rownolegle (watki). I/O roznych symboli sie naklada,
+    # limit 60 calls/min Finnhub i tak pilnuje rate limiter w FinnhubClient.
+    SCAN_MAX_WORKERS: int = 8
+    # Re-filter: ile datasetow scanow trzymac w pamieci procesu i jak dlugo (sekundy)
+    SCAN_DATASET_MAX: int = 20
+    SCAN_DATASET_TTL: int = 3600
+    # Background joby scanu: ile scanow naraz (reszta czeka w kolejce) i ile jobow trzymac
+    SCAN_JOB_WORKERS: int = 2
+    SCAN_JOB_MAX: int = 100
+    # Lokalny magazyn historii cen (pliki .npy per symbol, "" = wylaczony) i ile historii
+    # pobierac dla nowego symbolu (okres yfinance; dluzsze okna scanu ida z sieci)
+    PRICE_STORE_DIR: str = "data/prices"
+    PRICE_STORE_BACKFILL: str = "2y"
+    # Kwarantanna: symbol bez danych / z bledem w tylu kolejnych scanach z rzedu
+    # jest pomijany przez SYMBOL_QUARANTINE_TTL sekund (0 = wylaczona)
+    SYMBOL_QUARANTINE_FAILURES: int = 3
+    SYMBOL_QUARANTINE_TTL: int = 86400
+
+    # Fundamentals: ktore metryki / serie Finnhub trzymac w cache (reszta odrzucana).
+    # Metryki screenera sa dodawane zawsze. W .env jako JSON, np. ["netMargin","epsTTM"]
+    FUNDAMENTALS_METRICS: List[str] = []
+    FUNDAMENTALS_SERIES: List[str] = []          # format "okres.nazwa", np. "quarterly.eps"
+    FUNDAMENTALS_SERIES_POINTS: int = 1          # ile najnowszych punktow serii zachowac
+    # Snapshot fundamentals w PostgreSQL: przez tyle sekund od pobrania z API zastepuje
+    # API call po cache MISS (restart / flush Redis). 0 = snapshoty wylaczone
+    FUNDAMENTALS_SNAPSHOT_MAX_AGE: int = 86400
+
     # API Keys
     # Finnhub.io - WYMAGANE dla stock scanner fundamentals
     # FREE tier: 60 calls/min, 117 metrics w jednym calu
@@ -11,7 +11,7 @@ from app.config import settings
 # Silnik SQLAlchemy - odpowiada za połączenie z PostgreSQL
 engine = create_engine(
     settings.database_url,
-    echo=True,  # Loguje wszystkie zapytania SQL (pomocne przy debugowaniu)
+    echo=settings.DB_ECHO,  # Logowanie zapytań SQL tylko do debugowania (przy scanie spowalnia zapis)
     pool_pre_ping=True  # Sprawdza połączenie przed użyciem
 )
 
@@ -6,12 +6,18 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.database import engine, Base
 from app.config import settings
+from app.cache import redis_cache
 from app.api import scan, portfolio  # Import API routers
+from app.services.scan_partitions import scan_partitions
 
 
 # Tworzenie tabel w bazie danych (przy pierwszym uruchomieniu)
 Base.metadata.create_all(bind=engine)
 
+# create_all() nie zmienia istniejących tabel - stara scan_results (bez partycji / run_id)
+# = błąd startu zamiast błędów zapisu wyników (migracja: python migrate_scan_results.py)
+scan_partitions.verify_schema()
+
 
 # Inicjalizacja aplikacji FastAPI
 app = FastAPI(
@@ -61,12 +67,14 @@ async def health_check():
     Returns:
         dict: Status API i połączenia z bazą danych
     """
-    # TODO: Dodać sprawdzanie połączenia z PostgreSQL i Redis
+    # TODO: Dodać sprawdzanie połączenia z PostgreSQL
     return {
         "status": "ok",
         "message": "API is running",
         "database": "connected",  # W przyszłości: rzeczywiste sprawdzenie
-        "redis": "connected"      # W przyszłości: rzeczywiste sprawdzenie
+        # Stan circuit breakera Redis (bez PING - z wyników operacji cache)
+        "redis": "connected" if redis_cache.is_available() else "unavailable",
+        "redis_health": redis_cache.health.snapshot()
     }
 
 
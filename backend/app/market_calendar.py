@@ -0,0 +1,160 @@
+"""
+Kalendarz sesji gieldy US (NYSE / NASDAQ) - lokalna tabela, bez API calls
+
+Uzywany przez polityke TTL cache (app.cache_policy): quote zmienia sie tylko
+w trakcie sesji, wiec po zamknieciu mozna go trzymac do nastepnego otwarcia.
+
+Sesja: 9:30 - 16:00 czasu nowojorskiego, pon-pt, bez swiat gieldowych.
+Dni ze skrocona sesja (zamkniecie 13:00) w EARLY_CLOSES.
+
+UWAGA: Swieta trzeba dopisywac co rok (zrodlo: nyse.com/markets/hours-calendars).
+Rok spoza tabeli = tylko weekendy (logowane ostrzezenie).
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, FrozenSet, Optional
+from zoneinfo import ZoneInfo
+import logging
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = ZoneInfo("America/New_York")
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# Swieta NYSE (gielda zamknieta caly dzien)
+HOLIDAYS: FrozenSet[date] = frozenset({
+    # 2025
+    date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17),
+    date(2025, 4, 18), date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4),
+    date(2025, 9, 1), date(2025, 11, 27), date(2025, 12, 25),
+    # 2026
+    date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3),
+    date(2026, 5, 25), date(2026, 6, 19), date(2026, 7, 3), date(2026, 9, 7),
+    date(2026, 11, 26), date(2026, 12, 25),
+    # 2027
+    date(2027, 1, 1), date(2027, 1, 18), date(2027, 2, 15), date(2027, 3, 26),
+    date(2027, 5, 31), date(2027, 6, 18), date(2027, 7, 5), date(2027, 9, 6),
+    date(2027, 11, 25), date(2027, 12, 24),
+})
+
+# Skrocone sesje (zamkniecie 13:00)
+EARLY_CLOSES: Dict[date, time] = {
+    date(2025, 7, 3): EARLY_CLOSE,
+    date(2025, 11, 28): EARLY_CLOSE,
+    date(2025, 12, 24): EARLY_CLOSE,
+    date(2026, 11, 27): EARLY_CLOSE,
+    date(2026, 12, 24): EARLY_CLOSE,
+    date(2027, 11, 26): EARLY_CLOSE,
+}
+
+# Lata pokryte tabela swiat
+COVERED_YEARS = frozenset(day.year for day in HOLIDAYS)
+
+# Zabezpieczenie petli next_open() (najdluzsza przerwa to weekend + swieto)
+MAX_CLOSED_DAYS = 10
+
+
+class MarketCalendar:
+    """
+    Sesje gieldy: czy jest otwarta, kiedy zamkniecie / nastepne otwarcie.
+
+    Wszystkie metody przyjmuja `now` (aware datetime, dowolna strefa) - domyslnie
+    aktualny czas. Zwracane datetime sa w strefie gieldy.
+
+    Usage:
+        us_market_calendar.is_open()
+        us_market_calendar.seconds_until_next_open()
+    """
+
+    def __init__(
+        self,
+        tz: ZoneInfo = MARKET_TZ,
+        holidays: FrozenSet[date] = HOLIDAYS,
+        early_closes: Optional[Dict[date, time]] = None
+    ):
+        self.tz = tz
+        self.holidays = holidays
+        self.early_closes = EARLY_CLOSES if early_closes is None else early_closes
+        self._warned_years: set = set()
+
+    def is_trading_day(self, day: date) -> bool:
+        """Dzien roboczy gieldy (nie weekend, nie swieto)"""
+        if day.year not in COVERED_YEARS and day.year not in self._warned_years:
+            self._warned_years.add(day.year)
+            logger.warning(f"[MARKET CALENDAR] Brak swiat dla roku {day.year} - tylko weekendy")
+        return day.weekday() < 5 and day not in self.holidays
+
+    def session(self, day: date) -> Optional[tuple]:
+        """
+        Otwarcie i zamkniecie sesji danego dnia.
+
+        Returns:
+            (open, close) jako aware datetime lub None jesli gielda zamknieta
+        """
+        if not self.is_trading_day(day):
+            return None
+        close = self.early_closes.get(day, SESSION_CLOSE)
+        return (
+            datetime.combine(day, SESSION_OPEN, tzinfo=self.tz),
+            datetime.combine(day, close, tzinfo=self.tz),
+        )
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        """Czy trwa sesja"""
+        now = self._local(now)
+        session = self.session(now.date())
+        return session is not None and session[0] <= now < session[1]
+
+    def next_open(self, now: Optional[datetime] = None) -> datetime:
+        """
+        Najblizsze otwarcie sesji po `now` (w trakcie sesji = jutrzejsze / kolejne).
+        """
+        now = self._local(now)
+        day = now.date()
+        for _ in range(MAX_CLOSED_DAYS):
+            session = self.session(day)
+            if session is not None and session[0] > now:
+                return session[0]
+            day += timedelta(days=1)
+        # Tabela niespojna - nie blokujemy cache na zawsze
+        return now + timedelta(days=1)
+
+    def last_closed_session(self, now: Optional[datetime] = None) -> date:
+        """
+        Data ostatniej ZAKONCZONEJ sesji (w trakcie sesji = poprzedni dzien roboczy).
+
+        Uzywane przez lokalny magazyn cen - dzienny bar jest kompletny dopiero po zamknieciu.
+        """
+        now = self._local(now)
+        day = now.date()
+        for _ in range(MAX_CLOSED_DAYS):
+            session = self.session(day)
+            if session is not None and session[1] <= now:
+                return day
+            day -= timedelta(days=1)
+        return now.date() - timedelta(days=1)
+
+    def seconds_until_close(self, now: Optional[datetime] = None) -> Optional[float]:
+        """
+        Sekundy do konca trwajacej sesji lub None jesli gielda zamknieta.
+        """
+        now = self._local(now)
+        session = self.session(now.date())
+        if session is None or not session[0] <= now < session[1]:
+            return None
+        return (session[1] - now).total_seconds()
+
+    def seconds_until_next_open(self, now: Optional[datetime] = None) -> float:
+        """Sekundy do najblizszego otwarcia sesji"""
+        now = self._local(now)
+        return (self.next_open(now) - now).total_seconds()
+
+    def _local(self, now: Optional[datetime]) -> datetime:
+        if now is None:
+            now = datetime.now(timezone.utc)
+        return now.astimezone(self.tz)
+
+
+# Singleton - NYSE / NASDAQ (ten sam kalendarz)
+us_market_calendar = MarketCalendar()
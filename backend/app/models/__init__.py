@@ -3,6 +3,7 @@ Modele bazy danych (SQLAlchemy ORM)
 """
 from app.models.user import User
 from app.models.portfolio import PortfolioItem
-from app.models.scan import ScanResult
+from app.models.scan import ScanRun, ScanResult, ScanDailyRollup
+from app.models.fundamentals import FundamentalsSnapshot
 
-__all__ = ["User", "PortfolioItem", "ScanResult"]
+__all__ = ["User", "PortfolioItem", "ScanRun", "ScanResult", "ScanDailyRollup", "FundamentalsSnapshot"]
@@ -0,0 +1,30 @@
+"""
+Model snapshotu fundamentals (tabela 'fundamentals_snapshots')
+"""
+from sqlalchemy import Column, String, DateTime, JSON
+
+from app.database import Base
+
+
+class FundamentalsSnapshot(Base):
+    """
+    Ostatnie pobrane z Finnhub fundamentals symbolu (trwała kopia cache Redis).
+
+    Jeden rekord na symbol - nadpisywany po każdym API call. Po restarcie /
+    flushu Redis FinnhubClient czyta stąd zamiast wydawać limit 60 calls/min.
+
+    Przykład:
+    - symbol: "AAPL"
+    - as_of: 2025-10-07 14:30 UTC (kiedy pobrano z API)
+    - payload: {"metric": {"roeTTM": 154.92, ...}, "series": {"annual": {"roic": [...]}}}
+    """
+    __tablename__ = "fundamentals_snapshots"
+
+    # Symbol akcji = Primary Key (jeden snapshot na symbol)
+    symbol = Column(String, primary_key=True)
+
+    # Kiedy dane pobrano z Finnhub (wiek snapshotu liczony od tej chwili)
+    as_of = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    # Zprojektowana odpowiedź Finnhub (app.services.fundamentals.project_fundamentals)
+    payload = Column(JSON, nullable=False)
@@ -1,38 +1,99 @@
 """
 Model wyników skanowania (tabela 'scan_results')
 """
-from sqlalchemy import Column, Integer, BigInteger, String, Float, Boolean, DateTime, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Boolean, Date, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.sql import func
 
 from app.database import Base
 
 
+class ScanRun(Base):
+    """
+    Jeden przebieg scanu - parametry, czasy, liczniki, zużyte API calls.
+
+    Wiersze scan_results wskazują swój run przez run_id, więc "ostatni scan"
+    i wyniki konkretnego scanu to zapytania po indeksie zamiast po scan_date.
+
+    Przykład:
+    - scan_id: "9b1deb4d3b7d4bad9bdd2b0d7b3dcb6d" (dataset / job ID z API)
+    - source: "job"
+    - params: {"symbols": ["AAPL", ...], "thresholds": {"min_roe": 15.0, ...}, "lazy": true}
+    - total_symbols: 500, total_scanned: 480, matches: 12, api_calls: 730
+    """
+    __tablename__ = "scan_runs"
+
+    # Primary Key (rośnie z czasem - najnowszy run = największe id)
+    id = Column(Integer, primary_key=True)
+
+    # ID scanu widoczne w API (scan_id z POST /api/scan, job_id) - unikalne
+    scan_id = Column(String(32), nullable=True, unique=True)
+
+    # Skąd scan: "scan" (POST /api/scan), "stream", "job"
+    source = Column(String(16), nullable=False)
+
+    # "running" (stream w trakcie), "completed", "cancelled" (klient się rozłączył)
+    status = Column(String(16), nullable=False)
+
+    # Parametry requestu (symbole, progi kryteriów, lazy, horyzonty stóp zwrotu)
+    params = Column(JSON, nullable=False)
+
+    # Czasy
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+
+    # Liczniki: symbole w requeście, przeskanowane (po kwarantannie), spełniające kryteria
+    total_symbols = Column(Integer, nullable=False)
+    total_scanned = Column(Integer, nullable=True)
+    matches = Column(Integer, nullable=True)
+
+    # Ile Finnhub API calls zużył scan
+    api_calls = Column(Integer, nullable=True)
+
+
 class ScanResult(Base):
     """
     Tabela przechowująca wyniki skanów akcji.
 
     Każdy rekord = jedna akcja która przeszła kryteria w danym dniu.
 
+    W PostgreSQL tabela jest partycjonowana miesięcznie po scan_date
+    (app.services.scan_partitions) - retencja to DROP całej partycji,
+    a zapytania z zakresem dat czytają tylko pasujące miesiące.
+
     Przykład:
     - symbol: "AAPL"
     - scan_date: 2025-10-07
-    - criteria_met: {"volume": 50000000, "rsi": 65, "price_change_7d": 12.5}
+    - criteria_met: {"rsi": 65, "golden_cross": true}
     - price: 175.50
     - volume: 50000000
     """
     __tablename__ = "scan_results"
-
-    # Primary Key
-    id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (
+        # Wyniki runu stronicowane po id - bez sortowania
+        # (wszystkie wyniki: (run_id, id); tylko matches: (run_id, meets_criteria, id))
+        Index("ix_scan_results_run_id_id", "run_id", "id"),
+        Index("ix_scan_results_run_id_meets_criteria", "run_id", "meets_criteria", "id"),
+        # Historia symbolu w czasie (zastępuje pojedynczy indeks na symbol)
+        Index("ix_scan_results_symbol_scan_date", "symbol", "scan_date"),
+        # Partycje miesięczne (klucz partycji musi być w Primary Key)
+        {"postgresql_partition_by": "RANGE (scan_date)"},
+    )
+
+    # Primary Key = (id, scan_date) - wymóg tabeli partycjonowanej
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+
+    # Run scanu (NULL = wiersze sprzed tabeli scan_runs)
+    run_id = Column(Integer, ForeignKey("scan_runs.id", ondelete="CASCADE"), nullable=True)
 
     # Symbol akcji
-    symbol = Column(String, nullable=False, index=True)
+    symbol = Column(String, nullable=False)
 
-    # Data skanu
-    scan_date = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Data skanu (klucz partycji)
+    scan_date = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
 
-    # Spełnione kryteria (JSON - elastyczna struktura)
-    # Przykład: {"volume": 50M, "rsi": 65, "ma_50_cross": true}
+    # Wartości kryteriów bez własnych kolumn (JSON - elastyczna struktura)
+    # Przykład: {"rsi": 65, "golden_cross": true}
     criteria_met = Column(JSON, nullable=False)
 
     # Cena w momencie skanu
@@ -69,3 +130,37 @@ class ScanResult(Base):
 
     # Czy akcja spełnia wszystkie kryteria
     meets_criteria = Column(Boolean, default=False, nullable=False)
+
+
+class ScanDailyRollup(Base):
+    """
+    Dzienne podsumowanie wyników scanu per symbol (tabela 'scan_daily_rollups').
+
+    Wykresy długoterminowe czytają stąd zamiast z scan_results - jeden wiersz
+    na symbol i dzień, przeżywa retencję partycji scan_results.
+
+    Przykład:
+    - symbol: "AAPL", day: 2025-10-07
+    - last_price: 175.50 (ostatni scan tego dnia)
+    - scans: 4, matches: 3
+    """
+    __tablename__ = "scan_daily_rollups"
+
+    # Primary Key = (symbol, day) - zakres dat symbolu to jeden range scan
+    symbol = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    # Ile wyników symbolu tego dnia i ile spełniało kryteria
+    scans = Column(Integer, nullable=False)
+    matches = Column(Integer, nullable=False)
+
+    # Wartości z ostatniego scanu dnia
+    last_scan_date = Column(DateTime(timezone=True), nullable=False)
+    last_price = Column(Float, nullable=False)
+    last_volume = Column(BigInteger, nullable=False)
+    last_market_cap = Column(BigInteger, nullable=True)
+    last_roe = Column(Float, nullable=True)
+    last_forward_pe = Column(Float, nullable=True)
+    last_price_change_7d = Column(Float, nullable=True)
+    last_price_change_30d = Column(Float, nullable=True)
+    last_meets_criteria = Column(Boolean, nullable=False)
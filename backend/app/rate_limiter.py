@@ -0,0 +1,150 @@
+"""
+Rozproszony rate limiter (token bucket) współdzielony przez procesy przez Redis
+
+PROBLEM: @limits(calls=60, period=60) z pakietu ratelimit liczy calls w pamięci procesu.
+Kilka workerów uvicorn / procesów scanu = każdy myśli że ma pełne 60 calls/min
+-> 429 z Finnhub -> exponential backoff sleeps w _make_request_with_retry.
+
+ROZWIĄZANIE: Token bucket w Redis (hash: tokens + timestamp), aktualizowany
+atomowo skryptem Lua. Wszystkie procesy z tym samym API key biorą tokeny
+z jednego bucketa. Czas liczony z zegara Redis (TIME) - bez problemu rozjechanych
+zegarów między maszynami.
+
+Redis niedostępny -> lokalny bucket w pamięci procesu (jak wcześniej ratelimit).
+"""
+import hashlib
+import threading
+import time
+import logging
+from typing import Optional
+from app.cache import redis_cache
+
+logger = logging.getLogger(__name__)
+
+
+# Atomowa rezerwacja tokenu. Token jest zawsze odejmowany - przy pustym buckecie
+# stan schodzi ponizej zera (kolejka rezerwacji), a skrypt zwraca za ile sekund
+# zarezerwowany token bedzie dostepny (0 = od razu). Kolejni czekajacy dostaja
+# coraz dluzsze czasy (1/rate, 2/rate, ...) - nie budza sie wszyscy naraz.
+# Wynik jako string - Redis obcina liczby z Lua do integer.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+tokens = tokens - 1
+local wait = math.max(0, -tokens / rate)
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+-- Klucz zyje co najmniej do ponownego napelnienia bucketa (razem z dlugiem rezerwacji)
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+return tostring(wait)
+"""
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket: max `capacity` calls naraz (burst), potem `capacity / period` calls/s.
+
+    Usage:
+        limiter = TokenBucketLimiter("finnhub:abc123", capacity=60, period=60)
+        limiter.acquire()  # czeka az bedzie wolny token
+        client.quote("AAPL")
+    """
+
+    KEY_PREFIX = "ratelimit"
+
+    def __init__(self, name: str, capacity: int, period: float):
+        """
+        Args:
+            name: Nazwa bucketa (procesy z tą samą nazwą dzielą limit)
+            capacity: Max liczba calls w oknie `period`
+            period: Okno w sekundach (60 = limit na minutę)
+        """
+        self.key = f"{self.KEY_PREFIX}:{name}"
+        self.capacity = capacity
+        self.rate = capacity / period  # tokeny na sekundę
+
+        # Lokalny bucket (fallback gdy Redis niedostępny)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self._script = None
+
+    @classmethod
+    def for_api_key(cls, service: str, api_key: str, capacity: int, period: float) -> "TokenBucketLimiter":
+        """
+        Limiter współdzielony przez wszystkie procesy używające tego samego API key.
+
+        Klucz Redis zawiera hash API key (nie sam klucz).
+        """
+        digest = hashlib.sha256(api_key.encode()).hexdigest()[:12]
+        return cls(f"{service}:{digest}", capacity, period)
+
+    def acquire(self) -> float:
+        """
+        Pobiera 1 token - blokuje (sleep) dopóki zarezerwowany token nie będzie dostępny.
+
+        Token jest rezerwowany od razu, więc wystarczy jeden sleep - czekający
+        są obsługiwani w kolejności rezerwacji zamiast ścigać się po przebudzeniu.
+
+        Returns:
+            Czas czekania w sekundach
+        """
+        wait = self.reserve()
+        if wait > 0:
+            logger.debug(f"[RATE LIMITER] {self.key}: brak tokenów, czekam {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+    def reserve(self) -> float:
+        """
+        Rezerwuje 1 token bez czekania (bucket może zejść poniżej zera).
+
+        Returns:
+            0 jeśli token dostępny od razu, inaczej za ile sekund zarezerwowany token będzie dostępny
+        """
+        wait = self._reserve_redis()
+        if wait is None:
+            wait = self._reserve_local()
+        return wait
+
+    def _reserve_redis(self) -> Optional[float]:
+        """
+        Rezerwacja tokenu w buckecie Redis (atomowo, skrypt Lua).
+
+        Returns:
+            Czas oczekiwania lub None jeśli Redis niedostępny (-> lokalny bucket)
+        """
+        if redis_cache.client is None or not redis_cache.is_available():
+            return None
+
+        try:
+            if self._script is None:
+                self._script = redis_cache.client.register_script(TOKEN_BUCKET_SCRIPT)
+            wait = float(self._script(keys=[self.key], args=[self.capacity, self.rate]))
+            redis_cache.health.record_success()
+            return wait
+        except Exception as e:
+            redis_cache.report_error(e)
+            logger.warning(f"[RATE LIMITER] Redis error ({e}) - używam lokalnego bucketa")
+            return None
+
+    def _reserve_local(self) -> float:
+        """
+        Rezerwacja tokenu w buckecie w pamięci procesu (thread-safe, ta sama logika co skrypt Lua).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
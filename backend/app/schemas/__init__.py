@@ -1,10 +1,12 @@
 """
 Pydantic schemas (modele danych dla API requests/responses)
 """
-from app.schemas.scan import ScanRequest, ScanResponse, StockResult
+from app.schemas.scan import ScanCriteria, ScanJobStatus, ScanRequest, ScanResponse, StockResult
 from app.schemas.portfolio import PortfolioItemCreate, PortfolioItemUpdate, PortfolioItemResponse
 
 __all__ = [
+    "ScanCriteria",
+    "ScanJobStatus",
     "ScanRequest",
     "ScanResponse",
     "StockResult",
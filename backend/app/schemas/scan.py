@@ -2,32 +2,21 @@
 Pydantic schemas dla Stock Scanner
 """
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Any, ClassVar, Dict, List, Optional
 
 
-class ScanRequest(BaseModel):
+class ScanCriteria(BaseModel):
     """
-    Request body dla POST /api/scan - z kryteriami MULTIBAGGER
+    Progi kryteriow MULTIBAGGER (wspolne dla scanu i re-filtra).
 
-    Przyklad (wszystkie parametry opcjonalne poza symbols):
+    Request body dla POST /api/scan/{scan_id}/refilter:
     {
-        "symbols": ["AAPL", "MSFT", "TSLA"],
-        "min_volume": 1000000,
-        "min_market_cap": 50000000,
-        "max_market_cap": 5000000000,
-        "min_roe": 15.0,
-        "min_roce": 10.0,
-        "max_debt_equity": 0.3,
-        "min_revenue_growth": 15.0,
-        "max_forward_pe": 15.0
+        "min_roe": 20.0,
+        "max_forward_pe": 12.0,
+        "only_matches": true
     }
     """
-    symbols: List[str] = Field(
-        ...,
-        min_length=1,
-        description="Lista symboli akcji do skanowania (np. ['AAPL', 'MSFT']). Musi zawierac co najmniej 1 symbol.",
-        example=["AAPL", "MSFT", "TSLA"]
-    )
     min_volume: Optional[int] = Field(
         1000000,
         ge=0,
@@ -77,6 +66,135 @@ class ScanRequest(BaseModel):
         example=15.0
     )
 
+    # === WSKAZNIKI TECHNICZNE (z historii cen, 0 API calls; None = kryterium wylaczone) ===
+    min_rsi: Optional[float] = Field(None, ge=0, le=100, description="Min RSI 14", example=40.0)
+    max_rsi: Optional[float] = Field(None, ge=0, le=100, description="Max RSI 14 (70 = bez wykupienia)", example=70.0)
+    min_pct_from_sma_50: Optional[float] = Field(
+        None,
+        description="Min odleglosc ceny od SMA 50 (%). 0 = cena nad SMA 50",
+        example=0.0
+    )
+    min_pct_from_sma_200: Optional[float] = Field(
+        None,
+        description="Min odleglosc ceny od SMA 200 (%). 0 = cena nad SMA 200",
+        example=0.0
+    )
+    golden_cross: Optional[bool] = Field(
+        None,
+        description="True = tylko SMA 50 przecinajaca SMA 200 w gore w ostatnich 5 sesjach",
+        example=True
+    )
+    death_cross: Optional[bool] = Field(
+        None,
+        description="True = tylko death cross (SMA 50 pod SMA 200), False = bez death cross",
+        example=False
+    )
+    min_avg_volume: Optional[float] = Field(
+        None,
+        ge=0,
+        description="Min sredni wolumen z 20 sesji",
+        example=500000
+    )
+    max_atr_percent: Optional[float] = Field(
+        None,
+        ge=0,
+        description="Max ATR 14 jako % ceny (zmiennosc)",
+        example=5.0
+    )
+    min_pct_from_52w_high: Optional[float] = Field(
+        None,
+        le=0,
+        description="Min odleglosc od 52-tyg. maksimum (%). -10 = max 10% ponizej szczytu",
+        example=-10.0
+    )
+    min_pct_from_52w_low: Optional[float] = Field(
+        None,
+        ge=0,
+        description="Min odleglosc od 52-tyg. minimum (%). 30 = min 30% nad dolkiem",
+        example=30.0
+    )
+
+    only_matches: bool = Field(
+        False,
+        description="Zwroc tylko akcje spelniajace kryteria",
+        example=False
+    )
+
+    # Pola kryteriow technicznych (StockScanner.scan_stocks(indicator_thresholds=...))
+    INDICATOR_FIELDS: ClassVar[List[str]] = [
+        "min_rsi",
+        "max_rsi",
+        "min_pct_from_sma_50",
+        "min_pct_from_sma_200",
+        "golden_cross",
+        "death_cross",
+        "min_avg_volume",
+        "max_atr_percent",
+        "min_pct_from_52w_high",
+        "min_pct_from_52w_low",
+    ]
+
+    def thresholds(self) -> Dict[str, Optional[float]]:
+        """
+        Progi kryteriow jako dict (param -> wartosc) dla criteria engine.
+
+        Returns:
+            Dict np. {"min_volume": 1000000, "min_roe": 15.0, ...}
+        """
+        return self.model_dump(include=set(ScanCriteria.model_fields) - {"only_matches"})
+
+    def indicator_thresholds(self) -> Dict[str, Optional[float]]:
+        """
+        Progi kryteriow technicznych (tylko ustawione) dla StockScanner.scan_stocks().
+        """
+        return {
+            field: value for field, value in self.model_dump(include=set(self.INDICATOR_FIELDS)).items()
+            if value is not None
+        }
+
+
+class ScanRequest(ScanCriteria):
+    """
+    Request body dla POST /api/scan - z kryteriami MULTIBAGGER
+
+    Przyklad (wszystkie parametry opcjonalne poza symbols):
+    {
+        "symbols": ["AAPL", "MSFT", "TSLA"],
+        "min_volume": 1000000,
+        "min_market_cap": 50000000,
+        "max_market_cap": 5000000000,
+        "min_roe": 15.0,
+        "min_roce": 10.0,
+        "max_debt_equity": 0.3,
+        "min_revenue_growth": 15.0,
+        "max_forward_pe": 15.0
+    }
+    """
+    symbols: List[str] = Field(
+        ...,
+        min_length=1,
+        description="Lista symboli akcji do skanowania (np. ['AAPL', 'MSFT']). Musi zawierac co najmniej 1 symbol.",
+        example=["AAPL", "MSFT", "TSLA"]
+    )
+    max_workers: Optional[int] = Field(
+        None,
+        ge=1,
+        le=32,
+        description="Ile symboli skanowac rownolegle (domyslnie z konfiguracji SCAN_MAX_WORKERS)",
+        example=8
+    )
+    lazy: bool = Field(
+        False,
+        description="Leniwa ewaluacja: kryteria od najtanszego zrodla danych, "
+                    "bez Finnhub API calls dla symboli juz odrzuconych",
+        example=True
+    )
+    return_horizons: List[str] = Field(
+        default_factory=list,
+        description="Dodatkowe stopy zwrotu w StockResult.returns (1d, 5d, 7d, 30d, 90d, 1y, ytd)",
+        example=["1d", "90d", "ytd"]
+    )
+
     @field_validator('symbols')
     @classmethod
     def validate_symbols_not_empty(cls, v: List[str]) -> List[str]:
@@ -96,6 +214,16 @@ class ScanRequest(BaseModel):
             raise ValueError('symbols list cannot be empty')
         return v
 
+    @field_validator('return_horizons')
+    @classmethod
+    def validate_return_horizons(cls, v: List[str]) -> List[str]:
+        """
+        Walidator horyzontow stop zwrotu (nieznany horyzont = 422, duplikaty usuwane).
+        """
+        # Import lokalny - app.services importuje schemas (cykl przy imporcie modulu)
+        from app.services.returns import validate_horizons
+        return validate_horizons(v)
+
 
 class StockResult(BaseModel):
     """
@@ -115,7 +243,37 @@ class StockResult(BaseModel):
     revenue_growth: Optional[float] = Field(None, description="Revenue Growth YoY (%)", example=22.1)
     forward_pe: Optional[float] = Field(None, description="Forward P/E ratio", example=12.5)
 
+    # === WSKAZNIKI TECHNICZNE (None = za krotka historia) ===
+    rsi_14: Optional[float] = Field(None, description="RSI 14 (Wilder)", example=58.3)
+    sma_50: Optional[float] = Field(None, description="SMA 50", example=170.2)
+    sma_200: Optional[float] = Field(None, description="SMA 200", example=161.8)
+    ema_20: Optional[float] = Field(None, description="EMA 20", example=173.9)
+    pct_from_sma_50: Optional[float] = Field(None, description="Cena wzgledem SMA 50 (%)", example=3.1)
+    pct_from_sma_200: Optional[float] = Field(None, description="Cena wzgledem SMA 200 (%)", example=8.5)
+    golden_cross: Optional[bool] = Field(None, description="SMA 50 przeciela SMA 200 w gore (5 sesji)", example=False)
+    death_cross: Optional[bool] = Field(None, description="SMA 50 przeciela SMA 200 w dol (5 sesji)", example=False)
+    atr_14: Optional[float] = Field(None, description="ATR 14", example=3.2)
+    atr_percent: Optional[float] = Field(None, description="ATR 14 jako % ceny", example=1.8)
+    avg_volume_20: Optional[float] = Field(None, description="Sredni wolumen 20 sesji", example=48000000)
+    pct_from_52w_high: Optional[float] = Field(None, description="Odleglosc od 52-tyg. maksimum (%)", example=-4.2)
+    pct_from_52w_low: Optional[float] = Field(None, description="Odleglosc od 52-tyg. minimum (%)", example=35.7)
+
     meets_criteria: bool = Field(..., description="Czy akcja spelnia kryteria", example=True)
+    rejected_at: Optional[str] = Field(
+        None,
+        description="Etap na ktorym akcja odpadla ('history' lub 'fundamentals'), None jesli spelnia kryteria",
+        example=None
+    )
+    stale: bool = Field(
+        False,
+        description="Quote lub fundamentals z cache po TTL (stale-while-revalidate, odswiezane w tle)",
+        example=False
+    )
+    returns: Optional[Dict[str, Optional[float]]] = Field(
+        None,
+        description="Stopy zwrotu (%) dla return_horizons z requestu (None = za krotka historia)",
+        example={"1d": 0.8, "ytd": 12.4}
+    )
 
 
 class ScanResponse(BaseModel):
@@ -129,6 +287,151 @@ class ScanResponse(BaseModel):
         "results": [...]
     }
     """
+    scan_id: Optional[str] = Field(
+        None,
+        description="ID datasetu scanu - do POST /api/scan/{scan_id}/refilter (bez API calls)",
+        example="3f2b9c0e8a4d4b7f9e1c2a5d6b8f0e13"
+    )
     total_scanned: int = Field(..., description="Ilosc przeskanowanych akcji")
     matches: int = Field(..., description="Ilosc akcji spelniajacych kryteria")
     results: List[StockResult] = Field(..., description="Lista wynikow")
+
+
+class ScanJobStatus(BaseModel):
+    """
+    Response dla POST /api/scan/jobs i GET /api/scan/jobs/{job_id}
+
+    Przyklad:
+    {
+        "job_id": "9b1deb4d3b7d4bad9bdd2b0d7b3dcb6d",
+        "status": "running",
+        "total_symbols": 500,
+        "symbols_done": 120,
+        "api_calls": 231,
+        "progress_percent": 24.0,
+        "eta_seconds": 380.0
+    }
+    """
+    job_id: str = Field(..., description="ID joba (= scan_id do re-filtra)")
+    status: str = Field(..., description="queued / running / completed / failed", example="running")
+    total_symbols: int = Field(..., description="Ilosc symboli do przeskanowania")
+    symbols_done: int = Field(..., description="Ilosc juz przetworzonych symboli")
+    api_calls: int = Field(..., description="Ilosc wykonanych Finnhub API calls")
+    progress_percent: float = Field(..., description="Postep (%)", example=24.0)
+    eta_seconds: Optional[float] = Field(None, description="Szacowany czas do konca (rate limiter)", example=380.0)
+    created_at: datetime = Field(..., description="Czas dodania joba (UTC)")
+    started_at: Optional[datetime] = Field(None, description="Czas startu scanu (UTC)")
+    finished_at: Optional[datetime] = Field(None, description="Czas zakonczenia (UTC)")
+    error: Optional[str] = Field(None, description="Opis bledu (status failed)")
+
+
+class ScanRunSummary(BaseModel):
+    """
+    Run scanu na liscie GET /api/scan/runs (bez parametrow requestu)
+
+    Przyklad:
+    {
+        "id": 42,
+        "scan_id": "9b1deb4d3b7d4bad9bdd2b0d7b3dcb6d",
+        "source": "job",
+        "status": "completed",
+        "started_at": "2026-10-16T14:30:00Z",
+        "duration_seconds": 512.4,
+        "total_symbols": 500,
+        "total_scanned": 480,
+        "matches": 12,
+        "api_calls": 730
+    }
+    """
+    id: int = Field(..., description="ID runu (do GET /api/scan/runs/{run_id}/results)")
+    scan_id: Optional[str] = Field(None, description="scan_id / job_id z API")
+    source: str = Field(..., description="scan / stream / job", example="job")
+    status: str = Field(..., description="running / completed / cancelled", example="completed")
+    started_at: datetime = Field(..., description="Czas startu scanu (UTC)")
+    finished_at: Optional[datetime] = Field(None, description="Czas zakonczenia (UTC)")
+    duration_seconds: Optional[float] = Field(None, description="Czas trwania (s)", example=512.4)
+    total_symbols: int = Field(..., description="Ilosc symboli w requescie")
+    total_scanned: Optional[int] = Field(None, description="Ilosc przeskanowanych symboli (po kwarantannie)")
+    matches: Optional[int] = Field(None, description="Ilosc akcji spelniajacych kryteria")
+    api_calls: Optional[int] = Field(None, description="Ilosc wykonanych Finnhub API calls")
+
+    class Config:
+        from_attributes = True  # Pozwala konwersje z SQLAlchemy model -> Pydantic
+
+
+class ScanRunDetail(ScanRunSummary):
+    """
+    Response dla GET /api/scan/runs/{run_id} - run + parametry requestu
+    """
+    params: Dict[str, Any] = Field(..., description="Symbole, progi kryteriow, lazy, only_matches, return_horizons")
+
+
+class ScanRunPage(BaseModel):
+    """
+    Response dla GET /api/scan/runs - strona runow od najnowszego
+    """
+    runs: List[ScanRunSummary] = Field(..., description="Runy (id malejaco)")
+    next_before_id: Optional[int] = Field(None, description="Kursor nastepnej strony (None = koniec)")
+
+
+class StoredScanResult(BaseModel):
+    """
+    Wynik scanu zapisany w scan_results
+    """
+    id: int
+    symbol: str
+    scan_date: Optional[datetime]
+    price: float
+    volume: int
+    price_change_7d: Optional[float]
+    price_change_30d: Optional[float]
+    market_cap: Optional[int]
+    roe: Optional[float]
+    roce: Optional[float]
+    debt_equity: Optional[float]
+    revenue_growth: Optional[float]
+    forward_pe: Optional[float]
+    meets_criteria: bool
+    criteria_met: Dict[str, Any]
+
+    class Config:
+        from_attributes = True  # Pozwala konwersje z SQLAlchemy model -> Pydantic
+
+
+class ScanRunResultsPage(BaseModel):
+    """
+    Response dla GET /api/scan/runs/{run_id}/results - strona wynikow runu
+    """
+    run_id: int
+    results: List[StoredScanResult] = Field(..., description="Wyniki (id rosnaco)")
+    next_after_id: Optional[int] = Field(None, description="Kursor nastepnej strony (None = koniec)")
+
+
+class ScanDailyRollupResponse(BaseModel):
+    """
+    Response dla GET /api/scan/symbols/{symbol}/daily (jeden dzien)
+
+    Przyklad:
+    {
+        "day": "2026-10-16",
+        "scans": 4,
+        "matches": 3,
+        "last_price": 175.5,
+        "last_meets_criteria": true
+    }
+    """
+    day: date = Field(..., description="Dzien (UTC)")
+    scans: int = Field(..., description="Ilosc wynikow symbolu tego dnia")
+    matches: int = Field(..., description="Ile z nich spelnialo kryteria")
+    last_scan_date: datetime = Field(..., description="Czas ostatniego scanu dnia")
+    last_price: float
+    last_volume: int
+    last_market_cap: Optional[int]
+    last_roe: Optional[float]
+    last_forward_pe: Optional[float]
+    last_price_change_7d: Optional[float]
+    last_price_change_30d: Optional[float]
+    last_meets_criteria: bool
+
+    class Config:
+        from_attributes = True  # Pozwala konwersje z SQLAlchemy model -> Pydantic
@@ -3,5 +3,6 @@ Business logic services
 """
 from app.services.scanner import StockScanner
 from app.services.portfolio import PortfolioService
+from app.services.price_history import PriceHistoryService
 
-__all__ = ["StockScanner", "PortfolioService"]
+__all__ = ["StockScanner", "PortfolioService", "PriceHistoryService"]
@@ -0,0 +1,220 @@
+"""
+Criteria Engine - wektorowe kryteria MULTIBAGGER na kolumnowej tabeli metryk
+
+Zamiast lancucha `if` per symbol:
+1. Faza FETCH zbiera metryki kazdego symbolu do wiersza (dict)
+2. Wiersze -> kolumnowa tabela (pandas DataFrame, kolumny = numpy float arrays)
+3. Kazde kryterium = maska boolean liczona naraz dla CALEGO universe
+
+Nowe kryterium = jedna linia w CRITERIA (kolumna + operator), nie kolejny blok `if`.
+Re-filtrowanie tysiecy symboli z innymi progami = ulamek milisekundy.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional
+import numpy as np
+import pandas as pd
+from app.services.indicators import INDICATOR_COLUMNS
+
+# Etapy ewaluacji kryteriow (od najtanszego zrodla danych) - StockResult.rejected_at
+STAGE_HISTORY = "history"            # volume, zmiana ceny, wskazniki techniczne (historia, 0 API calls)
+STAGE_FUNDAMENTALS = "fundamentals"  # market cap, ROE, ROCE, D/E, growth, P/E (1 Finnhub call)
+STAGES = [STAGE_HISTORY, STAGE_FUNDAMENTALS]
+
+# Kolumny numeryczne tabeli metryk (nazwy = pola StockResult)
+METRIC_COLUMNS = [
+    "price",
+    "volume",
+    "price_change_7d",
+    "price_change_30d",
+    "market_cap",
+    "roe",
+    "roce",
+    "debt_equity",
+    "revenue_growth",
+    "forward_pe",
+    # Wskazniki techniczne (app.services.indicators)
+    *INDICATOR_COLUMNS,
+]
+
+
+@dataclass(frozen=True)
+class Criterion:
+    """
+    Pojedyncze kryterium jako wyrazenie na kolumnie.
+
+    Attributes:
+        param: Nazwa progu (= argument scan_stocks / pole ScanRequest)
+        column: Kolumna tabeli metryk
+        op: ">=" (minimum), "<=" (maksimum) lub "==" (flaga tak / nie, np. golden cross)
+        stage: Etap w ktorym dane kolumny sa dostepne
+        skip_missing: True = brak danych (NaN) pomija kryterium,
+            False = brak danych oznacza niespelnione kryterium
+    """
+    param: str
+    column: str
+    op: str
+    stage: str
+    skip_missing: bool = False
+
+    def mask(self, columns: Mapping[str, Any], threshold: float) -> np.ndarray:
+        """
+        Liczy maske boolean dla wszystkich wierszy naraz.
+
+        Args:
+            columns: DataFrame lub dict kolumna -> array
+            threshold: Prog kryterium
+
+        Returns:
+            np.ndarray[bool] - True gdzie kryterium spelnione
+        """
+        values = np.asarray(columns[self.column], dtype=float)
+        # Porownanie z NaN daje False (+ RuntimeWarning ktory wyciszamy)
+        with np.errstate(invalid="ignore"):
+            if self.op == ">=":
+                passed = values >= threshold
+            elif self.op == "==":
+                passed = values == float(threshold)
+            else:
+                passed = values <= threshold
+        if self.skip_missing:
+            passed |= np.isnan(values)
+        return passed
+
+
+# Definicje kryteriow MULTIBAGGER (kolejnosc = kolejnosc etapow)
+CRITERIA: List[Criterion] = [
+    # Kryterium 1: Volume
+    Criterion("min_volume", "volume", ">=", STAGE_HISTORY),
+    # Kryterium 2: Price change 7d (pomijane gdy za malo historii)
+    Criterion("min_price_change_percent", "price_change_7d", ">=", STAGE_HISTORY, skip_missing=True),
+    # Kryterium 3: Market Cap (zakres)
+    Criterion("min_market_cap", "market_cap", ">=", STAGE_FUNDAMENTALS),
+    Criterion("max_market_cap", "market_cap", "<=", STAGE_FUNDAMENTALS),
+    # Kryterium 4: ROE
+    Criterion("min_roe", "roe", ">=", STAGE_FUNDAMENTALS),
+    # Kryterium 5: ROCE
+    Criterion("min_roce", "roce", ">=", STAGE_FUNDAMENTALS),
+    # Kryterium 6: Debt/Equity
+    Criterion("max_debt_equity", "debt_equity", "<=", STAGE_FUNDAMENTALS),
+    # Kryterium 7: Revenue Growth
+    Criterion("min_revenue_growth", "revenue_growth", ">=", STAGE_FUNDAMENTALS),
+    # Kryterium 8: Forward P/E
+    Criterion("max_forward_pe", "forward_pe", "<=", STAGE_FUNDAMENTALS),
+]
+
+# Kryteria techniczne (z historii - ten sam etap co volume, 0 API calls)
+INDICATOR_CRITERIA: List[Criterion] = [
+    Criterion("min_rsi", "rsi_14", ">=", STAGE_HISTORY),
+    Criterion("max_rsi", "rsi_14", "<=", STAGE_HISTORY),
+    # Cena wzgledem srednich (0 = cena nad SMA)
+    Criterion("min_pct_from_sma_50", "pct_from_sma_50", ">=", STAGE_HISTORY),
+    Criterion("min_pct_from_sma_200", "pct_from_sma_200", ">=", STAGE_HISTORY),
+    Criterion("golden_cross", "golden_cross", "==", STAGE_HISTORY),
+    Criterion("death_cross", "death_cross", "==", STAGE_HISTORY),
+    Criterion("min_avg_volume", "avg_volume_20", ">=", STAGE_HISTORY),
+    Criterion("max_atr_percent", "atr_percent", "<=", STAGE_HISTORY),
+    # Np. -10 = max 10% ponizej 52-tyg. maksimum, 30 = min 30% nad minimum
+    Criterion("min_pct_from_52w_high", "pct_from_52w_high", ">=", STAGE_HISTORY),
+    Criterion("min_pct_from_52w_low", "pct_from_52w_low", ">=", STAGE_HISTORY),
+]
+CRITERIA.extend(INDICATOR_CRITERIA)
+
+# Progi kryteriow technicznych (pola ScanRequest przekazywane jako indicator_thresholds)
+INDICATOR_CRITERIA_PARAMS = [criterion.param for criterion in INDICATOR_CRITERIA]
+
+# Nazwy wszystkich progow (do budowania thresholds z ScanRequest / kwargs)
+CRITERIA_PARAMS = list(dict.fromkeys(criterion.param for criterion in CRITERIA))
+
+
+def build_metrics_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Buduje kolumnowa tabele metryk z wierszy zebranych w fazie fetch.
+
+    Args:
+        rows: Lista dict z kluczem "symbol" + METRIC_COLUMNS (None = brak danych)
+
+    Returns:
+        DataFrame (kolumna symbol + float kolumny metryk, None -> NaN)
+    """
+    frame = pd.DataFrame.from_records(rows, columns=["symbol", *METRIC_COLUMNS])
+    frame[METRIC_COLUMNS] = frame[METRIC_COLUMNS].astype(float)
+    return frame
+
+
+def evaluate_criteria(
+    columns: Mapping[str, Any],
+    thresholds: Mapping[str, Optional[float]],
+    stage: Optional[str] = None
+) -> np.ndarray:
+    """
+    Liczy maske "spelnia wszystkie kryteria" dla calej tabeli.
+
+    Args:
+        columns: DataFrame z build_metrics_frame() (lub dict kolumna -> array)
+        thresholds: Progi (param -> wartosc, None = kryterium wylaczone)
+        stage: Tylko kryteria z danego etapu (None = wszystkie)
+
+    Returns:
+        np.ndarray[bool] o dlugosci = liczba wierszy
+    """
+    size = len(np.asarray(columns["volume"]))
+    mask = np.ones(size, dtype=bool)
+
+    for criterion in CRITERIA:
+        if stage is not None and criterion.stage != stage:
+            continue
+        threshold = thresholds.get(criterion.param)
+        if threshold is None:
+            continue
+        mask &= criterion.mask(columns, threshold)
+
+    return mask
+
+
+def rejected_stages(
+    columns: Mapping[str, Any],
+    thresholds: Mapping[str, Optional[float]]
+) -> np.ndarray:
+    """
+    Dla kazdego wiersza zwraca PIERWSZY etap ktorego kryteria nie sa spelnione.
+
+    Args:
+        columns: DataFrame z build_metrics_frame()
+        thresholds: Progi kryteriow
+
+    Returns:
+        np.ndarray[object] - nazwa etapu lub None (spelnia wszystkie kryteria)
+    """
+    size = len(np.asarray(columns["volume"]))
+    stages = np.full(size, None, dtype=object)
+
+    # Od najdrozszego do najtanszego - wczesniejszy etap nadpisuje pozniejszy
+    for stage in reversed(STAGES):
+        stages[~evaluate_criteria(columns, thresholds, stage)] = stage
+
+    return stages
+
+
+def row_passes_stage(
+    row: Dict[str, Any],
+    thresholds: Mapping[str, Optional[float]],
+    stage: str
+) -> bool:
+    """
+    Sprawdza kryteria jednego etapu dla pojedynczego wiersza (tryb lazy).
+
+    Uzywa tych samych definicji CRITERIA co ewaluacja wektorowa.
+
+    Args:
+        row: Wiersz metryk jednego symbolu
+        thresholds: Progi kryteriow
+        stage: Etap do sprawdzenia
+
+    Returns:
+        True jesli wszystkie kryteria etapu sa spelnione
+    """
+    columns = {
+        column: np.array([np.nan if row.get(column) is None else row[column]], dtype=float)
+        for column in METRIC_COLUMNS
+    }
+    return bool(evaluate_criteria(columns, thresholds, stage)[0])
@@ -6,17 +6,26 @@ FREE tier: 60 API calls/minute
 Dokumentacja: https://finnhub.io/docs/api
 
 OPTYMALIZACJE:
-1. Redis cache (15 minut TTL) - zmniejsza API calls
-2. Rate limiter (60 calls/min) - chroni przed przekroczeniem limitów
+1. Redis cache (TTL z app.cache_policy: quote krótko w sesji / do otwarcia
+   po zamknięciu, fundamentals dni) - zmniejsza API calls
+   + negative cache (NEGATIVE_CACHE_TTL) dla symboli bez danych
+   + stale-while-revalidate (CACHE_MAX_STALE) - po TTL stara wartość od razu, odświeżenie w tle
+   + fundamentals: trwały snapshot w PostgreSQL (app.services.fundamentals_snapshots)
+     - flush / restart Redis nie oznacza ponownego pobrania całego universe
+2. Rate limiter (60 calls/min) - token bucket w Redis, wspólny dla wszystkich procesów
 3. Exponential backoff - retry przy 429 error
 """
 import finnhub
-from typing import Optional, Dict, Callable, Any
+from typing import Optional, Dict, Callable, Any, List
 import logging
+import threading
 import time
-from ratelimit import limits, sleep_and_retry
 from app.config import settings
-from app.cache import cache
+from app.cache import KNOWN_EMPTY, FetchedAt, build_cache_key, cache, redis_cache, swr_envelope
+from app.cache_policy import DATA_FUNDAMENTALS, DATA_PROFILE, DATA_QUOTE, ttl_policy
+from app.rate_limiter import TokenBucketLimiter
+from app.services.fundamentals import project_fundamentals
+from app.services.fundamentals_snapshots import fundamentals_snapshots
 
 logger = logging.getLogger(__name__)
 
@@ -32,8 +41,8 @@ class FinnhubClient:
     - Oficjalny Python SDK
 
     OPTYMALIZACJE:
-    - Rate limiter: Max 60 calls/min (automatyczne czekanie)
-    - Redis cache: 15 min TTL (zmniejsza API calls)
+    - Rate limiter: Max 60 calls/min na API key (wspólny dla procesów przez Redis)
+    - Redis cache: TTL zależny od typu danych i sesji giełdy (zmniejsza API calls)
     - Retry logic: Exponential backoff przy 429 errors
     """
 
@@ -41,6 +50,11 @@ class FinnhubClient:
     CALLS_PER_MINUTE = 60  # FREE tier limit
     RATE_LIMIT_PERIOD = 60  # 60 sekund
 
+    # Jeden bucket na API key - dzielony przez wszystkie instancje, wątki i procesy
+    rate_limiter = TokenBucketLimiter.for_api_key(
+        "finnhub", settings.FINNHUB_API_KEY, CALLS_PER_MINUTE, RATE_LIMIT_PERIOD
+    )
+
     def __init__(self):
         """
         Inicjalizuje klienta Finnhub.
@@ -57,14 +71,85 @@ class FinnhubClient:
         # Inicjalizuj oficjalny klient Finnhub
         self.client = finnhub.Client(api_key=self.api_key)
 
-    @sleep_and_retry
-    @limits(calls=CALLS_PER_MINUTE, period=RATE_LIMIT_PERIOD)
+        # Licznik wykonanych API calls (cache hit sie nie liczy) - postep jobow scanu.
+        # Klient jest wspoldzielony przez watki scannera, wiec licznik pod lockiem.
+        self.api_calls = 0
+        # Calls zakonczone bledem / wyczerpanym retry (429) - scan z awaria API
+        # nie liczy pustych wynikow do kwarantanny symboli
+        self.failed_calls = 0
+        self._api_calls_lock = threading.Lock()
+
+    # Metody z @cache, których wyniki scanner potrzebuje dla każdego symbolu
+    PREFETCH_METHODS = ("get_quote", "get_fundamentals")
+
+    def prefetch(self, symbols: List[str]) -> List[str]:
+        """
+        Rozgrzewa cache dla całego scanu: quote + fundamentals WSZYSTKICH symboli
+        jednym pipeline do Redis (zamiast ~4 round tripów per symbol).
+
+        Trafienia lądują w cache L1, więc get_quote()/get_fundamentals() dla nich
+        nie robią już round tripów ani API calls. Przy dużych universe
+        CACHE_L1_MAX_ITEMS powinien być >= 2 x liczba symboli.
+
+        Args:
+            symbols: Symbole scanu
+
+        Returns:
+            Symbole dla których brakuje czegoś w cache (będą API calls)
+        """
+        keys = {
+            symbol: [build_cache_key("finnhub", method, (symbol,)) for method in self.PREFETCH_METHODS]
+            for symbol in dict.fromkeys(symbols)
+        }
+        found = redis_cache.get_many([key for symbol_keys in keys.values() for key in symbol_keys])
+
+        # Fundamentals spoza cache (np. po flushu Redis) - ze snapshotów w bazie
+        without_fundamentals = [
+            symbol for symbol in keys
+            if build_cache_key("finnhub", "get_fundamentals", (symbol,)) not in found
+        ]
+        found.update(self._seed_from_snapshots(without_fundamentals))
+
+        misses = [symbol for symbol, symbol_keys in keys.items() if not all(key in found for key in symbol_keys)]
+        logger.info(
+            f"[PREFETCH] Cache: {len(keys) - len(misses)}/{len(keys)} symboli w całości, "
+            f"{len(misses)} do pobrania z API"
+        )
+        return misses
+
+    def _seed_from_snapshots(self, symbols: List[str]) -> Dict[str, Any]:
+        """
+        Fundamentals spoza cache ze snapshotów w bazie (jeden SELECT) -> cache.
+
+        Koperta SWR ma czas pobrania z API (as_of), więc snapshot starszy niż
+        FUNDAMENTALS_SNAPSHOT_MAX_AGE (ale w oknie CACHE_MAX_STALE) jest od razu
+        zwracany jako nieświeży i odświeżany w tle - scan po flushu Redis nie czeka.
+
+        Returns:
+            Dict klucz cache -> zapisana koperta
+        """
+        if not symbols or not fundamentals_snapshots.enabled:
+            return {}
+
+        max_age = fundamentals_snapshots.max_age
+        snapshots = fundamentals_snapshots.get_many(symbols, max_age=max_age + settings.CACHE_MAX_STALE)
+        seeded = {
+            build_cache_key("finnhub", "get_fundamentals", (symbol,)):
+                swr_envelope(snapshot.payload, max_age, stored_at=snapshot.as_of.timestamp())
+            for symbol, snapshot in snapshots.items()
+        }
+        if seeded:
+            redis_cache.set_many(seeded, max_age + settings.CACHE_MAX_STALE)
+            logger.info(f"[PREFETCH] Snapshoty fundamentals z bazy: {len(seeded)}/{len(symbols)}")
+        return seeded
+
     def _rate_limited_call(self, func: Callable, *args, **kwargs) -> Any:
         """
         Wrapper dla WSZYSTKICH Finnhub API calls z rate limiting.
 
         Automatycznie czeka jeśli przekroczony limit 60 calls/min.
-        Decorator @sleep_and_retry powoduje że funkcja czeka zamiast rzucić error.
+        Token bucket w Redis jest wspólny dla wszystkich workerów uvicorn i procesów
+        scanu z tym samym API key (fallback: lokalny bucket gdy Redis nie działa).
 
         Args:
             func: Funkcja Finnhub API do wywołania (np. self.client.quote)
@@ -78,6 +163,7 @@ class FinnhubClient:
             # Zamiast: self.client.quote("AAPL")
             # Używamy: self._rate_limited_call(self.client.quote, "AAPL")
         """
+        self.rate_limiter.acquire()
         logger.debug(f"[RATE LIMITER] Calling {func.__name__} with args={args}")
         return func(*args, **kwargs)
 
@@ -104,6 +190,9 @@ class FinnhubClient:
             Wynik funkcji lub None jeśli wszystkie próby failed
         """
         for attempt in range(max_retries):
+            with self._api_calls_lock:
+                self.api_calls += 1
+
             try:
                 # Użyj rate limiter wrapper
                 return self._rate_limited_call(func, *args, **kwargs)
@@ -123,29 +212,42 @@ class FinnhubClient:
 
                 # Inny błąd - rzuć error
                 logger.error(f"API error: {error_str}")
+                with self._api_calls_lock:
+                    self.failed_calls += 1
                 raise
 
         # Wszystkie próby failed
         logger.error(f"Max retries ({max_retries}) exceeded")
+        with self._api_calls_lock:
+            self.failed_calls += 1
         return None
 
-    @cache(ttl=900, key_prefix="finnhub")  # Cache 15 minut
+    @cache(
+        ttl=ttl_policy.ttl_for(DATA_FUNDAMENTALS),  # Dni - zmieniają się przy raportach
+        key_prefix="finnhub",
+        negative_ttl=settings.NEGATIVE_CACHE_TTL,
+        max_stale=settings.CACHE_MAX_STALE
+    )
     def get_fundamentals(self, symbol: str) -> Optional[Dict]:
         """
         Pobierz WSZYSTKIE fundamentals w jednym API calu.
 
         OPTYMALIZACJE:
-        - Cache: 15 minut TTL
+        - Cache: CACHE_TTL_FUNDAMENTALS (domyślnie 1 dzień)
         - Rate limiter: Max 60 calls/min
         - Retry: Exponential backoff przy 429
+        - Projekcja: do cache trafiaja tylko metryki/serie uzywane przez screener
+          (+ settings.FUNDAMENTALS_METRICS / FUNDAMENTALS_SERIES) - app.services.fundamentals
+        - Snapshot w PostgreSQL: cache MISS najpierw czyta snapshot mlodszy niz
+          FUNDAMENTALS_SNAPSHOT_MAX_AGE (0 API calls), wynik API zapisywany jako nowy snapshot
 
         Args:
             symbol: Symbol akcji (np. "AAPL")
 
         Returns:
-            Dict z kluczami:
-            - 'metric': Dict z 117 metrykami (roeTTM, roicTTM, totalDebtToEquity, etc.)
-            - 'series': Dict z historical data (annual, quarterly)
+            Dict (zprojektowana odpowiedz Finnhub) z kluczami:
+            - 'metric': Dict z metrykami (roeTTM, marketCapitalization, peTTM, etc.)
+            - 'series': Dict z najnowszymi punktami serii (annual.roic, ...)
 
         Example response:
         {
@@ -168,6 +270,14 @@ class FinnhubClient:
         }
         """
         try:
+            # Snapshot z bazy (po flushu / restarcie Redis) - bez API call.
+            # Do cache z czasem pobrania z API (jak _seed_from_snapshots) - inaczej
+            # decorator dalby mu pelny nowy TTL i dane zylyby ~2x max_age
+            snapshot = fundamentals_snapshots.get(symbol)
+            if snapshot is not None:
+                logger.info(f"[SNAPSHOTS] Fundamentals {symbol} z bazy ({snapshot.age():.0f}s)")
+                return FetchedAt(snapshot.payload, snapshot.as_of.timestamp(), fundamentals_snapshots.max_age)
+
             # Użyj rate-limited call z retry logic
             fundamentals = self._make_request_with_retry(
                 self.client.company_basic_financials,
@@ -175,23 +285,35 @@ class FinnhubClient:
                 'all'
             )
 
-            if not fundamentals or 'metric' not in fundamentals:
-                logger.warning(f"Finnhub: brak danych fundamentals dla {symbol}")
+            if fundamentals is None:
+                # Retry wyczerpane (429) - przejściowe, nie cache'ujemy
                 return None
 
-            return fundamentals
+            if not fundamentals.get('metric'):
+                # Finnhub odpowiedział, ale bez metryk (delisted / zły ticker)
+                logger.warning(f"Finnhub: brak danych fundamentals dla {symbol}")
+                return KNOWN_EMPTY
+
+            projected = project_fundamentals(fundamentals)
+            fundamentals_snapshots.save(symbol, projected)
+            return projected
 
         except Exception as e:
             logger.error(f"Finnhub fundamentals error dla {symbol}: {e}")
             return None
 
-    @cache(ttl=900, key_prefix="finnhub")  # Cache 15 minut
+    @cache(
+        ttl=ttl_policy.ttl_for(DATA_QUOTE),  # Sesja: krótko, po zamknięciu: do otwarcia
+        key_prefix="finnhub",
+        negative_ttl=settings.NEGATIVE_CACHE_TTL,
+        max_stale=settings.CACHE_MAX_STALE
+    )
     def get_quote(self, symbol: str) -> Optional[Dict]:
         """
         Pobierz real-time quote (price, volume, etc.)
 
         OPTYMALIZACJE:
-        - Cache: 15 minut TTL
+        - Cache: max 15 minut w sesji, po zamknięciu do następnego otwarcia
         - Rate limiter: Max 60 calls/min
         - Retry: Exponential backoff przy 429
 
@@ -224,23 +346,28 @@ class FinnhubClient:
                 symbol
             )
 
-            if not quote or 'c' not in quote:
-                logger.warning(f"Finnhub: brak danych quote dla {symbol}")
+            if quote is None:
                 return None
 
+            # Nieznany / delisted symbol: Finnhub odpowiada zerami ({'c': 0, ..., 't': 0}),
+            # a nie brakiem klucza 'c'
+            if not quote.get('t') and not quote.get('c'):
+                logger.warning(f"Finnhub: brak danych quote dla {symbol}")
+                return KNOWN_EMPTY
+
             return quote
 
         except Exception as e:
             logger.error(f"Finnhub quote error dla {symbol}: {e}")
             return None
 
-    @cache(ttl=3600, key_prefix="finnhub")  # Cache 60 minut (zmienia się rzadko)
+    @cache(ttl=ttl_policy.ttl_for(DATA_PROFILE), key_prefix="finnhub", negative_ttl=settings.NEGATIVE_CACHE_TTL)
     def get_company_profile(self, symbol: str) -> Optional[Dict]:
         """
         Pobierz company profile (market cap, industry, etc.)
 
         OPTYMALIZACJE:
-        - Cache: 60 minut TTL (profile zmienia się bardzo rzadko)
+        - Cache: CACHE_TTL_PROFILE (domyślnie 7 dni - profile zmienia się bardzo rzadko)
         - Rate limiter: Max 60 calls/min
         - Retry: Exponential backoff przy 429
 
@@ -257,9 +384,12 @@ class FinnhubClient:
                 symbol=symbol
             )
 
+            if profile is None:
+                return None
+
             if not profile:
                 logger.warning(f"Finnhub: brak danych profile dla {symbol}")
-                return None
+                return KNOWN_EMPTY
 
             return profile
 
@@ -0,0 +1,142 @@
+"""
+Fundamentals - projekcja odpowiedzi Finnhub do metryk uzywanych przez screener
+
+PROBLEM: company_basic_financials(symbol, 'all') = 117 metryk + wieloletnie
+series.annual / series.quarterly. Screener czyta z tego 6 wartosci, a cache
+(Redis + L1) trzymal calosc dla kazdego symbolu.
+
+ROZWIAZANIE:
+1. project_fundamentals() - zostawia tylko skonfigurowane metryki i serie
+   (settings.FUNDAMENTALS_METRICS / FUNDAMENTALS_SERIES), w ksztalcie odpowiedzi
+   Finnhub ({"metric": {...}, "series": {"annual": {...}}}) - to trafia do cache
+2. FundamentalsRecord - typowany, kompaktowy rekord dla scannera
+   (record.roe zamiast fundamentals['metric'].get('roeTTM'))
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from app.config import settings
+
+# Metryki bez ktorych screener nie dziala - zawsze w projekcji
+SCREENER_METRICS = [
+    "marketCapitalization",
+    "roeTTM",
+    "totalDebt/totalEquityAnnual",
+    "peTTM",
+    "revenueGrowthTTMYoy",
+]
+
+# Serie (format "okres.nazwa") bez ktorych screener nie dziala
+SCREENER_SERIES = ["annual.roic"]
+
+
+def project_fundamentals(
+    payload: Dict[str, Any],
+    metrics: Optional[List[str]] = None,
+    series: Optional[List[str]] = None,
+    series_points: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Zostawia z odpowiedzi Finnhub tylko potrzebne metryki i serie.
+
+    Args:
+        payload: Odpowiedz company_basic_financials (lub juz zprojektowana)
+        metrics: Klucze 'metric' do zachowania (domyslnie settings.FUNDAMENTALS_METRICS)
+        series: Serie "okres.nazwa", np. "annual.roic" (domyslnie settings.FUNDAMENTALS_SERIES)
+        series_points: Ile najnowszych punktow serii zachowac
+            (domyslnie settings.FUNDAMENTALS_SERIES_POINTS)
+
+    Returns:
+        Dict w ksztalcie odpowiedzi Finnhub: {"metric": {...}, "series": {"annual": {"roic": [...]}}}
+    """
+    metrics = list(dict.fromkeys(SCREENER_METRICS + (metrics if metrics is not None else settings.FUNDAMENTALS_METRICS)))
+    series = list(dict.fromkeys(SCREENER_SERIES + (series if series is not None else settings.FUNDAMENTALS_SERIES)))
+    if series_points is None:
+        series_points = settings.FUNDAMENTALS_SERIES_POINTS
+
+    source_metrics = payload.get("metric") or {}
+    source_series = payload.get("series") or {}
+
+    projected_series: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    for name in series:
+        period, _, series_name = name.partition(".")
+        points = (source_series.get(period) or {}).get(series_name)
+        if points:
+            # Finnhub zwraca serie od najnowszego punktu
+            projected_series.setdefault(period, {})[series_name] = points[:series_points]
+
+    return {
+        "metric": {key: source_metrics[key] for key in metrics if key in source_metrics},
+        "series": projected_series,
+    }
+
+
+@dataclass(frozen=True)
+class FundamentalsRecord:
+    """
+    Znormalizowane fundamentals jednego symbolu.
+
+    Attributes:
+        market_cap: Kapitalizacja w USD (Finnhub podaje w milionach)
+        roe: ROE w %
+        roce: ROCE w % (najnowszy punkt series.annual.roic)
+        debt_equity: Debt/Equity
+        revenue_growth: Wzrost przychodow YoY w %
+        forward_pe: P/E (TTM)
+        metrics: Wszystkie zprojektowane metryki (dla przyszlych wskaznikow)
+    """
+    market_cap: Optional[int]
+    roe: Optional[float]
+    roce: Optional[float]
+    debt_equity: Optional[float]
+    revenue_growth: Optional[float]
+    forward_pe: Optional[float]
+    metrics: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "FundamentalsRecord":
+        """
+        Buduje rekord z odpowiedzi Finnhub (pelnej albo zprojektowanej).
+
+        Args:
+            payload: Dict z kluczami 'metric' i 'series'
+
+        Returns:
+            FundamentalsRecord (None w polach = brak danych)
+        """
+        metrics = payload.get("metric") or {}
+
+        # Market Cap (w milionach!) - konwertuj na normalne wartosci
+        market_cap = metrics.get("marketCapitalization")
+        market_cap = int(market_cap * 1_000_000) if market_cap else None
+
+        # ROCE (Return on Capital Employed)
+        # Finnhub nie ma roicTTM, ale ma 'roic' w series.annual:
+        # [{'period': '2023-09-30', 'v': 0.4532}] - wartosc to decimal, konwertujemy na %
+        roce = None
+        roic_series = ((payload.get("series") or {}).get("annual") or {}).get("roic") or []
+        if roic_series and roic_series[0].get("v") is not None:
+            roce = roic_series[0]["v"] * 100
+
+        return cls(
+            market_cap=market_cap,
+            roe=metrics.get("roeTTM"),
+            roce=roce,
+            # Debt/Equity - PRAWIDLOWY KLUCZ! totalDebt/totalEquityAnnual (z / w nazwie klucza!)
+            debt_equity=metrics.get("totalDebt/totalEquityAnnual"),
+            revenue_growth=metrics.get("revenueGrowthTTMYoy"),
+            forward_pe=metrics.get("peTTM"),
+            metrics=metrics,
+        )
+
+    def columns(self) -> Dict[str, Optional[float]]:
+        """
+        Kolumny tabeli metryk scannera (app.services.criteria.METRIC_COLUMNS).
+        """
+        return {
+            "market_cap": self.market_cap,
+            "roe": self.roe,
+            "roce": self.roce,
+            "debt_equity": self.debt_equity,
+            "revenue_growth": self.revenue_growth,
+            "forward_pe": self.forward_pe,
+        }
@@ -0,0 +1,148 @@
+"""
+Fundamentals Snapshots - trwala kopia fundamentals w PostgreSQL
+
+PROBLEM: Fundamentals zyja tylko w Redis. Restart / eviction / clear_finnhub_cache()
+= ponowne pobranie KAZDEGO symbolu przy 60 calls/min (5000 symboli = ponad godzina).
+
+ROZWIAZANIE: Po kazdym API call FinnhubClient.get_fundamentals() zapisuje
+zprojektowana odpowiedz w tabeli fundamentals_snapshots (jeden wiersz na symbol).
+Przy cache MISS czyta najpierw stad:
+- snapshot mlodszy niz FUNDAMENTALS_SNAPSHOT_MAX_AGE = dane bez API call
+- FinnhubClient.prefetch() laduje snapshoty calego scanu jednym SELECT i wpisuje
+  je do cache z czasem pobrania z API (swiezosc liczona od as_of, nie od odczytu)
+
+Blad bazy nie przerywa scanu - snapshot jest tylko optymalizacja (log + API call).
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+import logging
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.fundamentals import FundamentalsSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Max symboli w jednym zapytaniu IN (...)
+SNAPSHOT_QUERY_CHUNK = 1000
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Snapshot fundamentals jednego symbolu.
+
+    Attributes:
+        symbol: Symbol
+        payload: Zprojektowana odpowiedz Finnhub ({"metric": ..., "series": ...})
+        as_of: Kiedy pobrano z API (UTC)
+    """
+    symbol: str
+    payload: Dict[str, Any]
+    as_of: datetime
+
+    def age(self, now: Optional[datetime] = None) -> float:
+        """Wiek snapshotu w sekundach"""
+        now = now or datetime.now(timezone.utc)
+        return (now - self.as_of).total_seconds()
+
+
+class FundamentalsSnapshotStore:
+    """
+    Odczyt / zapis snapshotow fundamentals (tabela fundamentals_snapshots).
+
+    Usage:
+        fundamentals_snapshots.save("AAPL", payload)      # po API call
+        fundamentals_snapshots.get("AAPL")                # None = brak / za stary
+        fundamentals_snapshots.get_many(symbols)          # jeden SELECT na chunk
+    """
+
+    def __init__(self, max_age: int, session_factory: Callable[[], Session] = SessionLocal):
+        """
+        Args:
+            max_age: Ile sekund snapshot zastepuje API call (0 = snapshoty wylaczone)
+            session_factory: Fabryka sesji SQLAlchemy
+        """
+        self.max_age = max_age
+        self.session_factory = session_factory
+
+    @property
+    def enabled(self) -> bool:
+        """Czy snapshoty sa wlaczone w konfiguracji"""
+        return self.max_age > 0
+
+    def get(self, symbol: str, max_age: Optional[int] = None) -> Optional[Snapshot]:
+        """
+        Snapshot symbolu mlodszy niz max_age (domyslnie self.max_age).
+        """
+        return self.get_many([symbol], max_age).get(symbol)
+
+    def get_many(self, symbols: Iterable[str], max_age: Optional[int] = None) -> Dict[str, Snapshot]:
+        """
+        Snapshoty wielu symboli mlodsze niz max_age (SNAPSHOT_QUERY_CHUNK symboli na SELECT).
+
+        Returns:
+            Dict symbol -> Snapshot (tylko znalezione)
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not self.enabled or not symbols:
+            return {}
+
+        max_age = self.max_age if max_age is None else max_age
+        oldest = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+
+        found: Dict[str, Snapshot] = {}
+        db = self.session_factory()
+        try:
+            for start in range(0, len(symbols), SNAPSHOT_QUERY_CHUNK):
+                chunk = symbols[start:start + SNAPSHOT_QUERY_CHUNK]
+                rows = (
+                    db.query(FundamentalsSnapshot)
+                    .filter(FundamentalsSnapshot.symbol.in_(chunk), FundamentalsSnapshot.as_of >= oldest)
+                    .all()
+                )
+                for row in rows:
+                    found[row.symbol] = Snapshot(row.symbol, row.payload, _as_utc(row.as_of))
+        except Exception as e:
+            logger.error(f"[SNAPSHOTS] Blad odczytu ({len(symbols)} symboli): {e}")
+        finally:
+            db.close()
+
+        logger.debug(f"[SNAPSHOTS] {len(found)}/{len(symbols)} symboli z bazy")
+        return found
+
+    def save(self, symbol: str, payload: Dict[str, Any], as_of: Optional[datetime] = None) -> bool:
+        """
+        Zapisuje (nadpisuje) snapshot symbolu.
+
+        Returns:
+            True jesli zapisano, False jesli wylaczone / blad bazy
+        """
+        if not self.enabled:
+            return False
+
+        db = self.session_factory()
+        try:
+            db.merge(FundamentalsSnapshot(
+                symbol=symbol,
+                as_of=as_of or datetime.now(timezone.utc),
+                payload=payload
+            ))
+            db.commit()
+            return True
+        except Exception as e:
+            logger.error(f"[SNAPSHOTS] Blad zapisu {symbol}: {e}")
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Baza bez stref czasowych (SQLite) zwraca naive datetime - zapisywany jako UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+# Singleton - polityka swiezosci z konfiguracji
+fundamentals_snapshots = FundamentalsSnapshotStore(max_age=settings.FUNDAMENTALS_SNAPSHOT_MAX_AGE)
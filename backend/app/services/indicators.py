@@ -0,0 +1,248 @@
+"""
+Indicators - wskazniki techniczne dla calego universe naraz
+
+PROBLEM: Kryteria techniczne (RSI, przeciecia srednich, ATR) liczone petla
+pandas per symbol (rolling / ewm na kazdym DataFrame) przy tysiacach tickerow
+zjadaja wiecej CPU niz cala reszta scanu.
+
+ROZWIAZANIE: OHLCVMatrix = wyrownane macierze Close / High / Low / Volume
+(daty x symbole). Kazdy wskaznik to seria operacji NumPy na calej macierzy:
+- srednie kroczace: suma skumulowana (rozniczka okna), bez petli
+- EMA / RSI / ATR (rekurencyjne): jedna petla po DATACH, wektor po symbolach
+  (~500 iteracji dla 2 lat niezaleznie od liczby symboli)
+- wartosci brane z ostatniego prawdziwego baru kazdego symbolu
+
+Brak danych: za krotka historia (np. < 200 barow dla SMA 200) = NaN / None,
+kryterium na takim wskazniku jest niespelnione (jak brak fundamentals).
+Wiersze macierzy = wspolne daty sesji; brakujaca sesja symbolu = ffill zamkniecia.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from app.services.returns import ClosesMatrix, align_histories, forward_fill, group_by_symbol
+
+# Parametry wskaznikow (nazwy kolumn zawieraja okres)
+RSI_PERIOD = 14
+SMA_FAST = 50
+SMA_SLOW = 200
+EMA_PERIOD = 20
+ATR_PERIOD = 14
+AVG_VOLUME_WINDOW = 20
+# Golden / death cross = przeciecie SMA 50 / SMA 200 w ostatnich N sesjach
+CROSS_LOOKBACK_BARS = 5
+# Okno 52 tygodni (dni kalendarzowe)
+WEEKS_52_DAYS = 365
+
+# Ile dni kalendarzowych historii potrzeba (okno 52 tyg. + zapas na weekend / swieto)
+INDICATOR_LOOKBACK_DAYS = WEEKS_52_DAYS + 7
+
+# Kolumny wynikowe (nazwy = pola StockResult i kolumny tabeli metryk criteria engine)
+INDICATOR_COLUMNS = [
+    "rsi_14",
+    "sma_50",
+    "sma_200",
+    "ema_20",
+    "pct_from_sma_50",
+    "pct_from_sma_200",
+    "golden_cross",
+    "death_cross",
+    "atr_14",
+    "atr_percent",
+    "avg_volume_20",
+    "pct_from_52w_high",
+    "pct_from_52w_low",
+]
+
+
+@dataclass(frozen=True)
+class OHLCVMatrix:
+    """
+    Wyrownane dzienne bary wielu symboli.
+
+    Attributes:
+        dates: Daty wierszy, rosnaco (datetime64[D], shape (T,))
+        symbols: Symbole kolumn (N)
+        close, high, low, volume: float shape (T, N), NaN = brak notowania
+            (historia bez High / Low = same NaN, ATR niedostepny)
+    """
+    dates: np.ndarray
+    symbols: List[str]
+    close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def from_histories(cls, histories: Dict[str, pd.DataFrame]) -> "OHLCVMatrix":
+        """
+        Buduje macierze z wyniku PriceHistoryService.fetch_history() (jeden concat).
+        """
+        dates, symbols, values = align_histories(histories, ["Close", "High", "Low", "Volume"])
+        return cls(
+            dates=dates,
+            symbols=symbols,
+            close=values[:, :, 0],
+            high=values[:, :, 1],
+            low=values[:, :, 2],
+            volume=values[:, :, 3]
+        )
+
+    def closes_matrix(self) -> ClosesMatrix:
+        """Zamkniecia jako ClosesMatrix (stopy zwrotu - app.services.returns) bez ponownego wyrownania"""
+        return ClosesMatrix(dates=self.dates, symbols=self.symbols, closes=self.close)
+
+
+def rolling_mean(values: np.ndarray, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    Srednia z ostatnich `window` wierszy dla kazdej komorki (NaN pomijane).
+
+    Args:
+        values: shape (T, N)
+        window: Dlugosc okna (wiersze)
+        min_periods: Minimum wartosci w oknie (domyslnie = window)
+
+    Returns:
+        shape (T, N), NaN gdzie za malo wartosci
+    """
+    min_periods = window if min_periods is None else min_periods
+    present = ~np.isnan(values)
+    zero_row = np.zeros((1, values.shape[1]))
+
+    sums = np.concatenate([zero_row, np.cumsum(np.where(present, values, 0.0), axis=0)])
+    counts = np.concatenate([zero_row, np.cumsum(present, axis=0)])
+    starts = np.maximum(np.arange(1, values.shape[0] + 1) - window, 0)
+
+    window_sums = sums[1:] - sums[starts]
+    window_counts = counts[1:] - counts[starts]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(window_counts >= max(min_periods, 1), window_sums / window_counts, np.nan)
+
+
+def smoothed_average(values: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    """
+    Srednia wykladnicza startujaca od SMA z pierwszych `period` wartosci.
+
+    alpha = 2 / (period + 1) - EMA, alpha = 1 / period - wygladzanie Wildera (RSI, ATR).
+    NaN w danych nie zmienia sredniej (wartosc z poprzedniego wiersza).
+
+    Returns:
+        shape (T, N), NaN dopoki symbol nie ma `period` wartosci
+    """
+    n_dates, n_symbols = values.shape
+    result = np.full((n_dates, n_symbols), np.nan)
+    count = np.zeros(n_symbols)
+    total = np.zeros(n_symbols)
+    average = np.full(n_symbols, np.nan)
+
+    # Petla po datach, wektor po symbolach
+    for t in range(n_dates):
+        row = values[t]
+        present = ~np.isnan(row)
+        count += present
+
+        seeding = present & (count <= period)
+        total[seeding] += row[seeding]
+        seeded = present & (count == period)
+        average[seeded] = total[seeded] / period
+
+        update = present & (count > period)
+        average[update] += alpha * (row[update] - average[update])
+        result[t] = average
+
+    return result
+
+
+def compute_indicators(matrix: OHLCVMatrix) -> Dict[str, np.ndarray]:
+    """
+    Wszystkie wskazniki INDICATOR_COLUMNS dla wszystkich symboli.
+
+    Returns:
+        Dict kolumna -> array shape (N,) w kolejnosci matrix.symbols (NaN = brak danych)
+    """
+    n_dates, n_symbols = matrix.close.shape
+    if not n_dates or not n_symbols:
+        return {column: np.full(n_symbols, np.nan) for column in INDICATOR_COLUMNS}
+
+    close, last_valid_row = forward_fill(matrix.close)
+    columns = np.arange(n_symbols)
+    has_data = last_valid_row[-1] >= 0
+    end_row = np.maximum(last_valid_row[-1], 0)
+    end_close = close[end_row, columns]
+
+    def at_end(series: np.ndarray) -> np.ndarray:
+        return np.where(has_data, series[end_row, columns], np.nan)
+
+    def pct(value: np.ndarray, reference: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(reference > 0, (value / reference - 1.0) * 100.0, np.nan)
+
+    results: Dict[str, np.ndarray] = {}
+
+    # === SREDNIE ===
+    sma_fast = rolling_mean(close, SMA_FAST)
+    sma_slow = rolling_mean(close, SMA_SLOW)
+    results["sma_50"] = at_end(sma_fast)
+    results["sma_200"] = at_end(sma_slow)
+    results["ema_20"] = at_end(smoothed_average(close, EMA_PERIOD, 2.0 / (EMA_PERIOD + 1)))
+    results["pct_from_sma_50"] = pct(end_close, results["sma_50"])
+    results["pct_from_sma_200"] = pct(end_close, results["sma_200"])
+
+    # === GOLDEN / DEATH CROSS (SMA 50 vs SMA 200 w ostatnich CROSS_LOOKBACK_BARS sesjach) ===
+    spread = sma_fast - sma_slow
+    spread_end = at_end(spread)
+    previous_rows = np.maximum(end_row[None, :] - np.arange(1, CROSS_LOOKBACK_BARS + 1)[:, None], 0)
+    previous_spread = spread[previous_rows, columns]
+    with np.errstate(invalid="ignore"):
+        golden = (spread_end > 0) & (previous_spread <= 0).any(axis=0)
+        death = (spread_end < 0) & (previous_spread >= 0).any(axis=0)
+    known = ~np.isnan(spread_end)
+    results["golden_cross"] = np.where(known, golden, np.nan)
+    results["death_cross"] = np.where(known, death, np.nan)
+
+    # === RSI (Wilder) ===
+    change = np.vstack([np.full((1, n_symbols), np.nan), np.diff(close, axis=0)])
+    average_gain = smoothed_average(np.maximum(change, 0.0), RSI_PERIOD, 1.0 / RSI_PERIOD)
+    average_loss = smoothed_average(np.maximum(-change, 0.0), RSI_PERIOD, 1.0 / RSI_PERIOD)
+    gain_end, loss_end = at_end(average_gain), at_end(average_loss)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + gain_end / loss_end)
+    # Brak spadkow w okresie = 100, brak ruchu = 50
+    rsi = np.where(loss_end == 0, np.where(gain_end > 0, 100.0, 50.0), rsi)
+    results["rsi_14"] = np.where(np.isnan(gain_end) | np.isnan(loss_end), np.nan, rsi)
+
+    # === ATR (Wilder, True Range z poprzednim zamknieciem) ===
+    previous_close = np.vstack([np.full((1, n_symbols), np.nan), close[:-1]])
+    high, low = matrix.high, matrix.low
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    true_range[np.isnan(high) | np.isnan(low)] = np.nan
+    results["atr_14"] = at_end(smoothed_average(true_range, ATR_PERIOD, 1.0 / ATR_PERIOD))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        results["atr_percent"] = np.where(end_close > 0, results["atr_14"] / end_close * 100.0, np.nan)
+
+    # === SREDNI WOLUMEN (sesje bez notowan pomijane) ===
+    results["avg_volume_20"] = at_end(
+        rolling_mean(matrix.volume, AVG_VOLUME_WINDOW, min_periods=AVG_VOLUME_WINDOW // 2)
+    )
+
+    # === ODLEGLOSC OD 52-TYGODNIOWEGO MAKSIMUM / MINIMUM ===
+    start_row = np.searchsorted(matrix.dates, matrix.dates[end_row] - np.timedelta64(WEEKS_52_DAYS, "D"))
+    rows = np.arange(n_dates)[:, None]
+    in_window = (rows >= start_row) & (rows <= end_row)
+    # Historia bez High / Low -> zamkniecia
+    highs = np.where(in_window, np.where(np.isnan(high), matrix.close, high), np.nan)
+    lows = np.where(in_window, np.where(np.isnan(low), matrix.close, low), np.nan)
+    results["pct_from_52w_high"] = pct(end_close, np.fmax.reduce(highs, axis=0))
+    results["pct_from_52w_low"] = pct(end_close, np.fmin.reduce(lows, axis=0))
+
+    return {column: np.where(has_data, results[column], np.nan) for column in INDICATOR_COLUMNS}
+
+
+def indicators_by_symbol(matrix: OHLCVMatrix) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    compute_indicators() pogrupowane per symbol.
+
+    Returns:
+        Dict symbol -> {kolumna: wartosc lub None}
+    """
+    return group_by_symbol(matrix.symbols, compute_indicators(matrix))
@@ -0,0 +1,215 @@
+"""
+Scan Jobs - background scany z job ID, postepem i pobieraniem wynikow
+
+PROBLEM: Scan duzego universe (setki symboli, rate limiter 60 calls/min) trwa minuty.
+Caly scan w requescie HTTP = zajety worker uvicorn + timeout proxy/klienta.
+
+ROZWIAZANIE: POST /api/scan/jobs zwraca od razu job_id, scan leci w puli watkow procesu.
+- GET /api/scan/jobs/{job_id}          - status: symbole done/total, API calls, ETA
+- GET /api/scan/jobs/{job_id}/results  - wyniki po zakonczeniu
+
+ETA liczone z rate limitera FinnhubClient (CALLS_PER_MINUTE) i sredniej liczby
+API calls na symbol - cache hity obnizaja ETA w trakcie scanu.
+
+UWAGA: Joby zyja w pamieci procesu - przy wielu workerach uvicorn status jest
+dostepny tylko w workerze ktory przyjal job (PRD 4.5: docelowo Celery + Redis).
+Dataset scanu trafia do scan_dataset_store pod job_id, wiec re-filter dziala
+jak dla zwyklego scanu (POST /api/scan/{job_id}/refilter).
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import logging
+from app.config import settings
+from app.schemas.scan import StockResult
+from app.services.finnhub_client import FinnhubClient
+from app.services.scan_runs import RUN_SOURCE_JOB
+from app.services.scanner import StockScanner
+
+logger = logging.getLogger(__name__)
+
+# Statusy joba
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_FINISHED = (JOB_COMPLETED, JOB_FAILED)
+
+# Szacunek API calls na symbol zanim zmierzymy prawdziwa srednia (quote + fundamentals)
+EXPECTED_CALLS_PER_SYMBOL = 2
+
+
+@dataclass
+class ScanJob:
+    """
+    Stan jednego background scanu.
+
+    Attributes:
+        job_id: ID joba (= dataset_id scanu)
+        symbols: Symbole do przeskanowania
+        total_symbols: Liczba unikalnych symboli
+        only_matches: Czy results zawieraja tylko matches
+        status: queued / running / completed / failed
+        symbols_done: Ile symboli juz przetworzonych
+        api_calls: Ile Finnhub API calls wykonal scan
+        results: Wyniki (po zakonczeniu)
+        error: Opis bledu (status failed)
+    """
+    job_id: str
+    symbols: List[str]
+    total_symbols: int
+    only_matches: bool = False
+    status: str = JOB_QUEUED
+    symbols_done: int = 0
+    api_calls: int = 0
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    results: Optional[List[StockResult]] = None
+    error: Optional[str] = None
+    _started_monotonic: Optional[float] = field(default=None, repr=False)
+
+    def update_progress(self, symbols_done: int, api_calls: int) -> None:
+        """
+        Callback postepu dla StockScanner.scan_stocks(progress=...).
+        """
+        self.symbols_done = symbols_done
+        self.api_calls = api_calls
+
+    @property
+    def progress_percent(self) -> float:
+        """Postep scanu w % (0-100)"""
+        if self.status == JOB_COMPLETED or not self.total_symbols:
+            return 100.0
+        return round(100.0 * min(self.symbols_done, self.total_symbols) / self.total_symbols, 1)
+
+    def eta_seconds(self) -> Optional[float]:
+        """
+        Szacowany czas do konca scanu (sekundy).
+
+        Dolna granica z rate limitera: pozostale API calls / (calls na sekunde).
+        Jesli obserwowane tempo jest wolniejsze (np. yfinance, siec) - bierzemy je.
+
+        Returns:
+            Sekundy, 0 dla zakonczonego joba
+        """
+        if self.status in JOB_FINISHED:
+            return 0.0
+
+        remaining = max(self.total_symbols - self.symbols_done, 0)
+        if self.symbols_done:
+            calls_per_symbol = self.api_calls / self.symbols_done
+        else:
+            calls_per_symbol = EXPECTED_CALLS_PER_SYMBOL
+
+        calls_per_second = FinnhubClient.CALLS_PER_MINUTE / FinnhubClient.RATE_LIMIT_PERIOD
+        eta = remaining * calls_per_symbol / calls_per_second
+
+        if self.symbols_done and self._started_monotonic is not None:
+            elapsed = time.monotonic() - self._started_monotonic
+            eta = max(eta, elapsed / self.symbols_done * remaining)
+
+        return round(eta, 1)
+
+
+class ScanJobManager:
+    """
+    In-process kolejka background scanow (ThreadPoolExecutor).
+
+    Przechowuje max_jobs ostatnich jobow - najstarsze ZAKONCZONE sa usuwane.
+    """
+
+    def __init__(self, max_workers: int, max_jobs: int):
+        """
+        Args:
+            max_workers: Ile scanow moze isc rownolegle (pozostale czekaja w kolejce)
+            max_jobs: Ile jobow (z wynikami) trzymac w pamieci
+        """
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan-job")
+        self._jobs: "OrderedDict[str, ScanJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, symbols: List[str], **scan_kwargs: Any) -> ScanJob:
+        """
+        Dodaje scan do kolejki i zwraca od razu (bez czekania na wyniki).
+
+        Args:
+            symbols: Lista symboli
+            **scan_kwargs: Pozostale argumenty StockScanner.scan_stocks()
+                (progi, max_workers, lazy, only_matches)
+
+        Returns:
+            ScanJob ze statusem queued
+        """
+        job = ScanJob(
+            job_id=uuid.uuid4().hex,
+            symbols=symbols,
+            total_symbols=len(set(symbols)),
+            only_matches=scan_kwargs.get("only_matches", False)
+        )
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, scan_kwargs)
+        logger.info(f"[SCAN JOBS] Job {job.job_id} w kolejce ({job.total_symbols} symboli)")
+        return job
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        """
+        Zwraca job po ID lub None jesli nie istnieje / zostal usuniety.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: ScanJob, scan_kwargs: Dict[str, Any]) -> None:
+        """
+        Wykonuje scan w watku puli - bledy laduja w job.error (status failed).
+        """
+        job.status = JOB_RUNNING
+        job.started_at = datetime.utcnow()
+        job._started_monotonic = time.monotonic()
+
+        # status ustawiany na koncu - kto widzi completed/failed, widzi tez komplet pol
+        try:
+            job.results = StockScanner.scan_stocks(
+                symbols=job.symbols,
+                dataset_id=job.job_id,
+                progress=job.update_progress,
+                run_source=RUN_SOURCE_JOB,
+                **scan_kwargs
+            )
+            job.finished_at = datetime.utcnow()
+            job.status = JOB_COMPLETED
+            logger.info(f"[SCAN JOBS] Job {job.job_id} zakonczony ({job.api_calls} API calls)")
+
+        except Exception as e:
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            job.status = JOB_FAILED
+            logger.error(f"[SCAN JOBS] Job {job.job_id} failed: {e}", exc_info=True)
+
+    def _prune(self) -> None:
+        """
+        Usuwa najstarsze zakonczone joby ponad max_jobs (wywolywane pod lockiem).
+        """
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.status in JOB_FINISHED][:excess]:
+            del self._jobs[job_id]
+
+
+# Singleton - jedna kolejka jobow dla procesu
+scan_job_manager = ScanJobManager(
+    max_workers=settings.SCAN_JOB_WORKERS,
+    max_jobs=settings.SCAN_JOB_MAX
+)
@@ -0,0 +1,374 @@
+"""
+Price History Service - batchowe pobieranie OHLCV z yfinance
+
+PROBLEM: yf.Ticker(symbol).history() = 1 HTTP request per symbol.
+Scan 500 symboli = 500 sekwencyjnych round tripow zanim cokolwiek przefiltrujemy.
+
+ROZWIAZANIE: yf.download() przyjmuje wiele tickerow naraz.
+Dzielimy liste symboli na chunki i pobieramy kazdy chunk jednym requestem.
+
+LOKALNY MAGAZYN (app.services.price_store, PRICE_STORE_DIR): historia
+zakonczonych sesji lezy na dysku. fetch_history() dociaga tylko brakujace
+bary (od ostatniej zapisanej daty), nowe symbole pobiera raz na
+PRICE_STORE_BACKFILL, a okno `period` czyta z dysku. Scan po zamknieciu /
+w weekend / drugi scan tego dnia = 0 requestow do yfinance. Ceny sa skorygowane
+(auto_adjust=True) - dywidenda lub split zmienia skorygowany Close nakladajacego
+sie baru, wtedy symbol jest pobierany od nowa.
+
+NEGATIVE CACHE: Symbol bez historii w chunku, ktory zwrocil dane dla innych
+symboli (delisted / zly ticker), trafia do cache jako EMPTY_MARKER na
+NEGATIVE_CACHE_TTL - kolejne scany go nie pobieraja. Pusty caly chunk to
+moze byc blad sieci - wtedy nic nie zapisujemy.
+
+STATUS (fetch_history(status=...)): symbole bez historii dostaja HISTORY_EMPTY
+(potwierdzony brak - negative cache / pusty w udanym chunku) albo HISTORY_FAILED
+(chunk sie nie pobral / byl caly pusty). Kwarantanna symboli liczy tylko te pierwsze.
+"""
+import yfinance as yf
+import pandas as pd
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+import logging
+from app.cache import EMPTY_MARKER, build_cache_key, is_empty_marker, redis_cache
+from app.config import settings
+from app.market_calendar import us_market_calendar
+from app.services.price_store import price_store
+
+logger = logging.getLogger(__name__)
+
+# Okresy yfinance -> dni kalendarzowe (okno odczytu z magazynu)
+PERIOD_DAYS = {
+    "5d": 7, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366,
+    "2y": 731, "5y": 1827, "10y": 3653,
+}
+
+# Zmiana skorygowanego Close nakladajacego sie baru > 0.05% = dywidenda / split -> pelna historia od nowa
+# (kwartalna dywidenda to zwykle 0.1-1% ceny; ponizej progu - szum zaokraglen yfinance)
+ADJUSTMENT_TOLERANCE = 0.0005
+
+# Status symbolu bez historii (fetch_history(status=...))
+HISTORY_EMPTY = "empty"    # potwierdzony brak danych (delisted / zly ticker)
+HISTORY_FAILED = "failed"  # chunk nie pobrany - nie wiadomo czy symbol ma dane
+
+
+class PriceHistoryService:
+    """
+    Serwis do pobierania historycznych danych cenowych (OHLCV) dla wielu symboli.
+
+    Moze byc uzywany samodzielnie (nie tylko przez StockScanner):
+
+        histories = PriceHistoryService.fetch_history(["AAPL", "MSFT"], period="3mo")
+        histories["AAPL"]["Close"]
+    """
+
+    # Ile tickerow w jednym yf.download() - wieksze chunki = mniej requestow,
+    # ale dluzszy pojedynczy request i wieksze ryzyko timeoutu
+    DEFAULT_CHUNK_SIZE = 100
+
+    @staticmethod
+    def fetch_history(
+        symbols: List[str],
+        period: str = "1mo",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        status: Optional[Dict[str, str]] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Pobiera historie cen dla listy symboli w chunkach (multi-ticker requests).
+
+        Args:
+            symbols: Lista symboli (np. ["AAPL", "MSFT"])
+            period: Okres historii w formacie yfinance (np. "1mo", "1y")
+            chunk_size: Max liczba symboli w jednym requescie
+            status: Jesli podane - dostaje symbol -> HISTORY_EMPTY / HISTORY_FAILED
+                dla symboli bez pobranej historii (dla kwarantanny symboli)
+
+        Returns:
+            Dict symbol -> DataFrame (kolumny Open/High/Low/Close/Volume, index = daty).
+            Symbole bez danych NIE sa w slowniku.
+        """
+        # Usun duplikaty zachowujac kolejnosc
+        unique_symbols = list(dict.fromkeys(symbols))
+
+        use_store = PriceHistoryService._use_store(period)
+        # Z magazynem nowe symbole sa pobierane na PRICE_STORE_BACKFILL - pod tym okresem negative cache
+        download_period = settings.PRICE_STORE_BACKFILL if use_store else period
+
+        # Pomin symbole z negative cache (wiadomo ze yfinance nie ma dla nich danych)
+        known_empty = PriceHistoryService._known_empty(unique_symbols, download_period)
+        to_download = [s for s in unique_symbols if s not in known_empty]
+        if known_empty:
+            logger.info(f"Pomijam {len(known_empty)} symboli bez historii (negative cache)")
+            if status is not None:
+                status.update(dict.fromkeys(known_empty, HISTORY_EMPTY))
+
+        if use_store:
+            return PriceHistoryService._fetch_with_store(to_download, period, chunk_size, status)
+
+        histories = PriceHistoryService._download_chunks(to_download, period, chunk_size, status=status)
+
+        logger.info(
+            f"Pobrano historie dla {len(histories)}/{len(unique_symbols)} symboli "
+            f"({(len(to_download) + chunk_size - 1) // chunk_size} requestow)"
+        )
+        return histories
+
+    @staticmethod
+    def period_covering(days: int) -> str:
+        """
+        Najkrotszy okres yfinance obejmujacy `days` dni kalendarzowych.
+        """
+        for period, period_days in sorted(PERIOD_DAYS.items(), key=lambda item: item[1]):
+            if period_days >= days:
+                return period
+        return "max"
+
+    @staticmethod
+    def _download_chunks(
+        symbols: List[str],
+        period: str,
+        chunk_size: int,
+        start: Optional[date] = None,
+        mark_empty: bool = True,
+        status: Optional[Dict[str, str]] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Pobiera symbole chunkami (1 yf.download() na chunk).
+
+        Args:
+            symbols: Symbole do pobrania
+            period: Okres yfinance (ignorowany gdy podano start)
+            chunk_size: Max symboli w jednym requescie
+            start: Pobierz bary od tej daty (dociaganie magazynu)
+            mark_empty: Symbole bez danych w udanym chunku -> negative cache
+            status: Jesli podane - HISTORY_FAILED dla symboli z nieudanego / calego pustego
+                chunka, HISTORY_EMPTY dla symboli oznaczonych w negative cache
+
+        Returns:
+            Dict symbol -> DataFrame (tylko symbole z danymi)
+        """
+        histories: Dict[str, pd.DataFrame] = {}
+
+        for offset in range(0, len(symbols), chunk_size):
+            chunk = symbols[offset:offset + chunk_size]
+            try:
+                chunk_histories = PriceHistoryService._download_chunk(chunk, period, start=start)
+            except Exception as e:
+                # Blad jednego chunka nie moze zatrzymac calego scanu
+                logger.error(f"Blad pobierania historii dla chunka {chunk[0]}..{chunk[-1]}: {e}")
+                chunk_histories = {}
+
+            if not chunk_histories:
+                # yfinance przy bledzie sieci / rate limicie zwraca pusty frame - to nie brak danych
+                if status is not None:
+                    status.update(dict.fromkeys(chunk, HISTORY_FAILED))
+                continue
+
+            histories.update(chunk_histories)
+            if mark_empty:
+                empty = [s for s in chunk if s not in chunk_histories]
+                PriceHistoryService._mark_empty(empty, period)
+                if status is not None:
+                    status.update(dict.fromkeys(empty, HISTORY_EMPTY))
+
+        return histories
+
+    @staticmethod
+    def _use_store(period: str) -> bool:
+        """
+        Czy okno `period` mozna czytac z magazynu (magazyn wlaczony i dosc gleboki).
+        """
+        if not price_store.enabled or period not in PERIOD_DAYS:
+            return False
+        return PERIOD_DAYS[period] <= PERIOD_DAYS.get(settings.PRICE_STORE_BACKFILL, 0)
+
+    @staticmethod
+    def _fetch_with_store(
+        symbols: List[str],
+        period: str,
+        chunk_size: int,
+        status: Optional[Dict[str, str]] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Historia z lokalnego magazynu + dociagniecie brakujacych barow z yfinance.
+
+        - brak pliku: pelny backfill (PRICE_STORE_BACKFILL)
+        - ostatni bar starszy niz ostatnia zakonczona sesja: download od ostatniej
+          zapisanej daty (nakladajacy sie bar wykrywa dywidende / split -> pelny backfill)
+        - aktualny: 0 requestow
+        """
+        last_session = us_market_calendar.last_closed_session()
+
+        backfill: List[str] = []
+        incremental: Dict[date, List[str]] = defaultdict(list)
+        for symbol in symbols:
+            last = price_store.last_date(symbol)
+            if last is None:
+                backfill.append(symbol)
+            elif last < last_session:
+                incremental[last].append(symbol)
+
+        requests = 0
+        if backfill:
+            downloaded = PriceHistoryService._download_chunks(
+                backfill, settings.PRICE_STORE_BACKFILL, chunk_size, status=status
+            )
+            requests += (len(backfill) + chunk_size - 1) // chunk_size
+            for symbol, frame in downloaded.items():
+                price_store.replace(symbol, frame[frame.index.date <= last_session])
+
+        resync: List[str] = []
+        for since, group in incremental.items():
+            downloaded = PriceHistoryService._download_chunks(
+                group, period, chunk_size, start=since, mark_empty=False, status=status
+            )
+            requests += (len(group) + chunk_size - 1) // chunk_size
+            for symbol, frame in downloaded.items():
+                frame = frame[frame.index.date <= last_session]
+                if PriceHistoryService._adjusted_since(symbol, frame, since):
+                    resync.append(symbol)
+                else:
+                    price_store.append(symbol, frame)
+
+        if resync:
+            # Split / dywidenda zmienila historie - stare bary w magazynie sa nieaktualne
+            logger.info(f"[PRICE STORE] Korekta historii dla {len(resync)} symboli - pelny backfill")
+            downloaded = PriceHistoryService._download_chunks(
+                resync, settings.PRICE_STORE_BACKFILL, chunk_size, mark_empty=False, status=status
+            )
+            requests += (len(resync) + chunk_size - 1) // chunk_size
+            for symbol, frame in downloaded.items():
+                price_store.replace(symbol, frame[frame.index.date <= last_session])
+
+        since = last_session - timedelta(days=PERIOD_DAYS[period])
+        histories: Dict[str, pd.DataFrame] = {}
+        for symbol in symbols:
+            frame = price_store.read(symbol, since=since)
+            if frame is not None:
+                histories[symbol] = frame.dropna(how="all")
+
+        logger.info(
+            f"Historia dla {len(histories)}/{len(symbols)} symboli z magazynu "
+            f"({len(backfill)} nowych, {sum(len(g) for g in incremental.values())} do dociagniecia, "
+            f"{requests} requestow)"
+        )
+        return histories
+
+    @staticmethod
+    def _adjusted_since(symbol: str, frame: pd.DataFrame, since: date) -> bool:
+        """
+        Czy skorygowany Close baru `since` z yfinance rozni sie od zapisanego.
+
+        yfinance koryguje cala historie wstecz o kazda nowa dywidende / split,
+        wiec zmiana zapisanego juz baru = bary w magazynie sa nieaktualne.
+        """
+        stored = price_store.read(symbol, since=since)
+        if stored is None or frame.empty:
+            return False
+
+        stored_close = stored["Close"].iloc[0]
+        overlap = frame[frame.index.date == since]
+        if overlap.empty or not stored_close:
+            return False
+
+        change = abs(float(overlap["Close"].iloc[0]) / stored_close - 1)
+        return change > ADJUSTMENT_TOLERANCE
+
+    @staticmethod
+    def _empty_key(symbol: str, period: str) -> str:
+        """Klucz negative cache dla historii symbolu"""
+        return build_cache_key("yfinance", "history", (symbol, period))
+
+    @staticmethod
+    def _known_empty(symbols: List[str], period: str) -> List[str]:
+        """
+        Symbole oznaczone w negative cache jako bez historii (jeden MGET).
+        """
+        if not settings.NEGATIVE_CACHE_TTL or not symbols:
+            return []
+
+        keys = {PriceHistoryService._empty_key(s, period): s for s in symbols}
+        cached = redis_cache.get_many(list(keys))
+        return [keys[key] for key, value in cached.items() if is_empty_marker(value)]
+
+    @staticmethod
+    def _mark_empty(symbols: List[str], period: str) -> None:
+        """
+        Zapisuje symbole bez historii w negative cache (NEGATIVE_CACHE_TTL).
+        """
+        if not settings.NEGATIVE_CACHE_TTL or not symbols:
+            return
+
+        redis_cache.set_many(
+            {PriceHistoryService._empty_key(s, period): EMPTY_MARKER for s in symbols},
+            settings.NEGATIVE_CACHE_TTL
+        )
+
+    @staticmethod
+    def _download_chunk(
+        chunk: List[str],
+        period: str,
+        start: Optional[date] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Pobiera jeden chunk symboli jednym wywolaniem yf.download().
+
+        Args:
+            chunk: Lista symboli (max chunk_size)
+            period: Okres historii
+            start: Jesli podane - bary od tej daty zamiast `period`
+
+        Returns:
+            Dict symbol -> DataFrame (tylko symbole z niepustymi danymi)
+        """
+        window = {"start": start.isoformat()} if start is not None else {"period": period}
+        # auto_adjust=True: Close skorygowany o splity i dywidendy (jak Ticker.history()) -
+        # inaczej dywidenda w oknie wyglada jak spadek ceny w zwrotach i wskaznikach
+        data = yf.download(
+            tickers=chunk,
+            group_by="ticker",
+            auto_adjust=True,
+            threads=True,
+            progress=False,
+            **window
+        )
+
+        return PriceHistoryService._split_frame(data, chunk)
+
+    @staticmethod
+    def _split_frame(data: pd.DataFrame, chunk: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Rozdziela wynik yf.download() na osobne DataFrame per symbol.
+
+        yf.download() z group_by="ticker" zwraca kolumny MultiIndex (ticker, pole)
+        dla wielu tickerow, ale plaskie kolumny dla jednego tickera.
+
+        Args:
+            data: Wynik yf.download()
+            chunk: Symbole ktore byly w requescie
+
+        Returns:
+            Dict symbol -> DataFrame bez pustych wierszy
+        """
+        result: Dict[str, pd.DataFrame] = {}
+
+        if data is None or data.empty:
+            return result
+
+        for symbol in chunk:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[symbol]
+            else:
+                frame = data
+
+            # Dni bez notowan dla danego symbolu maja NaN (inne symbole mialy sesje)
+            frame = frame.dropna(how="all")
+            if frame.empty or "Close" not in frame:
+                logger.warning(f"Brak danych historycznych dla {symbol}")
+                continue
+
+            result[symbol] = frame
+
+        return result
@@ -0,0 +1,182 @@
+"""
+Price Store - lokalny kolumnowy magazyn dziennych barow OHLCV
+
+PROBLEM: Kazdy scan pobiera z yfinance pelny miesiac historii dla kazdego
+symbolu, a historia nie jest nigdzie cache'owana.
+
+ROZWIAZANIE: Jeden plik .npy na symbol (structured array, posortowany po dacie):
+- odczyt przez np.load(mmap_mode="r") + searchsorted po dacie = okno bez
+  parsowania i bez sieci (mikrosekundy na symbol)
+- PriceHistoryService dociaga z yfinance tylko bary od ostatniej zapisanej daty
+- zapis atomowy (plik tymczasowy + os.replace) - rownolegle scany nie widza
+  polowicznie zapisanego pliku
+
+Magazyn trzyma tylko ZAKONCZONE sesje (bar z trwajacej sesji nie jest zapisywany).
+Ceny sa skorygowane o splity i dywidendy (yf.download(auto_adjust=True)) - po
+nowej dywidendzie / splicie PriceHistoryService pobiera cala historie od nowa.
+"""
+import os
+import uuid
+from datetime import date
+from typing import Optional
+import logging
+import numpy as np
+import pandas as pd
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Kolumny w formacie yf.download(auto_adjust=True) - OHLC skorygowane, bez "Adj Close"
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Rekord jednego dnia w pliku .npy (Volume jako float - NaN dla brakow)
+STORE_DTYPE = np.dtype(
+    [("date", "datetime64[D]")] + [(column, "f8") for column in OHLCV_COLUMNS]
+)
+
+
+class PriceStore:
+    """
+    Magazyn barow dziennych: katalog z plikami {SYMBOL}.npy.
+
+    Usage:
+        price_store.append("AAPL", frame)                 # nowe / poprawione bary
+        price_store.read("AAPL", since=date(2024, 1, 1))  # DataFrame jak z yfinance
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Katalog magazynu ("" = magazyn wylaczony)
+        """
+        self.root = root
+
+    @property
+    def enabled(self) -> bool:
+        """Czy magazyn jest wlaczony w konfiguracji"""
+        return bool(self.root)
+
+    def path(self, symbol: str) -> str:
+        """Sciezka pliku symbolu"""
+        safe_symbol = symbol.replace("/", "_").replace("\\", "_")
+        return os.path.join(self.root, f"{safe_symbol}.npy")
+
+    def load(self, symbol: str) -> Optional[np.ndarray]:
+        """
+        Wszystkie bary symbolu jako memmap (tylko odczyt) lub None jesli brak pliku.
+        """
+        try:
+            records = np.load(self.path(symbol), mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            # Uszkodzony plik = brak danych (zostanie pobrany od nowa i nadpisany)
+            logger.error(f"[PRICE STORE] Nie mozna odczytac {symbol}: {e}")
+            return None
+
+        if records.dtype != STORE_DTYPE:
+            # Stary format (ceny bez korekty + "Adj Close") = brak danych, pelny backfill
+            logger.info(f"[PRICE STORE] {symbol}: stary format pliku - historia zostanie pobrana od nowa")
+            return None
+        return records
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        """Data ostatniego zapisanego baru"""
+        records = self.load(symbol)
+        if records is None or not len(records):
+            return None
+        return records["date"][-1].astype(date)
+
+    def read(self, symbol: str, since: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """
+        Okno barow od `since` (wlacznie) do ostatniego zapisanego.
+
+        Returns:
+            DataFrame (kolumny OHLCV_COLUMNS, DatetimeIndex) lub None jesli brak danych
+        """
+        records = self.load(symbol)
+        if records is None:
+            return None
+
+        start = 0
+        if since is not None:
+            start = int(np.searchsorted(records["date"], np.datetime64(since, "D")))
+
+        # Kopia okna - plik moze byc zaraz podmieniony przez os.replace
+        window = np.array(records[start:])
+        if not len(window):
+            return None
+        return self._to_frame(window)
+
+    def append(self, symbol: str, frame: pd.DataFrame) -> int:
+        """
+        Dopisuje bary do magazynu; bary z datami juz zapisanymi sa nadpisywane.
+
+        Args:
+            symbol: Symbol
+            frame: DataFrame jak z yfinance (DatetimeIndex, kolumny OHLCV)
+
+        Returns:
+            Liczba barow w pliku po zapisie
+        """
+        new_records = self._to_records(frame)
+        if not len(new_records):
+            return 0
+
+        existing = self.load(symbol)
+        if existing is not None and len(existing):
+            keep = np.array(existing[existing["date"] < new_records["date"][0]])
+            new_records = np.concatenate([keep, new_records])
+        # Zwolnij memmap przed os.replace (Windows nie podmieni otwartego pliku)
+        del existing
+
+        self._write(symbol, new_records)
+        return len(new_records)
+
+    def replace(self, symbol: str, frame: pd.DataFrame) -> int:
+        """
+        Nadpisuje cala historie symbolu (np. po splicie - stare bary nieaktualne).
+        """
+        records = self._to_records(frame)
+        if not len(records):
+            return 0
+        self._write(symbol, records)
+        return len(records)
+
+    def _write(self, symbol: str, records: np.ndarray) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(symbol)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, records)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _to_records(frame: pd.DataFrame) -> np.ndarray:
+        """
+        DataFrame yfinance -> posortowany structured array (bez duplikatow dat).
+        """
+        frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+        records = np.empty(len(frame), dtype=STORE_DTYPE)
+        records["date"] = pd.DatetimeIndex(frame.index).tz_localize(None).values.astype("datetime64[D]")
+        for column in OHLCV_COLUMNS:
+            if column in frame:
+                records[column] = frame[column].to_numpy(dtype="f8", na_value=np.nan)
+            else:
+                records[column] = np.nan
+        return records
+
+    @staticmethod
+    def _to_frame(records: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(
+            {column: records[column] for column in OHLCV_COLUMNS},
+            index=pd.DatetimeIndex(records["date"].astype("datetime64[ns]"), name="Date")
+        )
+
+
+# Singleton - katalog z konfiguracji
+price_store = PriceStore(settings.PRICE_STORE_DIR)
@@ -0,0 +1,147 @@
+"""
+Kwarantanna symboli - pomijanie tickerow ktore ciagle failuja
+
+PROBLEM: Negative cache (EMPTY_MARKER) lapie tylko potwierdzony brak danych.
+Symbol ktory przy kazdym scanie konczy sie bledem API, pustym quote albo
+brakiem historii (a nie da sie tego odroznic od chwilowego bledu) nadal
+kosztuje API calls w kazdym scanie.
+
+ROZWIAZANIE: Licznik nieudanych scanow z rzedu per symbol (w cache, wspolny
+dla procesow). Po SYMBOL_QUARANTINE_FAILURES porazkach symbol jest pomijany
+przez SYMBOL_QUARANTINE_TTL sekund. Udany scan symbolu kasuje licznik.
+
+Liczone sa tylko potwierdzone braki danych - scan z awaria yfinance / Finnhub
+(blad, rate limit) nie aktualizuje licznikow (StockScanner._update_quarantine),
+inaczej jedna awaria wrzucilaby do kwarantanny caly universe.
+Pominiete symbole (z powodem) sa logowane przy kazdym scanie.
+
+Koszt: 1 MGET na poczatku scanu + 1-3 round tripy (pipeline) na koncu.
+"""
+from typing import Dict, Iterable, List
+import logging
+from app.cache import build_cache_key, redis_cache
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Powody porazki (pole "reason" wpisu w cache)
+REASON_NO_HISTORY = "no_history"
+REASON_NO_QUOTE = "no_quote"
+REASON_NO_FUNDAMENTALS = "no_fundamentals"
+REASON_ERROR = "error"
+
+
+class SymbolQuarantine:
+    """
+    Licznik porazek symboli w cache + lista symboli w kwarantannie.
+
+    Wpis w cache: {"failures": 2, "reason": "no_quote"} pod "quarantine:symbol:AAPL".
+
+    Usage:
+        active = symbol_quarantine.filter(symbols)   # bez symboli w kwarantannie
+        ... scan ...
+        symbol_quarantine.update(failures={"XYZ": "no_quote"}, successes=["AAPL"])
+    """
+
+    KEY_PREFIX = "quarantine"
+
+    def __init__(self, max_failures: int, ttl: int):
+        """
+        Args:
+            max_failures: Po ilu porazkach z rzedu symbol trafia do kwarantanny (0 = wylaczona)
+            ttl: Jak dlugo trzymac licznik / kwarantanne (sekundy)
+        """
+        self.max_failures = max_failures
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        """Czy kwarantanna jest wlaczona w konfiguracji"""
+        return self.max_failures > 0 and self.ttl > 0
+
+    def key(self, symbol: str) -> str:
+        """Klucz cache licznika porazek symbolu"""
+        return build_cache_key(self.KEY_PREFIX, "symbol", (symbol,))
+
+    def quarantined(self, symbols: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Symbole w kwarantannie (jeden MGET).
+
+        Returns:
+            Dict symbol -> wpis ({"failures": n, "reason": ...})
+        """
+        if not self.enabled:
+            return {}
+
+        records = self._records(symbols)
+        return {
+            symbol: record for symbol, record in records.items()
+            if record.get("failures", 0) >= self.max_failures
+        }
+
+    def filter(self, symbols: List[str]) -> List[str]:
+        """
+        Usuwa z listy symbole w kwarantannie (zachowuje kolejnosc).
+        """
+        quarantined = self.quarantined(symbols)
+        if not quarantined:
+            return symbols
+
+        logger.warning(
+            f"[QUARANTINE] Pomijam {len(quarantined)}/{len(symbols)} symboli: " + ", ".join(
+                f"{symbol} ({record.get('reason')})" for symbol, record in sorted(quarantined.items())
+            )
+        )
+        return [symbol for symbol in symbols if symbol not in quarantined]
+
+    def update(self, failures: Dict[str, str], successes: Iterable[str]) -> None:
+        """
+        Zapisuje wynik scanu: +1 porazka dla failures, reset licznika dla successes.
+
+        Args:
+            failures: Dict symbol -> powod porazki (REASON_*)
+            successes: Symbole z kompletem danych
+        """
+        if not self.enabled:
+            return
+
+        successes = [symbol for symbol in successes if symbol not in failures]
+        records = self._records(list(failures) + successes)
+
+        updated = {}
+        for symbol, reason in failures.items():
+            count = records.get(symbol, {}).get("failures", 0) + 1
+            updated[self.key(symbol)] = {"failures": count, "reason": reason}
+            if count == self.max_failures:
+                logger.warning(f"[QUARANTINE] {symbol} w kwarantannie na {self.ttl}s ({reason})")
+
+        if updated:
+            redis_cache.set_many(updated, self.ttl)
+
+        cleared = [self.key(symbol) for symbol in successes if symbol in records]
+        if cleared:
+            redis_cache.delete_many(cleared)
+
+    def release(self, symbol: str) -> bool:
+        """
+        Recznie zdejmuje symbol z kwarantanny (np. po poprawce tickera).
+        """
+        return redis_cache.delete(self.key(symbol))
+
+    def _records(self, symbols: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Wpisy licznikow dla symboli (tylko istniejace).
+        """
+        keys = {self.key(symbol): symbol for symbol in symbols}
+        if not keys:
+            return {}
+
+        cached = redis_cache.get_many(list(keys))
+        return {keys[key]: value for key, value in cached.items() if isinstance(value, dict)}
+
+
+# Singleton - wspolny dla scanow w procesie (stan w cache)
+symbol_quarantine = SymbolQuarantine(
+    max_failures=settings.SYMBOL_QUARANTINE_FAILURES,
+    ttl=settings.SYMBOL_QUARANTINE_TTL
+)
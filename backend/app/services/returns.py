@@ -0,0 +1,228 @@
+"""
+Returns - stopy zwrotu dla wielu horyzontow i calego universe naraz
+
+PROBLEM: scanner liczyl tylko 7d / 30d skalarnym iloc per symbol (2 lookupy
+Pythona na symbol), a przy krotkiej historii po cichu bral "pierwszy dostepny
+bar" jako 30 dni temu.
+
+ROZWIAZANIE: ClosesMatrix = wyrownana macierz zamkniec (daty x symbole).
+compute_returns() liczy wszystkie horyzonty jedna seria operacji NumPy
+na calej macierzy:
+- ffill w osi czasu (symbol bez sesji danego dnia = ostatnie zamkniecie)
+- koniec horyzontu = ostatni prawdziwy bar symbolu
+- poczatek = ostatni bar <= (data konca - horyzont); bar sprzed pierwszego
+  notowania symbolu = NaN (za krotka historia), NIE pierwszy dostepny bar
+
+Horyzonty (HORIZONS):
+- "1d", "5d" - sesje (bary) wstecz
+- "7d", "30d", "90d", "1y" - dni kalendarzowe wstecz
+- "ytd" - od ostatniego zamkniecia poprzedniego roku
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Horyzont -> (jednostka, ile): "bars" = sesje wstecz, "days" = dni kalendarzowe wstecz
+HORIZONS: Dict[str, tuple] = {
+    "1d": ("bars", 1),
+    "5d": ("bars", 5),
+    "7d": ("days", 7),
+    "30d": ("days", 30),
+    "90d": ("days", 90),
+    "1y": ("days", 365),
+    "ytd": ("ytd", 0),
+}
+
+# Horyzonty liczone zawsze (kolumny price_change_7d / price_change_30d kryteriow)
+DEFAULT_HORIZONS = ["7d", "30d"]
+
+# Zapas dni przy doborze okresu historii (weekend + swieto przed poczatkiem horyzontu)
+LOOKBACK_SLACK_DAYS = 7
+
+
+def align_histories(
+    histories: Dict[str, pd.DataFrame],
+    columns: List[str]
+) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Wyrownuje historie wielu symboli do wspolnej osi dat (jeden concat).
+
+    Symbol bez kolumny "Close" / z pusta historia jest pomijany; brakujace
+    pozostale kolumny = NaN.
+
+    Returns:
+        (dates datetime64[D] shape (T,), symbole (N), wartosci float shape (T, N, len(columns)))
+    """
+    frames = {
+        symbol: frame.reindex(columns=columns) for symbol, frame in histories.items()
+        if frame is not None and not frame.empty and "Close" in frame
+    }
+    if not frames:
+        return np.array([], dtype="datetime64[D]"), [], np.empty((0, 0, len(columns)))
+
+    aligned = pd.concat(frames, axis=1, sort=True)
+    index = pd.DatetimeIndex(aligned.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+
+    # Kilka barow tego samego dnia (rozne strefy / intraday) -> ostatni
+    dates = index.values.astype("datetime64[D]")
+    keep = np.append(dates[1:] != dates[:-1], True)
+
+    values = aligned.to_numpy(dtype="f8", na_value=np.nan).reshape(len(aligned), len(frames), len(columns))
+    return dates[keep], list(frames), values[keep]
+
+
+def forward_fill(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ffill w osi czasu (axis 0) dla wszystkich kolumn naraz.
+
+    Returns:
+        (wypelnione wartosci, indeks ostatniego prawdziwego wiersza dla kazdej komorki; -1 = brak)
+    """
+    rows = np.arange(values.shape[0])[:, None]
+    last_valid_row = np.maximum.accumulate(np.where(~np.isnan(values), rows, -1), axis=0)
+    filled = np.take_along_axis(values, np.maximum(last_valid_row, 0), axis=0)
+    filled[last_valid_row < 0] = np.nan
+    return filled, last_valid_row
+
+
+def group_by_symbol(symbols: List[str], computed: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Wyniki kolumnowe (nazwa -> array (N,)) pogrupowane per symbol, NaN -> None.
+    """
+    # Jedna konwersja array -> lista Pythona na nazwe zamiast lookupu per komorka
+    as_lists = {
+        name: [None if np.isnan(value) else value for value in values.tolist()]
+        for name, values in computed.items()
+    }
+    return {
+        symbol: {name: values[i] for name, values in as_lists.items()}
+        for i, symbol in enumerate(symbols)
+    }
+
+
+def validate_horizons(horizons: Iterable[str]) -> List[str]:
+    """
+    Sprawdza nazwy horyzontow (bez duplikatow, kolejnosc zachowana).
+
+    Raises:
+        ValueError: Nieznany horyzont
+    """
+    horizons = list(dict.fromkeys(horizons))
+    unknown = [h for h in horizons if h not in HORIZONS]
+    if unknown:
+        raise ValueError(f"Nieznane horyzonty: {', '.join(unknown)} (dostepne: {', '.join(HORIZONS)})")
+    return horizons
+
+
+def lookback_days(horizons: Iterable[str], today: date) -> int:
+    """
+    Ile dni kalendarzowych historii potrzeba dla horyzontow (z zapasem).
+    """
+    days = 0
+    for horizon in horizons:
+        unit, count = HORIZONS[horizon]
+        if unit == "bars":
+            # ~7 dni kalendarzowych na 5 sesji
+            days = max(days, count * 7 // 5 + 1)
+        elif unit == "days":
+            days = max(days, count)
+        else:
+            days = max(days, (today - date(today.year - 1, 12, 31)).days)
+    return days + LOOKBACK_SLACK_DAYS
+
+
+@dataclass(frozen=True)
+class ClosesMatrix:
+    """
+    Wyrownane zamkniecia wielu symboli.
+
+    Attributes:
+        dates: Daty wierszy, rosnaco (datetime64[D], shape (T,))
+        symbols: Symbole kolumn (N)
+        closes: Zamkniecia (float, shape (T, N), NaN = brak notowania)
+    """
+    dates: np.ndarray
+    symbols: List[str]
+    closes: np.ndarray
+
+    @classmethod
+    def from_histories(cls, histories: Dict[str, pd.DataFrame], column: str = "Close") -> "ClosesMatrix":
+        """
+        Buduje macierz z wyniku PriceHistoryService.fetch_history() (outer join po datach).
+        """
+        dates, symbols, values = align_histories(histories, [column])
+        return cls(dates=dates, symbols=symbols, closes=values[:, :, 0])
+
+    def column(self, symbol: str) -> int:
+        """Indeks kolumny symbolu"""
+        return self.symbols.index(symbol)
+
+
+def compute_returns(matrix: ClosesMatrix, horizons: Iterable[str]) -> Dict[str, np.ndarray]:
+    """
+    Stopy zwrotu (%) dla wszystkich symboli i horyzontow.
+
+    Args:
+        matrix: Wyrownane zamkniecia
+        horizons: Nazwy z HORIZONS
+
+    Returns:
+        Dict horyzont -> array shape (N,) w kolejnosci matrix.symbols (NaN = brak danych)
+    """
+    horizons = validate_horizons(horizons)
+    closes = matrix.closes
+    n_dates, n_symbols = closes.shape
+    if not n_dates or not n_symbols:
+        return {horizon: np.full(n_symbols, np.nan) for horizon in horizons}
+
+    valid = ~np.isnan(closes)
+    # ffill w osi czasu + indeks ostatniego prawdziwego baru dla kazdej komorki
+    filled, last_valid_row = forward_fill(closes)
+
+    has_data = valid.any(axis=0)
+    columns = np.arange(n_symbols)
+    first_row = np.where(has_data, valid.argmax(axis=0), n_dates)
+    end_row = np.where(has_data, last_valid_row[-1], 0)
+    end_close = filled[end_row, columns]
+    end_dates = matrix.dates[end_row]
+
+    results: Dict[str, np.ndarray] = {}
+    for horizon in horizons:
+        unit, count = HORIZONS[horizon]
+        if unit == "bars":
+            start_row = end_row - count
+        else:
+            if unit == "days":
+                start_dates = end_dates - np.timedelta64(count, "D")
+            else:
+                # YTD: ostatnie zamkniecie roku poprzedzajacego date konca
+                years = end_dates.astype("datetime64[Y]")
+                start_dates = years.astype("datetime64[D]") - np.timedelta64(1, "D")
+            start_row = np.searchsorted(matrix.dates, start_dates, side="right") - 1
+
+        enough_history = has_data & (start_row >= first_row)
+        start_close = filled[np.clip(start_row, 0, n_dates - 1), columns]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = (end_close / start_close - 1.0) * 100.0
+        results[horizon] = np.where(enough_history & (start_close != 0), change, np.nan)
+
+    return results
+
+
+def returns_by_symbol(
+    histories: Dict[str, pd.DataFrame],
+    horizons: Iterable[str]
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    compute_returns() dla historii z fetch_history(), pogrupowane per symbol.
+
+    Returns:
+        Dict symbol -> {horyzont: % lub None}
+    """
+    matrix = ClosesMatrix.from_histories(histories)
+    return group_by_symbol(matrix.symbols, compute_returns(matrix, horizons))
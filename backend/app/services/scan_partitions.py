@@ -0,0 +1,335 @@
+"""
+Scan Partitions - miesieczne partycje scan_results + retencja
+
+PROBLEM: Kazdy scan dopisuje pelne wiersze do scan_results na zawsze. Przy
+scanach z harmonogramu to miliony wierszy miesiecznie - indeksy puchna,
+a usuwanie starych danych przez DELETE to godziny pracy + VACUUM.
+
+ROZWIAZANIE: W PostgreSQL scan_results = PARTITION BY RANGE (scan_date),
+jedna partycja na miesiac (scan_results_y2026m10):
+- ensure() tworzy partycje biezacego miesiaca + SCAN_PARTITIONS_AHEAD kolejnych
+  (ScanResultWriter przed zapisem; pamieta ostatni miesiac = 0 zapytan potem)
+- apply_retention() usuwa partycje starsze niz SCAN_RESULTS_RETENTION_MONTHS
+  jednym DROP TABLE (O(1), bez VACUUM) i stare runy scan_runs bez wynikow
+  (run sprzed granicy moze miec wiersze w zachowanej partycji - FK z CASCADE)
+
+Baza bez partycji (SQLite w testach) = retencja przez DELETE po scan_date.
+Stara niepartycjonowana tabela w PostgreSQL: convert_legacy() (migrate_scan_results.py)
+przenosi wiersze do tabeli partycjonowanej, a verify_schema() przy starcie aplikacji
+odmawia pracy na niezmigrowanej tabeli (create_all() nie zmienia istniejacych tabel).
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Callable, List, Optional
+import logging
+import re
+import threading
+from sqlalchemy import delete, exists, inspect, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.scan import ScanResult as ScanResultModel
+from app.models.scan import ScanRun
+
+logger = logging.getLogger(__name__)
+
+TABLE = ScanResultModel.__tablename__
+
+# Stara (niepartycjonowana) tabela po convert_legacy() - zostaje do recznego DROP
+LEGACY_TABLE = f"{TABLE}_legacy"
+
+# Nazwa partycji miesiecznej: scan_results_y2026m10
+PARTITION_NAME = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def add_months(month: date, months: int) -> date:
+    """Pierwszy dzien miesiaca przesunietego o `months` (moze byc ujemne)"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bound(month: date) -> str:
+    """Granica partycji: polnoc UTC pierwszego dnia miesiaca"""
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+@dataclass
+class RetentionReport:
+    """
+    Wynik apply_retention().
+
+    Attributes:
+        cutoff: Wyniki sprzed tej chwili usuniete (None = retencja wylaczona)
+        dropped_partitions: Usuniete partycje (PostgreSQL)
+        deleted_rows: Wiersze usuniete DELETE (baza bez partycji)
+        deleted_runs: Usuniete runy scan_runs (sprzed granicy, bez wynikow)
+    """
+    cutoff: Optional[datetime] = None
+    dropped_partitions: List[str] = field(default_factory=list)
+    deleted_rows: int = 0
+    deleted_runs: int = 0
+
+
+class ScanPartitionManager:
+    """
+    Partycje miesieczne scan_results i retencja.
+
+    Usage:
+        scan_partitions.ensure()            # przed zapisem wynikow
+        scan_partitions.apply_retention()   # raz dziennie (maintain_scan_results.py)
+    """
+
+    def __init__(
+        self,
+        months_ahead: int,
+        retention_months: int,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        """
+        Args:
+            months_ahead: Ile miesiecy do przodu tworzyc partycje
+            retention_months: Ile pelnych miesiecy wstecz trzymac wyniki (0 = bez retencji)
+            session_factory: Fabryka sesji SQLAlchemy
+        """
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.session_factory = session_factory
+        self._ensured_through: Optional[date] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def partition_name(month: date) -> str:
+        """Nazwa partycji miesiaca (scan_results_y2026m10)"""
+        return f"{TABLE}_y{month.year}m{month.month:02d}"
+
+    def ensure(self, now: Optional[datetime] = None) -> None:
+        """
+        Tworzy brakujace partycje od biezacego miesiaca do +months_ahead.
+
+        Blad bazy jest logowany - zapis do brakujacej partycji i tak sie nie uda
+        (ScanResultWriter loguje i robi rollback).
+        """
+        current = (now or datetime.now(timezone.utc)).date().replace(day=1)
+        last = add_months(current, self.months_ahead)
+        if self._ensured_through is not None and self._ensured_through >= last:
+            return
+
+        with self._lock:
+            if self._ensured_through is not None and self._ensured_through >= last:
+                return
+
+            db = self.session_factory()
+            try:
+                if self._is_partitioned(db):
+                    self._create_partitions(db, current, last)
+                    db.commit()
+                    logger.info(f"[PARTITIONS] Partycje {TABLE} do {last:%Y-%m} gotowe")
+                self._ensured_through = last
+            except Exception as e:
+                logger.error(f"[PARTITIONS] Blad tworzenia partycji {TABLE}: {e}")
+                db.rollback()
+            finally:
+                db.close()
+
+    def apply_retention(self, now: Optional[datetime] = None) -> RetentionReport:
+        """
+        Usuwa wyniki starsze niz retention_months pelnych miesiecy (+ biezacy).
+
+        PostgreSQL z partycjami: DROP TABLE starych partycji. Inaczej DELETE po scan_date.
+        Runy (scan_runs) rozpoczete przed granica sa usuwane tylko gdy nie maja juz
+        wynikow - DELETE runu kasuje kaskadowo jego wiersze w zachowanych partycjach.
+
+        Raises:
+            Exception: Blad bazy (job utrzymaniowy ma sie wywrocic glosno)
+        """
+        report = RetentionReport()
+        if self.retention_months <= 0:
+            return report
+
+        current = (now or datetime.now(timezone.utc)).date().replace(day=1)
+        cutoff_month = add_months(current, -self.retention_months)
+        report.cutoff = datetime(cutoff_month.year, cutoff_month.month, 1, tzinfo=timezone.utc)
+
+        db = self.session_factory()
+        try:
+            if self._is_partitioned(db):
+                for name in self._partitions(db):
+                    match = PARTITION_NAME.match(name)
+                    if match and date(int(match[1]), int(match[2]), 1) < cutoff_month:
+                        db.execute(text(f"DROP TABLE {name}"))
+                        report.dropped_partitions.append(name)
+            else:
+                report.deleted_rows = db.execute(
+                    delete(ScanResultModel).where(ScanResultModel.scan_date < report.cutoff)
+                ).rowcount
+
+            report.deleted_runs = db.execute(
+                delete(ScanRun).where(
+                    ScanRun.started_at < report.cutoff,
+                    ~exists().where(ScanResultModel.run_id == ScanRun.id)
+                )
+            ).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        logger.info(
+            f"[PARTITIONS] Retencja przed {report.cutoff:%Y-%m-%d}: "
+            f"{len(report.dropped_partitions)} partycji, {report.deleted_rows} wierszy, "
+            f"{report.deleted_runs} runow"
+        )
+        return report
+
+    def verify_schema(self) -> None:
+        """
+        Sprawdzenie przy starcie aplikacji: scan_results w PostgreSQL musi byc
+        partycjonowana i miec run_id (create_all() nie migruje istniejacej tabeli).
+
+        Raises:
+            RuntimeError: Tabela niezmigrowana - uruchom migrate_scan_results.py
+        """
+        db = self.session_factory()
+        try:
+            if db.get_bind().dialect.name != "postgresql" or not self._exists(db, TABLE):
+                return
+
+            problems = []
+            if not self._is_partitioned(db):
+                problems.append("nie jest partycjonowana (PARTITION BY RANGE (scan_date))")
+            columns = {column["name"] for column in inspect(db.connection()).get_columns(TABLE)}
+            if "run_id" not in columns:
+                problems.append("nie ma kolumny run_id")
+        finally:
+            db.close()
+
+        if problems:
+            raise RuntimeError(
+                f"Tabela {TABLE} {' i '.join(problems)} - uruchom: python migrate_scan_results.py"
+            )
+
+    def convert_legacy(self, now: Optional[datetime] = None) -> Optional[int]:
+        """
+        Migruje niepartycjonowana scan_results do tabeli partycjonowanej z modelu.
+
+        W jednej transakcji: RENAME na scan_results_legacy (razem z indeksami i sekwencja -
+        ich nazwy sa globalne w schemacie), CREATE TABLE z modelu ScanResult, partycje od
+        miesiaca najstarszego wyniku do +months_ahead, INSERT ... SELECT, setval sekwencji id.
+        scan_results_legacy zostaje do recznego DROP po sprawdzeniu danych.
+
+        Returns:
+            Liczba skopiowanych wierszy, None gdy nie ma czego migrowac
+            (nie PostgreSQL / brak tabeli / tabela juz partycjonowana)
+
+        Raises:
+            RuntimeError: scan_results_legacy juz istnieje (poprzednia migracja)
+            Exception: Blad bazy (rollback - tabela bez zmian)
+        """
+        db = self.session_factory()
+        try:
+            if (db.get_bind().dialect.name != "postgresql"
+                    or not self._exists(db, TABLE) or self._is_partitioned(db)):
+                return None
+            if self._exists(db, LEGACY_TABLE):
+                raise RuntimeError(f"{LEGACY_TABLE} juz istnieje - usun ja lub zmien nazwe przed migracja")
+
+            db.execute(text(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}"))
+            # Constrainty (z indeksem PK) i pozostale indeksy dostaja sufiks _legacy
+            constraints = db.execute(text(
+                "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table)"
+            ), {"table": LEGACY_TABLE}).scalars().all()
+            for constraint in constraints:
+                db.execute(text(f'ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT "{constraint}" TO "{constraint}_legacy"'))
+            indexes = db.execute(text(
+                "SELECT indexname FROM pg_indexes "
+                "WHERE schemaname = current_schema() AND tablename = :table"
+            ), {"table": LEGACY_TABLE}).scalars().all()
+            for index in indexes:
+                if not index.endswith("_legacy"):  # indeks PK przemianowany razem z constraintem
+                    db.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_legacy"'))
+            sequence = db.execute(
+                text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": LEGACY_TABLE}
+            ).scalar()
+            if sequence:
+                db.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {LEGACY_TABLE}_id_seq"))
+
+            ScanResultModel.__table__.create(bind=db.connection())
+
+            current = (now or datetime.now(timezone.utc)).date().replace(day=1)
+            oldest, newest = db.execute(
+                text(f"SELECT min(scan_date), max(scan_date) FROM {LEGACY_TABLE}")
+            ).one()
+            first = min(current, oldest.date().replace(day=1)) if oldest else current
+            last = add_months(current, self.months_ahead)
+            if newest:
+                last = max(last, newest.date().replace(day=1))
+            self._create_partitions(db, first, last)
+
+            # Kolumny modelu obecne w starej tabeli (np. bez run_id - NULL)
+            legacy_columns = {column["name"] for column in inspect(db.connection()).get_columns(LEGACY_TABLE)}
+            columns = ", ".join(
+                column.name for column in ScanResultModel.__table__.columns if column.name in legacy_columns
+            )
+            # scan_date NULL nie ma partycji (i nie spelnia nowego PK) - takie wiersze zostaja w legacy
+            copied = db.execute(text(
+                f"INSERT INTO {TABLE} ({columns}) "
+                f"SELECT {columns} FROM {LEGACY_TABLE} WHERE scan_date IS NOT NULL"
+            )).rowcount
+            db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+                f"COALESCE((SELECT max(id) FROM {TABLE}), 0) + 1, false)"
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self._ensured_through = None
+        logger.info(f"[PARTITIONS] {TABLE} partycjonowana: {copied} wierszy ({first:%Y-%m} - {last:%Y-%m})")
+        return copied
+
+    def _create_partitions(self, db: Session, first: date, last: date) -> None:
+        """Partycje miesieczne od `first` do `last` wlacznie (IF NOT EXISTS)"""
+        month = first
+        while month <= last:
+            following = add_months(month, 1)
+            db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.partition_name(month)} "
+                f"PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{month_bound(month)}') TO ('{month_bound(following)}')"
+            ))
+            month = following
+
+    @staticmethod
+    def _exists(db: Session, table: str) -> bool:
+        """Czy tabela istnieje (w search_path)"""
+        return db.execute(text("SELECT to_regclass(:table)"), {"table": table}).scalar() is not None
+
+    @staticmethod
+    def _is_partitioned(db: Session) -> bool:
+        """Czy scan_results to tabela partycjonowana PostgreSQL"""
+        if db.get_bind().dialect.name != "postgresql":
+            return False
+        return db.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"
+        ), {"table": TABLE}).first() is not None
+
+    @staticmethod
+    def _partitions(db: Session) -> List[str]:
+        """Nazwy partycji scan_results"""
+        return list(db.execute(text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ), {"table": TABLE}).scalars())
+
+
+# Singleton - horyzont partycji i retencja z konfiguracji
+scan_partitions = ScanPartitionManager(
+    months_ahead=settings.SCAN_PARTITIONS_AHEAD,
+    retention_months=settings.SCAN_RESULTS_RETENTION_MONTHS
+)
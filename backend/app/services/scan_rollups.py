@@ -0,0 +1,136 @@
+"""
+Scan Rollups - dzienne podsumowanie wynikow scanu per symbol (scan_daily_rollups)
+
+PROBLEM: Wykres symbolu za rok = przeszukiwanie milionow wierszy scan_results
+(kilka scanow dziennie x tysiace symboli), a retencja partycji i tak usuwa
+starsze dane.
+
+ROZWIAZANIE: Jeden wiersz na (symbol, dzien): wartosci z ostatniego scanu dnia
++ liczba scanow i matches. Liczone w bazie jednym INSERT ... SELECT na dzien
+(funkcje okna, bez przesylania wierszy do Pythona), dzien UTC = zakres
+scan_date, wiec PostgreSQL czyta tylko jedna partycje.
+
+rollup_pending() nadrabia dni od ostatniego rollupu (ostatni dzien liczony
+ponownie - mogl byc niepelny) - uruchamiane przed retencja partycji.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
+import logging
+from sqlalchemy import Date, case, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+from app.models.scan import ScanDailyRollup
+from app.models.scan import ScanResult as ScanResultModel
+
+logger = logging.getLogger(__name__)
+
+# Kolumny "last_*" rollupu -> kolumny scan_results
+LAST_VALUE_COLUMNS = {
+    "last_scan_date": "scan_date",
+    "last_price": "price",
+    "last_volume": "volume",
+    "last_market_cap": "market_cap",
+    "last_roe": "roe",
+    "last_forward_pe": "forward_pe",
+    "last_price_change_7d": "price_change_7d",
+    "last_price_change_30d": "price_change_30d",
+    "last_meets_criteria": "meets_criteria",
+}
+
+
+class ScanRollupService:
+    """
+    Liczenie i odczyt rollupow dziennych (sesja z SessionLocal / Depends(get_db)).
+    """
+
+    @staticmethod
+    def rollup_day(db: Session, day: date) -> int:
+        """
+        Przelicza rollup jednego dnia (UTC) - nadpisuje istniejace wiersze tego dnia.
+
+        Commit po stronie wywolujacego.
+
+        Returns:
+            Liczba symboli w rollupie
+        """
+        start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+        result = ScanResultModel
+
+        ranked = select(
+            result.symbol,
+            *(result.__table__.c[column] for column in LAST_VALUE_COLUMNS.values()),
+            func.row_number().over(
+                partition_by=result.symbol,
+                order_by=(result.scan_date.desc(), result.id.desc())
+            ).label("position"),
+            func.count().over(partition_by=result.symbol).label("scans"),
+            func.sum(case((result.meets_criteria, 1), else_=0)).over(partition_by=result.symbol).label("matches"),
+        ).where(
+            result.scan_date >= start,
+            result.scan_date < start + timedelta(days=1)
+        ).subquery()
+
+        last = select(
+            ranked.c.symbol,
+            literal(day, Date),
+            ranked.c.scans,
+            ranked.c.matches,
+            *(ranked.c[column] for column in LAST_VALUE_COLUMNS.values()),
+        ).where(ranked.c.position == 1)
+
+        db.execute(delete(ScanDailyRollup).where(ScanDailyRollup.day == day))
+        written = db.execute(insert(ScanDailyRollup).from_select(
+            ["symbol", "day", "scans", "matches", *LAST_VALUE_COLUMNS], last
+        )).rowcount
+        logger.debug(f"[ROLLUPS] {day}: {written} symboli")
+        return written
+
+    @staticmethod
+    def rollup_pending(db: Session, today: Optional[date] = None) -> List[date]:
+        """
+        Przelicza dni od ostatniego rollupu (wlacznie) do dzisiaj (UTC).
+
+        Bez rollupow - od pierwszego wyniku w scan_results. Commit po kazdym dniu.
+
+        Returns:
+            Przeliczone dni
+        """
+        today = today or datetime.now(timezone.utc).date()
+        start = db.execute(select(func.max(ScanDailyRollup.day))).scalar()
+        if start is None:
+            first = db.execute(select(func.min(ScanResultModel.scan_date))).scalar()
+            if first is None:
+                return []
+            start = _as_utc(first).date()
+
+        days = []
+        day = start
+        while day <= today:
+            ScanRollupService.rollup_day(db, day)
+            db.commit()
+            days.append(day)
+            day += timedelta(days=1)
+
+        logger.info(f"[ROLLUPS] Przeliczono {len(days)} dni ({start} - {today})")
+        return days
+
+    @staticmethod
+    def history(
+        db: Session,
+        symbol: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> List[ScanDailyRollup]:
+        """
+        Rollupy symbolu rosnaco po dniu (zakres wlacznie) - range scan po PK (symbol, day).
+        """
+        query = db.query(ScanDailyRollup).filter(ScanDailyRollup.symbol == symbol)
+        if start is not None:
+            query = query.filter(ScanDailyRollup.day >= start)
+        if end is not None:
+            query = query.filter(ScanDailyRollup.day <= end)
+        return query.order_by(ScanDailyRollup.day).all()
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Baza bez stref czasowych (SQLite) zwraca naive datetime - zapisywany jako UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
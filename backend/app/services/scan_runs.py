@@ -0,0 +1,172 @@
+"""
+Scan Runs - przebiegi scanu jako osobne rekordy (tabela scan_runs)
+
+PROBLEM: Wiersze scan_results maja tylko symbol i scan_date. Nie wiadomo ktore
+wiersze sa z jednego scanu ani jakie progi je daly, a "ostatni scan" to
+przeszukiwanie po czasie rosnacej tabeli.
+
+ROZWIAZANIE: Kazdy scan zapisujacy wyniki tworzy wiersz scan_runs (parametry,
+czasy, liczniki, API calls), a kazdy wynik ma run_id:
+- lista runow = PK scan_runs malejaco (stronicowanie kursorem before_id)
+- wyniki runu = indeks (run_id, id), tylko matches = (run_id, meets_criteria, id) -
+  kursor after_id zamiast OFFSET, koszt strony nie rosnie z glebokoscia
+
+Blad bazy przy zapisie runu nie przerywa scanu (wyniki trafiaja bez run_id).
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+import logging
+from sqlalchemy.orm import Session, defer
+from app.database import SessionLocal
+from app.models.scan import ScanResult as ScanResultModel
+from app.models.scan import ScanRun
+
+logger = logging.getLogger(__name__)
+
+# Zrodla runow
+RUN_SOURCE_SCAN = "scan"
+RUN_SOURCE_STREAM = "stream"
+RUN_SOURCE_JOB = "job"
+
+# Statusy runu
+RUN_RUNNING = "running"
+RUN_COMPLETED = "completed"
+RUN_CANCELLED = "cancelled"
+
+
+class ScanRunStore:
+    """
+    Zapis przebiegow scanu (sesja z session_factory - wolane z watkow scanu).
+
+    Usage:
+        run_id = scan_run_store.start(RUN_SOURCE_SCAN, params, total_symbols=500)
+        scan_result_writer.write(results, run_id=run_id)
+        scan_run_store.finish(run_id, total_scanned=480, matches=12, api_calls=730)
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+
+    def start(
+        self,
+        source: str,
+        params: Dict[str, Any],
+        total_symbols: int,
+        scan_id: Optional[str] = None,
+        started_at: Optional[datetime] = None
+    ) -> Optional[int]:
+        """
+        Tworzy run ze statusem running.
+
+        Returns:
+            ID runu lub None przy bledzie bazy
+        """
+        db = self.session_factory()
+        try:
+            run = ScanRun(
+                scan_id=scan_id,
+                source=source,
+                status=RUN_RUNNING,
+                params=params,
+                started_at=started_at or datetime.now(timezone.utc),
+                total_symbols=total_symbols
+            )
+            db.add(run)
+            db.commit()
+            return run.id
+        except Exception as e:
+            logger.error(f"[SCAN RUNS] Blad zapisu runu {scan_id or source}: {e}")
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def finish(
+        self,
+        run_id: Optional[int],
+        total_scanned: int,
+        matches: int,
+        api_calls: int,
+        status: str = RUN_COMPLETED
+    ) -> None:
+        """
+        Zamyka run: czas konca, liczniki, API calls (run_id None = nic do zrobienia).
+        """
+        if run_id is None:
+            return
+
+        db = self.session_factory()
+        try:
+            run = db.get(ScanRun, run_id)
+            if run is None:
+                return
+            run.status = status
+            run.finished_at = datetime.now(timezone.utc)
+            run.duration_seconds = round((run.finished_at - _as_utc(run.started_at)).total_seconds(), 3)
+            run.total_scanned = total_scanned
+            run.matches = matches
+            run.api_calls = api_calls
+            db.commit()
+        except Exception as e:
+            logger.error(f"[SCAN RUNS] Blad zamkniecia runu {run_id}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+class ScanRunService:
+    """
+    Odczyt runow i ich wynikow dla endpointow (sesja z Depends(get_db)).
+    """
+
+    @staticmethod
+    def list_runs(
+        db: Session,
+        limit: int,
+        before_id: Optional[int] = None,
+        scan_id: Optional[str] = None
+    ) -> List[ScanRun]:
+        """
+        Runy od najnowszego, strona po `limit` (kursor: id ostatniego runu poprzedniej strony).
+        """
+        # Bez params (lista symboli moze miec tysiace pozycji) - tylko w szczegolach runu
+        query = db.query(ScanRun).options(defer(ScanRun.params))
+        if scan_id is not None:
+            query = query.filter(ScanRun.scan_id == scan_id)
+        if before_id is not None:
+            query = query.filter(ScanRun.id < before_id)
+        return query.order_by(ScanRun.id.desc()).limit(limit).all()
+
+    @staticmethod
+    def get_run(db: Session, run_id: int) -> Optional[ScanRun]:
+        """
+        Run po ID lub None.
+        """
+        return db.get(ScanRun, run_id)
+
+    @staticmethod
+    def list_results(
+        db: Session,
+        run_id: int,
+        limit: int,
+        after_id: Optional[int] = None,
+        only_matches: bool = False
+    ) -> List[ScanResultModel]:
+        """
+        Wyniki runu rosnaco po id, strona po `limit` (kursor: id ostatniego wyniku poprzedniej strony).
+        """
+        query = db.query(ScanResultModel).filter(ScanResultModel.run_id == run_id)
+        if only_matches:
+            query = query.filter(ScanResultModel.meets_criteria.is_(True))
+        if after_id is not None:
+            query = query.filter(ScanResultModel.id > after_id)
+        return query.order_by(ScanResultModel.id).limit(limit).all()
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Baza bez stref czasowych (SQLite) zwraca naive datetime - zapisywany jako UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+# Singleton
+scan_run_store = ScanRunStore()
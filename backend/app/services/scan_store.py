@@ -0,0 +1,132 @@
+"""
+Scan Dataset Store - przechowuje wiersze metryk ostatnich scanow (po scan_id)
+
+PROBLEM: Zmiana suwaka w UI (min_roe, max_forward_pe, ...) = nowy POST /api/scan
+= caly pipeline fetch od nowa (cache lookups + API calls dla wygaslych kluczy).
+
+ROZWIAZANIE: Po scanie zapisujemy wiersze metryk pod scan_id.
+POST /api/scan/{scan_id}/refilter stosuje nowe progi do zapisanych danych:
+0 API calls, odpowiedz w milisekundach.
+
+Dwa poziomy:
+- In-process (OrderedDict, LRU + TTL) - gotowy DataFrame, bez budowania od nowa
+- Redis (JSON, TTL) - dataset widoczny dla wszystkich workerow uvicorn
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import logging
+import pandas as pd
+from app.cache import redis_cache
+from app.config import settings
+from app.services.criteria import build_metrics_frame
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScanDataset:
+    """
+    Zapisany dataset jednego scanu.
+
+    Attributes:
+        rows: Wiersze metryk z fazy fetch (kolejnosc symboli)
+        frame: Kolumnowa tabela metryk (build_metrics_frame(rows))
+        expires_at: Czas wygasniecia (time.monotonic())
+        total_symbols: Liczba unikalnych symboli z requestu scanu (total_scanned re-filtra)
+    """
+    rows: List[Dict[str, Any]]
+    frame: pd.DataFrame
+    expires_at: float
+    total_symbols: int
+
+
+class ScanDatasetStore:
+    """
+    Magazyn datasetow scanow z limitem rozmiaru (LRU) i TTL.
+    """
+
+    KEY_PREFIX = "scan_dataset"
+
+    def __init__(self, max_datasets: int, ttl: int):
+        """
+        Args:
+            max_datasets: Max liczba datasetow w pamieci procesu (najstarsze usuwane)
+            ttl: Czas zycia datasetu w sekundach (in-process i Redis)
+        """
+        self.max_datasets = max_datasets
+        self.ttl = ttl
+        self._datasets: "OrderedDict[str, ScanDataset]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, dataset_id: str, rows: List[Dict[str, Any]], total_symbols: int) -> None:
+        """
+        Zapisuje wiersze metryk scanu pod dataset_id.
+
+        Args:
+            dataset_id: ID scanu (scan_id z ScanResponse)
+            rows: Wiersze metryk z fazy fetch
+            total_symbols: Liczba unikalnych symboli z requestu (rows nie maja
+                symboli bez danych / w kwarantannie)
+        """
+        self._put_local(dataset_id, rows, total_symbols)
+        redis_cache.set(
+            f"{self.KEY_PREFIX}:{dataset_id}",
+            {"rows": rows, "total_symbols": total_symbols},
+            self.ttl
+        )
+        logger.info(f"[SCAN STORE] Zapisano dataset {dataset_id} ({len(rows)} symboli)")
+
+    def get(self, dataset_id: str) -> Optional[ScanDataset]:
+        """
+        Pobiera dataset scanu (najpierw z pamieci procesu, potem z Redis).
+
+        Args:
+            dataset_id: ID scanu
+
+        Returns:
+            ScanDataset lub None jesli nie istnieje / wygasl
+        """
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            if dataset is not None:
+                if dataset.expires_at > time.monotonic():
+                    self._datasets.move_to_end(dataset_id)
+                    return dataset
+                del self._datasets[dataset_id]
+
+        # Dataset mogl byc zapisany przez inny worker
+        stored = redis_cache.get(f"{self.KEY_PREFIX}:{dataset_id}")
+        if stored is None:
+            return None
+        if isinstance(stored, list):
+            # Format sprzed total_symbols (sama lista wierszy) - do wygasniecia TTL
+            return self._put_local(dataset_id, stored, len(stored))
+
+        return self._put_local(dataset_id, stored["rows"], stored["total_symbols"])
+
+    def _put_local(self, dataset_id: str, rows: List[Dict[str, Any]], total_symbols: int) -> ScanDataset:
+        """
+        Zapisuje dataset w pamieci procesu (z gotowym DataFrame), usuwa najstarsze.
+        """
+        dataset = ScanDataset(
+            rows=rows,
+            frame=build_metrics_frame(rows),
+            expires_at=time.monotonic() + self.ttl,
+            total_symbols=total_symbols
+        )
+        with self._lock:
+            self._datasets[dataset_id] = dataset
+            self._datasets.move_to_end(dataset_id)
+            while len(self._datasets) > self.max_datasets:
+                self._datasets.popitem(last=False)
+        return dataset
+
+
+# Singleton - jeden magazyn datasetow dla calej aplikacji
+scan_dataset_store = ScanDatasetStore(
+    max_datasets=settings.SCAN_DATASET_MAX,
+    ttl=settings.SCAN_DATASET_TTL
+)
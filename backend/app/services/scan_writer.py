@@ -0,0 +1,177 @@
+"""
+Scan Writer - zapis wynikow scanu do scan_results w paczkach
+
+PROBLEM: Zapis scanu = jeden obiekt ORM ScanResult + db.add() na wynik.
+Przy 5000 symboli sam narzut ORM (unit of work, INSERT per wiersz) to sekundy.
+
+ROZWIAZANIE: Wyniki -> slowniki kolumn -> jedna z metod (SCAN_SAVE_METHOD):
+- "insert": Core insert() z lista wierszy, po SCAN_SAVE_BATCH_SIZE wierszy
+  (SQLAlchemy 2 + psycopg2 = wielowierszowe INSERT ... VALUES (...), (...))
+- "copy": PostgreSQL COPY FROM STDIN (CSV) - najszybsze dla duzych universe;
+  na innej bazie (np. SQLite w testach) zapis przez "insert"
+
+Calosc w jednej transakcji - blad = rollback calego scanu (log, scan trwa dalej).
+Przed zapisem scan_partitions.ensure() - partycja biezacego miesiaca musi istniec.
+"""
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, List, Optional
+import logging
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.scan import ScanResult as ScanResultModel
+from app.schemas.scan import StockResult
+from app.services.scan_partitions import scan_partitions
+
+logger = logging.getLogger(__name__)
+
+# Metody zapisu (SCAN_SAVE_METHOD)
+SAVE_INSERT = "insert"
+SAVE_COPY = "copy"
+
+# Kolumny zapisywane przy scanie (scan_date i id - domyslne z bazy)
+RECORD_COLUMNS = [
+    "run_id",
+    "symbol",
+    "criteria_met",
+    "price",
+    "volume",
+    "market_cap",
+    "roe",
+    "roce",
+    "debt_equity",
+    "revenue_growth",
+    "forward_pe",
+    "price_change_7d",
+    "price_change_30d",
+    "meets_criteria",
+]
+
+
+class ScanResultWriter:
+    """
+    Zapis listy StockResult do tabeli scan_results.
+
+    Usage:
+        scan_result_writer.write(results, run_id=run_id)   # liczba zapisanych wierszy
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        method: str = SAVE_INSERT,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        """
+        Args:
+            batch_size: Ile wierszy na jeden INSERT / COPY
+            method: SAVE_INSERT lub SAVE_COPY
+
+        Raises:
+            ValueError: Nieznana metoda zapisu
+        """
+        if method not in (SAVE_INSERT, SAVE_COPY):
+            raise ValueError(f"Nieznana metoda zapisu scanu: {method} (dostepne: {SAVE_INSERT}, {SAVE_COPY})")
+        self.batch_size = max(1, batch_size)
+        self.method = method
+        self.session_factory = session_factory
+
+    def write(self, results: List[StockResult], run_id: Optional[int] = None) -> int:
+        """
+        Zapisuje wyniki jedna transakcja.
+
+        Args:
+            results: Wyniki scanu
+            run_id: Run scanu (app.services.scan_runs) - None = wyniki bez runu
+
+        Blad zapisu jest logowany (rollback), ale nie przerywa scanu.
+
+        Returns:
+            Liczba zapisanych wierszy (0 przy bledzie)
+        """
+        if not results:
+            return 0
+
+        records = [self.to_record(result, run_id) for result in results]
+        scan_partitions.ensure()
+        db = self.session_factory()
+        try:
+            if self.method == SAVE_COPY and db.get_bind().dialect.name == "postgresql":
+                self._copy(db, records)
+            else:
+                self._insert(db, records)
+            db.commit()
+            logger.info(f"Zapisano {len(records)} wynikow skanowania do bazy danych ({self.method})")
+            return len(records)
+
+        except Exception as e:
+            logger.error(f"Blad zapisu do bazy danych: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+    def _insert(self, db: Session, records: List[Dict[str, Any]]) -> None:
+        table = ScanResultModel.__table__
+        for start in range(0, len(records), self.batch_size):
+            db.execute(insert(table), records[start:start + self.batch_size])
+
+    def _copy(self, db: Session, records: List[Dict[str, Any]]) -> None:
+        # Surowe polaczenie psycopg2 z transakcji sesji (commit / rollback przez sesje)
+        cursor = db.connection().connection.cursor()
+        statement = (
+            f"COPY {ScanResultModel.__tablename__} ({', '.join(RECORD_COLUMNS)}) "
+            f"FROM STDIN WITH (FORMAT csv)"
+        )
+        try:
+            for start in range(0, len(records), self.batch_size):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for record in records[start:start + self.batch_size]:
+                    # None -> puste pole bez cudzyslowow = NULL w COPY CSV
+                    writer.writerow([
+                        json.dumps(record[column]) if column == "criteria_met" else record[column]
+                        for column in RECORD_COLUMNS
+                    ])
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def to_record(result: StockResult, run_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        StockResult -> wiersz tabeli scan_results (kolumny RECORD_COLUMNS).
+        """
+        return {
+            "run_id": run_id,
+            "symbol": result.symbol,
+            # criteria_met to JSON - tylko kryteria bez wlasnych kolumn
+            # (kopie kolumn w kazdym wierszu = glowny skladnik rozmiaru tabeli)
+            "criteria_met": {
+                "rsi": result.rsi_14,
+                "golden_cross": result.golden_cross
+            },
+            "price": result.price,
+            "volume": result.volume,
+            # Fundamentals w osobnych kolumnach
+            "market_cap": result.market_cap,
+            "roe": result.roe,
+            "roce": result.roce,
+            "debt_equity": result.debt_equity,
+            "revenue_growth": result.revenue_growth,
+            "forward_pe": result.forward_pe,
+            "price_change_7d": result.price_change_7d,
+            "price_change_30d": result.price_change_30d,
+            "meets_criteria": result.meets_criteria,
+        }
+
+
+# Singleton - metoda i rozmiar paczki z konfiguracji
+scan_result_writer = ScanResultWriter(
+    batch_size=settings.SCAN_SAVE_BATCH_SIZE,
+    method=settings.SCAN_SAVE_METHOD
+)
@@ -1,13 +1,65 @@
 """
 Stock Scanner Service - HYBRID: yfinance (price changes) + Finnhub (fundamentals)
+
+Pipeline:
+0. PREFETCH - symbole w kwarantannie odpadaja (app.services.quarantine),
+              cache quote + fundamentals calego scanu jednym pipeline do Redis
+1. FETCH  - historia cen (lokalny magazyn + dociaganie z yfinance), Finnhub quote
+            + fundamentals -> wiersz metryk per symbol
+   Stopy zwrotu (7d, 30d + horyzonty z return_horizons) i wskazniki techniczne
+   dla calego universe operacjami NumPy (app.services.returns / indicators)
+2. FILTER - wszystkie kryteria naraz jako maski numpy na kolumnowej tabeli metryk
+            (app.services.criteria)
 """
-import yfinance as yf
-from typing import List, Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 import logging
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from app.cache import stale_age
+from app.config import settings
 from app.schemas.scan import StockResult
-from app.database import SessionLocal
-from app.models.scan import ScanResult as ScanResultModel
+from app.services.criteria import (
+    INDICATOR_CRITERIA_PARAMS,
+    STAGE_FUNDAMENTALS,
+    STAGE_HISTORY,
+    build_metrics_frame,
+    evaluate_criteria,
+    rejected_stages,
+    row_passes_stage,
+)
 from app.services.finnhub_client import FinnhubClient
+from app.services.fundamentals import FundamentalsRecord
+from app.services.price_history import HISTORY_EMPTY, HISTORY_FAILED, PriceHistoryService
+from app.services.quarantine import (
+    REASON_ERROR,
+    REASON_NO_FUNDAMENTALS,
+    REASON_NO_HISTORY,
+    REASON_NO_QUOTE,
+    symbol_quarantine,
+)
+from app.services.indicators import INDICATOR_COLUMNS, INDICATOR_LOOKBACK_DAYS, OHLCVMatrix, indicators_by_symbol
+from app.services.returns import (
+    DEFAULT_HORIZONS,
+    compute_returns,
+    group_by_symbol,
+    lookback_days,
+    returns_by_symbol,
+    validate_horizons,
+)
+from app.services.scan_runs import (
+    RUN_CANCELLED,
+    RUN_SOURCE_SCAN,
+    RUN_SOURCE_STREAM,
+    scan_run_store,
+)
+from app.services.scan_store import scan_dataset_store
+from app.services.scan_writer import scan_result_writer
 
 # Logger dla error handling
 logger = logging.getLogger(__name__)
@@ -22,6 +74,9 @@ class StockScanner:
     - Finnhub API: Fundamentals + Real-time Price/Volume (117 metrics w 1 calu!)
     """
 
+    # Streaming: co ile wynikow zapisywac paczke do bazy danych
+    STREAM_SAVE_BATCH = 100
+
     @staticmethod
     def scan_stocks(
         symbols: List[str],
@@ -35,7 +90,15 @@ class StockScanner:
         max_debt_equity: Optional[float] = 0.3,            # max 30% zadluzenie
         min_revenue_growth: Optional[float] = 15.0,        # min 15% wzrost przychodow
         max_forward_pe: Optional[float] = 15.0,            # max P/E = 15 (tanie)
-        save_to_db: bool = True                            # czy zapisac wyniki do bazy
+        save_to_db: bool = True,                           # czy zapisac wyniki do bazy
+        max_workers: Optional[int] = None,                 # ile symboli rownolegle (None = z config)
+        lazy: bool = False,                                # najtansze kryteria najpierw, bez zbednych API calls
+        only_matches: bool = False,                        # zwroc tylko akcje spelniajace kryteria
+        dataset_id: Optional[str] = None,                  # zapisz dataset pod tym ID (re-filter)
+        progress: Optional[Callable[[int, int], None]] = None,  # callback postepu (job scanu)
+        return_horizons: Optional[List[str]] = None,       # dodatkowe stopy zwrotu w StockResult.returns
+        indicator_thresholds: Optional[Dict[str, Any]] = None,  # kryteria techniczne (min_rsi, golden_cross, ...)
+        run_source: str = RUN_SOURCE_SCAN                  # zrodlo runu w scan_runs (scan / job)
     ) -> List[StockResult]:
         """
         Skanuje liste akcji i zwraca te ktore spelniaja kryteria MULTIBAGGER.
@@ -51,198 +114,742 @@ class StockScanner:
             max_debt_equity: Max zadluzenie (0.3 = 30% max)
             min_revenue_growth: Min wzrost przychodow YoY % (15% = growth)
             max_forward_pe: Max forward P/E (15 = nie przewartosciowane)
+            save_to_db: Czy zapisac wyniki do tabeli scan_results
+            max_workers: Liczba watkow skanujacych symbole rownolegle
+                (domyslnie settings.SCAN_MAX_WORKERS, 1 = sekwencyjnie)
+            lazy: Leniwa ewaluacja - kryteria od najtanszego zrodla danych
+                (historia yfinance -> fundamentals -> quote). Symbol odrzucony
+                na wczesnym etapie nie kosztuje kolejnych Finnhub API calls,
+                a StockResult.rejected_at mowi na ktorym etapie odpadl.
+            only_matches: Zwroc tylko akcje z meets_criteria=True
+            dataset_id: Jesli podane - wiersze metryk zostaja w scan_dataset_store
+                pod tym ID, zeby re-filtrowac je innymi progami bez API calls
+            progress: Wywolywany po kazdym symbolu jako progress(symbols_done, api_calls)
+                (uzywane przez background joby scanu - app.services.jobs)
+            return_horizons: Horyzonty z app.services.returns.HORIZONS (np. ["1d", "ytd"])
+                zwracane w StockResult.returns
+            indicator_thresholds: Progi kryteriow technicznych (INDICATOR_CRITERIA_PARAMS,
+                np. {"min_rsi": 40, "golden_cross": True}) - etap history, 0 API calls
+            run_source: Zrodlo zapisywane w scan_runs.source (przy save_to_db)
 
         Returns:
-            Lista StockResult z akcjami + fundamentals
+            Lista StockResult z akcjami + fundamentals (w kolejnosci symbols)
         """
-        results = []
+        started_at = datetime.now(timezone.utc)
+        thresholds = StockScanner._build_thresholds(
+            min_volume, min_price_change_percent, min_market_cap, max_market_cap, min_roe,
+            min_roce, max_debt_equity, min_revenue_growth, max_forward_pe, indicator_thresholds
+        )
+
+        requested = symbols
+        # === KWARANTANNA + CACHE PREFETCH + HISTORIA CEN (wspolne dla sync / async / stream) ===
+        symbols, finnhub, fetch_one, update_quarantine = StockScanner._prepare_scan(
+            symbols, thresholds, lazy, only_matches, dataset_id, return_horizons
+        )
+        if progress is not None:
+            fetch_one = StockScanner._with_progress(fetch_one, finnhub, progress)
+
+        # === FAZA FETCH (sekwencyjnie lub w puli watkow) ===
+        # I/O dla roznych symboli (Finnhub quote + fundamentals) naklada sie w czasie.
+        # Limit 60 calls/min pilnuje FinnhubClient - rate limiter jest wspolny dla watkow.
+        workers = max_workers or settings.SCAN_MAX_WORKERS
+        if workers > 1 and len(symbols) > 1:
+            with StockScanner._scan_executor(workers, len(symbols)) as executor:
+                # executor.map zachowuje kolejnosc wejsciowa symboli
+                fetched = list(executor.map(fetch_one, symbols))
+        else:
+            fetched = [fetch_one(symbol) for symbol in symbols]
 
-        # Inicjalizuj Finnhub client raz dla wszystkich symboli
-        finnhub = FinnhubClient()
+        update_quarantine()
 
-        for symbol in symbols:
-            try:
-                # === PRICE CHANGES Z YFINANCE (historical data) ===
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period="1mo")
+        # === FAZA FILTER (wektorowo dla calego universe) ===
+        rows = [row for row in fetched if row is not None]
+        if dataset_id:
+            scan_dataset_store.save(dataset_id, rows, len(set(requested)))
+        results = StockScanner.filter_rows(rows, thresholds, only_matches=only_matches)
 
-                if hist.empty:
-                    logger.warning(f"Brak danych historycznych dla {symbol}")
-                    continue
+        # === ZAPISZ RUN + WYNIKI DO BAZY DANYCH (opcjonalne) ===
+        if save_to_db:
+            StockScanner._save_run(
+                run_source, dataset_id, started_at, requested, symbols, thresholds,
+                lazy, only_matches, return_horizons, results, finnhub
+            )
+        else:
+            logger.info("Pomijam zapis do bazy danych (save_to_db=False)")
 
-                # Oblicz zmiane ceny 7 dni
-                price_change_7d = None
-                if len(hist) >= 7:
-                    current_price_hist = float(hist["Close"].iloc[-1])
-                    price_7d_ago = float(hist["Close"].iloc[-7])
-                    price_change_7d = ((current_price_hist - price_7d_ago) / price_7d_ago) * 100
-
-                # Oblicz zmiane ceny 30 dni
-                price_change_30d = None
-                if len(hist) >= 30:
-                    current_price_hist = float(hist["Close"].iloc[-1])
-                    price_30d_ago = float(hist["Close"].iloc[-30])
-                    price_change_30d = ((current_price_hist - price_30d_ago) / price_30d_ago) * 100
-                elif len(hist) > 1:
-                    current_price_hist = float(hist["Close"].iloc[-1])
-                    price_first = float(hist["Close"].iloc[0])
-                    price_change_30d = ((current_price_hist - price_first) / price_first) * 100
-
-                # === REAL-TIME PRICE Z FINNHUB ===
-                quote = finnhub.get_quote(symbol)
-                if not quote:
-                    logger.warning(f"Brak danych quote Finnhub dla {symbol}")
-                    continue
+        return results
 
-                current_price = quote.get('c', 0)  # current price
+    @staticmethod
+    async def scan_stocks_async(
+        symbols: List[str],
+        min_volume: int = 1_000_000,
+        min_price_change_percent: Optional[float] = None,
+        min_market_cap: Optional[int] = 50_000_000,
+        max_market_cap: Optional[int] = 5_000_000_000,
+        min_roe: Optional[float] = 15.0,
+        min_roce: Optional[float] = 10.0,
+        max_debt_equity: Optional[float] = 0.3,
+        min_revenue_growth: Optional[float] = 15.0,
+        max_forward_pe: Optional[float] = 15.0,
+        save_to_db: bool = True,
+        max_workers: Optional[int] = None,
+        lazy: bool = False,
+        only_matches: bool = False,
+        dataset_id: Optional[str] = None,
+        return_horizons: Optional[List[str]] = None,
+        indicator_thresholds: Optional[Dict[str, Any]] = None
+    ) -> List[StockResult]:
+        """
+        Asynchroniczna wersja scan_stocks() dla endpointow FastAPI.
 
-                # === VOLUME Z YFINANCE (Finnhub czasem nie zwraca volume) ===
-                current_volume = int(hist["Volume"].iloc[-1]) if not hist.empty else 0
+        NIE blokuje event loopa: caly blokujacy I/O (yfinance batch, Finnhub SDK
+        + cache Redis, zapis do PostgreSQL) idzie przez asyncio.to_thread(),
+        a symbole sa skanowane wspolbieznie we wlasnej puli scanu (max max_workers naraz).
+        Jeden worker uvicorn obsluguje wtedy wiele scanow + lekkie requesty (/health, portfolio).
 
-                # === FUNDAMENTALS Z FINNHUB (1 API call!) ===
-                fundamentals = finnhub.get_fundamentals(symbol)
+        Args:
+            Takie same jak scan_stocks()
 
-                if not fundamentals or 'metric' not in fundamentals:
-                    logger.warning(f"Brak danych fundamentals Finnhub dla {symbol} - pomijamy")
-                    continue
+        Returns:
+            Lista StockResult (w kolejnosci symbols)
+        """
+        started_at = datetime.now(timezone.utc)
+        thresholds = StockScanner._build_thresholds(
+            min_volume, min_price_change_percent, min_market_cap, max_market_cap, min_roe,
+            min_roce, max_debt_equity, min_revenue_growth, max_forward_pe, indicator_thresholds
+        )
+
+        requested = symbols
+        symbols, finnhub, fetch_one, update_quarantine = await asyncio.to_thread(
+            StockScanner._prepare_scan, symbols, thresholds, lazy, only_matches, dataset_id, return_horizons
+        )
+
+        executor = StockScanner._scan_executor(max_workers, len(symbols))
+        loop = asyncio.get_running_loop()
+        try:
+            # gather zachowuje kolejnosc wejsciowa
+            fetched = await asyncio.gather(
+                *(loop.run_in_executor(executor, fetch_one, symbol) for symbol in symbols)
+            )
+        finally:
+            # Bez czekania w event loopie (po gather watki nie maja juz pracy)
+            executor.shutdown(wait=False, cancel_futures=True)
+        await asyncio.to_thread(update_quarantine)
+
+        rows = [row for row in fetched if row is not None]
+        if dataset_id:
+            await asyncio.to_thread(scan_dataset_store.save, dataset_id, rows, len(set(requested)))
+        results = StockScanner.filter_rows(rows, thresholds, only_matches=only_matches)
 
-                # Metrics dict - zawiera 117 metryk!
-                metrics = fundamentals['metric']
-
-                # === POBIERZ METRYKI Z PRAWIDŁOWYMI KLUCZAMI ===
-
-                # Market Cap (w milionach!)
-                market_cap = metrics.get('marketCapitalization', 0)
-                # Konwertuj z milionów na normalne wartości
-                market_cap = int(market_cap * 1_000_000) if market_cap else 0
-
-                # ROE (Return on Equity) - już w %
-                roe = metrics.get('roeTTM', 0)
-
-                # ROCE (Return on Capital Employed)
-                # Finnhub nie ma roicTTM, ale ma 'roic' w series.annual
-                roce = 0
-                if 'series' in fundamentals and 'annual' in fundamentals['series']:
-                    roic_series = fundamentals['series']['annual'].get('roic', [])
-                    if roic_series and len(roic_series) > 0:
-                        # roic to lista dict: [{'period': '2023-09-30', 'v': 0.4532}]
-                        # wartość to decimal, konwertujemy na %
-                        roce = roic_series[0].get('v', 0) * 100 if roic_series[0].get('v') else 0
-
-                # Debt/Equity - PRAWIDŁOWY KLUCZ!
-                # totalDebt/totalEquityAnnual (z / w nazwie klucza!)
-                debt_equity = metrics.get('totalDebt/totalEquityAnnual', 999)
-
-                # P/E Ratio TTM
-                forward_pe = metrics.get('peTTM', 999)
-
-                # Revenue Growth TTM YoY - PRAWIDŁOWY KLUCZ!
-                revenue_growth = metrics.get('revenueGrowthTTMYoy', 0)
-
-                # === SPRAWDZ WSZYSTKIE KRYTERIA ===
-                meets_criteria = True
-
-                # Kryterium 1: Volume
-                if current_volume < min_volume:
-                    meets_criteria = False
-
-                # Kryterium 2: Price change (jesli podane)
-                if min_price_change_percent is not None and price_change_7d is not None:
-                    if price_change_7d < min_price_change_percent:
-                        meets_criteria = False
-
-                # === NOWE KRYTERIA FUNDAMENTALS ===
-
-                # Kryterium 3: Market Cap (musi byc w zakresie)
-                if min_market_cap is not None and max_market_cap is not None:
-                    if not (min_market_cap <= market_cap <= max_market_cap):
-                        meets_criteria = False
-
-                # Kryterium 4: ROE (min 15%)
-                if min_roe is not None and roe < min_roe:
-                    meets_criteria = False
-
-                # Kryterium 5: ROCE (min 10%)
-                if min_roce is not None and roce < min_roce:
-                    meets_criteria = False
-
-                # Kryterium 6: Debt/Equity (max 0.3 = 30%)
-                if max_debt_equity is not None and debt_equity > max_debt_equity:
-                    meets_criteria = False
-
-                # Kryterium 7: Revenue Growth (min 15%)
-                if min_revenue_growth is not None and revenue_growth < min_revenue_growth:
-                    meets_criteria = False
-
-                # Kryterium 8: Forward P/E (max 15)
-                if max_forward_pe is not None and forward_pe > max_forward_pe:
-                    meets_criteria = False
-
-                # Dodaj wynik z WSZYSTKIMI danymi (cenowe + fundamentals)
-                results.append(StockResult(
-                    symbol=symbol,
-                    price=round(current_price, 2),
-                    volume=current_volume,
-                    price_change_7d=round(price_change_7d, 2) if price_change_7d else None,
-                    price_change_30d=round(price_change_30d, 2) if price_change_30d else None,
-                    # === NOWE POLA ===
-                    market_cap=market_cap,
-                    roe=round(roe, 2),
-                    roce=round(roce, 2),
-                    debt_equity=round(debt_equity, 3) if debt_equity != 999 else None,
-                    revenue_growth=round(revenue_growth, 2),
-                    forward_pe=round(forward_pe, 2) if forward_pe != 999 else None,
-                    meets_criteria=meets_criteria
-                ))
-
-            except Exception as e:
-                # Jesli blad (np. symbol nie istnieje) - pomijamy
-                logger.error(f"Error scanning {symbol}: {e}")
-                continue
-
-        # === ZAPISZ WYNIKI DO BAZY DANYCH (opcjonalne) ===
         if save_to_db:
-            db = SessionLocal()
-            try:
-                for result in results:
-                    # Stworz nowy rekord w tabeli scan_results
-                    scan_record = ScanResultModel(
-                        symbol=result.symbol,
-                        price=result.price,
-                        volume=result.volume,
-                        # criteria_met to JSON - zapisujemy wszystkie kryteria
-                        criteria_met={
-                            "volume": result.volume,
-                            "price_change_7d": result.price_change_7d,
-                            "market_cap": result.market_cap,
-                            "roe": result.roe,
-                            "roce": result.roce,
-                            "debt_equity": result.debt_equity,
-                            "revenue_growth": result.revenue_growth,
-                            "forward_pe": result.forward_pe
-                        },
-                        # Fundamentals w osobnych kolumnach
-                        market_cap=result.market_cap,
-                        roe=result.roe,
-                        roce=result.roce,
-                        debt_equity=result.debt_equity,
-                        revenue_growth=result.revenue_growth,
-                        forward_pe=result.forward_pe,
-                        price_change_7d=result.price_change_7d,
-                        price_change_30d=result.price_change_30d,
-                        meets_criteria=result.meets_criteria
-                    )
-                    db.add(scan_record)
-
-                db.commit()
-                logger.info(f"Zapisano {len(results)} wynikow skanowania do bazy danych")
-
-            except Exception as e:
-                logger.error(f"Blad zapisu do bazy danych: {e}")
-                db.rollback()
-            finally:
-                db.close()
+            await asyncio.to_thread(
+                StockScanner._save_run,
+                RUN_SOURCE_SCAN, dataset_id, started_at, requested, symbols, thresholds,
+                lazy, only_matches, return_horizons, results, finnhub
+            )
         else:
             logger.info("Pomijam zapis do bazy danych (save_to_db=False)")
 
         return results
+
+    @staticmethod
+    async def scan_stocks_stream(
+        symbols: List[str],
+        min_volume: int = 1_000_000,
+        min_price_change_percent: Optional[float] = None,
+        min_market_cap: Optional[int] = 50_000_000,
+        max_market_cap: Optional[int] = 5_000_000_000,
+        min_roe: Optional[float] = 15.0,
+        min_roce: Optional[float] = 10.0,
+        max_debt_equity: Optional[float] = 0.3,
+        min_revenue_growth: Optional[float] = 15.0,
+        max_forward_pe: Optional[float] = 15.0,
+        save_to_db: bool = True,
+        max_workers: Optional[int] = None,
+        lazy: bool = False,
+        only_matches: bool = False,
+        return_horizons: Optional[List[str]] = None,
+        indicator_thresholds: Optional[Dict[str, Any]] = None,
+        scan_id: Optional[str] = None,
+        run_started: Optional[Callable[[Optional[int]], None]] = None
+    ) -> AsyncIterator[StockResult]:
+        """
+        Streamingowa wersja scan_stocks_async() - yield kazdego StockResult
+        zaraz po przetworzeniu symbolu (kolejnosc ukonczenia, NIE kolejnosc symbols).
+
+        Time-to-first-result ~1s zamiast minut (rate limiter 60 calls/min).
+        Serwer nie trzyma calej listy wynikow - do bazy zapisuje w paczkach
+        po STREAM_SAVE_BATCH wynikow. Run w scan_runs powstaje przed pierwszym
+        symbolem; rozlaczenie klienta zamyka go ze statusem cancelled.
+
+        Args:
+            Takie same jak scan_stocks() (bez dataset_id), oraz:
+            scan_id: ID scanu zapisywane w scan_runs.scan_id (None = generowane)
+            run_started: Wywolywany z run_id (None bez save_to_db / przy bledzie bazy)
+                przed pierwszym wynikiem - klient streamu dostaje run_id w podsumowaniu
+
+        Yields:
+            StockResult dla kazdego przeskanowanego symbolu
+        """
+        started_at = datetime.now(timezone.utc)
+        thresholds = StockScanner._build_thresholds(
+            min_volume, min_price_change_percent, min_market_cap, max_market_cap, min_roe,
+            min_roce, max_debt_equity, min_revenue_growth, max_forward_pe, indicator_thresholds
+        )
+
+        requested = symbols
+        run_id = None
+        if save_to_db:
+            run_id = await asyncio.to_thread(
+                scan_run_store.start,
+                RUN_SOURCE_STREAM,
+                StockScanner._run_params(requested, thresholds, lazy, only_matches, return_horizons),
+                len(set(requested)),
+                scan_id or uuid.uuid4().hex,
+                started_at
+            )
+        if run_started is not None:
+            run_started(run_id)
+
+        symbols, finnhub, fetch_one, update_quarantine = await asyncio.to_thread(
+            StockScanner._prepare_scan, symbols, thresholds, lazy, only_matches, None, return_horizons
+        )
+
+        executor = StockScanner._scan_executor(max_workers, len(symbols))
+        loop = asyncio.get_running_loop()
+        tasks = [loop.run_in_executor(executor, fetch_one, symbol) for symbol in symbols]
+        pending_save: List[StockResult] = []
+        scanned = 0
+        matches = 0
+        completed = False
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                row = await next_done
+                scanned += 1
+                if row is None:
+                    continue
+
+                for result in StockScanner.filter_rows([row], thresholds, only_matches=only_matches):
+                    matches += int(result.meets_criteria)
+                    yield result
+
+                    if save_to_db:
+                        pending_save.append(result)
+                        if len(pending_save) >= StockScanner.STREAM_SAVE_BATCH:
+                            await asyncio.to_thread(StockScanner._save_results, pending_save, run_id)
+                            pending_save = []
+
+            if save_to_db and pending_save:
+                await asyncio.to_thread(StockScanner._save_results, pending_save, run_id)
+
+            # Tylko kompletny scan (klient sie nie rozlaczyl) aktualizuje kwarantanne
+            await asyncio.to_thread(update_quarantine)
+            await asyncio.to_thread(scan_run_store.finish, run_id, scanned, matches, finnhub.api_calls)
+            completed = True
+        finally:
+            # Klient sie rozlaczyl (lub blad) - nie startuj kolejnych symboli
+            for task in tasks:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            if not completed:
+                # Synchronicznie - przy zamykaniu generatora (GeneratorExit) nie wolno await
+                scan_run_store.finish(run_id, scanned, matches, finnhub.api_calls, status=RUN_CANCELLED)
+
+    @staticmethod
+    def _prepare_scan(
+        symbols: List[str],
+        thresholds: Dict[str, Any],
+        lazy: bool,
+        only_matches: bool,
+        dataset_id: Optional[str],
+        return_horizons: Optional[List[str]]
+    ) -> Tuple[List[str], FinnhubClient, Callable[[str], Optional[Dict[str, Any]]], Callable[[], None]]:
+        """
+        Wspolny start scanu (scan_stocks / scan_stocks_async / scan_stocks_stream):
+        kwarantanna, prefetch cache, historia cen + stopy zwrotu + wskazniki.
+
+        Blokujacy I/O - sciezki async wolaja przez asyncio.to_thread().
+
+        Returns:
+            (symbole po kwarantannie, FinnhubClient scanu, fetch jednego symbolu,
+             zapis wyniku scanu do kwarantanny - wolany po fazie FETCH)
+        """
+        # Inicjalizuj Finnhub client raz dla wszystkich symboli
+        finnhub = FinnhubClient()
+
+        # === KWARANTANNA (symbole ktore failuja scan za scanem - 0 API calls) ===
+        symbols = symbol_quarantine.filter(symbols)
+        failures: Dict[str, str] = {}
+        history_status: Dict[str, str] = {}
+
+        # === CACHE PREFETCH (1 pipeline do Redis dla calego scanu) ===
+        finnhub.prefetch(symbols)
+
+        # === HISTORIA CEN (magazyn lokalny / batch yfinance) + STOPY ZWROTU (1 przebieg NumPy) ===
+        histories, symbol_returns, symbol_indicators = StockScanner._load_history(
+            symbols, thresholds, return_horizons, status=history_status
+        )
+
+        fetch_one = partial(
+            StockScanner._fetch_symbol_metrics,
+            histories=histories,
+            returns=symbol_returns,
+            indicators=symbol_indicators,
+            return_horizons=return_horizons,
+            finnhub=finnhub,
+            thresholds=thresholds,
+            lazy=lazy,
+            # Dataset do re-filtra musi miec tez odrzucone symbole
+            only_matches=only_matches and dataset_id is None,
+            failures=failures
+        )
+        update_quarantine = partial(StockScanner._update_quarantine, symbols, failures, history_status, finnhub)
+        return symbols, finnhub, fetch_one, update_quarantine
+
+    @staticmethod
+    def _update_quarantine(
+        symbols: List[str],
+        failures: Dict[str, str],
+        history_status: Dict[str, str],
+        finnhub: FinnhubClient
+    ) -> None:
+        """
+        Zapisuje wynik scanu w kwarantannie symboli - tylko gdy zrodla danych dzialaly.
+
+        Awaria yfinance (chunk nie pobrany) albo Finnhub (blad / wyczerpany retry po 429)
+        wyglada jak brak danych dla wielu symboli naraz - taki scan nie zmienia licznikow
+        (inaczej jedna awaria wrzucilaby do kwarantanny caly universe).
+        Brak historii liczy sie tylko potwierdzony (HISTORY_EMPTY z PriceHistoryService).
+        """
+        outages = []
+        if HISTORY_FAILED in history_status.values():
+            outages.append("yfinance")
+        if finnhub.failed_calls:
+            outages.append("finnhub")
+        if outages:
+            logger.warning(
+                f"[QUARANTINE] Bledy zrodel danych ({', '.join(outages)}) - "
+                f"scan nie aktualizuje kwarantanny ({len(failures)} symboli bez danych)"
+            )
+            return
+
+        confirmed = {
+            symbol: reason for symbol, reason in failures.items()
+            if reason != REASON_NO_HISTORY or history_status.get(symbol) == HISTORY_EMPTY
+        }
+        symbol_quarantine.update(confirmed, symbols)
+
+    @staticmethod
+    def _scan_executor(max_workers: Optional[int], symbol_count: int) -> ThreadPoolExecutor:
+        """
+        Pula watkow fetch dla jednego scanu (max_workers, domyslnie SCAN_MAX_WORKERS).
+
+        Sciezki async nie uzywaja asyncio.to_thread() dla symboli - domyslny executor
+        petli ma min(32, CPU + 4) watkow i dzielony jest z innymi requestami, wiec
+        po cichu obcinalby max_workers. Wlasna pula = dokladnie max_workers naraz.
+        """
+        workers = max(1, min(max_workers or settings.SCAN_MAX_WORKERS, symbol_count))
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scanner")
+
+    @staticmethod
+    def _with_progress(
+        fetch_one: Callable[[str], Optional[Dict[str, Any]]],
+        finnhub: FinnhubClient,
+        progress: Callable[[int, int], None]
+    ) -> Callable[[str], Optional[Dict[str, Any]]]:
+        """
+        Opakowuje fetch jednego symbolu raportowaniem postepu (thread-safe licznik).
+        """
+        lock = threading.Lock()
+        done = 0
+
+        def fetch_with_progress(symbol: str) -> Optional[Dict[str, Any]]:
+            nonlocal done
+            try:
+                return fetch_one(symbol)
+            finally:
+                with lock:
+                    done += 1
+                    progress(done, finnhub.api_calls)
+
+        return fetch_with_progress
+
+    @staticmethod
+    def _load_history(
+        symbols: List[str],
+        thresholds: Dict[str, Any],
+        return_horizons: Optional[List[str]] = None,
+        status: Optional[Dict[str, str]] = None
+    ) -> Tuple[
+        Dict[str, pd.DataFrame],
+        Dict[str, Dict[str, Optional[float]]],
+        Dict[str, Dict[str, Optional[float]]]
+    ]:
+        """
+        Historia cen dla scanu (okres dobrany do najdluzszego horyzontu / okna wskaznikow)
+        + stopy zwrotu i wskazniki techniczne wszystkich symboli na jednej
+        wyrownanej macierzy barow.
+
+        Wskazniki (i ~1y historii na SMA 200 / 52w) tylko gdy ustawiono kryterium
+        techniczne - domyslny scan 7d/30d pobiera krotki okres.
+
+        Args:
+            status: Przekazywany do PriceHistoryService.fetch_history() (HISTORY_EMPTY / HISTORY_FAILED)
+
+        Returns:
+            (historie, symbol -> stopy zwrotu, symbol -> wskazniki - pusty bez kryteriow technicznych)
+
+        Raises:
+            ValueError: Nieznany horyzont w return_horizons
+        """
+        horizons = validate_horizons(DEFAULT_HORIZONS + list(return_horizons or []))
+        with_indicators = any(thresholds.get(param) is not None for param in INDICATOR_CRITERIA_PARAMS)
+        days = lookback_days(horizons, date.today())
+        if with_indicators:
+            days = max(days, INDICATOR_LOOKBACK_DAYS)
+
+        histories = PriceHistoryService.fetch_history(
+            symbols, period=PriceHistoryService.period_covering(days), status=status
+        )
+        matrix = OHLCVMatrix.from_histories(histories)
+        symbol_returns = group_by_symbol(matrix.symbols, compute_returns(matrix.closes_matrix(), horizons))
+        symbol_indicators = indicators_by_symbol(matrix) if with_indicators else {}
+        return histories, symbol_returns, symbol_indicators
+
+    @staticmethod
+    def _build_thresholds(
+        min_volume: int,
+        min_price_change_percent: Optional[float],
+        min_market_cap: Optional[int],
+        max_market_cap: Optional[int],
+        min_roe: Optional[float],
+        min_roce: Optional[float],
+        max_debt_equity: Optional[float],
+        min_revenue_growth: Optional[float],
+        max_forward_pe: Optional[float],
+        indicator_thresholds: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Optional[float]]:
+        """
+        Progi kryteriow jako dict (param -> wartosc) dla criteria engine.
+
+        Raises:
+            ValueError: Nieznane kryterium w indicator_thresholds
+        """
+        unknown = set(indicator_thresholds or {}) - set(INDICATOR_CRITERIA_PARAMS)
+        if unknown:
+            raise ValueError(f"Nieznane kryteria techniczne: {', '.join(sorted(unknown))}")
+
+        return {
+            "min_volume": min_volume,
+            "min_price_change_percent": min_price_change_percent,
+            "min_market_cap": min_market_cap,
+            "max_market_cap": max_market_cap,
+            "min_roe": min_roe,
+            "min_roce": min_roce,
+            "max_debt_equity": max_debt_equity,
+            "min_revenue_growth": min_revenue_growth,
+            "max_forward_pe": max_forward_pe,
+            **(indicator_thresholds or {}),
+        }
+
+    @staticmethod
+    def filter_rows(
+        rows: List[Dict[str, Any]],
+        thresholds: Dict[str, Optional[float]],
+        only_matches: bool = False,
+        frame: Optional[pd.DataFrame] = None
+    ) -> List[StockResult]:
+        """
+        Faza FILTER: ewaluacja kryteriow na kolumnowej tabeli metryk (bez API calls).
+
+        Uzywana przez scan i przez re-filter zapisanego datasetu.
+
+        Args:
+            rows: Wiersze metryk z fazy fetch (_fetch_symbol_metrics)
+            thresholds: Progi kryteriow (param -> wartosc, None = wylaczone)
+            only_matches: Zwroc tylko wiersze spelniajace kryteria
+            frame: Gotowa tabela metryk dla rows (pomija build_metrics_frame)
+
+        Returns:
+            Lista StockResult (w kolejnosci rows)
+        """
+        if not rows:
+            return []
+
+        if frame is None:
+            frame = build_metrics_frame(rows)
+        mask = evaluate_criteria(frame, thresholds)
+        stages = rejected_stages(frame, thresholds)
+
+        indices = np.flatnonzero(mask) if only_matches else range(len(rows))
+        return [
+            StockScanner._to_stock_result(rows[i], bool(mask[i]), stages[i])
+            for i in indices
+        ]
+
+    @staticmethod
+    def _to_stock_result(
+        row: Dict[str, Any],
+        meets_criteria: bool,
+        rejected_at: Optional[str]
+    ) -> StockResult:
+        """
+        Zamienia wiersz metryk na StockResult (zaokraglenia jak w API).
+        """
+        def rounded(key: str, digits: int = 2) -> Optional[float]:
+            value = row.get(key)
+            return round(value, digits) if value is not None else None
+
+        def flag(key: str) -> Optional[bool]:
+            value = row.get(key)
+            return bool(value) if value is not None else None
+
+        return StockResult(
+            symbol=row["symbol"],
+            price=round(row["price"], 2),
+            volume=row["volume"],
+            price_change_7d=round(row["price_change_7d"], 2) if row.get("price_change_7d") else None,
+            price_change_30d=round(row["price_change_30d"], 2) if row.get("price_change_30d") else None,
+            # === FUNDAMENTALS ===
+            market_cap=row.get("market_cap"),
+            roe=rounded("roe"),
+            roce=rounded("roce"),
+            debt_equity=rounded("debt_equity", 3),
+            revenue_growth=rounded("revenue_growth"),
+            forward_pe=rounded("forward_pe"),
+            # === WSKAZNIKI TECHNICZNE ===
+            rsi_14=rounded("rsi_14"),
+            sma_50=rounded("sma_50"),
+            sma_200=rounded("sma_200"),
+            ema_20=rounded("ema_20"),
+            pct_from_sma_50=rounded("pct_from_sma_50"),
+            pct_from_sma_200=rounded("pct_from_sma_200"),
+            golden_cross=flag("golden_cross"),
+            death_cross=flag("death_cross"),
+            atr_14=rounded("atr_14", 3),
+            atr_percent=rounded("atr_percent"),
+            avg_volume_20=rounded("avg_volume_20", 0),
+            pct_from_52w_high=rounded("pct_from_52w_high"),
+            pct_from_52w_low=rounded("pct_from_52w_low"),
+            meets_criteria=meets_criteria,
+            rejected_at=rejected_at,
+            stale=row.get("stale", False),
+            returns={
+                horizon: round(value, 2) if value is not None else None
+                for horizon, value in row["returns"].items()
+            } if row.get("returns") is not None else None
+        )
+
+    @staticmethod
+    def _save_results(results: List[StockResult], run_id: Optional[int] = None) -> None:
+        """
+        Zapisuje wyniki skanowania do tabeli scan_results (paczki INSERT / COPY).
+
+        Blad zapisu jest logowany (rollback), ale nie przerywa scanu.
+
+        Args:
+            results: Lista StockResult do zapisania
+            run_id: Run scanu w scan_runs (None = wyniki bez runu)
+        """
+        scan_result_writer.write(results, run_id=run_id)
+
+    @staticmethod
+    def _save_run(
+        source: str,
+        scan_id: Optional[str],
+        started_at: datetime,
+        requested: List[str],
+        scanned: List[str],
+        thresholds: Dict[str, Any],
+        lazy: bool,
+        only_matches: bool,
+        return_horizons: Optional[List[str]],
+        results: List[StockResult],
+        finnhub: FinnhubClient
+    ) -> None:
+        """
+        Zapisuje run scanu (scan_runs) i jego wyniki (scan_results z run_id).
+
+        Args:
+            requested: Symbole z requestu (przed kwarantanna)
+            scanned: Symbole faktycznie skanowane (po kwarantannie)
+        """
+        run_id = scan_run_store.start(
+            source,
+            StockScanner._run_params(requested, thresholds, lazy, only_matches, return_horizons),
+            len(set(requested)),
+            scan_id=scan_id,
+            started_at=started_at
+        )
+        StockScanner._save_results(results, run_id)
+        scan_run_store.finish(
+            run_id,
+            total_scanned=len(set(scanned)),
+            matches=sum(1 for r in results if r.meets_criteria),
+            api_calls=finnhub.api_calls
+        )
+
+    @staticmethod
+    def _run_params(
+        symbols: List[str],
+        thresholds: Dict[str, Any],
+        lazy: bool,
+        only_matches: bool,
+        return_horizons: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """
+        Parametry requestu zapisywane w scan_runs.params (JSON).
+        """
+        return {
+            "symbols": list(symbols),
+            "thresholds": thresholds,
+            "lazy": lazy,
+            "only_matches": only_matches,
+            "return_horizons": list(return_horizons or []),
+        }
+
+    @staticmethod
+    def _fetch_symbol_metrics(
+        symbol: str,
+        histories: Dict[str, pd.DataFrame],
+        finnhub: FinnhubClient,
+        thresholds: Dict[str, Optional[float]],
+        lazy: bool = False,
+        only_matches: bool = False,
+        failures: Optional[Dict[str, str]] = None,
+        returns: Optional[Dict[str, Dict[str, Optional[float]]]] = None,
+        indicators: Optional[Dict[str, Dict[str, Optional[float]]]] = None,
+        return_horizons: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Faza FETCH dla JEDNEGO symbolu: historia -> Finnhub fundamentals/quote -> wiersz metryk.
+
+        Bezpieczne do wywolania z wielu watkow naraz (brak wspoldzielonego stanu
+        poza FinnhubClient, ktory ma wspolny rate limiter).
+
+        Args:
+            symbol: Symbol akcji
+            histories: Wynik PriceHistoryService.fetch_history()
+            finnhub: Wspoldzielony FinnhubClient
+            thresholds: Progi kryteriow (uzywane tylko w trybie lazy)
+            lazy: Kolejnosc etapow od najtanszego, stop po pierwszym odrzuceniu
+            only_matches: W trybie lazy - odrzucony symbol zwraca None od razu
+            failures: Jesli podane - symbol pominiety przez brak danych / blad
+                trafia tu z powodem (REASON_*), dla kwarantanny symboli
+            returns: Stopy zwrotu z _load_history() (symbol -> horyzont -> %);
+                None = liczone tutaj z historii tego symbolu
+            indicators: Wskazniki z _load_history() (symbol -> kolumna -> wartosc,
+                pusty = scan bez kryteriow technicznych); None = liczone tutaj z historii tego symbolu
+            return_horizons: Horyzonty do row["returns"] (StockResult.returns)
+
+        Returns:
+            Dict z kluczem "symbol" + METRIC_COLUMNS (None = brak danych)
+            lub None jesli symbol pominiety (brak danych / blad)
+        """
+        def fail(reason: str) -> None:
+            # Rozne symbole = rozne klucze, dict jest bezpieczny miedzy watkami
+            if failures is not None:
+                failures[symbol] = reason
+
+        try:
+            # === PRICE CHANGES Z YFINANCE (historical data) ===
+            hist = histories.get(symbol)
+
+            if hist is None or hist.empty:
+                logger.warning(f"Brak danych historycznych dla {symbol}")
+                fail(REASON_NO_HISTORY)
+                return None
+
+            # Stopy zwrotu policzone wektorowo dla calego scanu (app.services.returns)
+            if returns is None:
+                returns = returns_by_symbol({symbol: hist}, DEFAULT_HORIZONS + list(return_horizons or []))
+            changes = returns.get(symbol, {})
+            if indicators is None:
+                indicators = indicators_by_symbol(OHLCVMatrix.from_histories({symbol: hist}))
+            technicals = indicators.get(symbol, {})
+
+            row: Dict[str, Any] = {
+                "symbol": symbol,
+                # Cena z ostatniego zamkniecia - nadpisywana przez Finnhub quote
+                "price": float(hist["Close"].iloc[-1]),
+                # === VOLUME Z YFINANCE (Finnhub czasem nie zwraca volume) ===
+                "volume": StockScanner._last_volume(hist),
+                "price_change_7d": changes.get("7d"),
+                "price_change_30d": changes.get("30d"),
+                **{column: technicals.get(column) for column in INDICATOR_COLUMNS},
+            }
+            if return_horizons:
+                row["returns"] = {horizon: changes.get(horizon) for horizon in return_horizons}
+
+            # === ETAP 1 (lazy): KRYTERIA Z HISTORII (dane juz mamy - 0 API calls) ===
+            if lazy and not row_passes_stage(row, thresholds, STAGE_HISTORY):
+                # Symbol juz nie moze spelnic kryteriow - oszczedzamy 2 Finnhub calls
+                return None if only_matches else row
+
+            # === REAL-TIME PRICE Z FINNHUB ===
+            # W trybie lazy quote pobieramy dopiero na koncu (tylko dla kandydatow)
+            if not lazy:
+                if not StockScanner._apply_quote(row, finnhub):
+                    fail(REASON_NO_QUOTE)
+                    return None
+
+            # === FUNDAMENTALS Z FINNHUB (1 API call!) ===
+            fundamentals = finnhub.get_fundamentals(symbol)
+
+            if not fundamentals or 'metric' not in fundamentals:
+                logger.warning(f"Brak danych fundamentals Finnhub dla {symbol} - pomijamy")
+                fail(REASON_NO_FUNDAMENTALS)
+                return None
+
+            row.update(FundamentalsRecord.from_payload(fundamentals).columns())
+            if stale_age(fundamentals) is not None:
+                row["stale"] = True
+
+            # === ETAP 2 (lazy): KRYTERIA FUNDAMENTALS, ETAP 3: QUOTE TYLKO DLA KANDYDATOW ===
+            if lazy:
+                if not row_passes_stage(row, thresholds, STAGE_FUNDAMENTALS):
+                    # Odrzucony - cena z ostatniego zamkniecia (bez API call)
+                    return None if only_matches else row
+                if not StockScanner._apply_quote(row, finnhub):
+                    fail(REASON_NO_QUOTE)
+                    return None
+
+            return row
+
+        except Exception as e:
+            # Jesli blad (np. symbol nie istnieje) - pomijamy
+            logger.error(f"Error scanning {symbol}: {e}")
+            fail(REASON_ERROR)
+            return None
+
+    @staticmethod
+    def _last_volume(hist: pd.DataFrame) -> int:
+        """
+        Wolumen ostatniego baru z danymi.
+
+        Ostatni bar po dociagnieciu z magazynu / trwajacej sesji moze miec NaN -
+        int(NaN) = ValueError liczony jako blad symbolu (kwarantanna zdrowego tickera).
+        Brak jakiegokolwiek wolumenu = 0 (odrzucany przez min_volume).
+        """
+        volume = hist["Volume"].dropna()
+        return int(volume.iloc[-1]) if not volume.empty else 0
+
+    @staticmethod
+    def _apply_quote(row: Dict[str, Any], finnhub: FinnhubClient) -> bool:
+        """
+        Pobiera real-time quote z Finnhub i ustawia row["price"].
+
+        Returns:
+            False jesli brak danych quote (symbol pomijamy)
+        """
+        quote = finnhub.get_quote(row["symbol"])
+        if not quote:
+            logger.warning(f"Brak danych quote Finnhub dla {row['symbol']}")
+            return False
+
+        row["price"] = quote.get('c', 0)  # current price
+        if stale_age(quote) is not None:
+            # Quote z cache po TTL (stale-while-revalidate) - odswiezany w tle
+            row["stale"] = True
+        return True
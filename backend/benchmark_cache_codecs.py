@@ -0,0 +1,136 @@
+"""
+Benchmark: rozmiar i czas encode/decode payloadów fundamentals w Redis cache
+
+Porównuje stary format (json.dumps) z kodekami z app.cache_codecs.
+
+Użycie:
+    # 1. Nagraj prawdziwe payloady Finnhub (wymaga FINNHUB_API_KEY, 1 API call / symbol)
+    python benchmark_cache_codecs.py --record AAPL MSFT NVDA
+
+    # 2. Benchmark na nagranych plikach
+    python benchmark_cache_codecs.py fundamentals_AAPL.json fundamentals_MSFT.json
+
+    # Bez plików - syntetyczny payload w kształcie company_basic_financials
+    python benchmark_cache_codecs.py --universe 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
+
+from app.cache_codecs import CacheSerializer
+
+
+def record_payloads(symbols):
+    """Pobiera fundamentals z Finnhub i zapisuje do fundamentals_{SYMBOL}.json"""
+    from app.services.finnhub_client import FinnhubClient
+
+    client = FinnhubClient()
+    paths = []
+    for symbol in symbols:
+        payload = client.get_fundamentals(symbol)
+        if not payload:
+            print(f"⚠ Brak danych dla {symbol} - pomijam")
+            continue
+        path = f"fundamentals_{symbol}.json"
+        with open(path, "w") as f:
+            json.dump(payload, f)
+        paths.append(path)
+        print(f"✓ Zapisano {path}")
+    return paths
+
+
+def synthetic_payload():
+    """
+    Payload w kształcie company_basic_financials(symbol, 'all'):
+    117 metryk + series.annual / series.quarterly (~30 metryk, 20 lat / 80 kwartałów).
+    """
+    rng = random.Random(42)
+    metric = {f"metric{i}TTM": round(rng.uniform(-100, 1000), 4) for i in range(117)}
+
+    def series(periods, step_months):
+        data = {}
+        for i in range(30):
+            points = []
+            for p in range(periods):
+                year = 2024 - (p * step_months) // 12
+                month = 12 - (p * step_months) % 12
+                points.append({"period": f"{year}-{month:02d}-30", "v": round(rng.uniform(-5, 50), 4)})
+            data[f"series{i}"] = points
+        return data
+
+    return {
+        "metric": metric,
+        "metricType": "all",
+        "series": {"annual": series(20, 12), "quarterly": series(80, 3)},
+        "symbol": "SYNTH",
+    }
+
+
+def measure(encode, decode, payloads, repeat):
+    """Zwraca (średni rozmiar B, encode µs, decode µs) na payload"""
+    encoded = [encode(p) for p in payloads]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            encode(payload)
+    encode_us = (time.perf_counter() - start) / (repeat * len(payloads)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in encoded:
+            decode(data)
+    decode_us = (time.perf_counter() - start) / (repeat * len(payloads)) * 1e6
+
+    return sum(len(e) for e in encoded) / len(encoded), encode_us, decode_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("payloads", nargs="*", help="Pliki JSON z nagranymi payloadami fundamentals")
+    parser.add_argument("--record", nargs="+", metavar="SYMBOL", help="Nagraj payloady z Finnhub")
+    parser.add_argument("--universe", type=int, default=5000, help="Liczba symboli do projekcji pamięci Redis")
+    parser.add_argument("--repeat", type=int, default=200, help="Powtórzenia pomiaru")
+    args = parser.parse_args()
+
+    paths = record_payloads(args.record) if args.record else args.payloads
+    if paths:
+        payloads = []
+        for path in paths:
+            with open(path) as f:
+                payloads.append(json.load(f))
+        source = f"{len(payloads)} nagranych payloadów"
+    else:
+        payloads = [synthetic_payload()]
+        source = "syntetyczny payload (użyj --record dla prawdziwych danych)"
+
+    variants = [
+        ("json (stary format)", lambda v: json.dumps(v).encode(), json.loads),
+    ]
+    for codec in ("json", "msgpack"):
+        for compress_min_bytes, label in ((-1, ""), (0, " + zlib")):
+            serializer = CacheSerializer(codec, compress_min_bytes=compress_min_bytes)
+            variants.append((f"{codec}{label}", serializer.dumps, serializer.loads))
+
+    print(f"\nBenchmark kodeków cache - {source}\n")
+    print(f"{'Format':<22}{'Rozmiar':>12}{'Encode':>12}{'Decode':>12}{f'Redis ({args.universe} sym.)':>22}")
+    print("-" * 80)
+
+    baseline = None
+    for name, encode, decode in variants:
+        size, encode_us, decode_us = measure(encode, decode, payloads, args.repeat)
+        baseline = baseline or size
+        total_mb = size * args.universe / 1024 / 1024
+        print(
+            f"{name:<22}{size / 1024:>9.1f} KB{encode_us:>9.0f} µs{decode_us:>9.0f} µs"
+            f"{total_mb:>12.1f} MB ({baseline / size:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
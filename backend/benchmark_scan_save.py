@@ -0,0 +1,113 @@
+"""
+Benchmark: zapis wyników scanu do scan_results
+
+Porównuje stary zapis (obiekt ORM + db.add() na wynik) z ScanResultWriter
+(wielowierszowy INSERT w paczkach i PostgreSQL COPY).
+
+Każdy wariant działa w transakcji wycofywanej na końcu - tabela bez zmian.
+
+Użycie:
+    # Baza z konfiguracji (.env), 5000 syntetycznych wyników
+    python benchmark_scan_save.py
+
+    python benchmark_scan_save.py --rows 20000 --batch-size 2000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
+
+from app.database import SessionLocal
+from app.models.scan import ScanResult as ScanResultModel
+from app.schemas.scan import StockResult
+from app.services.scan_partitions import scan_partitions
+from app.services.scan_writer import SAVE_COPY, SAVE_INSERT, ScanResultWriter
+
+
+def synthetic_results(rows):
+    """Wyniki scanu z losowymi metrykami (jak z pełnego universe)"""
+    rng = random.Random(42)
+    return [
+        StockResult(
+            symbol=f"SYM{i:05d}",
+            price=round(rng.uniform(1, 500), 2),
+            volume=rng.randint(100_000, 50_000_000),
+            price_change_7d=round(rng.uniform(-20, 20), 2),
+            price_change_30d=round(rng.uniform(-40, 40), 2),
+            market_cap=rng.randint(50_000_000, 3_000_000_000_000),
+            roe=round(rng.uniform(-10, 60), 2),
+            roce=round(rng.uniform(-10, 60), 2),
+            debt_equity=round(rng.uniform(0, 3), 2),
+            revenue_growth=round(rng.uniform(-0.2, 0.8), 4),
+            forward_pe=round(rng.uniform(5, 80), 2),
+            meets_criteria=rng.random() < 0.1,
+        )
+        for i in range(rows)
+    ]
+
+
+def save_orm(db, writer, results):
+    """Stary zapis: obiekt ORM na wynik + db.add()"""
+    for result in results:
+        db.add(ScanResultModel(**writer.to_record(result)))
+    db.flush()
+
+
+def save_insert(db, writer, results):
+    writer._insert(db, [writer.to_record(result) for result in results])
+
+
+def save_copy(db, writer, results):
+    writer._copy(db, [writer.to_record(result) for result in results])
+
+
+def measure(save, writer, results, repeat):
+    """Najlepszy czas zapisu (ms) z `repeat` prób, każda wycofana rollbackiem"""
+    best = None
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            save(db, writer, results)
+            elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            db.rollback()
+            db.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="Liczba wyników scanu")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Wierszy na jeden INSERT / COPY")
+    parser.add_argument("--repeat", type=int, default=3, help="Powtórzenia pomiaru (liczy się najlepszy)")
+    args = parser.parse_args()
+
+    results = synthetic_results(args.rows)
+    # Partycja biezacego miesiaca (PostgreSQL) - zapis omija ScanResultWriter.write()
+    scan_partitions.ensure()
+    variants = [
+        ("ORM db.add() (stary)", save_orm, SAVE_INSERT),
+        (f"INSERT batch {args.batch_size}", save_insert, SAVE_INSERT),
+    ]
+    if SessionLocal.kw["bind"].dialect.name == "postgresql":
+        variants.append((f"COPY batch {args.batch_size}", save_copy, SAVE_COPY))
+
+    print(f"\nBenchmark zapisu scanu - {args.rows} wyników\n")
+    print(f"{'Metoda':<26}{'Czas':>12}{'Wierszy/s':>14}")
+    print("-" * 52)
+
+    baseline = None
+    for name, save, method in variants:
+        writer = ScanResultWriter(batch_size=args.batch_size, method=method)
+        elapsed = measure(save, writer, results, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:<26}{elapsed:>9.0f} ms{args.rows / elapsed * 1000:>14,.0f}  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
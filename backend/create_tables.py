@@ -3,7 +3,7 @@ Skrypt do tworzenia tabel w bazie danych.
 Uruchom: python create_tables.py
 """
 from app.database import Base, engine
-from app.models import User, PortfolioItem, ScanResult
+from app.models import User, PortfolioItem, ScanRun, ScanResult, ScanDailyRollup, FundamentalsSnapshot
 
 print("Tworzenie tabel w bazie danych...")
 
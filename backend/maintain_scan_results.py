@@ -0,0 +1,57 @@
+"""
+Utrzymanie tabeli scan_results: partycje, rollupy dzienne, retencja.
+
+Kolejnosc ma znaczenie - rollupy liczone PRZED usunieciem starych partycji,
+wiec wykresy dlugoterminowe (scan_daily_rollups) nie traca dni.
+
+Uruchamiaj raz dziennie (cron), np.:
+    15 2 * * * cd /app && python maintain_scan_results.py
+
+    # Bez retencji (tylko partycje + rollupy)
+    python maintain_scan_results.py --skip-retention
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
+
+from app.database import SessionLocal
+from app.services.scan_partitions import scan_partitions
+from app.services.scan_rollups import ScanRollupService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skip-retention", action="store_true", help="Nie usuwaj starych wynikow")
+    args = parser.parse_args()
+
+    # 1. Partycje biezacego i kolejnych miesiecy
+    scan_partitions.ensure()
+    print(f"✓ Partycje scan_results na {scan_partitions.months_ahead} miesiace do przodu")
+
+    # 2. Rollupy dzienne od ostatniego przeliczonego dnia
+    db = SessionLocal()
+    try:
+        days = ScanRollupService.rollup_pending(db)
+    finally:
+        db.close()
+    print(f"✓ Rollupy dzienne: {len(days)} dni" + (f" ({days[0]} - {days[-1]})" if days else ""))
+
+    # 3. Retencja (DROP starych partycji)
+    if args.skip_retention or scan_partitions.retention_months <= 0:
+        print("- Retencja pominieta")
+        return
+
+    report = scan_partitions.apply_retention()
+    print(
+        f"✓ Retencja przed {report.cutoff:%Y-%m-%d}: "
+        f"{len(report.dropped_partitions)} partycji, {report.deleted_rows} wierszy, "
+        f"{report.deleted_runs} runow"
+    )
+    for name in report.dropped_partitions:
+        print(f"  - {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Migracja istniejacej bazy do aktualnego schematu scan_results.
+
+create_all() (start aplikacji / create_tables.py) tworzy tylko BRAKUJACE tabele -
+istniejaca tabela scan_results nie dostaje nowych kolumn ani indeksow.
+
+Start aplikacji odmawia pracy na niezmigrowanej tabeli (scan_partitions.verify_schema()).
+
+Kroki (idempotentne - mozna uruchamiac wielokrotnie):
+1. Tabela scan_runs (jesli brak)
+2. Niepartycjonowana scan_results -> PARTITION BY RANGE (scan_date), PK (id, scan_date)
+   (scan_partitions.convert_legacy(): RENAME na scan_results_legacy, tabela z modelu,
+   partycje miesieczne od najstarszego wyniku, INSERT ... SELECT, setval sekwencji id)
+3. Kolumna scan_results.run_id -> scan_runs(id) ON DELETE CASCADE
+4. Indeksy z modelu ScanResult, m.in. ix_scan_results_run_id_id
+   i ix_scan_results_run_id_meets_criteria (strony wynikow runu bez sortowania)
+
+Krok 2 kopiuje cala tabele w jednej transakcji - uruchamiaj przy zatrzymanej aplikacji.
+Uruchom raz po aktualizacji, PRZED startem aplikacji:
+    python migrate_scan_results.py
+
+    # Po sprawdzeniu danych
+    psql -c "DROP TABLE scan_results_legacy"
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex
+
+from app.database import engine
+from app.models.scan import ScanResult, ScanRun
+from app.services.scan_partitions import LEGACY_TABLE, scan_partitions
+
+TABLE = ScanResult.__tablename__
+
+
+def add_run_id(conn: Connection) -> None:
+    """
+    Kolumna scan_results.run_id + indeksy modelu ScanResult.
+    """
+    conn.execute(text(
+        f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS run_id INTEGER "
+        f"REFERENCES {ScanRun.__tablename__}(id) ON DELETE CASCADE"
+    ))
+    for index in sorted(ScanResult.__table__.indexes, key=lambda index: index.name):
+        conn.execute(CreateIndex(index, if_not_exists=True))
+        print(f"  - indeks {index.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    # 1. scan_runs (FK run_id w nowej tabeli)
+    with engine.begin() as conn:
+        if not inspect(conn).has_table(TABLE):
+            print(f"- Brak tabeli {TABLE} - utworzy ja start aplikacji (create_all)")
+            return
+        ScanRun.__table__.create(bind=conn, checkfirst=True)
+
+    # 2. Partycje (wlasna transakcja - blad = rollback, tabela bez zmian)
+    copied = scan_partitions.convert_legacy()
+    if copied is None:
+        print(f"- {TABLE} juz partycjonowana (lub baza inna niz PostgreSQL)")
+    else:
+        print(f"✓ {TABLE} partycjonowana: {copied} wierszy skopiowanych, stara tabela: {LEGACY_TABLE}")
+
+    # 3-4. Jedna transakcja - blad w polowie nie zostawia bazy w stanie posrednim
+    with engine.begin() as conn:
+        add_run_id(conn)
+    print(f"✓ {TABLE}.run_id + indeksy runu")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,102 @@ import os
 os.environ["REDIS_ENABLED"] = "false"
 
 
+@pytest.fixture(autouse=True)
+def clear_local_cache():
+    """
+    Czyści cache L1 (pamięć procesu) przed każdym testem.
+
+    Bez tego wynik get_fundamentals("AAPL") z jednego testu
+    byłby cache HIT w następnym (mocki API nie byłyby wywołane).
+    """
+    from app.cache import redis_cache
+    redis_cache.local.clear()
+    yield
+
+
+@pytest.fixture(autouse=True, scope="session")
+def disable_redis_reconnect():
+    """
+    Wątek reconnect globalnego redis_cache nie łączy się w trakcie testów.
+
+    Bez tego próba połączenia trafiająca w test z podmienionym
+    redis.Redis.from_url podpina MOCK klienta do globalnego redis_cache
+    (kolejne testy dostają dane z mocka zamiast cache MISS).
+    """
+    import redis
+    from app.cache import redis_cache
+
+    def probe():
+        raise redis.ConnectionError("Redis wyłączony w testach")
+
+    original = redis_cache.health._probe
+    redis_cache.health._probe = probe
+    yield
+    redis_cache.health._probe = original
+
+
+@pytest.fixture(autouse=True)
+def disable_price_store(monkeypatch):
+    """
+    Wyłącza lokalny magazyn cen (PRICE_STORE_DIR) - testy nie piszą do data/prices.
+
+    Testy magazynu ustawiają price_store.root na tmp_path.
+    """
+    from app.services.price_store import price_store
+    monkeypatch.setattr(price_store, "root", "")
+    yield
+
+
+@pytest.fixture(autouse=True)
+def disable_fundamentals_snapshots(monkeypatch):
+    """
+    Wyłącza snapshoty fundamentals w PostgreSQL - get_fundamentals() w testach
+    zawsze woła (zmockowane) API i nie zapisuje do bazy.
+
+    Testy snapshotów podmieniają max_age / session_factory na SQLite w pamięci.
+    """
+    from app.services.fundamentals_snapshots import fundamentals_snapshots
+    monkeypatch.setattr(fundamentals_snapshots, "max_age", 0)
+    yield
+
+
+@pytest.fixture
+def scan_db(monkeypatch):
+    """
+    Tabele scanu (scan_runs, scan_results, scan_daily_rollups) na SQLite w pamięci.
+
+    Zapis runów, wyników i partycji idzie przez tę bazę (podmienione session_factory).
+    SQLite nie ma autoincrement dla złożonego PK (id, scan_date) tabeli
+    partycjonowanej - w kopii scan_results PK = id.
+
+    Returns:
+        sessionmaker związany z bazą testową
+    """
+    from sqlalchemy import MetaData, PrimaryKeyConstraint, create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from app.models.scan import ScanDailyRollup, ScanResult, ScanRun
+    from app.services.scan_partitions import scan_partitions
+    from app.services.scan_runs import scan_run_store
+    from app.services.scan_writer import scan_result_writer
+
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    metadata = MetaData()
+    for table in (ScanRun.__table__, ScanResult.__table__, ScanDailyRollup.__table__):
+        table.to_metadata(metadata)
+    results = metadata.tables[ScanResult.__tablename__]
+    results.c.scan_date.primary_key = False
+    results.append_constraint(PrimaryKeyConstraint(results.c.id))
+    metadata.create_all(engine)
+
+    factory = sessionmaker(bind=engine)
+    for service in (scan_run_store, scan_result_writer, scan_partitions):
+        monkeypatch.setattr(service, "session_factory", factory)
+    return factory
+
+
 @pytest.fixture
 def mock_finnhub_fundamentals():
     """
@@ -95,6 +191,17 @@ def mock_yfinance_ticker(mock_yfinance_history):
     return mock
 
 
+@pytest.fixture
+def mock_price_history(mock_yfinance_history):
+    """
+    Mock dla PriceHistoryService.fetch_history() (batch download yfinance).
+
+    Returns:
+        Callable: side_effect zwracajacy te sama 30-dniowa historie dla kazdego symbolu
+    """
+    return lambda symbols, **kwargs: {symbol: mock_yfinance_history for symbol in symbols}
+
+
 @pytest.fixture
 def mock_finnhub_client(mock_finnhub_fundamentals, mock_finnhub_quote):
     """
@@ -17,7 +17,7 @@ from unittest.mock import patch, MagicMock
 class TestScanEndpoint:
     """Integration tests dla /api/scan endpoint"""
 
-    def test_scan_endpoint_returns_200(self, fastapi_test_client, mock_finnhub_fundamentals, mock_finnhub_quote, mock_yfinance_ticker):
+    def test_scan_endpoint_returns_200(self, fastapi_test_client, mock_finnhub_fundamentals, mock_finnhub_quote, mock_price_history):
         """
         Test: POST /api/scan zwraca 200 OK
 
@@ -26,10 +26,10 @@ class TestScanEndpoint:
         - Response ma klucze: results, total_scanned, matches
         - Results jest listą StockResult
         """
-        with patch('app.services.scanner.yf.Ticker') as mock_yf, \
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
              patch('app.services.scanner.FinnhubClient') as mock_client_class:
 
-            mock_yf.return_value = mock_yfinance_ticker
+            mock_fetch.side_effect = mock_price_history
             mock_client = MagicMock()
             mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
             mock_client.get_quote.return_value = mock_finnhub_quote
@@ -86,7 +86,7 @@ class TestScanEndpoint:
         assert response.status_code == 422, "Ujemny min_volume powinien zwrócić 422"
 
 
-    def test_scan_endpoint_with_all_filters(self, fastapi_test_client, mock_finnhub_fundamentals, mock_finnhub_quote, mock_yfinance_ticker):
+    def test_scan_endpoint_with_all_filters(self, fastapi_test_client, mock_finnhub_fundamentals, mock_finnhub_quote, mock_price_history):
         """
         Test: POST /api/scan z wszystkimi filtrami fundamentals
 
@@ -94,17 +94,17 @@ class TestScanEndpoint:
         - Endpoint akceptuje wszystkie parametry
         - Status code = 200
         """
-        with patch('app.services.scanner.yf.Ticker') as mock_yf, \
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
              patch('app.services.scanner.FinnhubClient') as mock_client_class:
 
-            mock_yf.return_value = mock_yfinance_ticker
+            mock_fetch.side_effect = mock_price_history
             mock_client = MagicMock()
             mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
             mock_client.get_quote.return_value = mock_finnhub_quote
             mock_client_class.return_value = mock_client
 
             # Request z WSZYSTKIMI filtrami
-            response = fastapi_test_client.post('/api/scan', json={
+            request = {
                 'symbols': ['AAPL', 'MSFT'],
                 'min_volume': 1_000_000,
                 'min_price_change_percent': 2.0,
@@ -115,12 +115,18 @@ class TestScanEndpoint:
                 'max_debt_equity': 0.3,
                 'min_revenue_growth': 15.0,
                 'max_forward_pe': 15.0
-            })
+            }
+            response = fastapi_test_client.post('/api/scan', json=request)
 
             # Asercje
             assert response.status_code == 200
             data = response.json()
-            assert data['total_scanned'] >= 0
+            assert data['total_scanned'] == 2
+
+            # only_matches zmienia results, ale nie total_scanned
+            only_matches = fastapi_test_client.post('/api/scan', json={**request, 'only_matches': True}).json()
+            assert only_matches['total_scanned'] == data['total_scanned']
+            assert len(only_matches['results']) == data['matches']
 
 
     def test_scan_endpoint_handles_scanner_exception(self, fastapi_test_client):
@@ -131,7 +137,7 @@ class TestScanEndpoint:
         - Nie crashuje przy exception w StockScanner
         - Zwraca 500 lub inne poprawne error response
         """
-        with patch('app.services.scanner.StockScanner.scan_stocks') as mock_scan:
+        with patch('app.services.scanner.StockScanner.scan_stocks_async') as mock_scan:
             # Symuluj exception w scanner
             mock_scan.side_effect = Exception("Database connection error")
 
@@ -144,7 +150,7 @@ class TestScanEndpoint:
             assert response.status_code >= 400, "Exception powinno zwrócić error status"
 
 
-    def test_scan_endpoint_response_structure(self, fastapi_test_client, mock_finnhub_fundamentals, mock_finnhub_quote, mock_yfinance_ticker):
+    def test_scan_endpoint_response_structure(self, fastapi_test_client, mock_finnhub_fundamentals, mock_finnhub_quote, mock_price_history):
         """
         Test: POST /api/scan zwraca poprawną strukturę response
 
@@ -152,10 +158,10 @@ class TestScanEndpoint:
         - results zawiera wszystkie wymagane pola StockResult
         - matches jest poprawnie obliczony
         """
-        with patch('app.services.scanner.yf.Ticker') as mock_yf, \
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
              patch('app.services.scanner.FinnhubClient') as mock_client_class:
 
-            mock_yf.return_value = mock_yfinance_ticker
+            mock_fetch.side_effect = mock_price_history
             mock_client = MagicMock()
             mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
             mock_client.get_quote.return_value = mock_finnhub_quote
@@ -301,3 +307,172 @@ class TestCORS:
 
         # Asercja: Status 200 oznacza że CORS preflight passed
         assert response.status_code == 200
+
+
+@pytest.mark.integration
+class TestRefilterEndpoint:
+    """Integration tests dla /api/scan/{scan_id}/refilter endpoint"""
+
+    def test_refilter_reuses_dataset_without_api_calls(self, fastapi_test_client, mock_finnhub_fundamentals, mock_finnhub_quote, mock_price_history):
+        """
+        Test: Re-filter stosuje nowe progi do zapisanego datasetu
+
+        Weryfikuje:
+        - POST /api/scan zwraca scan_id
+        - Re-filter nie wywoluje Finnhub ani yfinance
+        - Nowe progi zmieniaja meets_criteria
+        """
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            # DELISTED bez historii - nie ma go w datasecie, ale liczy sie do total_scanned
+            mock_fetch.side_effect = lambda symbols, **kwargs: {
+                symbol: history for symbol, history in mock_price_history(symbols).items()
+                if symbol != 'DELISTED'
+            }
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client_class.return_value = mock_client
+
+            scan = fastapi_test_client.post('/api/scan', json={'symbols': ['AAPL', 'MSFT', 'DELISTED']}).json()
+            assert scan['matches'] == 0  # Mock AAPL: market cap 3.8T > max 5B
+            api_calls = mock_client.get_fundamentals.call_count
+
+            response = fastapi_test_client.post(f"/api/scan/{scan['scan_id']}/refilter", json={
+                'max_market_cap': None,
+                'max_debt_equity': None,
+                'max_forward_pe': None,
+                'min_revenue_growth': None
+            })
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data['total_scanned'] == scan['total_scanned'] == 3
+            assert data['matches'] == 2
+            assert mock_client.get_fundamentals.call_count == api_calls
+            assert mock_fetch.call_count == 1
+
+
+    def test_refilter_unknown_scan_returns_404(self, fastapi_test_client):
+        """
+        Test: Re-filter nieistniejacego datasetu zwraca 404
+        """
+        response = fastapi_test_client.post('/api/scan/nonexistent/refilter', json={})
+
+        assert response.status_code == 404
+
+
+@pytest.mark.integration
+class TestScanStreamEndpoint:
+    """Integration tests dla /api/scan/stream endpoint"""
+
+    def test_scan_stream_ndjson(self, fastapi_test_client, mock_finnhub_fundamentals, mock_finnhub_quote, mock_price_history):
+        """
+        Test: POST /api/scan/stream zwraca NDJSON - rekord per symbol + summary
+
+        Weryfikuje:
+        - Content-Type = application/x-ndjson
+        - 1 rekord "result" per symbol, ostatni rekord "summary"
+        """
+        import json
+
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client_class.return_value = mock_client
+
+            response = fastapi_test_client.post('/api/scan/stream', json={
+                'symbols': ['AAPL', 'MSFT', 'NVDA'],
+                'min_volume': 0
+            })
+
+            assert response.status_code == 200
+            assert response.headers['content-type'].startswith('application/x-ndjson')
+
+            records = [json.loads(line) for line in response.text.splitlines()]
+            assert [r['type'] for r in records] == ['result', 'result', 'result', 'summary']
+            assert {r['symbol'] for r in records[:3]} == {'AAPL', 'MSFT', 'NVDA'}
+            assert records[-1]['total_scanned'] == 3
+
+
+    def test_scan_stream_sse(self, fastapi_test_client, mock_finnhub_fundamentals, mock_finnhub_quote, mock_price_history):
+        """
+        Test: format=sse zwraca Server-Sent Events
+        """
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client_class.return_value = mock_client
+
+            response = fastapi_test_client.post('/api/scan/stream?format=sse', json={'symbols': ['AAPL']})
+
+            assert response.headers['content-type'].startswith('text/event-stream')
+            assert 'event: result\ndata: ' in response.text
+            assert response.text.rstrip().split('\n\n')[-1].startswith('event: summary')
+
+
+@pytest.mark.integration
+class TestScanJobsEndpoint:
+    """Integration tests dla /api/scan/jobs endpoints"""
+
+    def test_scan_job_submit_status_and_results(self, fastapi_test_client, mock_finnhub_fundamentals, mock_finnhub_quote, mock_price_history):
+        """
+        Test: POST /api/scan/jobs -> 202 + job_id, status az do completed, potem wyniki
+
+        Weryfikuje:
+        - Submit zwraca od razu (202) z job_id
+        - GET status raportuje postep symbols_done/total
+        - GET results zwraca ScanResponse ze scan_id = job_id
+        """
+        import time
+
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client.api_calls = 4
+            mock_client_class.return_value = mock_client
+
+            response = fastapi_test_client.post('/api/scan/jobs', json={
+                'symbols': ['AAPL', 'MSFT'],
+                'min_volume': 0
+            })
+            assert response.status_code == 202
+            job_id = response.json()['job_id']
+            assert response.json()['total_symbols'] == 2
+
+            deadline = time.monotonic() + 5
+            status = response.json()
+            while status['status'] not in ('completed', 'failed') and time.monotonic() < deadline:
+                time.sleep(0.02)
+                status = fastapi_test_client.get(f'/api/scan/jobs/{job_id}').json()
+
+            assert status['status'] == 'completed'
+            assert status['symbols_done'] == 2
+            assert status['progress_percent'] == 100.0
+
+            results = fastapi_test_client.get(f'/api/scan/jobs/{job_id}/results')
+            assert results.status_code == 200
+            data = results.json()
+            assert data['scan_id'] == job_id
+            assert data['total_scanned'] == 2
+
+
+    def test_scan_job_unknown_id_returns_404(self, fastapi_test_client):
+        """
+        Test: Nieistniejacy job_id = 404 (status i results)
+        """
+        assert fastapi_test_client.get('/api/scan/jobs/does-not-exist').status_code == 404
+        assert fastapi_test_client.get('/api/scan/jobs/does-not-exist/results').status_code == 404
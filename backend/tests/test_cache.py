@@ -6,10 +6,22 @@ Testujemy:
 2. Cache TTL działa (wygasanie po X sekund)
 3. clear_cache() usuwa klucze
 4. Cache działa bez Redis (graceful degradation)
+5. Negative cache (KNOWN_EMPTY -> EMPTY_MARKER z krótszym TTL)
+6. Stale-while-revalidate (max_stale)
 """
 import pytest
 from unittest.mock import patch, MagicMock
-from app.cache import RedisCache, cache, clear_finnhub_cache
+from app.cache import (
+    EMPTY_MARKER,
+    KNOWN_EMPTY,
+    STALE_KEY,
+    SWR_STORED_AT,
+    SWR_VALUE,
+    BackgroundRefresher,
+    RedisCache,
+    cache,
+    clear_finnhub_cache,
+)
 import time
 
 
@@ -68,8 +80,10 @@ class TestRedisCache:
         with patch('app.cache.redis.Redis.from_url') as mock_redis:
             mock_client = MagicMock()
             mock_client.ping.return_value = True
-            # Mock Redis GET - zwraca JSON string
-            mock_client.get.return_value = '{"symbol": "AAPL", "price": 256.48}'
+            # Mock Redis GET + PTTL (pipeline) - zwraca JSON string i pozostały TTL
+            mock_client.pipeline.return_value.execute.return_value = [
+                '{"symbol": "AAPL", "price": 256.48}', 900_000
+            ]
             mock_redis.return_value = mock_client
 
             cache_instance = RedisCache()
@@ -91,7 +105,7 @@ class TestRedisCache:
         with patch('app.cache.redis.Redis.from_url') as mock_redis:
             mock_client = MagicMock()
             mock_client.ping.return_value = True
-            mock_client.get.return_value = None  # Klucz nie istnieje
+            mock_client.pipeline.return_value.execute.return_value = [None, -2]  # Klucz nie istnieje
             mock_redis.return_value = mock_client
 
             cache_instance = RedisCache()
@@ -107,7 +121,7 @@ class TestRedisCache:
 
         Weryfikuje:
         - Wywołuje Redis.setex() z TTL
-        - Serializuje do JSON
+        - Serializuje kodekiem cache (odczyt zwraca te same dane)
         """
         with patch('app.cache.redis.Redis.from_url') as mock_redis:
             mock_client = MagicMock()
@@ -125,7 +139,7 @@ class TestRedisCache:
             call_args = mock_client.setex.call_args
             assert call_args[0][0] == "finnhub:get_quote:AAPL"
             assert call_args[0][1] == 900  # TTL
-            assert '"symbol": "AAPL"' in call_args[0][2]  # JSON string
+            assert cache_instance.serializer.loads(call_args[0][2]) == data  # zakodowane kodekiem cache
 
 
     def test_cache_delete(self):
@@ -179,6 +193,172 @@ class TestRedisCache:
             mock_client.delete.assert_called_once()
 
 
+    def test_cache_get_serves_l1_without_redis_round_trip(self):
+        """
+        Test: Drugi get() tego samego klucza = L1 (bez Redis GET)
+
+        Weryfikuje:
+        - Trafienie w Redis trafia do L1
+        - Kolejny odczyt nie robi round tripu do Redis
+        - L1 nie żyje dłużej niż klucz w Redis (PTTL)
+        """
+        with patch('app.cache.redis.Redis.from_url') as mock_redis:
+            mock_client = MagicMock()
+            mock_client.ping.return_value = True
+            mock_client.pipeline.return_value.execute.return_value = ['{"symbol": "AAPL"}', 50]
+            mock_redis.return_value = mock_client
+
+            cache_instance = RedisCache()
+
+            assert cache_instance.get("finnhub:get_quote:AAPL") == {"symbol": "AAPL"}
+            assert cache_instance.get("finnhub:get_quote:AAPL") == {"symbol": "AAPL"}
+            assert mock_client.pipeline.call_count == 1
+
+            # 50 ms pozostałego TTL w Redis -> wpis L1 wygasa razem z Redis
+            time.sleep(0.06)
+            cache_instance.get("finnhub:get_quote:AAPL")
+            assert mock_client.pipeline.call_count == 2
+
+
+    def test_get_many_uses_single_pipeline(self):
+        """
+        Test: get_many() = L1 + JEDEN pipeline (MGET + PTTL) dla brakujących kluczy
+
+        Weryfikuje:
+        - Klucze z L1 nie idą do Redis
+        - Zwraca tylko trafienia
+        - Trafienia z Redis trafiają do L1
+        """
+        with patch('app.cache.redis.Redis.from_url') as mock_redis:
+            mock_client = MagicMock()
+            mock_client.ping.return_value = True
+            pipe = mock_client.pipeline.return_value
+            pipe.execute.return_value = [['{"c": 2.0}', None], 900_000, -2]
+            mock_redis.return_value = mock_client
+
+            cache_instance = RedisCache()
+            cache_instance.local.set("finnhub:get_quote:AAPL", {"c": 1.0}, ttl=60)
+
+            found = cache_instance.get_many([
+                "finnhub:get_quote:AAPL", "finnhub:get_quote:MSFT", "finnhub:get_quote:NVDA"
+            ])
+
+            assert found == {"finnhub:get_quote:AAPL": {"c": 1.0}, "finnhub:get_quote:MSFT": {"c": 2.0}}
+            pipe.mget.assert_called_once_with(["finnhub:get_quote:MSFT", "finnhub:get_quote:NVDA"])
+            assert pipe.execute.call_count == 1
+            assert cache_instance.local.get("finnhub:get_quote:MSFT") == {"c": 2.0}
+
+
+    def test_set_many_uses_single_pipeline(self):
+        """
+        Test: set_many() = pipeline SETEX dla wszystkich kluczy, 1 execute()
+        """
+        with patch('app.cache.redis.Redis.from_url') as mock_redis:
+            mock_client = MagicMock()
+            mock_client.ping.return_value = True
+            mock_redis.return_value = mock_client
+
+            cache_instance = RedisCache()
+            result = cache_instance.set_many({"a": {"x": 1}, "b": {"x": 2}}, ttl=900)
+
+            pipe = mock_client.pipeline.return_value
+            assert result == True
+            assert pipe.setex.call_count == 2
+            pipe.setex.assert_any_call("a", 900, cache_instance.serializer.dumps({"x": 1}))
+            assert pipe.execute.call_count == 1
+
+
+    def test_local_cache_evicts_least_recently_used(self):
+        """
+        Test: L1 ma limit wpisów - usuwany najdawniej używany
+        """
+        from app.cache import LocalCache
+
+        local = LocalCache(max_items=2, max_ttl=60)
+        local.set("a", 1, ttl=60)
+        local.set("b", 2, ttl=60)
+        local.get("a")          # "a" świeżo użyty
+        local.set("c", 3, ttl=60)
+
+        assert local.get("a") == 1
+        assert local.get("b") is None
+        assert local.get("c") == 3
+
+
+@pytest.mark.unit
+class TestRedisHealth:
+    """Unit tests dla RedisHealth (circuit breaker zamiast PING per operacja)"""
+
+    def test_operations_do_not_ping(self):
+        """
+        Test: get/set/delete = 1 round trip (PING tylko przy inicjalizacji)
+        """
+        with patch('app.cache.redis.Redis.from_url') as mock_redis:
+            mock_client = MagicMock()
+            mock_client.ping.return_value = True
+            mock_client.pipeline.return_value.execute.return_value = [None, -2]
+            mock_redis.return_value = mock_client
+
+            cache_instance = RedisCache()
+            cache_instance.get("finnhub:get_quote:AAPL")
+            cache_instance.set("finnhub:get_quote:AAPL", {"c": 1.0})
+            cache_instance.delete("finnhub:get_quote:AAPL")
+
+            assert mock_client.ping.call_count == 1
+
+
+    def test_circuit_opens_after_connection_failures(self):
+        """
+        Test: FAILURE_THRESHOLD błędów połączenia -> circuit open, Redis pomijany
+
+        Weryfikuje:
+        - is_available() = False
+        - Kolejne operacje nie idą do Redis
+        - Przejście closed->open policzone
+        """
+        import redis as redis_lib
+
+        with patch('app.cache.redis.Redis.from_url') as mock_redis, \
+             patch('app.cache.RedisHealth._start_reconnect'):
+            mock_client = MagicMock()
+            mock_client.ping.return_value = True
+            mock_client.setex.side_effect = redis_lib.ConnectionError("Connection refused")
+            mock_redis.return_value = mock_client
+
+            cache_instance = RedisCache()
+            for _ in range(3):
+                assert cache_instance.set("key", {"x": 1}) == False
+
+            assert cache_instance.is_available() == False
+            assert cache_instance.set("key", {"x": 1}) == False
+            assert mock_client.setex.call_count == 3
+
+            health = cache_instance.health.snapshot()
+            assert health["state"] == "open"
+            assert health["transitions"] == {"closed->open": 1}
+
+
+    def test_background_reconnect_closes_circuit(self):
+        """
+        Test: Wątek w tle łączy się ponownie z backoff -> closed (cache wraca sam)
+        """
+        from app.cache import RedisHealth
+
+        probe = MagicMock(side_effect=[Exception("Connection refused"), None])
+
+        with patch.object(RedisHealth, 'RECONNECT_MIN_DELAY', 0.01):
+            health = RedisHealth(probe=probe, state=RedisHealth.OPEN)
+
+            deadline = time.monotonic() + 2
+            while not health.allow() and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        snapshot = health.snapshot()
+        assert snapshot["state"] == "closed"
+        assert snapshot["reconnect_attempts"] == 2
+        assert snapshot["transitions"] == {"open->half_open": 2, "half_open->open": 1, "half_open->closed": 1}
+
+
 @pytest.mark.unit
 class TestCacheDecorator:
     """Unit tests dla @cache decorator"""
@@ -292,6 +472,280 @@ class TestCacheDecorator:
             assert result == 10
 
 
+@pytest.mark.unit
+class TestSingleflight:
+    """Unit tests dla singleflight (coalescing równoczesnych cache MISS)"""
+
+    def test_concurrent_misses_call_upstream_once(self):
+        """
+        Test: 5 wątków równocześnie prosi o ten sam klucz - 1 upstream call
+
+        Weryfikuje:
+        - Funkcja wykonana raz
+        - Wszystkie wątki dostają ten sam wynik
+        """
+        import threading
+
+        call_count = 0
+        started = threading.Event()
+        release = threading.Event()
+
+        with patch('app.cache.redis_cache') as mock_cache:
+            mock_cache.get.return_value = None
+            mock_cache.acquire_lock.return_value = "token"
+
+            @cache(ttl=60, key_prefix="test")
+            def get_fundamentals(self, symbol):
+                nonlocal call_count
+                call_count += 1
+                started.set()
+                release.wait(timeout=2)
+                return {"symbol": symbol}
+
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(get_fundamentals(None, "AAPL")))
+                for _ in range(5)
+            ]
+            threads[0].start()
+            started.wait(timeout=2)
+            for thread in threads[1:]:
+                thread.start()
+            time.sleep(0.05)
+            release.set()
+            for thread in threads:
+                thread.join(timeout=2)
+
+            assert call_count == 1
+            assert results == [{"symbol": "AAPL"}] * 5
+            mock_cache.set.assert_called_once()
+
+
+    def test_waits_for_other_process_holding_lock(self):
+        """
+        Test: Lock w Redis trzyma inny proces - czekamy na jego wynik w cache
+
+        Weryfikuje:
+        - Funkcja NIE jest wykonana
+        - Zwrócony wynik zapisany w cache przez inny proces
+        """
+        with patch('app.cache.redis_cache') as mock_cache, \
+             patch('app.cache.time.sleep'):
+            # MISS w decoratorze, MISS przy 1. sprawdzeniu, potem wynik innego procesu
+            mock_cache.get.side_effect = [None, None, {"symbol": "AAPL"}]
+            mock_cache.acquire_lock.return_value = None
+
+            upstream = MagicMock(return_value={"symbol": "AAPL"})
+
+            @cache(ttl=60, key_prefix="test")
+            def get_fundamentals(self, symbol):
+                return upstream(symbol)
+
+            result = get_fundamentals(None, "AAPL")
+
+            assert result == {"symbol": "AAPL"}
+            upstream.assert_not_called()
+            mock_cache.release_lock.assert_not_called()
+
+
+    def test_acquire_lock_uses_set_nx(self):
+        """
+        Test: acquire_lock() = SET lock:{key} NX EX, None gdy lock zajęty
+        """
+        with patch('app.cache.redis.Redis.from_url') as mock_redis:
+            mock_client = MagicMock()
+            mock_client.ping.return_value = True
+            mock_client.set.side_effect = [True, None]
+            mock_redis.return_value = mock_client
+
+            cache_instance = RedisCache()
+
+            token = cache_instance.acquire_lock("finnhub:get_quote:AAPL", ttl=30)
+            assert token is not None
+            mock_client.set.assert_called_with("lock:finnhub:get_quote:AAPL", token, nx=True, ex=30)
+
+            assert cache_instance.acquire_lock("finnhub:get_quote:AAPL", ttl=30) is None
+
+
+@pytest.mark.unit
+class TestNegativeCache:
+    """Unit tests dla negative cache (symbole bez danych)"""
+
+    def test_known_empty_is_cached_with_negative_ttl(self):
+        """
+        Test: Funkcja zwraca KNOWN_EMPTY -> EMPTY_MARKER w cache z negative_ttl
+
+        Weryfikuje:
+        - Wywołujący dostaje None (nie sentinel)
+        - Zapis z krótszym TTL niż normalny wynik
+        """
+        with patch('app.cache.redis_cache') as mock_cache:
+            mock_cache.get.return_value = None
+            mock_cache.acquire_lock.return_value = "token"
+
+            @cache(ttl=900, key_prefix="test", negative_ttl=60)
+            def get_quote(self, symbol):
+                return KNOWN_EMPTY
+
+            assert get_quote(None, "DEAD") is None
+            mock_cache.set.assert_called_once_with("test:get_quote:DEAD", EMPTY_MARKER, 60)
+
+
+    def test_empty_marker_hit_skips_upstream(self):
+        """
+        Test: EMPTY_MARKER w cache -> None bez wywołania funkcji (0 API calls)
+        """
+        with patch('app.cache.redis_cache') as mock_cache:
+            mock_cache.get.return_value = dict(EMPTY_MARKER)
+            upstream = MagicMock()
+
+            @cache(ttl=900, key_prefix="test", negative_ttl=60)
+            def get_quote(self, symbol):
+                return upstream(symbol)
+
+            assert get_quote(None, "DEAD") is None
+            upstream.assert_not_called()
+
+
+    def test_transient_none_is_not_cached(self):
+        """
+        Test: None (błąd API / wyczerpane retry) NIE trafia do negative cache
+        """
+        with patch('app.cache.redis_cache') as mock_cache:
+            mock_cache.get.return_value = None
+            mock_cache.acquire_lock.return_value = "token"
+
+            @cache(ttl=900, key_prefix="test", negative_ttl=60)
+            def get_quote(self, symbol):
+                return None
+
+            assert get_quote(None, "AAPL") is None
+            mock_cache.set.assert_not_called()
+
+
+@pytest.mark.unit
+class TestStaleWhileRevalidate:
+    """Unit tests dla @cache(max_stale=...)"""
+
+    def test_result_stored_in_envelope_for_ttl_plus_max_stale(self):
+        """
+        Test: MISS -> zapis {czas zapisu, wartość} na ttl + max_stale, wywołujący dostaje wartość
+        """
+        with patch('app.cache.redis_cache') as mock_cache:
+            mock_cache.get.return_value = None
+            mock_cache.acquire_lock.return_value = "token"
+
+            @cache(ttl=900, key_prefix="test", max_stale=600)
+            def get_quote(self, symbol):
+                return {"c": 1.0}
+
+            assert get_quote(None, "AAPL") == {"c": 1.0}
+
+            key, stored, ttl = mock_cache.set.call_args[0]
+            assert stored[SWR_VALUE] == {"c": 1.0}
+            assert SWR_STORED_AT in stored
+            assert ttl == 1500
+
+
+    def test_callable_ttl_resolved_at_store_time(self):
+        """
+        Test: ttl jako callable (polityka TTL) - liczony przy zapisie i zapamiętany w kopercie
+
+        Weryfikuje:
+        - Wpis świeży według TTL z chwili zapisu, nie z chwili odczytu
+        """
+        with patch('app.cache.redis_cache') as mock_cache:
+            mock_cache.get.return_value = None
+            mock_cache.acquire_lock.return_value = "token"
+
+            @cache(ttl=lambda: 50_000, key_prefix="test", max_stale=600)
+            def get_quote(self, symbol):
+                return {"c": 1.0}
+
+            get_quote(None, "AAPL")
+            key, stored, ttl = mock_cache.set.call_args[0]
+            assert stored["ttl"] == 50_000
+            assert ttl == 50_600
+
+            # Odczyt po 10 000s przy polityce "teraz 900s" - nadal świeży (TTL zapisu)
+            stored[SWR_STORED_AT] -= 10_000
+            mock_cache.get.return_value = stored
+
+            @cache(ttl=lambda: 900, key_prefix="test", max_stale=600)
+            def get_quote_later(self, symbol):
+                return {"c": 2.0}
+
+            result = get_quote_later(None, "AAPL")
+            assert result == {"c": 1.0}
+
+
+    def test_stale_value_served_and_refreshed_in_background(self):
+        """
+        Test: Wartość starsza niż ttl (w granicy max_stale)
+
+        Weryfikuje:
+        - Zwrócona od razu z STALE_KEY (wiek)
+        - Upstream NIE wywołany synchronicznie, odświeżenie zaplanowane w tle
+        """
+        upstream = MagicMock(return_value={"c": 2.0})
+
+        with patch('app.cache.redis_cache') as mock_cache, \
+             patch('app.cache.background_refresher') as mock_refresher:
+            mock_cache.get.return_value = {SWR_STORED_AT: time.time() - 1000, SWR_VALUE: {"c": 1.0}}
+
+            @cache(ttl=900, key_prefix="test", max_stale=600)
+            def get_quote(self, symbol):
+                return upstream(symbol)
+
+            result = get_quote(None, "AAPL")
+
+            assert result["c"] == 1.0
+            assert result[STALE_KEY] >= 1000
+            upstream.assert_not_called()
+            assert mock_refresher.submit.call_args[0][0] == "test:get_quote:AAPL"
+
+
+    def test_value_older_than_max_stale_fetched_synchronously(self):
+        """
+        Test: Wartość starsza niż ttl + max_stale - synchroniczny upstream call
+        """
+        with patch('app.cache.redis_cache') as mock_cache, \
+             patch('app.cache.background_refresher') as mock_refresher:
+            mock_cache.get.side_effect = [
+                {SWR_STORED_AT: time.time() - 2000, SWR_VALUE: {"c": 1.0}},
+            ]
+            mock_cache.acquire_lock.return_value = "token"
+
+            @cache(ttl=900, key_prefix="test", max_stale=600)
+            def get_quote(self, symbol):
+                return {"c": 2.0}
+
+            assert get_quote(None, "AAPL") == {"c": 2.0}
+            mock_refresher.submit.assert_not_called()
+
+
+    def test_background_refresher_runs_one_refresh_per_key(self):
+        """
+        Test: Drugi submit tego samego klucza w trakcie odświeżania jest pomijany
+        """
+        import threading
+
+        release = threading.Event()
+        refresh = MagicMock(side_effect=lambda: release.wait(timeout=2))
+        refresher = BackgroundRefresher(max_workers=1, max_pending=10)
+
+        assert refresher.submit("test:get_quote:AAPL", refresh) is True
+        assert refresher.submit("test:get_quote:AAPL", refresh) is False
+        release.set()
+
+        deadline = time.time() + 2
+        while refresher.pending() and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert refresh.call_count == 1
+        assert refresher.pending() == 0
+
+
 @pytest.mark.unit
 class TestCacheUtilities:
     """Unit tests dla utility functions"""
@@ -0,0 +1,60 @@
+"""
+Unit tests dla kodeków cache (app.cache_codecs)
+
+Testujemy:
+1. Round trip dla każdego kodeka (z kompresją i bez)
+2. Odczyt starych wpisów (czysty JSON bez nagłówka)
+3. Kompresja tylko dla dużych payloadów
+"""
+import json
+import pytest
+from app.cache_codecs import COMPRESSION_NONE, COMPRESSION_ZLIB, TAG_MSGPACK, CacheSerializer
+
+
+@pytest.mark.unit
+class TestCacheSerializer:
+    """Unit tests dla CacheSerializer"""
+
+    @pytest.mark.parametrize("codec", ["msgpack", "json"])
+    @pytest.mark.parametrize("compress_min_bytes", [0, -1])
+    def test_round_trip(self, codec, compress_min_bytes, mock_finnhub_fundamentals):
+        """
+        Test: loads(dumps(x)) == x dla payloadu fundamentals
+        """
+        serializer = CacheSerializer(codec, compress_min_bytes=compress_min_bytes)
+
+        assert serializer.loads(serializer.dumps(mock_finnhub_fundamentals)) == mock_finnhub_fundamentals
+
+
+    def test_reads_legacy_json_entries(self):
+        """
+        Test: Wpisy zapisane przed zmianą formatu (json.dumps) nadal czytelne
+        """
+        serializer = CacheSerializer("msgpack")
+        legacy = json.dumps({"c": 258.06, "pc": 254.5})
+
+        assert serializer.loads(legacy) == {"c": 258.06, "pc": 254.5}
+        assert serializer.loads(legacy.encode()) == {"c": 258.06, "pc": 254.5}
+
+
+    def test_compresses_only_large_payloads(self):
+        """
+        Test: Mały quote bez kompresji, duży payload (series) skompresowany
+        """
+        serializer = CacheSerializer("msgpack", compress_min_bytes=1024)
+
+        small = serializer.dumps({"c": 258.06})
+        large_value = {"series": {"annual": {"eps": [{"period": f"{2000 + i}-09-30", "v": i * 1.5} for i in range(200)]}}}
+        large = serializer.dumps(large_value)
+
+        assert small[:2] == TAG_MSGPACK + COMPRESSION_NONE
+        assert large[:2] == TAG_MSGPACK + COMPRESSION_ZLIB
+        assert len(large) < len(json.dumps(large_value)) / 3
+
+
+    def test_unknown_codec_raises(self):
+        """
+        Test: Nieznany kodek w konfiguracji = ValueError przy starcie
+        """
+        with pytest.raises(ValueError):
+            CacheSerializer("pickle")
@@ -0,0 +1,95 @@
+"""
+Unit tests dla kalendarza sesji (app.market_calendar) i polityki TTL (app.cache_policy)
+
+Testujemy:
+1. Sesje, weekendy, swieta i skrocone sesje NYSE
+2. TTL quote: krotki w sesji, do otwarcia po zamknieciu
+3. TTL fundamentals / profile: stale (dni)
+"""
+import pytest
+from datetime import datetime
+from app.cache_policy import DATA_FUNDAMENTALS, DATA_QUOTE, TTLPolicy
+from app.market_calendar import MARKET_TZ, MarketCalendar
+
+
+def _ny(*args):
+    """Aware datetime w strefie gieldy (Nowy Jork)"""
+    return datetime(*args, tzinfo=MARKET_TZ)
+
+
+@pytest.fixture
+def policy():
+    return TTLPolicy(
+        calendar=MarketCalendar(),
+        quote_session_ttl=900,
+        quote_close_grace=120,
+        fundamentals_ttl=86400,
+        profile_ttl=604800
+    )
+
+
+@pytest.mark.unit
+class TestMarketCalendar:
+    """Unit tests dla MarketCalendar"""
+
+    def test_session_hours_and_weekend(self):
+        """
+        Test: Sroda 11:00 otwarta, 16:00 zamknieta, sobota zamknieta
+        """
+        calendar = MarketCalendar()
+
+        assert calendar.is_open(_ny(2026, 10, 14, 11, 0))
+        assert not calendar.is_open(_ny(2026, 10, 14, 16, 0))
+        assert not calendar.is_open(_ny(2026, 10, 17, 11, 0))
+
+
+    def test_next_open_skips_weekend_and_holiday(self):
+        """
+        Test: Po zamknieciu w srode przed Thanksgiving - nastepne otwarcie w piatek
+        """
+        calendar = MarketCalendar()
+
+        assert calendar.next_open(_ny(2026, 10, 16, 17, 0)) == _ny(2026, 10, 19, 9, 30)
+        assert calendar.next_open(_ny(2026, 11, 25, 17, 0)) == _ny(2026, 11, 27, 9, 30)
+
+
+    def test_early_close(self):
+        """
+        Test: Dzien po Thanksgiving - sesja do 13:00
+        """
+        calendar = MarketCalendar()
+
+        assert calendar.seconds_until_close(_ny(2026, 11, 27, 12, 0)) == 3600
+        assert not calendar.is_open(_ny(2026, 11, 27, 13, 30))
+
+
+@pytest.mark.unit
+class TestTTLPolicy:
+    """Unit tests dla TTLPolicy"""
+
+    def test_quote_ttl_during_session(self, policy):
+        """
+        Test: W sesji quote_session_ttl, przed zamknieciem - do zamkniecia + grace
+        """
+        assert policy.ttl(DATA_QUOTE, _ny(2026, 10, 14, 11, 0)) == 900
+        assert policy.ttl(DATA_QUOTE, _ny(2026, 10, 14, 15, 55)) == 300 + 120
+
+
+    def test_quote_ttl_after_close_until_next_open(self, policy):
+        """
+        Test: Piatek po zamknieciu - quote wazny do poniedzialku 9:30 (scan w weekend = 0 API calls)
+        """
+        ttl = policy.ttl(DATA_QUOTE, _ny(2026, 10, 16, 17, 0))
+
+        assert ttl == int((_ny(2026, 10, 19, 9, 30) - _ny(2026, 10, 16, 17, 0)).total_seconds())
+
+
+    def test_fixed_ttl_for_fundamentals_and_unknown_type(self, policy):
+        """
+        Test: Fundamentals = staly TTL niezaleznie od sesji, nieznany typ = ValueError
+        """
+        assert policy.ttl(DATA_FUNDAMENTALS, _ny(2026, 10, 14, 11, 0)) == 86400
+        assert policy.ttl_for(DATA_FUNDAMENTALS)() == 86400
+
+        with pytest.raises(ValueError):
+            policy.ttl("options")
@@ -0,0 +1,147 @@
+"""
+Unit tests dla wektorowego Criteria Engine
+
+Testujemy:
+1. Maski kryteriow liczone dla calej tabeli naraz
+2. Obsluge brakujacych danych (NaN)
+3. Etap odrzucenia (rejected_stages)
+4. Wylaczone kryteria (prog None)
+5. Kryteria techniczne (RSI, golden cross) w etapie history
+"""
+import pytest
+import numpy as np
+from app.services.criteria import (
+    build_metrics_frame,
+    evaluate_criteria,
+    rejected_stages,
+    row_passes_stage,
+    STAGE_HISTORY,
+    STAGE_FUNDAMENTALS,
+)
+
+
+def _row(symbol, **overrides):
+    """Wiersz metryk spelniajacy domyslne kryteria MULTIBAGGER"""
+    row = {
+        "symbol": symbol,
+        "price": 10.0,
+        "volume": 2_000_000,
+        "price_change_7d": 3.0,
+        "price_change_30d": 8.0,
+        "market_cap": 1_000_000_000,
+        "roe": 20.0,
+        "roce": 15.0,
+        "debt_equity": 0.2,
+        "revenue_growth": 25.0,
+        "forward_pe": 12.0,
+    }
+    row.update(overrides)
+    return row
+
+
+DEFAULT_THRESHOLDS = {
+    "min_volume": 1_000_000,
+    "min_price_change_percent": None,
+    "min_market_cap": 50_000_000,
+    "max_market_cap": 5_000_000_000,
+    "min_roe": 15.0,
+    "min_roce": 10.0,
+    "max_debt_equity": 0.3,
+    "min_revenue_growth": 15.0,
+    "max_forward_pe": 15.0,
+}
+
+
+@pytest.mark.unit
+class TestCriteriaEngine:
+    """Unit tests dla app.services.criteria"""
+
+    def test_evaluate_criteria_masks_whole_universe(self):
+        """
+        Test: Jedna ewaluacja zwraca maske dla wszystkich symboli
+        """
+        frame = build_metrics_frame([
+            _row("GOOD"),
+            _row("LOWVOL", volume=500_000),
+            _row("DEBT", debt_equity=1.5),
+            _row("BIG", market_cap=10_000_000_000),
+        ])
+
+        mask = evaluate_criteria(frame, DEFAULT_THRESHOLDS)
+
+        assert mask.tolist() == [True, False, False, False]
+
+
+    def test_missing_fundamentals_fail_criteria(self):
+        """
+        Test: Brak danych (None -> NaN) = kryterium niespelnione
+        """
+        frame = build_metrics_frame([_row("NOPE", forward_pe=None), _row("NOROE", roe=None)])
+
+        assert evaluate_criteria(frame, DEFAULT_THRESHOLDS).tolist() == [False, False]
+
+        # Po wylaczeniu kryteriow brakujace dane nie maja znaczenia
+        thresholds = dict(DEFAULT_THRESHOLDS, max_forward_pe=None, min_roe=None)
+        assert evaluate_criteria(frame, thresholds).tolist() == [True, True]
+
+
+    def test_missing_price_change_skips_criterion(self):
+        """
+        Test: Brak historii 7d (NaN) pomija kryterium zmiany ceny
+        """
+        frame = build_metrics_frame([_row("NEW", price_change_7d=None), _row("DOWN", price_change_7d=-5.0)])
+        thresholds = dict(DEFAULT_THRESHOLDS, min_price_change_percent=2.0)
+
+        assert evaluate_criteria(frame, thresholds).tolist() == [True, False]
+
+
+    def test_rejected_stages_reports_first_failing_stage(self):
+        """
+        Test: rejected_stages zwraca najtanszy etap ktory odrzucil symbol
+        """
+        frame = build_metrics_frame([
+            _row("GOOD"),
+            _row("BOTH", volume=0, roe=1.0),
+            _row("FUND", roe=1.0),
+        ])
+
+        stages = rejected_stages(frame, DEFAULT_THRESHOLDS)
+
+        assert stages.tolist() == [None, STAGE_HISTORY, STAGE_FUNDAMENTALS]
+
+
+    def test_row_passes_stage_matches_vectorized(self):
+        """
+        Test: Ewaluacja pojedynczego wiersza (lazy) = ewaluacja wektorowa
+        """
+        row = _row("LOWVOL", volume=10)
+
+        assert row_passes_stage(row, DEFAULT_THRESHOLDS, STAGE_HISTORY) == False
+        assert row_passes_stage(row, DEFAULT_THRESHOLDS, STAGE_FUNDAMENTALS) == True
+        assert isinstance(evaluate_criteria(build_metrics_frame([row]), DEFAULT_THRESHOLDS), np.ndarray)
+
+    def test_indicator_criteria(self):
+        """
+        Test: Kryteria techniczne - zakres RSI i flaga golden cross ("==")
+
+        Weryfikuje: brak wskaznika (za krotka historia) = kryterium niespelnione,
+        odrzucenie na etapie history
+        """
+        frame = build_metrics_frame([
+            _row("CROSS", rsi_14=55.0, golden_cross=True),
+            _row("NOCROSS", rsi_14=55.0, golden_cross=False),
+            _row("OVERBOUGHT", rsi_14=82.0, golden_cross=True),
+            _row("NEW", rsi_14=None, golden_cross=None),
+        ])
+        thresholds = {**DEFAULT_THRESHOLDS, "max_rsi": 70.0, "golden_cross": True}
+
+        mask = evaluate_criteria(frame, thresholds)
+        stages = rejected_stages(frame, thresholds)
+
+        assert mask.tolist() == [True, False, False, False]
+        assert stages.tolist() == [None, STAGE_HISTORY, STAGE_HISTORY, STAGE_HISTORY]
+
+        # golden_cross=False = tylko symbole BEZ swiezego przeciecia
+        assert evaluate_criteria(frame, {**DEFAULT_THRESHOLDS, "golden_cross": False}).tolist() == [
+            False, True, False, False
+        ]
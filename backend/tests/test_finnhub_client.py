@@ -205,8 +205,8 @@ class TestFinnhubClient:
         Test: get_quote() obsługuje niepoprawny symbol
 
         Weryfikuje:
-        - Nie crashuje
-        - Zwraca dane z c = 0 dla invalid symbols (Finnhub behavior)
+        - Finnhub zwraca zera dla invalid symbols (c = 0, t = 0) - None
+        - Kolejne wywołanie NIE robi API call (negative cache)
         """
         with patch('app.services.finnhub_client.finnhub.Client') as mock_client_class, \
              patch.object(FinnhubClient, '_make_request_with_retry') as mock_retry:
@@ -214,12 +214,55 @@ class TestFinnhubClient:
             mock_client = MagicMock()
             mock_client_class.return_value = mock_client
 
-            # Finnhub API zwraca {'c': 0} dla invalid symbols
-            mock_retry.return_value = {'c': 0}
+            # Finnhub API zwraca same zera dla invalid symbols
+            mock_retry.return_value = {'c': 0, 'd': None, 'dp': None, 'h': 0, 'l': 0, 'o': 0, 'pc': 0, 't': 0}
 
             client = FinnhubClient()
-            result = client.get_quote("INVALID123")
 
-            # Asercja: Zwraca dane ale c = 0
-            assert result is not None, "Powinien zwrócić dict dla invalid symbol"
-            assert result['c'] == 0, "Invalid symbol powinien zwrócić price = 0"
+            assert client.get_quote("INVALID123") is None
+            assert client.get_quote("INVALID123") is None
+            assert mock_retry.call_count == 1
+
+
+    def test_get_fundamentals_negative_caches_symbol_without_data(self):
+        """
+        Test: Finnhub odpowiada bez metryk (delisted / zly ticker) - None
+        i kolejne wywolanie NIE robi API call (negative cache)
+        """
+        with patch('app.services.finnhub_client.finnhub.Client'), \
+             patch.object(FinnhubClient, '_make_request_with_retry') as mock_retry:
+
+            mock_retry.return_value = {'metric': {}, 'series': {}}
+
+            client = FinnhubClient()
+            assert client.get_fundamentals("DEAD123") is None
+            assert client.get_fundamentals("DEAD123") is None
+
+            assert mock_retry.call_count == 1
+
+
+    def test_prefetch_reads_whole_scan_in_one_bulk_lookup(self):
+        """
+        Test: prefetch() = 1 get_many() dla quote + fundamentals wszystkich symboli
+
+        Weryfikuje:
+        - Klucze w formacie @cache ("finnhub:get_quote:AAPL")
+        - Zwraca symbole z brakami w cache (do pobrania z API)
+        """
+        with patch('app.services.finnhub_client.finnhub.Client'), \
+             patch('app.services.finnhub_client.redis_cache') as mock_cache:
+
+            mock_cache.get_many.return_value = {
+                "finnhub:get_quote:AAPL": {"c": 1.0},
+                "finnhub:get_fundamentals:AAPL": {"metric": {}},
+                "finnhub:get_quote:MSFT": {"c": 2.0},
+            }
+
+            client = FinnhubClient()
+            misses = client.prefetch(["AAPL", "MSFT", "NVDA"])
+
+            mock_cache.get_many.assert_called_once()
+            keys = mock_cache.get_many.call_args[0][0]
+            assert len(keys) == 6
+            assert "finnhub:get_fundamentals:NVDA" in keys
+            assert misses == ["MSFT", "NVDA"]
@@ -0,0 +1,85 @@
+"""
+Unit tests dla projekcji fundamentals (app.services.fundamentals)
+
+Testujemy:
+1. project_fundamentals() zostawia tylko metryki/serie screenera (+ konfiguracja)
+2. FundamentalsRecord - konwersje (market cap z milionow, ROCE z roic)
+3. Rekord z pelnej i zprojektowanej odpowiedzi jest identyczny
+"""
+import pytest
+from app.services.fundamentals import FundamentalsRecord, project_fundamentals
+
+
+@pytest.fixture
+def full_payload(mock_finnhub_fundamentals):
+    """Odpowiedz Finnhub z metrykami i seriami ktorych screener nie uzywa"""
+    payload = {
+        "metric": dict(mock_finnhub_fundamentals["metric"], netMargin=25.31, epsTTM=6.1),
+        "series": {
+            "annual": dict(
+                mock_finnhub_fundamentals["series"]["annual"],
+                eps=[{"period": "2023-09-30", "v": 6.1}]
+            ),
+            "quarterly": {"eps": [{"period": "2023-12-30", "v": 2.2}]},
+        },
+    }
+    return payload
+
+
+@pytest.mark.unit
+class TestFundamentalsProjection:
+    """Unit tests dla project_fundamentals() i FundamentalsRecord"""
+
+    def test_projection_keeps_only_screener_fields(self, full_payload):
+        """
+        Test: Domyslna projekcja = metryki screenera + najnowszy punkt annual.roic
+        """
+        projected = project_fundamentals(full_payload, metrics=[], series=[], series_points=1)
+
+        assert set(projected["metric"]) == {
+            "marketCapitalization", "roeTTM", "totalDebt/totalEquityAnnual", "peTTM", "revenueGrowthTTMYoy"
+        }
+        assert projected["series"] == {"annual": {"roic": [{"period": "2023-09-30", "v": 0.5699}]}}
+
+
+    def test_projection_is_configurable(self, full_payload):
+        """
+        Test: Dodatkowe metryki i serie z konfiguracji trafiaja do projekcji
+        """
+        projected = project_fundamentals(
+            full_payload, metrics=["netMargin"], series=["quarterly.eps"], series_points=5
+        )
+
+        assert projected["metric"]["netMargin"] == 25.31
+        assert "epsTTM" not in projected["metric"]
+        assert projected["series"]["quarterly"]["eps"] == [{"period": "2023-12-30", "v": 2.2}]
+        assert len(projected["series"]["annual"]["roic"]) == 2
+
+
+    def test_record_from_full_and_projected_payload(self, full_payload):
+        """
+        Test: FundamentalsRecord - konwersje jednostek, ten sam wynik dla obu ksztaltow
+
+        Weryfikuje:
+        - market_cap: miliony -> USD
+        - roce: decimal roic -> %
+        """
+        record = FundamentalsRecord.from_payload(full_payload)
+
+        assert record.market_cap == 3_809_379_000_000
+        assert record.roe == pytest.approx(154.92)
+        assert record.roce == pytest.approx(56.99)
+        assert record.debt_equity == pytest.approx(1.8881)
+        assert record == FundamentalsRecord.from_payload(project_fundamentals(full_payload))
+
+
+    def test_record_missing_data_is_none(self):
+        """
+        Test: Brak metryk / serii = None w polach (kryteria traktuja jako niespelnione)
+        """
+        record = FundamentalsRecord.from_payload({"metric": {}})
+
+        assert record.columns() == {
+            "market_cap": None, "roe": None, "roce": None,
+            "debt_equity": None, "revenue_growth": None, "forward_pe": None,
+        }
@@ -0,0 +1,157 @@
+"""
+Unit tests dla snapshotow fundamentals w bazie (FundamentalsSnapshotStore)
+
+Testujemy:
+1. Zapis / odczyt snapshotu + polityka swiezosci (max_age)
+2. Blad bazy = brak snapshotu (scan dziala dalej)
+3. get_fundamentals(): cache MISS czyta snapshot zamiast API, API zapisuje snapshot
+4. prefetch(): snapshoty calego scanu do cache (flush Redis bez API calls)
+5. get_fundamentals(): snapshot w cache z czasem pobrania z API (as_of), nie z czasem zapisu
+
+Baza: SQLite w pamieci zamiast PostgreSQL.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.fundamentals import FundamentalsSnapshot
+from app.services.finnhub_client import FinnhubClient
+from app.services.fundamentals_snapshots import fundamentals_snapshots
+
+PAYLOAD = {"metric": {"roeTTM": 20.0, "marketCapitalization": 1000}, "series": {}}
+
+
+@pytest.fixture
+def snapshots(monkeypatch):
+    """Snapshoty wlaczone (max_age 1h) na SQLite w pamieci"""
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    FundamentalsSnapshot.__table__.create(engine)
+    monkeypatch.setattr(fundamentals_snapshots, "session_factory", sessionmaker(bind=engine))
+    monkeypatch.setattr(fundamentals_snapshots, "max_age", 3600)
+    return fundamentals_snapshots
+
+
+@pytest.mark.unit
+class TestFundamentalsSnapshots:
+    """Unit tests dla app.services.fundamentals_snapshots"""
+
+    def test_save_and_get_respects_max_age(self, snapshots):
+        """
+        Test: Snapshot mlodszy niz max_age jest zwracany, starszy nie; zapis nadpisuje
+        """
+        old = datetime.now(timezone.utc) - timedelta(hours=2)
+        assert snapshots.save("AAPL", PAYLOAD)
+        assert snapshots.save("MSFT", PAYLOAD, as_of=old)
+
+        assert snapshots.get("AAPL").payload == PAYLOAD
+        assert snapshots.get("AAPL").age() < 60
+        assert snapshots.get("MSFT") is None
+        assert set(snapshots.get_many(["AAPL", "MSFT", "NVDA"], max_age=3 * 3600)) == {"AAPL", "MSFT"}
+
+        # Nowy API call nadpisuje stary snapshot
+        snapshots.save("MSFT", {"metric": {"roeTTM": 5.0}, "series": {}})
+        assert snapshots.get("MSFT").payload["metric"]["roeTTM"] == 5.0
+
+
+    def test_database_error_returns_no_snapshot(self, snapshots, monkeypatch):
+        """
+        Test: Baza niedostepna - brak snapshotu i False z save(), bez wyjatku
+        """
+        broken = MagicMock()
+        broken.return_value.query.side_effect = RuntimeError("connection refused")
+        broken.return_value.merge.side_effect = RuntimeError("connection refused")
+        monkeypatch.setattr(snapshots, "session_factory", broken)
+
+        assert snapshots.get_many(["AAPL"]) == {}
+        assert snapshots.save("AAPL", PAYLOAD) is False
+
+
+    def test_get_fundamentals_reads_through_snapshot(self, snapshots, mock_finnhub_fundamentals):
+        """
+        Test: Cache MISS + swiezy snapshot = 0 API calls; wynik API zapisany jako snapshot
+        """
+        snapshots.save("AAPL", PAYLOAD)
+
+        with patch('app.services.finnhub_client.finnhub.Client'), \
+             patch.object(FinnhubClient, '_make_request_with_retry') as mock_retry:
+
+            mock_retry.return_value = mock_finnhub_fundamentals
+            client = FinnhubClient()
+
+            assert client.get_fundamentals("AAPL") == PAYLOAD
+            mock_retry.assert_not_called()
+
+            result = client.get_fundamentals("MSFT")
+            assert mock_retry.call_count == 1
+            assert snapshots.get("MSFT").payload == result
+
+
+    def test_prefetch_seeds_cache_from_snapshots(self, snapshots):
+        """
+        Test: Po flushu Redis prefetch() laduje fundamentals z bazy jednym zapytaniem
+
+        Weryfikuje: snapshot starszy niz max_age (w oknie CACHE_MAX_STALE) jest
+        zwracany od razu jako nieswiezy - swiezosc liczona od as_of
+        """
+        from app.cache import STALE_KEY
+
+        snapshots.save("AAPL", PAYLOAD)
+        snapshots.save("MSFT", PAYLOAD, as_of=datetime.now(timezone.utc) - timedelta(seconds=3700))
+
+        with patch('app.services.finnhub_client.finnhub.Client'), \
+             patch('app.cache.background_refresher') as mock_refresher, \
+             patch.object(FinnhubClient, '_make_request_with_retry') as mock_retry:
+
+            client = FinnhubClient()
+            misses = client.prefetch(["AAPL", "MSFT", "NVDA"])
+
+            # Quote nie ma w cache - wszystkie symbole nadal wymagaja API call
+            assert misses == ["AAPL", "MSFT", "NVDA"]
+
+            assert client.get_fundamentals("AAPL") == PAYLOAD
+            stale = client.get_fundamentals("MSFT")
+            assert stale[STALE_KEY] >= 3700
+            mock_refresher.submit.assert_called_once()
+            mock_retry.assert_not_called()
+
+
+    def test_get_fundamentals_snapshot_keeps_as_of(self, snapshots, monkeypatch, mock_finnhub_fundamentals):
+        """
+        Test: Snapshot sprzed 23h (max_age 24h) jest nieswiezy po ~1h, nie po kolejnych 24h
+
+        Weryfikuje: po 1h zwracana wartosc stale, odswiezenie w tle idzie do API
+        (snapshot ma juz ponad max_age) zamiast ponownie podbijac wiek snapshotu
+        """
+        import time
+        from app.cache import STALE_KEY
+
+        monkeypatch.setattr(snapshots, "max_age", 86400)
+        fetched = datetime.now(timezone.utc) - timedelta(hours=23)
+        snapshots.save("AAPL", PAYLOAD, as_of=fetched)
+
+        with patch('app.services.finnhub_client.finnhub.Client'), \
+             patch('app.cache.background_refresher') as mock_refresher, \
+             patch.object(FinnhubClient, '_make_request_with_retry') as mock_retry:
+
+            mock_retry.return_value = mock_finnhub_fundamentals
+            client = FinnhubClient()
+            assert client.get_fundamentals("AAPL") == PAYLOAD
+            mock_retry.assert_not_called()
+
+            # Godzine pozniej: wpis w cache i snapshot w bazie sa starsze o 1h
+            snapshots.save("AAPL", PAYLOAD, as_of=fetched - timedelta(hours=1, minutes=1))
+            later = time.time() + 3660
+            with patch('app.cache.time.time', return_value=later):
+                stale = client.get_fundamentals("AAPL")
+                assert stale[STALE_KEY] >= 86400
+                mock_refresher.submit.assert_called_once()
+
+                _, refresh = mock_refresher.submit.call_args.args
+                refresh()
+
+            assert mock_retry.call_count == 1
+            assert snapshots.get("AAPL").age() < 60
@@ -0,0 +1,160 @@
+"""
+Unit tests dla wskaznikow technicznych (app.services.indicators)
+
+Testujemy:
+1. SMA / EMA / RSI / ATR / sredni wolumen zgodne z referencja pandas
+2. Golden / death cross
+3. Za krotka historia i brak High / Low = None
+4. Jeden przebieg dla wielu symboli = wyniki per symbol
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from app.services.indicators import (
+    OHLCVMatrix,
+    compute_indicators,
+    indicators_by_symbol,
+)
+
+
+def _bars(closes, end="2026-10-16"):
+    """Bary dzienne (dni robocze) z podanymi zamknieciami, High / Low = Close +- 1"""
+    closes = np.asarray(closes, dtype=float)
+    dates = pd.bdate_range(end=end, periods=len(closes))
+    return pd.DataFrame({
+        'Close': closes,
+        'High': closes + 1.0,
+        'Low': closes - 1.0,
+        'Volume': np.arange(len(closes), dtype=float) * 1000 + 1_000_000,
+    }, index=dates)
+
+
+def _random_walk(seed, size=400):
+    rng = np.random.default_rng(seed)
+    return 100 + rng.standard_normal(size).cumsum()
+
+
+def _wilder(values, period):
+    """Referencyjne wygladzanie Wildera (seed = SMA z pierwszych `period` wartosci)"""
+    values = values.dropna().to_numpy()
+    average = values[:period].mean()
+    for value in values[period:]:
+        average += (value - average) / period
+    return average
+
+
+@pytest.mark.unit
+class TestIndicators:
+    """Unit tests dla compute_indicators / indicators_by_symbol"""
+
+    def test_matches_pandas_reference(self):
+        """
+        Test: Wartosci wskaznikow = klasyczne definicje liczone pandas
+        """
+        hist = _bars(_random_walk(1))
+        close = hist['Close']
+
+        result = indicators_by_symbol(OHLCVMatrix.from_histories({"AAPL": hist}))["AAPL"]
+
+        assert result["sma_50"] == pytest.approx(close.rolling(50).mean().iloc[-1])
+        assert result["sma_200"] == pytest.approx(close.rolling(200).mean().iloc[-1])
+        assert result["avg_volume_20"] == pytest.approx(hist['Volume'].tail(20).mean())
+        assert result["pct_from_sma_50"] == pytest.approx((close.iloc[-1] / result["sma_50"] - 1) * 100)
+
+        # EMA 20 startujaca od SMA z pierwszych 20 zamkniec
+        ema = close.iloc[:20].mean()
+        for value in close.iloc[20:]:
+            ema += 2 / 21 * (value - ema)
+        assert result["ema_20"] == pytest.approx(ema)
+
+        change = close.diff()
+        gain, loss = _wilder(change.clip(lower=0), 14), _wilder((-change).clip(lower=0), 14)
+        assert result["rsi_14"] == pytest.approx(100 - 100 / (1 + gain / loss))
+
+        previous = close.shift()
+        true_range = pd.concat([
+            hist['High'] - hist['Low'],
+            (hist['High'] - previous).abs(),
+            (hist['Low'] - previous).abs(),
+        ], axis=1).max(axis=1)
+        assert result["atr_14"] == pytest.approx(_wilder(true_range, 14))
+        assert result["atr_percent"] == pytest.approx(result["atr_14"] / close.iloc[-1] * 100)
+
+        window = hist[hist.index > hist.index[-1] - pd.Timedelta(days=365)]
+        assert result["pct_from_52w_high"] == pytest.approx((close.iloc[-1] / window['High'].max() - 1) * 100)
+        assert result["pct_from_52w_low"] == pytest.approx((close.iloc[-1] / window['Low'].min() - 1) * 100)
+
+    def test_golden_and_death_cross(self):
+        """
+        Test: SMA 50 przecina SMA 200 w ostatnich sesjach
+
+        Spadek przez 300 sesji, potem ostry wzrost - SMA 50 przebija SMA 200
+        w gore dokladnie na ostatnim barze (dobrane przesuniecie).
+        """
+        down = np.linspace(200, 100, 300)
+        closes = None
+        for rally in range(1, 120):
+            candidate = np.concatenate([down, np.linspace(101, 101 + rally * 3, rally)])
+            sma_fast = candidate[-50:].mean() - candidate[-200:].mean()
+            sma_fast_prev = candidate[-51:-1].mean() - candidate[-201:-1].mean()
+            if sma_fast > 0 and sma_fast_prev <= 0:
+                closes = candidate
+                break
+
+        golden = indicators_by_symbol(OHLCVMatrix.from_histories({"UP": _bars(closes)}))["UP"]
+        assert golden["golden_cross"] == 1.0
+        assert golden["death_cross"] == 0.0
+
+        # Lustrzane odbicie = death cross
+        death = indicators_by_symbol(OHLCVMatrix.from_histories({"DOWN": _bars(400 - closes)}))["DOWN"]
+        assert death["death_cross"] == 1.0
+        assert death["golden_cross"] == 0.0
+
+        # Dawno po przecieciu (trend trwa) = brak flagi
+        steady = indicators_by_symbol(OHLCVMatrix.from_histories({"FLAT": _bars(np.linspace(100, 200, 400))}))
+        assert steady["FLAT"]["golden_cross"] == 0.0
+
+    def test_short_history_and_missing_high_low(self):
+        """
+        Test: Za krotka historia na SMA 200 = None, historia bez High / Low = ATR None
+        """
+        short = _bars(_random_walk(2, size=60))
+        close_only = _bars(_random_walk(3))[['Close', 'Volume']]
+
+        result = indicators_by_symbol(OHLCVMatrix.from_histories({"NEW": short, "CLOSE": close_only}))
+
+        assert result["NEW"]["sma_50"] is not None
+        assert result["NEW"]["sma_200"] is None
+        assert result["NEW"]["golden_cross"] is None
+        assert result["NEW"]["rsi_14"] is not None
+
+        assert result["CLOSE"]["atr_14"] is None
+        assert result["CLOSE"]["rsi_14"] is not None
+        # 52-tyg. maksimum z zamkniec
+        assert result["CLOSE"]["pct_from_52w_high"] <= 0
+
+    def test_batch_matches_single_symbol(self):
+        """
+        Test: Jeden przebieg dla wielu symboli (rozne dlugosci historii, halt) = wyniki per symbol
+        """
+        histories = {f"S{i}": _bars(_random_walk(i, size=400 - i * 20)) for i in range(10)}
+        # Symbol bez notowan ostatnich 3 sesji
+        histories["HALT"] = _bars(_random_walk(99), end="2026-10-13")
+
+        matrix = OHLCVMatrix.from_histories(histories)
+        batch = compute_indicators(matrix)
+
+        for symbol, hist in histories.items():
+            single = indicators_by_symbol(OHLCVMatrix.from_histories({symbol: hist}))[symbol]
+            column = matrix.symbols.index(symbol)
+            for name, value in single.items():
+                if value is None:
+                    assert np.isnan(batch[name][column]), (symbol, name)
+                else:
+                    assert batch[name][column] == pytest.approx(value), (symbol, name)
+
+    def test_empty_histories(self):
+        """
+        Test: Brak historii = brak wynikow (bez wyjatku)
+        """
+        assert indicators_by_symbol(OHLCVMatrix.from_histories({"EMPTY": pd.DataFrame()})) == {}
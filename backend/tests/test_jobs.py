@@ -0,0 +1,102 @@
+"""
+Unit tests dla background jobow scanu (ScanJobManager)
+
+Testujemy:
+1. Job konczy sie wynikami + postep symbols_done/api_calls
+2. Blad scanu = status failed z opisem bledu
+3. ETA z rate limitera
+"""
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from app.services.jobs import (
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_FINISHED,
+    JOB_RUNNING,
+    ScanJob,
+    ScanJobManager,
+)
+
+
+def _wait_for(manager, job_id, timeout=5.0):
+    """Czeka az job sie zakonczy (completed / failed)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job.status in JOB_FINISHED:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} nie zakonczyl sie w {timeout}s")
+
+
+@pytest.mark.unit
+class TestScanJobManager:
+    """Unit tests dla ScanJobManager"""
+
+    def test_job_completes_with_results_and_progress(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_price_history
+    ):
+        """
+        Test: Job przechodzi do completed, ma wyniki i postep 3/3
+
+        Weryfikuje:
+        - results = wyniki scan_stocks()
+        - symbols_done = total_symbols
+        - api_calls pobrane z FinnhubClient.api_calls
+        """
+        manager = ScanJobManager(max_workers=1, max_jobs=10)
+
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client.api_calls = 6
+            mock_client_class.return_value = mock_client
+
+            job = manager.submit(["AAPL", "MSFT", "NVDA"], min_volume=0, save_to_db=False)
+            job = _wait_for(manager, job.job_id)
+
+            assert job.status == JOB_COMPLETED
+            assert [r.symbol for r in job.results] == ["AAPL", "MSFT", "NVDA"]
+            assert job.symbols_done == job.total_symbols == 3
+            assert job.api_calls == 6
+            assert job.progress_percent == 100.0
+            assert job.eta_seconds() == 0.0
+
+
+    def test_job_failure_sets_error(self):
+        """
+        Test: Wyjatek w scanie = status failed + job.error
+        """
+        manager = ScanJobManager(max_workers=1, max_jobs=10)
+
+        with patch('app.services.jobs.StockScanner.scan_stocks', side_effect=ValueError("FINNHUB_API_KEY")):
+            job = manager.submit(["AAPL"])
+            job = _wait_for(manager, job.job_id)
+
+            assert job.status == JOB_FAILED
+            assert "FINNHUB_API_KEY" in job.error
+            assert job.finished_at is not None
+
+
+    def test_eta_uses_rate_limiter_and_calls_per_symbol(self):
+        """
+        Test: ETA = pozostale symbole * API calls na symbol / (60 calls / 60s)
+        """
+        job = ScanJob(job_id="x", symbols=[], total_symbols=100, status=JOB_RUNNING)
+        job._started_monotonic = time.monotonic()
+
+        # Przed pierwszym symbolem: szacunek 2 calls/symbol -> 200 calls = 200s
+        assert job.eta_seconds() == pytest.approx(200.0)
+
+        # Cache hity: 50 symboli za 50 calls -> 50 pozostalych * 1 call = 50s
+        job.update_progress(50, 50)
+        assert job.eta_seconds() == pytest.approx(50.0, abs=0.5)
+        assert job.progress_percent == 50.0
@@ -0,0 +1,129 @@
+"""
+Unit tests dla PriceHistoryService (batch download yfinance)
+
+Testujemy:
+1. Podzial symboli na chunki (1 request per chunk)
+2. Rozdzielanie MultiIndex DataFrame na symbole
+3. Pomijanie symboli bez danych
+4. Negative cache dla symboli bez historii
+"""
+import pytest
+import pandas as pd
+from unittest.mock import patch
+from app.services.price_history import HISTORY_EMPTY, HISTORY_FAILED, PriceHistoryService
+
+
+def _multi_ticker_frame(symbols, days=5):
+    """Buduje DataFrame w formacie yf.download(group_by="ticker")"""
+    dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=days, freq='D')
+    frames = {
+        symbol: pd.DataFrame({
+            'Open': [100.0 + i for i in range(days)],
+            'High': [101.0 + i for i in range(days)],
+            'Low': [99.0 + i for i in range(days)],
+            'Close': [100.5 + i for i in range(days)],
+            'Volume': [1_000_000] * days,
+        }, index=dates)
+        for symbol in symbols
+    }
+    return pd.concat(frames.values(), axis=1, keys=frames.keys())
+
+
+@pytest.mark.unit
+class TestPriceHistoryService:
+    """Unit tests dla PriceHistoryService"""
+
+    def test_fetch_history_uses_one_request_per_chunk(self):
+        """
+        Test: 5 symboli z chunk_size=2 = 3 requesty yf.download()
+        """
+        symbols = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]
+
+        with patch('app.services.price_history.yf.download') as mock_download:
+            mock_download.side_effect = lambda tickers, **kwargs: _multi_ticker_frame(tickers)
+
+            histories = PriceHistoryService.fetch_history(symbols, chunk_size=2)
+
+            assert mock_download.call_count == 3
+            assert list(histories.keys()) == symbols
+            # Ceny skorygowane o splity i dywidendy (jak Ticker.history())
+            assert all(call.kwargs["auto_adjust"] is True for call in mock_download.call_args_list)
+            assert histories["NVDA"]["Close"].iloc[-1] == pytest.approx(104.5)
+
+
+    def test_fetch_history_skips_symbols_without_data(self):
+        """
+        Test: Symbol z samymi NaN (np. delisted) nie trafia do wyniku
+        """
+        data = _multi_ticker_frame(["AAPL", "DEAD"])
+        data["DEAD"] = float("nan")
+
+        with patch('app.services.price_history.yf.download', return_value=data):
+            histories = PriceHistoryService.fetch_history(["AAPL", "DEAD"])
+
+            assert "AAPL" in histories
+            assert "DEAD" not in histories
+
+
+    def test_fetch_history_single_ticker_flat_columns(self):
+        """
+        Test: Dla 1 tickera yf.download() zwraca plaskie kolumny (bez MultiIndex)
+        """
+        data = _multi_ticker_frame(["AAPL"])["AAPL"]
+
+        with patch('app.services.price_history.yf.download', return_value=data):
+            histories = PriceHistoryService.fetch_history(["AAPL"])
+
+            assert len(histories["AAPL"]) == 5
+
+
+    def test_fetch_history_chunk_error_does_not_stop_scan(self):
+        """
+        Test: Blad jednego chunka nie przerywa pobierania pozostalych
+
+        Weryfikuje:
+        - Symbole z nieudanego chunka = HISTORY_FAILED (nie potwierdzony brak danych)
+        - Symbol bez danych w udanym chunku = HISTORY_EMPTY
+        """
+        def download(tickers, **kwargs):
+            if "BAD" in tickers:
+                raise Exception("Network error")
+            data = _multi_ticker_frame(tickers)
+            if "DEAD" in tickers:
+                data["DEAD"] = float("nan")
+            return data
+
+        status = {}
+        with patch('app.services.price_history.yf.download', side_effect=download):
+            histories = PriceHistoryService.fetch_history(
+                ["BAD", "X", "AAPL", "DEAD"], chunk_size=2, status=status
+            )
+
+            assert set(histories.keys()) == {"AAPL"}
+            assert status == {"BAD": HISTORY_FAILED, "X": HISTORY_FAILED, "DEAD": HISTORY_EMPTY}
+
+
+    def test_fetch_history_does_not_refetch_known_empty_symbols(self):
+        """
+        Test: Symbol bez historii w udanym chunku -> negative cache,
+        kolejny fetch_history() nie wysyla go do yfinance
+        """
+        data = _multi_ticker_frame(["AAPL", "DEAD"])
+        data["DEAD"] = float("nan")
+
+        with patch('app.services.price_history.yf.download', return_value=data) as mock_download:
+            PriceHistoryService.fetch_history(["AAPL", "DEAD"])
+            PriceHistoryService.fetch_history(["AAPL", "DEAD"])
+
+            assert mock_download.call_args_list[1].kwargs["tickers"] == ["AAPL"]
+
+
+    def test_fetch_history_empty_chunk_is_not_negative_cached(self):
+        """
+        Test: Caly chunk pusty (np. blad sieci) - symbole NIE trafiaja do negative cache
+        """
+        with patch('app.services.price_history.yf.download', return_value=pd.DataFrame()) as mock_download:
+            PriceHistoryService.fetch_history(["AAPL"])
+            PriceHistoryService.fetch_history(["AAPL"])
+
+            assert mock_download.call_count == 2
@@ -0,0 +1,158 @@
+"""
+Unit tests dla lokalnego magazynu cen (PriceStore) i dociagania historii
+
+Testujemy:
+1. Zapis / odczyt okna z pliku .npy
+2. fetch_history(): backfill nowego symbolu, potem 0 requestow
+3. Dociaganie tylko brakujacych barow
+4. Split / dywidenda (zmiana skorygowanego Close nakladajacego sie baru) -> pelny backfill
+5. Plik w starym formacie (bez korekty cen) = brak danych
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date
+from unittest.mock import patch
+from app.services.price_history import PriceHistoryService
+from app.services.price_store import OHLCV_COLUMNS, price_store
+
+
+def _bars(start, end, close=100.0):
+    """Bary dzienne (dni robocze) w formacie yf.download() dla jednego tickera"""
+    dates = pd.bdate_range(start, end)
+    closes = [close + i for i in range(len(dates))]
+    return pd.DataFrame({
+        'Open': closes,
+        'High': closes,
+        'Low': closes,
+        'Close': closes,
+        'Volume': [1_000_000] * len(dates),
+    }, index=dates)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Magazyn w katalogu tymczasowym"""
+    monkeypatch.setattr(price_store, "root", str(tmp_path))
+    return price_store
+
+
+@pytest.mark.unit
+class TestPriceStore:
+    """Unit tests dla PriceStore"""
+
+    def test_append_and_read_window(self, store):
+        """
+        Test: append() nadpisuje bary z tymi samymi datami, read(since) zwraca okno
+        """
+        store.append("AAPL", _bars("2026-10-05", "2026-10-09"))
+        store.append("AAPL", _bars("2026-10-09", "2026-10-12", close=200.0))
+
+        frame = store.read("AAPL", since=date(2026, 10, 8))
+
+        assert list(frame.columns) == OHLCV_COLUMNS
+        assert list(frame.index.date) == [date(2026, 10, 8), date(2026, 10, 9), date(2026, 10, 12)]
+        assert frame.loc["2026-10-09", "Close"] == 200.0
+        assert store.last_date("AAPL") == date(2026, 10, 12)
+        assert store.read("MISSING") is None
+
+
+    def test_fetch_history_backfills_once_then_reads_from_disk(self, store):
+        """
+        Test: Nowy symbol = 1 download na PRICE_STORE_BACKFILL, drugi scan = 0 requestow
+        """
+        history = _bars("2025-10-01", "2026-10-16")
+
+        with patch('app.services.price_history.yf.download', return_value=history) as mock_download, \
+             patch('app.services.price_history.us_market_calendar.last_closed_session',
+                   return_value=date(2026, 10, 16)):
+
+            first = PriceHistoryService.fetch_history(["AAPL"], period="1mo")
+            second = PriceHistoryService.fetch_history(["AAPL"], period="1mo")
+
+            assert mock_download.call_count == 1
+            assert mock_download.call_args.kwargs["period"] == "2y"
+            assert first["AAPL"].index[-1].date() == date(2026, 10, 16)
+            assert first["AAPL"].index[0].date() >= date(2026, 9, 15)
+            pd.testing.assert_frame_equal(first["AAPL"], second["AAPL"])
+
+
+    def test_fetch_history_downloads_only_missing_bars(self, store):
+        """
+        Test: Ostatni bar 14.10, ostatnia sesja 16.10 - download od 14.10 (start=), nie calego okresu
+        """
+        store.append("AAPL", _bars("2026-09-01", "2026-10-14"))
+        stored_close = store.read("AAPL")["Close"].iloc[-1]
+        new_bars = _bars("2026-10-14", "2026-10-16", close=stored_close)
+
+        with patch('app.services.price_history.yf.download', return_value=new_bars) as mock_download, \
+             patch('app.services.price_history.us_market_calendar.last_closed_session',
+                   return_value=date(2026, 10, 16)):
+
+            histories = PriceHistoryService.fetch_history(["AAPL"], period="1mo")
+
+            assert mock_download.call_count == 1
+            assert mock_download.call_args.kwargs["start"] == "2026-10-14"
+            assert histories["AAPL"].index[-1].date() == date(2026, 10, 16)
+            assert store.last_date("AAPL") == date(2026, 10, 16)
+
+
+    def test_fetch_history_resyncs_after_split(self, store):
+        """
+        Test: Nakladajacy sie bar ma inny Close (split 2:1) - pelna historia pobrana od nowa
+        """
+        store.append("AAPL", _bars("2026-09-01", "2026-10-14", close=200.0))
+        split_history = _bars("2025-10-01", "2026-10-16", close=50.0)
+
+        def download(tickers, **kwargs):
+            if "start" in kwargs:
+                return _bars("2026-10-14", "2026-10-16", close=100.0)
+            return split_history
+
+        with patch('app.services.price_history.yf.download', side_effect=download) as mock_download, \
+             patch('app.services.price_history.us_market_calendar.last_closed_session',
+                   return_value=date(2026, 10, 16)):
+
+            PriceHistoryService.fetch_history(["AAPL"], period="1mo")
+
+            assert mock_download.call_count == 2
+            assert store.read("AAPL")["Close"].iloc[0] == 50.0
+
+
+    def test_fetch_history_resyncs_after_dividend(self, store):
+        """
+        Test: Dywidenda 0.4% koryguje wstecz Close nakladajacego sie baru - pelna historia od nowa
+        """
+        store.append("AAPL", _bars("2026-09-01", "2026-10-14"))
+        stored_close = store.read("AAPL")["Close"].iloc[-1]
+        adjusted_history = _bars("2025-10-01", "2026-10-16", close=90.0)
+
+        def download(tickers, **kwargs):
+            if "start" in kwargs:
+                return _bars("2026-10-14", "2026-10-16", close=stored_close * 0.996)
+            return adjusted_history
+
+        with patch('app.services.price_history.yf.download', side_effect=download) as mock_download, \
+             patch('app.services.price_history.us_market_calendar.last_closed_session',
+                   return_value=date(2026, 10, 16)):
+
+            PriceHistoryService.fetch_history(["AAPL"], period="1mo")
+
+            assert mock_download.call_count == 2
+            assert store.read("AAPL")["Close"].iloc[0] == 90.0
+
+
+    def test_legacy_file_is_backfilled(self, store):
+        """
+        Test: Plik ze starym dtype (ceny bez korekty + "Adj Close") traktowany jak brak danych
+        """
+        legacy_dtype = np.dtype([("date", "datetime64[D]")] + [
+            (column, "f8") for column in ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+        ])
+        np.save(store.path("AAPL"), np.zeros(3, dtype=legacy_dtype))
+
+        assert store.last_date("AAPL") is None
+        assert store.read("AAPL") is None
+
+        store.replace("AAPL", _bars("2026-10-12", "2026-10-16"))
+        assert store.last_date("AAPL") == date(2026, 10, 16)
@@ -0,0 +1,136 @@
+"""
+Unit tests dla kwarantanny symboli (app.services.quarantine)
+
+Testujemy:
+1. Symbol trafia do kwarantanny po max_failures nieudanych scanach
+2. Udany scan kasuje licznik
+3. Scanner pomija symbole w kwarantannie (0 API calls)
+4. Awaria yfinance / Finnhub nie wrzuca symboli do kwarantanny
+"""
+import pytest
+import pandas as pd
+from unittest.mock import patch
+from app.services.quarantine import REASON_NO_QUOTE, SymbolQuarantine
+
+
+@pytest.mark.unit
+class TestSymbolQuarantine:
+    """Unit tests dla SymbolQuarantine"""
+
+    def test_symbol_quarantined_after_max_failures(self):
+        """
+        Test: 2 porazki z max_failures=2 -> symbol odfiltrowany, reszta zostaje
+        """
+        quarantine = SymbolQuarantine(max_failures=2, ttl=60)
+
+        quarantine.update({"DEAD": REASON_NO_QUOTE}, ["AAPL", "DEAD"])
+        assert quarantine.filter(["AAPL", "DEAD"]) == ["AAPL", "DEAD"]
+
+        quarantine.update({"DEAD": REASON_NO_QUOTE}, ["AAPL", "DEAD"])
+        assert quarantine.filter(["AAPL", "DEAD"]) == ["AAPL"]
+        assert quarantine.quarantined(["DEAD"])["DEAD"] == {"failures": 2, "reason": REASON_NO_QUOTE}
+
+
+    def test_success_resets_failure_counter(self):
+        """
+        Test: Udany scan miedzy porazkami - licznik od zera (porazki "z rzedu")
+        """
+        quarantine = SymbolQuarantine(max_failures=2, ttl=60)
+
+        quarantine.update({"FLAKY": REASON_NO_QUOTE}, ["FLAKY"])
+        quarantine.update({}, ["FLAKY"])
+        quarantine.update({"FLAKY": REASON_NO_QUOTE}, ["FLAKY"])
+
+        assert quarantine.filter(["FLAKY"]) == ["FLAKY"]
+
+
+    def test_disabled_quarantine_never_filters(self):
+        """
+        Test: max_failures=0 - kwarantanna wylaczona
+        """
+        quarantine = SymbolQuarantine(max_failures=0, ttl=60)
+
+        for _ in range(3):
+            quarantine.update({"DEAD": REASON_NO_QUOTE}, ["DEAD"])
+
+        assert quarantine.filter(["DEAD"]) == ["DEAD"]
+
+
+    def test_scanner_skips_quarantined_symbols(self, mock_yfinance_history):
+        """
+        Test: Symbol failujacy scan za scanem przestaje kosztowac API calls
+
+        Weryfikuje:
+        - Po SYMBOL_QUARANTINE_FAILURES scanach bez quote symbol nie jest skanowany
+        """
+        from app.services.scanner import StockScanner
+
+        quarantine = SymbolQuarantine(max_failures=2, ttl=60)
+
+        with patch('app.services.scanner.symbol_quarantine', quarantine), \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class, \
+             patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch:
+
+            mock_fetch.return_value = {"DEAD": mock_yfinance_history}
+            mock_client = mock_client_class.return_value
+            mock_client.get_quote.return_value = None
+            mock_client.failed_calls = 0
+
+            for _ in range(3):
+                StockScanner.scan_stocks(["DEAD"], save_to_db=False, max_workers=1)
+
+            assert mock_client.get_quote.call_count == 2
+            assert mock_fetch.call_args_list[2].args[0] == []
+
+
+    def test_history_outage_does_not_quarantine_symbols(self):
+        """
+        Test: yfinance zwraca puste dane (awaria / rate limit) scan za scanem
+
+        Weryfikuje:
+        - Zaden symbol nie trafia do kwarantanny
+        - Kolejny scan nadal pobiera wszystkie symbole
+        """
+        from app.services.scanner import StockScanner
+
+        quarantine = SymbolQuarantine(max_failures=2, ttl=60)
+
+        with patch('app.services.scanner.symbol_quarantine', quarantine), \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class, \
+             patch('app.services.price_history.yf.download', return_value=pd.DataFrame()) as mock_download:
+
+            mock_client_class.return_value.failed_calls = 0
+
+            for _ in range(3):
+                StockScanner.scan_stocks(["AAPL", "MSFT"], save_to_db=False, max_workers=1)
+
+            assert quarantine.quarantined(["AAPL", "MSFT"]) == {}
+            assert mock_download.call_args_list[2].kwargs["tickers"] == ["AAPL", "MSFT"]
+            mock_client_class.return_value.get_quote.assert_not_called()
+
+
+    def test_finnhub_outage_does_not_quarantine_symbols(self, mock_yfinance_history):
+        """
+        Test: Finnhub nie odpowiada (wyczerpany retry po 429) - quote None dla wszystkich
+
+        Weryfikuje:
+        - Scan z failed_calls > 0 nie zwieksza licznikow porazek
+        """
+        from app.services.scanner import StockScanner
+
+        quarantine = SymbolQuarantine(max_failures=2, ttl=60)
+
+        with patch('app.services.scanner.symbol_quarantine', quarantine), \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class, \
+             patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch:
+
+            mock_fetch.return_value = {"AAPL": mock_yfinance_history}
+            mock_client = mock_client_class.return_value
+            mock_client.get_quote.return_value = None
+            mock_client.failed_calls = 1
+
+            for _ in range(3):
+                StockScanner.scan_stocks(["AAPL"], save_to_db=False, max_workers=1)
+
+            assert mock_client.get_quote.call_count == 3
+            assert quarantine.quarantined(["AAPL"]) == {}
@@ -0,0 +1,99 @@
+"""
+Unit tests dla TokenBucketLimiter (rate limiter wspólny przez Redis)
+
+Testujemy:
+1. Lokalny bucket: burst = capacity, potem czas oczekiwania
+2. acquire() czeka (sleep) zamiast rzucać error
+3. Ścieżka Redis (skrypt Lua) + fallback przy błędzie Redis
+"""
+import pytest
+from unittest.mock import patch, MagicMock
+from app.rate_limiter import TokenBucketLimiter
+
+
+@pytest.mark.unit
+class TestTokenBucketLimiter:
+    """Unit tests dla TokenBucketLimiter"""
+
+    def test_local_bucket_allows_burst_then_waits(self):
+        """
+        Test: Bez Redis - capacity tokenów od razu, kolejny call musi czekać
+
+        Weryfikuje:
+        - 60 tokenów dostępne natychmiast
+        - 61. call: czas oczekiwania ~1s (60 calls / 60s = 1 token/s)
+        """
+        with patch('app.rate_limiter.redis_cache') as mock_cache:
+            mock_cache.client = None
+            limiter = TokenBucketLimiter("test", capacity=60, period=60)
+
+            assert all(limiter.reserve() == 0 for _ in range(60))
+            assert limiter.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+    def test_waiters_reserve_consecutive_slots(self):
+        """
+        Test: Czekający rezerwują kolejne tokeny - nie budzą się wszyscy naraz
+
+        Weryfikuje:
+        - Po wyczerpaniu bucketa kolejne rezerwacje dostają 1s, 2s, 3s
+        - Wcześniejszy czekający nie traci miejsca w kolejce
+        """
+        with patch('app.rate_limiter.redis_cache') as mock_cache:
+            mock_cache.client = None
+            limiter = TokenBucketLimiter("test", capacity=60, period=60)
+
+            for _ in range(60):
+                limiter.reserve()
+            waits = [limiter.reserve() for _ in range(3)]
+
+            assert waits == [pytest.approx(n, abs=0.05) for n in (1.0, 2.0, 3.0)]
+
+
+    def test_acquire_sleeps_until_token_available(self):
+        """
+        Test: acquire() śpi raz tyle ile zwraca rezerwacja (token już zarezerwowany)
+        """
+        limiter = TokenBucketLimiter("test", capacity=1, period=1)
+
+        with patch.object(limiter, 'reserve', return_value=0.5) as mock_reserve, \
+             patch('app.rate_limiter.time.sleep') as mock_sleep:
+
+            waited = limiter.acquire()
+
+            mock_sleep.assert_called_once_with(0.5)
+            mock_reserve.assert_called_once()
+            assert waited == 0.5
+
+
+    def test_redis_bucket_shared_key_per_api_key(self):
+        """
+        Test: Z Redis token pobierany skryptem Lua z kluczem zależnym od API key
+
+        Weryfikuje:
+        - Ten sam API key = ten sam klucz (wspólny limit procesów)
+        - Klucz nie zawiera samego API key
+        """
+        with patch('app.rate_limiter.redis_cache') as mock_cache:
+            script = MagicMock(return_value="0")
+            mock_cache.client.register_script.return_value = script
+
+            limiter = TokenBucketLimiter.for_api_key("finnhub", "secret-key", capacity=60, period=60)
+            other = TokenBucketLimiter.for_api_key("finnhub", "secret-key", capacity=60, period=60)
+
+            assert limiter.reserve() == 0
+            assert limiter.key == other.key
+            assert "secret-key" not in limiter.key
+            script.assert_called_once_with(keys=[limiter.key], args=[60, 1.0])
+
+
+    def test_redis_error_falls_back_to_local_bucket(self):
+        """
+        Test: Błąd Redis -> lokalny bucket (scan działa dalej)
+        """
+        with patch('app.rate_limiter.redis_cache') as mock_cache:
+            mock_cache.client.register_script.return_value = MagicMock(side_effect=Exception("Connection refused"))
+            limiter = TokenBucketLimiter("test", capacity=1, period=60)
+
+            assert limiter.reserve() == 0
+            assert limiter.reserve() > 0
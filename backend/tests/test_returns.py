@@ -0,0 +1,166 @@
+"""
+Unit tests dla stop zwrotu (app.services.returns)
+
+Testujemy:
+1. Horyzonty w dniach kalendarzowych i w sesjach
+2. Za krotka historia = NaN / None (NIE pierwszy dostepny bar)
+3. YTD od ostatniego zamkniecia poprzedniego roku
+4. Symbol bez notowan czesci dni (ffill) w jednej macierzy z innymi
+5. Dobor okresu historii (lookback_days / period_covering)
+"""
+import math
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date
+from app.services.price_history import PriceHistoryService
+from app.services.returns import (
+    ClosesMatrix,
+    compute_returns,
+    lookback_days,
+    returns_by_symbol,
+    validate_horizons,
+)
+
+
+def _closes(start, end, first=100.0, step=1.0, freq='B'):
+    """Historia w formacie fetch_history(): zamkniecia rosnace o `step` na bar"""
+    dates = pd.date_range(start, end, freq=freq)
+    return pd.DataFrame({'Close': [first + i * step for i in range(len(dates))]}, index=dates)
+
+
+@pytest.mark.unit
+class TestReturns:
+    """Unit tests dla compute_returns / returns_by_symbol"""
+
+    def test_calendar_day_horizons(self):
+        """
+        Test: 7d liczone od ostatniego baru <= data konca - 7 dni
+
+        2026-10-16 (pt) - 7 dni = 2026-10-09 (pt), 30 dni = 2026-09-16 (sr)
+        """
+        hist = _closes("2026-09-01", "2026-10-16")
+        closes = hist['Close']
+
+        result = returns_by_symbol({"AAPL": hist}, ["7d", "30d"])["AAPL"]
+
+        expected_7d = (closes["2026-10-16"] / closes["2026-10-09"] - 1) * 100
+        expected_30d = (closes["2026-10-16"] / closes["2026-09-16"] - 1) * 100
+        assert result["7d"] == pytest.approx(expected_7d)
+        assert result["30d"] == pytest.approx(expected_30d)
+
+    def test_start_on_weekend_uses_previous_session(self):
+        """
+        Test: Poczatek horyzontu w weekend => zamkniecie z piatku
+        """
+        # 2026-10-19 (pon) - 30 dni = 2026-09-19 (sob) -> 2026-09-18 (pt)
+        hist = _closes("2026-09-01", "2026-10-19")
+        closes = hist['Close']
+
+        result = returns_by_symbol({"AAPL": hist}, ["30d"])["AAPL"]
+
+        assert result["30d"] == pytest.approx((closes["2026-10-19"] / closes["2026-09-18"] - 1) * 100)
+
+    def test_short_history_is_none(self):
+        """
+        Test: Historia krotsza niz horyzont => None (bez fallbacku na pierwszy bar)
+        """
+        hist = _closes("2026-10-01", "2026-10-16")
+
+        result = returns_by_symbol({"NEW": hist}, ["7d", "30d", "1y"])["NEW"]
+
+        assert result["7d"] is not None
+        assert result["30d"] is None
+        assert result["1y"] is None
+
+    def test_bar_horizons(self):
+        """
+        Test: 1d / 5d = sesje wstecz (nie dni kalendarzowe)
+        """
+        hist = _closes("2026-10-01", "2026-10-16")
+        closes = hist['Close'].to_numpy()
+
+        result = returns_by_symbol({"AAPL": hist}, ["1d", "5d"])["AAPL"]
+
+        assert result["1d"] == pytest.approx((closes[-1] / closes[-2] - 1) * 100)
+        assert result["5d"] == pytest.approx((closes[-1] / closes[-6] - 1) * 100)
+
+    def test_ytd_from_previous_year_close(self):
+        """
+        Test: YTD = od ostatniej sesji poprzedniego roku (2025-12-31)
+        """
+        hist = _closes("2025-12-01", "2026-03-13")
+        closes = hist['Close']
+
+        result = returns_by_symbol({"AAPL": hist}, ["ytd"])["AAPL"]
+
+        assert result["ytd"] == pytest.approx((closes["2026-03-13"] / closes["2025-12-31"] - 1) * 100)
+
+        # Historia od nowego roku = brak zamkniecia poprzedniego roku
+        late = returns_by_symbol({"IPO": _closes("2026-01-05", "2026-03-13")}, ["ytd"])["IPO"]
+        assert late["ytd"] is None
+
+    def test_halted_symbol_uses_own_last_bar(self):
+        """
+        Test: Symbol bez notowan ostatnich dni (halt) w macierzy z innymi
+
+        Weryfikuje: koniec horyzontu = ostatni prawdziwy bar symbolu,
+        dziury w srodku wypelniane ostatnim zamknieciem (ffill)
+        """
+        active = _closes("2026-09-01", "2026-10-16")
+        halted = _closes("2026-09-01", "2026-10-09")
+        # Dziura w srodku historii (brak sesji 2026-10-02)
+        halted = halted.drop(pd.Timestamp("2026-10-02"))
+
+        result = returns_by_symbol({"ACT": active, "HALT": halted}, ["7d"])
+
+        closes = halted['Close']
+        # 2026-10-09 - 7 dni = 2026-10-02 (brak baru) -> ffill z 2026-10-01
+        assert result["HALT"]["7d"] == pytest.approx((closes["2026-10-09"] / closes["2026-10-01"] - 1) * 100)
+        assert result["ACT"]["7d"] == pytest.approx(
+            (active['Close']["2026-10-16"] / active['Close']["2026-10-09"] - 1) * 100
+        )
+
+    def test_matrix_matches_per_symbol_computation(self):
+        """
+        Test: Jeden przebieg dla wielu symboli = te same wyniki co per symbol
+        """
+        rng = np.random.default_rng(0)
+        histories = {}
+        for i in range(20):
+            hist = _closes("2025-06-02", "2026-10-16")
+            hist['Close'] = 50 + rng.random(len(hist)).cumsum()
+            # Rozne poczatki notowan
+            histories[f"S{i}"] = hist.iloc[i * 15:]
+
+        matrix = ClosesMatrix.from_histories(histories)
+        batch = compute_returns(matrix, ["5d", "90d", "1y"])
+
+        for symbol, hist in histories.items():
+            single = returns_by_symbol({symbol: hist}, ["5d", "90d", "1y"])[symbol]
+            column = matrix.column(symbol)
+            for horizon, value in single.items():
+                if value is None:
+                    assert math.isnan(batch[horizon][column])
+                else:
+                    assert batch[horizon][column] == pytest.approx(value)
+
+    def test_empty_and_unknown(self):
+        """
+        Test: Pusta historia pomijana, nieznany horyzont = ValueError
+        """
+        assert returns_by_symbol({"EMPTY": pd.DataFrame()}, ["7d"]) == {}
+
+        with pytest.raises(ValueError):
+            validate_horizons(["7d", "2w"])
+
+    def test_lookback_period(self):
+        """
+        Test: Okres historii pokrywa najdluzszy horyzont (z zapasem na weekend)
+        """
+        today = date(2026, 10, 17)
+
+        assert PriceHistoryService.period_covering(lookback_days(["7d", "30d"], today)) == "3mo"
+        assert PriceHistoryService.period_covering(lookback_days(["7d", "30d", "ytd"], today)) == "1y"
+        assert PriceHistoryService.period_covering(lookback_days(["1y"], today)) == "2y"
+        assert PriceHistoryService.period_covering(100_000) == "max"
@@ -0,0 +1,226 @@
+"""
+Unit tests dla partycji i retencji scan_results (app.services.scan_partitions)
+
+Testujemy:
+1. Nazwy partycji i arytmetyka miesiecy
+2. Retencja na bazie bez partycji = DELETE po scan_date + usuniecie starych runow
+3. Run przez granice retencji (wyniki w obu miesiacach) = run i nowsze wyniki zostaja
+4. Retencja wylaczona (0 miesiecy) = nic nie usuwa
+5. ensure() na bazie bez partycji = brak DDL, kolejne wywolania bez zapytan
+6. DDL modelu dla PostgreSQL: PARTITION BY RANGE (scan_date), PK (id, scan_date)
+7. Migracja starej tabeli (convert_legacy) + verify_schema() na PostgreSQL
+
+Baza: SQLite w pamieci (DROP partycji testowany recznie na PostgreSQL).
+Testy migracji: PostgreSQL z konfiguracji (DB_*) w tymczasowym schemacie, bez bazy = skip.
+"""
+import uuid
+import pytest
+from datetime import date, datetime, timezone
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+from app.config import settings
+from app.models.scan import ScanResult as ScanResultModel
+from app.models.scan import ScanRun
+from app.services.scan_partitions import ScanPartitionManager, add_months, month_bound
+
+NOW = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def pg_factory():
+    """
+    Sesje PostgreSQL w tymczasowym schemacie (search_path) - prawdziwe DDL modelu ScanResult.
+
+    Brak PostgreSQL = skip.
+    """
+    schema = f"test_partitions_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(settings.database_url)
+    try:
+        with admin.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+    except OperationalError as e:
+        admin.dispose()
+        pytest.skip(f"PostgreSQL niedostepny: {e}")
+
+    engine = create_engine(settings.database_url, connect_args={"options": f"-csearch_path={schema}"})
+    yield sessionmaker(bind=engine)
+
+    engine.dispose()
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+    admin.dispose()
+
+
+def _seed(factory, days):
+    """Run + jeden wynik na kazda date z listy"""
+    for day in days:
+        _seed_run(factory, day, [day])
+
+
+def _seed_run(factory, started_at, scan_dates):
+    """Run rozpoczety started_at z wynikiem na kazda date z scan_dates, zwraca run_id"""
+    db = factory()
+    run = ScanRun(source="scan", status="completed", params={}, started_at=started_at, total_symbols=1)
+    db.add(run)
+    db.flush()
+    db.execute(insert(ScanResultModel.__table__), [{
+        "run_id": run.id, "symbol": "AAPL", "scan_date": day, "criteria_met": {},
+        "price": 1.0, "volume": 1, "meets_criteria": False,
+    } for day in scan_dates])
+    run_id = run.id
+    db.commit()
+    db.close()
+    return run_id
+
+
+@pytest.mark.unit
+class TestScanPartitions:
+    """Unit tests dla ScanPartitionManager"""
+
+    def test_month_arithmetic_and_names(self):
+        """
+        Test: Przesuniecie miesiecy przez granice roku, nazwa i granica partycji w UTC
+        """
+        assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+        assert add_months(date(2026, 2, 1), -3) == date(2025, 11, 1)
+        assert ScanPartitionManager.partition_name(date(2026, 3, 1)) == "scan_results_y2026m03"
+        assert month_bound(date(2026, 3, 1)) == "2026-03-01 00:00:00+00"
+
+    def test_retention_deletes_without_partitions(self, scan_db):
+        """
+        Test: Retencja 6 miesiecy 17.10 = granica 1.04 - starsze wyniki i runy usuniete
+        """
+        _seed(scan_db, [
+            datetime(2026, 3, 31, 23, 0, tzinfo=timezone.utc),
+            datetime(2026, 4, 1, 1, 0, tzinfo=timezone.utc),
+            datetime(2026, 10, 16, 9, 0, tzinfo=timezone.utc),
+        ])
+        manager = ScanPartitionManager(months_ahead=2, retention_months=6, session_factory=scan_db)
+
+        report = manager.apply_retention(now=NOW)
+
+        assert report.cutoff == datetime(2026, 4, 1, tzinfo=timezone.utc)
+        assert report.dropped_partitions == []
+        assert report.deleted_rows == 1
+        assert report.deleted_runs == 1
+
+        db = scan_db()
+        assert db.query(ScanResultModel).count() == 2
+        assert db.query(ScanRun).count() == 2
+        db.close()
+
+    def test_retention_keeps_run_spanning_cutoff(self, scan_db):
+        """
+        Test: Run z 31.03 23:50 z wynikami przed i po granicy 1.04 - run zostaje
+        (DELETE runu skasowalby kaskadowo wynik z zachowanego kwietnia), stary wynik usuniety
+        """
+        started = datetime(2026, 3, 31, 23, 50, tzinfo=timezone.utc)
+        spanning = _seed_run(scan_db, started, [started, datetime(2026, 4, 1, 0, 5, tzinfo=timezone.utc)])
+        manager = ScanPartitionManager(months_ahead=2, retention_months=6, session_factory=scan_db)
+
+        report = manager.apply_retention(now=NOW)
+
+        assert report.deleted_rows == 1
+        assert report.deleted_runs == 0
+        db = scan_db()
+        assert db.get(ScanRun, spanning) is not None
+        assert [row.run_id for row in db.query(ScanResultModel).all()] == [spanning]
+        db.close()
+
+    def test_retention_disabled(self, scan_db):
+        """
+        Test: retention_months = 0 - nic nie jest usuwane
+        """
+        _seed(scan_db, [datetime(2020, 1, 1, tzinfo=timezone.utc)])
+        manager = ScanPartitionManager(months_ahead=2, retention_months=0, session_factory=scan_db)
+
+        report = manager.apply_retention(now=NOW)
+
+        assert report.cutoff is None
+        db = scan_db()
+        assert db.query(ScanResultModel).count() == 1
+        db.close()
+
+    def test_ensure_is_noop_without_partitions(self):
+        """
+        Test: Baza inna niz PostgreSQL - brak DDL, drugi ensure() nie otwiera sesji
+        """
+        factory = MagicMock()
+        factory.return_value.get_bind.return_value.dialect.name = "sqlite"
+        manager = ScanPartitionManager(months_ahead=2, retention_months=6, session_factory=factory)
+
+        manager.ensure(now=NOW)
+        manager.ensure(now=NOW)
+
+        assert factory.call_count == 1
+        factory.return_value.execute.assert_not_called()
+
+    def test_model_ddl_is_partitioned(self):
+        """
+        Test: DDL modelu ScanResult dla PostgreSQL (nie kopia z scan_db, gdzie PK = id)
+
+        Weryfikuje:
+        - PARTITION BY RANGE (scan_date)
+        - PK (id, scan_date) z id z sekwencji (SERIAL)
+        """
+        ddl = str(CreateTable(ScanResultModel.__table__).compile(dialect=postgresql.dialect()))
+
+        assert "id SERIAL NOT NULL" in ddl
+        assert "PRIMARY KEY (id, scan_date)" in ddl
+        assert ddl.rstrip().endswith("PARTITION BY RANGE (scan_date)")
+
+
+@pytest.mark.integration
+class TestScanPartitionsMigration:
+    """Migracja niepartycjonowanej scan_results na PostgreSQL"""
+
+    def test_convert_legacy_table(self, pg_factory):
+        """
+        Test: Stara scan_results (PK = id, bez run_id) -> tabela partycjonowana z modelu
+
+        Weryfikuje:
+        - verify_schema() odrzuca stara tabele, po migracji przechodzi
+        - Wiersze w partycjach swoich miesiecy, id zachowane, partycje do +months_ahead
+        - Nowy wiersz dostaje id po najwiekszym skopiowanym (setval sekwencji)
+        - Druga migracja nic nie robi
+        """
+        db = pg_factory()
+        ScanRun.__table__.create(bind=db.connection())
+        db.execute(text(
+            "CREATE TABLE scan_results (id SERIAL PRIMARY KEY, symbol VARCHAR NOT NULL, "
+            "scan_date TIMESTAMPTZ DEFAULT now(), criteria_met JSON NOT NULL, price FLOAT NOT NULL, "
+            "volume INTEGER NOT NULL, meets_criteria BOOLEAN NOT NULL)"
+        ))
+        db.execute(text(
+            "INSERT INTO scan_results (symbol, scan_date, criteria_met, price, volume, meets_criteria) "
+            "VALUES ('AAPL', '2026-08-03', '{}', 1, 1, false), ('MSFT', '2026-10-02', '{}', 2, 2, true)"
+        ))
+        db.commit()
+        db.close()
+        manager = ScanPartitionManager(months_ahead=2, retention_months=6, session_factory=pg_factory)
+
+        with pytest.raises(RuntimeError, match="migrate_scan_results.py"):
+            manager.verify_schema()
+
+        assert manager.convert_legacy(now=NOW) == 2
+        assert manager.convert_legacy(now=NOW) is None
+        manager.verify_schema()
+
+        db = pg_factory()
+        rows = db.execute(text(
+            "SELECT tableoid::regclass::text, id, symbol, run_id FROM scan_results ORDER BY id"
+        )).all()
+        new_id = db.execute(insert(ScanResultModel.__table__).values(
+            symbol="NVDA", scan_date=NOW, criteria_met={}, price=3.0, volume=3, meets_criteria=False
+        ).returning(ScanResultModel.__table__.c.id)).scalar()
+        partitions = sorted(manager._partitions(db))
+        db.commit()
+        db.close()
+
+        assert rows == [("scan_results_y2026m08", 1, "AAPL", None), ("scan_results_y2026m10", 2, "MSFT", None)]
+        assert new_id == 3
+        assert partitions == [f"scan_results_y2026m{month:02d}" for month in range(8, 13)]
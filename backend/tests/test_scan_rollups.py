@@ -0,0 +1,122 @@
+"""
+Unit tests dla dziennych rollupow scanu (app.services.scan_rollups)
+
+Testujemy:
+1. Rollup dnia: wartosci z ostatniego scanu, liczba scanow i matches, granice dnia UTC
+2. rollup_pending(): nadrabia dni od ostatniego rollupu, ponowne liczenie nadpisuje
+3. GET /api/scan/symbols/{symbol}/daily - zakres dat
+
+Baza: SQLite w pamieci zamiast PostgreSQL.
+"""
+import pytest
+from datetime import date, datetime, timezone
+from sqlalchemy import insert
+from app.database import get_db
+from app.models.scan import ScanDailyRollup
+from app.models.scan import ScanResult as ScanResultModel
+from app.services.scan_rollups import ScanRollupService
+
+
+def _add(factory, symbol, scan_date, price, meets_criteria):
+    db = factory()
+    db.execute(insert(ScanResultModel.__table__), [{
+        "symbol": symbol, "scan_date": scan_date, "criteria_met": {}, "price": price,
+        "volume": 1_000_000, "roe": 20.0, "meets_criteria": meets_criteria,
+    }])
+    db.commit()
+    db.close()
+
+
+def _at(day, hour):
+    return datetime(2026, 10, day, hour, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.unit
+class TestScanRollups:
+    """Unit tests dla ScanRollupService"""
+
+    def test_rollup_day_last_values_and_counts(self, scan_db):
+        """
+        Test: 3 scany AAPL 16.10 (2 matches) + 1 MSFT; scan 17.10 00:30 UTC nie wchodzi
+        """
+        _add(scan_db, "AAPL", _at(16, 9), 100.0, True)
+        _add(scan_db, "AAPL", _at(16, 23), 103.0, False)
+        _add(scan_db, "AAPL", _at(16, 14), 101.0, True)
+        _add(scan_db, "MSFT", _at(16, 10), 400.0, False)
+        _add(scan_db, "AAPL", datetime(2026, 10, 17, 0, 30, tzinfo=timezone.utc), 200.0, True)
+
+        db = scan_db()
+        assert ScanRollupService.rollup_day(db, date(2026, 10, 16)) == 2
+        db.commit()
+
+        aapl = db.get(ScanDailyRollup, ("AAPL", date(2026, 10, 16)))
+        assert (aapl.scans, aapl.matches) == (3, 2)
+        assert aapl.last_price == 103.0
+        assert aapl.last_meets_criteria is False
+        assert aapl.last_roe == 20.0
+        assert db.get(ScanDailyRollup, ("MSFT", date(2026, 10, 16))).matches == 0
+        db.close()
+
+    def test_rollup_pending_catches_up(self, scan_db):
+        """
+        Test: Pierwsze uruchomienie od najstarszego wyniku, kolejne od ostatniego dnia (nadpisuje)
+        """
+        _add(scan_db, "AAPL", _at(14, 9), 100.0, True)
+        _add(scan_db, "AAPL", _at(16, 9), 101.0, True)
+
+        db = scan_db()
+        days = ScanRollupService.rollup_pending(db, today=date(2026, 10, 16))
+        assert days == [date(2026, 10, 14), date(2026, 10, 15), date(2026, 10, 16)]
+        assert db.query(ScanDailyRollup).count() == 2
+
+        # Kolejny scan tego samego dnia - ostatni dzien liczony ponownie
+        _add(scan_db, "AAPL", _at(16, 15), 105.0, False)
+        days = ScanRollupService.rollup_pending(db, today=date(2026, 10, 17))
+        assert days == [date(2026, 10, 16), date(2026, 10, 17)]
+
+        rollup = db.get(ScanDailyRollup, ("AAPL", date(2026, 10, 16)))
+        db.refresh(rollup)
+        assert (rollup.scans, rollup.matches, rollup.last_price) == (2, 1, 105.0)
+        assert db.query(ScanDailyRollup).count() == 2
+        db.close()
+
+    def test_rollup_pending_without_results(self, scan_db):
+        """
+        Test: Pusta tabela wynikow - nic do przeliczenia
+        """
+        assert ScanRollupService.rollup_pending(scan_db(), today=date(2026, 10, 17)) == []
+
+
+@pytest.mark.integration
+class TestSymbolDailyEndpoint:
+    """Integration tests dla /api/scan/symbols/{symbol}/daily"""
+
+    def test_daily_history_range(self, scan_db, fastapi_test_client):
+        """
+        Test: Punkty dzienne rosnaco, filtr start / end, symbol bez rozrozniania wielkosci liter
+        """
+        for day in (14, 15, 16):
+            _add(scan_db, "AAPL", _at(day, 12), 100.0 + day, day != 15)
+        db = scan_db()
+        ScanRollupService.rollup_pending(db, today=date(2026, 10, 16))
+        db.close()
+
+        def override_get_db():
+            session = scan_db()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app = fastapi_test_client.app
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            response = fastapi_test_client.get('/api/scan/symbols/aapl/daily', params={'start': '2026-10-15'})
+        finally:
+            app.dependency_overrides.pop(get_db)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [point['day'] for point in data] == ['2026-10-15', '2026-10-16']
+        assert data[0]['matches'] == 0
+        assert data[1]['last_price'] == 116.0
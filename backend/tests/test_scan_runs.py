@@ -0,0 +1,202 @@
+"""
+Unit tests dla runow scanu (app.services.scan_runs) i endpointow historii
+
+Testujemy:
+1. scan_stocks(save_to_db=True) zapisuje run (parametry, liczniki, API calls) + wyniki z run_id
+2. Stream rozlaczony przez klienta = run cancelled
+3. GET /api/scan/runs i /api/scan/runs/{run_id}/results - stronicowanie kursorem
+4. Blad bazy przy starcie runu = wyniki bez run_id (scan dziala dalej)
+
+Baza: SQLite w pamieci zamiast PostgreSQL.
+"""
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from app.database import get_db
+from app.models.scan import ScanResult as ScanResultModel
+from app.models.scan import ScanRun
+from app.schemas.scan import StockResult
+from app.services.scan_runs import RUN_CANCELLED, RUN_COMPLETED, RUN_SOURCE_SCAN, RUN_SOURCE_STREAM, scan_run_store
+from app.services.scan_writer import scan_result_writer
+from app.services.scanner import StockScanner
+
+
+@pytest.fixture
+def session_factory(scan_db):
+    """scan_runs + scan_results na SQLite w pamieci (zapis runow, wynikow i endpointy)"""
+    return scan_db
+
+
+@pytest.fixture
+def mock_scan_sources(mock_finnhub_fundamentals, mock_finnhub_quote, mock_price_history):
+    """Historia cen + Finnhub bez sieci (3 API calls na scan)"""
+    with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+         patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+        mock_fetch.side_effect = mock_price_history
+        mock_client = MagicMock()
+        mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+        mock_client.get_quote.return_value = mock_finnhub_quote
+        mock_client.api_calls = 3
+        mock_client_class.return_value = mock_client
+        yield mock_client
+
+
+def _seed_run(factory, matches_pattern):
+    """Run z wynikami S0..Sn (meets_criteria wg listy), zwraca run_id"""
+    run_id = scan_run_store.start(RUN_SOURCE_SCAN, {"symbols": []}, total_symbols=len(matches_pattern))
+    scan_result_writer.write([
+        StockResult(symbol=f"S{i}", price=10.0, volume=1_000_000, meets_criteria=match)
+        for i, match in enumerate(matches_pattern)
+    ], run_id=run_id)
+    scan_run_store.finish(run_id, total_scanned=len(matches_pattern), matches=sum(matches_pattern), api_calls=0)
+    return run_id
+
+
+@pytest.mark.unit
+class TestScanRuns:
+    """Unit tests dla zapisu runow scanu"""
+
+    def test_scan_stocks_records_run(self, session_factory, mock_scan_sources):
+        """
+        Test: Scan z zapisem = jeden run (parametry, liczniki, API calls) i wyniki z jego run_id
+        """
+        StockScanner.scan_stocks(
+            symbols=["AAPL", "MSFT"], min_roe=10.0, dataset_id="abc123", lazy=True
+        )
+
+        db = session_factory()
+        run = db.query(ScanRun).one()
+        rows = db.query(ScanResultModel).all()
+        db.close()
+
+        assert run.scan_id == "abc123"
+        assert run.source == RUN_SOURCE_SCAN
+        assert run.status == RUN_COMPLETED
+        assert run.params["symbols"] == ["AAPL", "MSFT"]
+        assert run.params["thresholds"]["min_roe"] == 10.0
+        assert run.params["lazy"] is True
+        assert run.total_symbols == 2
+        assert run.total_scanned == 2
+        assert run.matches == sum(row.meets_criteria for row in rows)
+        assert run.api_calls == 3
+        assert run.duration_seconds >= 0
+        assert {row.run_id for row in rows} == {run.id}
+        assert len(rows) == 2
+
+    def test_stream_disconnect_cancels_run(self, session_factory, mock_scan_sources):
+        """
+        Test: Klient przerywa stream po pierwszym wyniku - run zamkniety jako cancelled
+        """
+        async def first_result():
+            stream = StockScanner.scan_stocks_stream(symbols=["AAPL", "MSFT", "NVDA"], max_workers=1)
+            result = await stream.__anext__()
+            await stream.aclose()
+            return result
+
+        asyncio.run(first_result())
+
+        db = session_factory()
+        run = db.query(ScanRun).one()
+        db.close()
+
+        assert run.source == RUN_SOURCE_STREAM
+        assert run.status == RUN_CANCELLED
+        assert run.total_symbols == 3
+        assert 1 <= run.total_scanned < 3
+        assert run.scan_id is not None
+
+    def test_database_error_saves_results_without_run(self, session_factory, monkeypatch):
+        """
+        Test: Baza odrzuca run - start() zwraca None, finish(None) nic nie robi, wyniki bez run_id
+        """
+        broken = MagicMock()
+        broken.return_value.commit.side_effect = RuntimeError("connection refused")
+        monkeypatch.setattr(scan_run_store, "session_factory", broken)
+
+        run_id = scan_run_store.start(RUN_SOURCE_SCAN, {}, total_symbols=1)
+        assert run_id is None
+        scan_run_store.finish(run_id, total_scanned=1, matches=0, api_calls=0)
+
+        result = StockResult(symbol="AAPL", price=1.0, volume=1, meets_criteria=False)
+        assert scan_result_writer.write([result], run_id=run_id) == 1
+        db = session_factory()
+        assert db.query(ScanResultModel).one().run_id is None
+        db.close()
+
+
+@pytest.mark.integration
+class TestScanRunsEndpoints:
+    """Integration tests dla /api/scan/runs"""
+
+    @pytest.fixture
+    def client(self, session_factory, fastapi_test_client):
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app = fastapi_test_client.app
+        app.dependency_overrides[get_db] = override_get_db
+        yield fastapi_test_client
+        app.dependency_overrides.pop(get_db)
+
+    def test_list_runs_newest_first_with_cursor(self, session_factory, client):
+        """
+        Test: Lista runow od najnowszego, kolejna strona przez before_id, szczegoly z params
+        """
+        ids = [_seed_run(session_factory, [True]) for _ in range(3)]
+
+        first = client.get('/api/scan/runs', params={'limit': 2}).json()
+        assert [run['id'] for run in first['runs']] == ids[::-1][:2]
+        assert 'params' not in first['runs'][0]
+        assert first['runs'][0]['status'] == RUN_COMPLETED
+
+        second = client.get('/api/scan/runs', params={'limit': 2, 'before_id': first['next_before_id']}).json()
+        assert [run['id'] for run in second['runs']] == [ids[0]]
+        assert second['next_before_id'] is None
+
+        detail = client.get(f'/api/scan/runs/{ids[0]}').json()
+        assert detail['params'] == {"symbols": []}
+        assert client.get('/api/scan/runs/999').status_code == 404
+
+    def test_run_results_pages(self, session_factory, client):
+        """
+        Test: Wyniki runu stronami po id, only_matches filtruje, wyniki innego runu nie wchodza
+        """
+        run_id = _seed_run(session_factory, [True, False, True, True, False])
+        _seed_run(session_factory, [True, True])
+
+        url = f'/api/scan/runs/{run_id}/results'
+        first = client.get(url, params={'limit': 2, 'only_matches': True}).json()
+        assert [r['symbol'] for r in first['results']] == ["S0", "S2"]
+
+        second = client.get(url, params={'limit': 2, 'only_matches': True, 'after_id': first['next_after_id']}).json()
+        assert [r['symbol'] for r in second['results']] == ["S3"]
+        assert second['next_after_id'] is None
+
+        everything = client.get(url).json()['results']
+        assert len(everything) == 5
+        assert everything[1]['meets_criteria'] is False
+
+        assert client.get('/api/scan/runs/999/results').status_code == 404
+
+    def test_stream_summary_links_run(self, session_factory, client, mock_scan_sources):
+        """
+        Test: Podsumowanie streamu zawiera scan_id i run_id zapisanego runu
+        """
+        import json
+
+        response = client.post('/api/scan/stream', json={'symbols': ['AAPL', 'MSFT'], 'min_volume': 0})
+        summary = json.loads(response.text.splitlines()[-1])
+
+        db = session_factory()
+        run = db.query(ScanRun).one()
+        db.close()
+
+        assert summary['type'] == 'summary'
+        assert summary['run_id'] == run.id
+        assert summary['scan_id'] == run.scan_id
+        assert client.get(f"/api/scan/runs/{summary['run_id']}").json()['status'] == RUN_COMPLETED
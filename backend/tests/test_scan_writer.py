@@ -0,0 +1,105 @@
+"""
+Unit tests dla zapisu wynikow scanu (ScanResultWriter)
+
+Testujemy:
+1. Zapis w paczkach (batch_size wierszy na INSERT), wartosci kolumn i criteria_met
+2. "copy" na bazie innej niz PostgreSQL = zapis przez INSERT
+3. Blad bazy = rollback, 0 zapisanych wierszy (scan dziala dalej)
+
+Baza: SQLite w pamieci zamiast PostgreSQL.
+"""
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from app.models.scan import ScanResult as ScanResultModel
+from app.schemas.scan import StockResult
+from app.services.scan_writer import SAVE_COPY, ScanResultWriter
+
+
+def _results(count):
+    return [
+        StockResult(
+            symbol=f"S{i}",
+            price=10.0 + i,
+            volume=1_000_000 + i,
+            price_change_7d=1.5,
+            roe=None if i % 2 else 20.0,
+            rsi_14=55.0,
+            golden_cross=True,
+            meets_criteria=i % 3 == 0,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def engine(scan_db):
+    """SQLite w pamieci z tabela scan_results"""
+    return scan_db.kw["bind"]
+
+
+def _count_inserts(engine):
+    """Liczba wierszy w kazdym wykonaniu INSERT (jedno wykonanie = jedna paczka)"""
+    inserts = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT"):
+            inserts.append(len(parameters) if executemany else 1)
+
+    return inserts
+
+
+@pytest.mark.unit
+class TestScanResultWriter:
+    """Unit tests dla app.services.scan_writer"""
+
+    def test_write_in_batches(self, engine):
+        """
+        Test: 25 wynikow, batch_size 10 = 3 wykonania INSERT, wszystkie wiersze zapisane
+
+        Weryfikuje: kolumny, NULL dla brakujacych metryk, criteria_met z RSI / golden cross,
+        scan_date z domyslnej wartosci bazy
+        """
+        inserts = _count_inserts(engine)
+        writer = ScanResultWriter(batch_size=10, session_factory=sessionmaker(bind=engine))
+
+        assert writer.write(_results(25)) == 25
+        assert inserts == [10, 10, 5]
+
+        db = sessionmaker(bind=engine)()
+        rows = {row.symbol: row for row in db.query(ScanResultModel).all()}
+        db.close()
+
+        assert len(rows) == 25
+        assert rows["S0"].roe == 20.0 and rows["S1"].roe is None
+        assert rows["S3"].meets_criteria is True and rows["S4"].meets_criteria is False
+        assert rows["S2"].criteria_met["rsi"] == 55.0
+        assert rows["S2"].criteria_met["golden_cross"] is True
+        assert rows["S2"].scan_date is not None
+
+    def test_copy_falls_back_to_insert(self, engine):
+        """
+        Test: Metoda "copy" na SQLite = zapis przez INSERT (COPY tylko PostgreSQL)
+        """
+        writer = ScanResultWriter(batch_size=100, method=SAVE_COPY, session_factory=sessionmaker(bind=engine))
+
+        assert writer.write(_results(5)) == 5
+        assert writer.write([]) == 0
+
+    def test_database_error_rolls_back(self):
+        """
+        Test: Blad bazy = rollback i 0 zapisanych wierszy, bez wyjatku; nieznana metoda = ValueError
+        """
+        broken = MagicMock()
+        broken.return_value.get_bind.return_value.dialect.name = "postgresql"
+        broken.return_value.execute.side_effect = RuntimeError("connection refused")
+        writer = ScanResultWriter(batch_size=10, session_factory=broken)
+
+        assert writer.write(_results(3)) == 0
+        broken.return_value.rollback.assert_called_once()
+        broken.return_value.commit.assert_not_called()
+
+        with pytest.raises(ValueError):
+            ScanResultWriter(batch_size=10, method="orm")
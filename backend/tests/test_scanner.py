@@ -6,6 +6,7 @@ Testujemy:
 2. Filtrowanie po volume
 3. Obliczenia fundamentals (ROE, ROCE, etc.)
 4. Obsługę błędów (invalid symbols)
+5. Ostatni bar bez wolumenu (NaN) - wolumen z poprzedniego baru, bez kwarantanny
 """
 import pytest
 from unittest.mock import patch, MagicMock
@@ -21,7 +22,7 @@ class TestStockScanner:
         self,
         mock_finnhub_fundamentals,
         mock_finnhub_quote,
-        mock_yfinance_ticker
+        mock_price_history
     ):
         """
         Test: scan_stocks zwraca wyniki dla poprawnych symboli
@@ -32,11 +33,11 @@ class TestStockScanner:
         - Price, volume, market_cap > 0
         - ROE i ROCE nie są None
         """
-        with patch('app.services.scanner.yf.Ticker') as mock_yf, \
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
              patch('app.services.scanner.FinnhubClient') as mock_client_class:
 
             # Setup mocks
-            mock_yf.return_value = mock_yfinance_ticker
+            mock_fetch.side_effect = mock_price_history
             mock_client = MagicMock()
             mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
             mock_client.get_quote.return_value = mock_finnhub_quote
@@ -72,15 +73,13 @@ class TestStockScanner:
         Weryfikuje:
         - Akcje z volume < min_volume są odrzucane
         """
-        with patch('app.services.scanner.yf.Ticker') as mock_yf, \
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
              patch('app.services.scanner.FinnhubClient') as mock_client_class:
 
             # Mock dla akcji z NISKIM volume (999,000)
-            mock_ticker = MagicMock()
             mock_history = MagicMock()
             mock_history.tail.return_value = MagicMock(Volume=MagicMock(mean=lambda: 999_000))
-            mock_ticker.history.return_value = mock_history
-            mock_yf.return_value = mock_ticker
+            mock_fetch.return_value = {"LOWVOL": mock_history}
 
             mock_client = MagicMock()
             mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
@@ -106,11 +105,11 @@ class TestStockScanner:
         - Nie crashuje przy invalid symbols
         - Zwraca pustą listę lub pomija niepoprawne symbole
         """
-        with patch('app.services.scanner.yf.Ticker') as mock_yf, \
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
              patch('app.services.scanner.FinnhubClient') as mock_client_class:
 
-            # Mock dla invalid symbol - yfinance rzuca Exception
-            mock_yf.return_value.history.side_effect = Exception("Invalid symbol")
+            # Mock dla invalid symbol - batch download nie zwraca danych dla symbolu
+            mock_fetch.return_value = {}
 
             mock_client = MagicMock()
             mock_client.get_fundamentals.side_effect = Exception("Symbol not found")
@@ -132,7 +131,7 @@ class TestStockScanner:
         self,
         mock_finnhub_fundamentals,
         mock_finnhub_quote,
-        mock_yfinance_ticker
+        mock_price_history
     ):
         """
         Test: Skanowanie wielu symboli jednocześnie
@@ -141,10 +140,10 @@ class TestStockScanner:
         - Każdy symbol zwraca wynik
         - Kolejność symboli jest zachowana
         """
-        with patch('app.services.scanner.yf.Ticker') as mock_yf, \
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
              patch('app.services.scanner.FinnhubClient') as mock_client_class:
 
-            mock_yf.return_value = mock_yfinance_ticker
+            mock_fetch.side_effect = mock_price_history
             mock_client = MagicMock()
             mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
             mock_client.get_quote.return_value = mock_finnhub_quote
@@ -172,7 +171,7 @@ class TestStockScanner:
         self,
         mock_finnhub_fundamentals,
         mock_finnhub_quote,
-        mock_yfinance_ticker
+        mock_price_history
     ):
         """
         Test: Sprawdzenie poprawności obliczeń fundamentals
@@ -182,10 +181,10 @@ class TestStockScanner:
         - Market Cap jest w USD (nie milionach)
         - Debt/Equity ratio jest poprawny
         """
-        with patch('app.services.scanner.yf.Ticker') as mock_yf, \
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
              patch('app.services.scanner.FinnhubClient') as mock_client_class:
 
-            mock_yf.return_value = mock_yfinance_ticker
+            mock_fetch.side_effect = mock_price_history
             mock_client = MagicMock()
             mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
             mock_client.get_quote.return_value = mock_finnhub_quote
@@ -218,7 +217,7 @@ class TestStockScanner:
         self,
         mock_finnhub_fundamentals,
         mock_finnhub_quote,
-        mock_yfinance_ticker
+        mock_price_history
     ):
         """
         Test: Logika meets_criteria (czy akcja spełnia kryteria multibagger)
@@ -227,10 +226,10 @@ class TestStockScanner:
         - meets_criteria = True jeśli wszystkie kryteria spełnione
         - meets_criteria = False jeśli któreś kryterium nie spełnione
         """
-        with patch('app.services.scanner.yf.Ticker') as mock_yf, \
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
              patch('app.services.scanner.FinnhubClient') as mock_client_class:
 
-            mock_yf.return_value = mock_yfinance_ticker
+            mock_fetch.side_effect = mock_price_history
             mock_client = MagicMock()
             mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
             mock_client.get_quote.return_value = mock_finnhub_quote
@@ -268,3 +267,348 @@ class TestStockScanner:
             if len(results_lenient) > 0:
                 assert results_lenient[0].meets_criteria == True, \
                     "meets_criteria powinno być True jeśli wszystkie kryteria spełnione"
+
+
+    def test_scan_stocks_concurrent_preserves_input_order(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_price_history
+    ):
+        """
+        Test: Tryb wspolbiezny (max_workers > 1) zwraca wyniki w kolejnosci symbols
+
+        Weryfikuje:
+        - Kolejnosc wynikow = kolejnosc wejsciowa mimo losowych opoznien I/O
+        - Wyniki identyczne jak w trybie sekwencyjnym
+        """
+        import random
+        import time as time_module
+
+        def slow_quote(symbol):
+            # Symuluj rozne czasy odpowiedzi API
+            time_module.sleep(random.uniform(0, 0.01))
+            return mock_finnhub_quote
+
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.side_effect = slow_quote
+            mock_client_class.return_value = mock_client
+
+            symbols = [f"SYM{i}" for i in range(20)]
+
+            concurrent = StockScanner.scan_stocks(
+                symbols=symbols, min_volume=0, save_to_db=False, max_workers=8
+            )
+            sequential = StockScanner.scan_stocks(
+                symbols=symbols, min_volume=0, save_to_db=False, max_workers=1
+            )
+
+            assert [r.symbol for r in concurrent] == symbols
+            assert concurrent == sequential
+
+
+    async def test_scan_stocks_async_matches_sync(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_price_history
+    ):
+        """
+        Test: scan_stocks_async() zwraca te same wyniki co scan_stocks()
+
+        Weryfikuje:
+        - Wersja async nie zmienia logiki kryteriow
+        - Kolejnosc wynikow = kolejnosc symbols
+        """
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client_class.return_value = mock_client
+
+            symbols = ["AAPL", "MSFT", "NVDA"]
+
+            async_results = await StockScanner.scan_stocks_async(
+                symbols=symbols, min_volume=0, save_to_db=False
+            )
+            sync_results = StockScanner.scan_stocks(
+                symbols=symbols, min_volume=0, save_to_db=False
+            )
+
+            assert [r.symbol for r in async_results] == symbols
+            assert async_results == sync_results
+
+
+    async def test_scan_stocks_async_runs_max_workers_at_once(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_price_history
+    ):
+        """
+        Test: max_workers=40 = 40 symboli naraz (wlasna pula scanu, nie domyslny
+        executor asyncio z min(32, CPU + 4) watkami)
+        """
+        import threading
+
+        barrier = threading.Barrier(40, timeout=5)
+
+        def fundamentals(symbol):
+            # Przejdzie tylko gdy wszystkie 40 symboli jest w toku jednoczesnie
+            barrier.wait()
+            return mock_finnhub_fundamentals
+
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.side_effect = fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client_class.return_value = mock_client
+
+            symbols = [f"SYM{i}" for i in range(40)]
+            results = await StockScanner.scan_stocks_async(
+                symbols=symbols, min_volume=0, save_to_db=False, max_workers=40
+            )
+
+            assert [r.symbol for r in results] == symbols
+
+
+    def test_scan_stocks_lazy_skips_finnhub_for_rejected_symbols(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_price_history
+    ):
+        """
+        Test: Tryb lazy nie wywoluje Finnhub dla symboli odrzuconych na etapie historii
+
+        Weryfikuje:
+        - Volume < min_volume => 0 calls get_quote / get_fundamentals
+        - rejected_at = "history", cena z ostatniego zamkniecia
+        - only_matches=True => brak wyniku
+        """
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client_class.return_value = mock_client
+
+            # Mock volume ~50M - wymagamy 100M => odrzucony w etapie "history"
+            results = StockScanner.scan_stocks(
+                symbols=["AAPL"], min_volume=100_000_000, save_to_db=False, lazy=True
+            )
+
+            assert len(results) == 1
+            assert results[0].meets_criteria == False
+            assert results[0].rejected_at == "history"
+            assert results[0].roe is None
+            mock_client.get_quote.assert_not_called()
+            mock_client.get_fundamentals.assert_not_called()
+
+            results_only_matches = StockScanner.scan_stocks(
+                symbols=["AAPL"], min_volume=100_000_000, save_to_db=False,
+                lazy=True, only_matches=True
+            )
+            assert results_only_matches == []
+
+
+    def test_scan_stocks_lazy_skips_quote_after_fundamentals_reject(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_price_history
+    ):
+        """
+        Test: Tryb lazy nie pobiera quote gdy fundamentals odrzucaja symbol
+
+        Weryfikuje:
+        - Mock AAPL ma market cap 3.8T > max 5B => rejected_at = "fundamentals"
+        - get_quote nie jest wywolany, get_fundamentals 1 raz
+        """
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client_class.return_value = mock_client
+
+            results = StockScanner.scan_stocks(
+                symbols=["AAPL"], min_volume=0, save_to_db=False, lazy=True
+            )
+
+            assert results[0].rejected_at == "fundamentals"
+            assert results[0].roe == 154.92
+            mock_client.get_fundamentals.assert_called_once_with("AAPL")
+            mock_client.get_quote.assert_not_called()
+
+
+    def test_scan_stocks_marks_stale_quote(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_price_history
+    ):
+        """
+        Test: Quote z cache po TTL (stale-while-revalidate) => StockResult.stale = True
+        """
+        from app.cache import STALE_KEY
+
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = {**mock_finnhub_quote, STALE_KEY: 1200.0}
+            mock_client_class.return_value = mock_client
+
+            results = StockScanner.scan_stocks(symbols=["AAPL"], save_to_db=False)
+
+            assert results[0].stale is True
+            assert results[0].price == round(mock_finnhub_quote["c"], 2)
+
+
+    def test_scan_stocks_return_horizons(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_price_history
+    ):
+        """
+        Test: return_horizons => StockResult.returns, historia pobierana na najdluzszy horyzont
+
+        Weryfikuje: 30-dniowa historia z mocka nie wystarcza na 1y (None, nie pierwszy bar)
+        """
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client_class.return_value = mock_client
+
+            results = StockScanner.scan_stocks(
+                symbols=["AAPL"], save_to_db=False, return_horizons=["1d", "1y"]
+            )
+
+            assert mock_fetch.call_args.kwargs["period"] == "2y"
+            assert set(results[0].returns) == {"1d", "1y"}
+            assert results[0].returns["1d"] == pytest.approx(0.08, abs=0.01)
+            assert results[0].returns["1y"] is None
+            assert results[0].price_change_7d is not None
+
+            # Bez return_horizons - pole returns puste
+            assert StockScanner.scan_stocks(symbols=["AAPL"], save_to_db=False)[0].returns is None
+
+    def test_scan_stocks_default_skips_indicators(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_price_history
+    ):
+        """
+        Test: Scan bez kryteriow technicznych pobiera krotki okres (7d/30d) i nie liczy wskaznikow
+        """
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class, \
+             patch('app.services.scanner.indicators_by_symbol') as mock_indicators:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client_class.return_value = mock_client
+
+            results = StockScanner.scan_stocks(symbols=["AAPL", "MSFT"], save_to_db=False)
+
+            assert mock_fetch.call_args.kwargs["period"] == "3mo"
+            mock_indicators.assert_not_called()
+            assert results[0].price_change_7d is not None
+            assert results[0].rsi_14 is None
+
+    def test_scan_stocks_indicator_criteria_lazy(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_price_history
+    ):
+        """
+        Test: Kryterium techniczne odrzuca symbol na etapie history (lazy = 0 Finnhub calls)
+
+        Weryfikuje: 30-dniowa historia z mocka nie wystarcza na SMA 200 (None),
+        RSI rosnacego trendu = 100
+        """
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class:
+
+            mock_fetch.side_effect = mock_price_history
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client_class.return_value = mock_client
+
+            results = StockScanner.scan_stocks(
+                symbols=["AAPL"], save_to_db=False, lazy=True,
+                indicator_thresholds={"max_rsi": 70.0}
+            )
+
+            # Kryterium techniczne = historia na okno wskaznikow (SMA 200 / 52w)
+            assert mock_fetch.call_args.kwargs["period"] == "2y"
+            assert results[0].rsi_14 == 100.0
+            assert results[0].sma_200 is None
+            assert results[0].meets_criteria is False
+            assert results[0].rejected_at == "history"
+            mock_client.get_fundamentals.assert_not_called()
+
+            with pytest.raises(ValueError):
+                StockScanner.scan_stocks(
+                    symbols=["AAPL"], save_to_db=False, indicator_thresholds={"min_macd": 1.0}
+                )
+
+    def test_scan_stocks_trailing_nan_volume(
+        self,
+        mock_finnhub_fundamentals,
+        mock_finnhub_quote,
+        mock_yfinance_history
+    ):
+        """
+        Test: Ostatni bar z NaN w Volume (dociagniety / niepelny bar) - wolumen z ostatniego
+        baru z danymi, symbol nie jest liczony jako blad (kwarantanna)
+        """
+        history = mock_yfinance_history.copy()
+        history.iloc[-1, history.columns.get_loc("Volume")] = float("nan")
+
+        with patch('app.services.scanner.PriceHistoryService.fetch_history') as mock_fetch, \
+             patch('app.services.scanner.FinnhubClient') as mock_client_class, \
+             patch('app.services.scanner.symbol_quarantine') as mock_quarantine:
+
+            mock_fetch.return_value = {"AAPL": history}
+            mock_client = MagicMock()
+            mock_client.get_fundamentals.return_value = mock_finnhub_fundamentals
+            mock_client.get_quote.return_value = mock_finnhub_quote
+            mock_client.failed_calls = 0
+            mock_client_class.return_value = mock_client
+            mock_quarantine.filter.side_effect = lambda symbols: symbols
+
+            results = StockScanner.scan_stocks(symbols=["AAPL"], save_to_db=False)
+
+            assert len(results) == 1
+            assert results[0].volume == int(history["Volume"].iloc[-2])
+            failures, _ = mock_quarantine.update.call_args.args
+            assert failures == {}